@@ -17,6 +17,7 @@ import ppanggolin.meta
 
 SUBCOMMAND_TO_SUBPARSER = {
     "annotate": ppanggolin.annotate.subparser,
+    "add_genomes": ppanggolin.annotate.addGenomes.subparser,
     "cluster": ppanggolin.cluster.subparser,
     "graph": ppanggolin.graph.subparser,
     "partition": ppanggolin.nem.partition.subparser,
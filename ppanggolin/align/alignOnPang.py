@@ -744,10 +744,13 @@ def align(
             need_rgp=True,
             need_spots=True,
             need_modules=need_mod,
+            cpu=cpu,
             disable_bar=disable_bar,
         )
     else:
-        check_pangenome_info(pangenome, need_families=True, disable_bar=disable_bar)
+        check_pangenome_info(
+            pangenome, need_families=True, cpu=cpu, disable_bar=disable_bar
+        )
 
     with read_compressed_or_not(sequence_file) as seqFileObj:
         seq_set, is_nucleotide, single_line_fasta = get_seq_ids(seqFileObj)
@@ -1 +1,2 @@
 from .annotate import subparser, launch
+from . import addGenomes
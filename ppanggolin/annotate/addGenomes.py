@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+# default libraries
+import argparse
+import logging
+from pathlib import Path
+import tempfile
+from typing import Set, Tuple
+
+# installed libraries
+import tables
+
+# local libraries
+from ppanggolin.annotate.annotate import (
+    annotate_pangenome,
+    read_annotations,
+    get_gene_sequences_from_fastas,
+    contig_counter,
+)
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.utils import check_input_files
+from ppanggolin.formats.writeBinaries import append_genomes
+
+
+def check_add_genomes_args(args: argparse.Namespace):
+    """Check That the given arguments are usable
+
+    :param args: All arguments provide by user
+
+    :raise Exception:
+    """
+    if args.fasta is None and args.anno is None:
+        raise argparse.ArgumentError(
+            argument=None,
+            message="You must provide at least a file with the --fasta option to annotate "
+            "from sequences, or a file with the --anno option to load annotations from.",
+        )
+
+    if args.fasta is not None:
+        check_input_files(args.fasta, True)
+
+    if args.anno is not None:
+        check_input_files(args.anno, True)
+
+
+def get_pangenome_file_content(pangenome: Pangenome) -> Tuple[Set[str], Set[str], int]:
+    """
+    Get the names of the genomes, the gene identifiers and the next free contig identifier of a pangenome file
+
+    :param pangenome: Pangenome with an associated file
+
+    :return: Genome names, gene identifiers and the first contig identifier to use for new contigs
+    """
+    with tables.open_file(pangenome.file, "r") as h5f:
+        annotations = h5f.root.annotations
+        genome_names = {name.decode() for name in annotations.genomes.col("name")}
+        gene_ids = {gene_id.decode() for gene_id in annotations.genes.col("ID")}
+        gene_ids |= {rna_id.decode() for rna_id in annotations.RNAs.col("ID")}
+        next_contig_id = (
+            int(annotations.contigs.col("ID").max()) + 1
+            if annotations.contigs.nrows > 0
+            else 0
+        )
+    return genome_names, gene_ids, next_contig_id
+
+
+def check_new_genomes(
+    new_genomes: Pangenome, genome_names: Set[str], gene_ids: Set[str]
+):
+    """
+    Check that the genomes to add can be appended to the pangenome file
+
+    :param new_genomes: Pangenome with the genomes to add
+    :param genome_names: Names of the genomes already in the pangenome file
+    :param gene_ids: Identifiers of the genes and RNAs already in the pangenome file
+
+    :raises ValueError: If genomes or genes of the new genomes are already in the pangenome file
+    """
+    common_genomes = {org.name for org in new_genomes.organisms} & genome_names
+    if len(common_genomes) > 0:
+        raise ValueError(
+            f"{len(common_genomes)} genomes to add are already in the pangenome file: "
+            f"{', '.join(sorted(common_genomes)[:10])}. Genome names must be unique."
+        )
+    common_genes = {gene.ID for gene in new_genomes.genes} & gene_ids
+    common_genes |= {rna.ID for rna in new_genomes.RNAs} & gene_ids
+    if len(common_genes) > 0:
+        raise ValueError(
+            f"{len(common_genes)} gene identifiers of the genomes to add are already used in the pangenome file, "
+            f"such as {', '.join(sorted(common_genes)[:10])}."
+        )
+
+
+def add_genomes(
+    pangenome: Pangenome,
+    fasta_list: Path = None,
+    anno_list: Path = None,
+    tmpdir: Path = None,
+    cpu: int = 1,
+    disable_bar: bool = False,
+):
+    """
+    Annotates new genomes, or reads their annotations, and appends them to a pangenome file.
+    Genomes are annotated with the parameters used for the genomes already in the pangenome.
+
+    :param pangenome: Pangenome with an associated file
+    :param fasta_list: File listing the genome names and the fasta files of their genomic sequences
+    :param anno_list: File listing the genome names and the gff/gbff files of their annotations
+    :param tmpdir: Path to temporary directory
+    :param cpu: number of CPU cores to use
+    :param disable_bar: Disable the progress bar
+    """
+    if pangenome.status["genomesAnnotated"] not in ["Loaded", "inFile"]:
+        raise ValueError(
+            "The pangenome file does not have any genome annotations to append genomes to. "
+            "Use the 'annotate' command to create it."
+        )
+    genome_names, gene_ids, next_contig_id = get_pangenome_file_content(pangenome)
+    annotate_params = pangenome.parameters.get("annotate", {})
+
+    # new contigs are numbered after the contigs of the file
+    with contig_counter.get_lock():
+        contig_counter.value = next_contig_id
+
+    new_genomes = Pangenome()
+    if anno_list is not None:
+        read_annotations(
+            new_genomes,
+            anno_list,
+            cpu=cpu,
+            pseudo=annotate_params.get("use_pseudo", False),
+            translation_table=annotate_params.get("translation_table", 11),
+            known_gene_ids=gene_ids,
+            disable_bar=disable_bar,
+        )
+        if new_genomes.status["geneSequences"] == "No" and fasta_list is not None:
+            logging.getLogger("PPanGGOLiN").info(
+                f"Get sequences from FASTA file: {fasta_list}"
+            )
+            get_gene_sequences_from_fastas(
+                new_genomes, fasta_list, disable_bar=disable_bar
+            )
+        used_local_identifiers = new_genomes.parameters["annotate"][
+            "# used_local_identifiers"
+        ]
+        if used_local_identifiers != annotate_params.get(
+            "# used_local_identifiers", used_local_identifiers
+        ):
+            logging.getLogger("PPanGGOLiN").warning(
+                f"The added genomes use {'local' if used_local_identifiers else 'PPanGGOLiN generated'} "
+                f"gene identifiers while the genomes of the pangenome file do not."
+            )
+    else:
+        annotate_pangenome(
+            new_genomes,
+            fasta_list,
+            tmpdir=tmpdir,
+            cpu=cpu,
+            translation_table=annotate_params.get("translation_table", 11),
+            kingdom=annotate_params.get("kingdom", "bacteria"),
+            norna=annotate_params.get("norna", False),
+            allow_overlap=annotate_params.get("allow_overlap", False),
+            procedure=annotate_params.get("prodigal_procedure"),
+            disable_bar=disable_bar,
+        )
+    check_new_genomes(new_genomes, genome_names, gene_ids)
+
+    append_genomes(pangenome, new_genomes, disable_bar=disable_bar)
+    logging.getLogger("PPanGGOLiN").info(
+        f"{new_genomes.number_of_organisms} genomes have been added to the pangenome, "
+        f"which now has {len(genome_names) + new_genomes.number_of_organisms} genomes."
+    )
+
+
+def launch(args: argparse.Namespace):
+    """
+    Command launcher
+
+    :param args: All arguments provide by user
+    """
+    check_add_genomes_args(args)
+    pangenome = Pangenome()
+    pangenome.add_file(args.pangenome)
+    add_genomes(
+        pangenome,
+        fasta_list=args.fasta,
+        anno_list=args.anno,
+        tmpdir=args.tmpdir,
+        cpu=args.cpu,
+        disable_bar=args.disable_prog_bar,
+    )
+
+
+def subparser(sub_parser: argparse._SubParsersAction) -> argparse.ArgumentParser:
+    """
+    Subparser to launch PPanGGOLiN in Command line
+
+    :param sub_parser : sub_parser for add_genomes command
+
+    :return : parser arguments for add_genomes command
+    """
+    parser = sub_parser.add_parser(
+        "add_genomes", formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser_add_genomes(parser)
+    return parser
+
+
+def parser_add_genomes(parser: argparse.ArgumentParser):
+    """
+    Parser for specific argument of add_genomes command
+
+    :param parser: parser for add_genomes argument
+    """
+    required = parser.add_argument_group(
+        title="Required arguments",
+        description="The pangenome and one of the --fasta or --anno arguments are required :",
+    )
+    required.add_argument(
+        "-p", "--pangenome", required=False, type=Path, help="The pangenome .h5 file"
+    )
+    required.add_argument(
+        "--fasta",
+        required=False,
+        type=Path,
+        help="A tab-separated file listing the genome names, and the fasta filepath of its genomic "
+        "sequence(s) (the fastas can be compressed with gzip). One line per genome. "
+        "Genomes are annotated with the parameters used to annotate the pangenome.",
+    )
+    required.add_argument(
+        "--anno",
+        required=False,
+        type=Path,
+        help="A tab-separated file listing the genome names, and the gff/gbff filepath of its "
+        "annotations (the files can be compressed with gzip). One line per genome. "
+        "If this is provided, those annotations will be used.",
+    )
+
+    optional = parser.add_argument_group(title="Optional arguments")
+    optional.add_argument(
+        "-c",
+        "--cpu",
+        required=False,
+        default=1,
+        type=int,
+        help="Number of available cpus",
+    )
+    optional.add_argument(
+        "--tmpdir",
+        required=False,
+        type=str,
+        default=Path(tempfile.gettempdir()),
+        help="directory for storing temporary files",
+    )
+
+
+if __name__ == "__main__":
+    """To test local change and allow using debugger"""
+    from ppanggolin.utils import set_verbosity_level, add_common_arguments
+
+    main_parser = argparse.ArgumentParser(
+        description="Depicting microbial species diversity via a Partitioned PanGenome Graph Of Linked Neighbors",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    parser_add_genomes(main_parser)
+    add_common_arguments(main_parser)
+    set_verbosity_level(main_parser.parse_args())
+    launch(main_parser.parse_args())
@@ -10,12 +10,13 @@ import os
 from pathlib import Path
 import tempfile
 import time
-from typing import List, Set, Tuple, Iterable, Dict, Generator, Union
+from typing import Any, List, Set, Tuple, Iterable, Dict, Generator, Union
 import re
 from collections import defaultdict
 import warnings
 
 # installed libraries
+import numpy as np
 from tqdm import tqdm
 from tables.path import check_name_validity, NaturalNameWarning
 
@@ -36,6 +37,7 @@ from ppanggolin.utils import (
     check_input_files,
     has_non_ascii,
     replace_non_ascii,
+    ANNOTATION_CATEGORIES,
 )
 from ppanggolin.formats import write_pangenome
 from ppanggolin.metadata import Metadata
@@ -45,6 +47,14 @@ warnings.filterwarnings("ignore", category=NaturalNameWarning)
 
 ctg_counter = contig_counter
 
+# fields of the genes and RNAs sent back by the annotation workers, by type of column
+FEATURE_STRING_FIELDS = ["ID", "local_identifier", "dna"]
+FEATURE_INTEGER_FIELDS = ["start", "stop"]
+FEATURE_BOOLEAN_FIELDS = ["is_fragment"]
+GENE_STRING_FIELDS = FEATURE_STRING_FIELDS + ["protein"]
+GENE_INTEGER_FIELDS = FEATURE_INTEGER_FIELDS + ["position", "genetic_code", "_frame"]
+GENE_BOOLEAN_FIELDS = FEATURE_BOOLEAN_FIELDS + ["is_partial"]
+
 
 def check_annotate_args(args: argparse.Namespace):
     """Check That the given arguments are usable
@@ -1451,17 +1461,23 @@ def read_anno_file(
         )
 
 
-def chose_gene_identifiers(pangenome: Pangenome) -> bool:
+def chose_gene_identifiers(
+    pangenome: Pangenome, known_gene_ids: Set[str] = None
+) -> bool:
     """
     Parses the pangenome genes to decide whether to use local_identifiers or ppanggolin generated gene identifiers.
     If the local identifiers are unique within the pangenome they are picked, otherwise ppanggolin ones are used.
 
     :param pangenome: input pangenome
+    :param known_gene_ids: Identifiers of genes already in the pangenome file, that local identifiers must not reuse
 
     :return: Boolean stating True if local identifiers are used, and False otherwise
     """
 
-    if local_identifiers_are_unique(pangenome.genes):
+    if local_identifiers_are_unique(pangenome.genes) and (
+        known_gene_ids is None
+        or all(gene.local_identifier not in known_gene_ids for gene in pangenome.genes)
+    ):
 
         for gene in pangenome.genes:
             gene.ID = (
@@ -1471,6 +1487,7 @@ def chose_gene_identifiers(pangenome: Pangenome) -> bool:
                 ""  # this is now useless, setting it to default value
             )
         pangenome._mk_gene_getter()  # re-build the gene getter
+        pangenome.reset_indexes()
         return True
 
     else:
@@ -1497,12 +1514,220 @@ def local_identifiers_are_unique(genes: Iterable[Gene]) -> bool:
     return True
 
 
+def pack_features(
+    features: List[Union[Gene, RNA]],
+    string_fields: List[str],
+    integer_fields: List[str],
+    boolean_fields: List[str],
+) -> Dict[str, Any]:
+    """
+    Store the fields of genes or RNAs as columns
+
+    :param features: Genes or RNAs
+    :param string_fields: Fields with free strings, kept as lists
+    :param integer_fields: Fields with integers or None, stored as arrays with -1 for None
+    :param boolean_fields: Fields with booleans, stored as arrays
+
+    :return: Columns of the features
+    """
+    columns = {
+        field: [getattr(feature, field) for feature in features]
+        for field in string_fields
+    }
+    for field in integer_fields:
+        columns[field] = np.array(
+            [
+                -1 if getattr(feature, field) is None else getattr(feature, field)
+                for feature in features
+            ],
+            dtype=np.int64,
+        )
+    for field in boolean_fields:
+        columns[field] = np.array(
+            [getattr(feature, field) for feature in features], dtype=bool
+        )
+    # repeated values are sent once, with the code of the value of each feature
+    for field in ANNOTATION_CATEGORIES:
+        values = {}
+        codes = [
+            values.setdefault(getattr(feature, field), len(values))
+            for feature in features
+        ]
+        columns[field] = (list(values), np.array(codes, dtype=np.int32))
+    coordinates = [feature.coordinates for feature in features]
+    columns["coordinates_count"] = np.array(
+        [len(coords) for coords in coordinates], dtype=np.int64
+    )
+    columns["coordinates"] = np.array(
+        [position for coords in coordinates for part in coords for position in part],
+        dtype=np.int64,
+    )
+    return columns
+
+
+def unpack_features(
+    features: List[Union[Gene, RNA]],
+    columns: Dict[str, Any],
+    string_fields: List[str],
+    integer_fields: List[str],
+    boolean_fields: List[str],
+):
+    """
+    Fill genes or RNAs with the fields stored as columns by :func:`pack_features`
+
+    :param features: Genes or RNAs to fill, in the order of the columns
+    :param columns: Columns of the features
+    :param string_fields: Fields with free strings
+    :param integer_fields: Fields with integers or None
+    :param boolean_fields: Fields with booleans
+    """
+    for field in string_fields:
+        for feature, value in zip(features, columns[field]):
+            setattr(feature, field, value)
+    for field in integer_fields:
+        for feature, value in zip(features, columns[field].tolist()):
+            setattr(feature, field, None if value == -1 else value)
+    for field in boolean_fields:
+        for feature, value in zip(features, columns[field].tolist()):
+            setattr(feature, field, value)
+    for field, category in ANNOTATION_CATEGORIES.items():
+        values, codes = columns[field]
+        values = [category.intern(value) for value in values]
+        for feature, code in zip(features, codes.tolist()):
+            setattr(feature, field, values[code])
+    bounds = np.cumsum(columns["coordinates_count"] * 2).tolist()
+    positions = columns["coordinates"].tolist()
+    start = 0
+    for feature, stop in zip(features, bounds):
+        feature.coordinates = list(
+            zip(positions[start:stop:2], positions[start + 1 : stop : 2])
+        )
+        start = stop
+
+
+def pack_organism(organism: Organism) -> Dict[str, Any]:
+    """
+    Store a genome as columns of its contig, gene and RNA fields, to send it back from a worker process.
+    Columns are pickled much faster than the graph of objects, and repeated annotations are sent once.
+
+    :param organism: Genome built by a worker process
+
+    :return: Genome columns, to give to :func:`unpack_organism`
+    """
+    contigs = list(organism.contigs)
+    genes, gene_contigs, rnas, rna_contigs = [], [], [], []
+    for index, contig in enumerate(contigs):
+        contig_genes = list(contig.genes)
+        genes.extend(contig_genes)
+        gene_contigs.extend([index] * len(contig_genes))
+        contig_rnas = list(contig.RNAs)
+        rnas.extend(contig_rnas)
+        rna_contigs.extend([index] * len(contig_rnas))
+    return {
+        "name": organism.name,
+        "metadata": organism._metadata_getter,
+        "contigs": {
+            "ID": [contig.ID for contig in contigs],
+            "name": [contig.name for contig in contigs],
+            "is_circular": [contig.is_circular for contig in contigs],
+            "length": [contig._length for contig in contigs],
+            "metadata": [contig._metadata_getter for contig in contigs],
+        },
+        "genes": pack_features(
+            genes, GENE_STRING_FIELDS, GENE_INTEGER_FIELDS, GENE_BOOLEAN_FIELDS
+        ),
+        "gene_contigs": np.array(gene_contigs, dtype=np.int64),
+        "RNAs": pack_features(
+            rnas, FEATURE_STRING_FIELDS, FEATURE_INTEGER_FIELDS, FEATURE_BOOLEAN_FIELDS
+        ),
+        "RNA_contigs": np.array(rna_contigs, dtype=np.int64),
+    }
+
+
+def unpack_organism(payload: Dict[str, Any]) -> Organism:
+    """
+    Build a genome from the columns sent back by a worker process.
+    Repeated annotation values are replaced by the instances already known in the main process.
+
+    :param payload: Genome columns made by :func:`pack_organism`
+
+    :return: Genome
+    """
+    organism = Organism(payload["name"])
+    organism._metadata_getter = payload["metadata"]
+    contigs = []
+    contig_columns = payload["contigs"]
+    for identifier, name, is_circular, length, metadata in zip(
+        contig_columns["ID"],
+        contig_columns["name"],
+        contig_columns["is_circular"],
+        contig_columns["length"],
+        contig_columns["metadata"],
+    ):
+        contig = Contig(identifier, name, is_circular)
+        contig._length = length
+        contig._metadata_getter = metadata
+        organism.add(contig)
+        contigs.append(contig)
+
+    genes = [Gene(gene_id) for gene_id in payload["genes"]["ID"]]
+    unpack_features(
+        genes,
+        payload["genes"],
+        GENE_STRING_FIELDS,
+        GENE_INTEGER_FIELDS,
+        GENE_BOOLEAN_FIELDS,
+    )
+    for gene, index in zip(genes, payload["gene_contigs"].tolist()):
+        contig = contigs[index]
+        gene.fill_parents(organism, contig)
+        contig[gene.start, gene.stop, gene.strand] = gene
+
+    rnas = [RNA(rna_id) for rna_id in payload["RNAs"]["ID"]]
+    unpack_features(
+        rnas,
+        payload["RNAs"],
+        FEATURE_STRING_FIELDS,
+        FEATURE_INTEGER_FIELDS,
+        FEATURE_BOOLEAN_FIELDS,
+    )
+    for rna, index in zip(rnas, payload["RNA_contigs"].tolist()):
+        contig = contigs[index]
+        rna.fill_parents(organism, contig)
+        contig.add_rna(rna)
+    return organism
+
+
+def read_anno_file_payload(*args) -> Tuple[Dict[str, Any], bool]:
+    """
+    Read an annotation file in a worker process, and send back the genome as columns.
+
+    :param args: Arguments of :func:`read_anno_file`
+
+    :return: Genome columns to give to :func:`unpack_organism`, and true for sequence in file
+    """
+    organism, has_sequence = read_anno_file(*args)
+    return pack_organism(organism), has_sequence
+
+
+def annotate_organism_payload(*args) -> Dict[str, Any]:
+    """
+    Annotate a genome in a worker process, and send it back as columns.
+
+    :param args: Arguments of :func:`ppanggolin.annotate.synta.annotate_organism`
+
+    :return: Genome columns to give to :func:`unpack_organism`
+    """
+    return pack_organism(annotate_organism(*args))
+
+
 def read_annotations(
     pangenome: Pangenome,
     organisms_file: Path,
     cpu: int = 1,
     pseudo: bool = False,
     translation_table: int = 11,
+    known_gene_ids: Set[str] = None,
     disable_bar: bool = False,
 ):
     """
@@ -1513,6 +1738,7 @@ def read_annotations(
     :param cpu: number of CPU cores to use
     :param pseudo: allow to read pseudogene
     :param translation_table: Translation table (genetic code) to use when /transl_table is missing from CDS tags.
+    :param known_gene_ids: Identifiers of genes already in the pangenome file the genomes are added to
     :param disable_bar: Disable the progress bar
     """
 
@@ -1548,19 +1774,20 @@ def read_annotations(
             futures = []
 
             for fn_args in args:
-                future = executor.submit(read_anno_file, *fn_args)
+                future = executor.submit(read_anno_file_payload, *fn_args)
                 future.add_done_callback(lambda p: progress.update())
                 futures.append(future)
 
             for future in futures:
-                org, has_dna_sequence = future.result()
+                payload, has_dna_sequence = future.result()
+                org = unpack_organism(payload)
                 pangenome.add_organism(org)
 
                 if not has_dna_sequence:
                     pangenome.status["geneSequences"] = "No"
 
     # decide whether we use local ids or ppanggolin ids.
-    used_local_identifiers = chose_gene_identifiers(pangenome)
+    used_local_identifiers = chose_gene_identifiers(pangenome, known_gene_ids)
     if used_local_identifiers:
         logging.getLogger("PPanGGOLiN").info(
             "gene identifiers used in the provided annotation files were unique, "
@@ -1737,12 +1964,13 @@ def annotate_pangenome(
             futures = []
 
             for fn_args in arguments:
-                future = executor.submit(annotate_organism, *fn_args)
+                future = executor.submit(annotate_organism_payload, *fn_args)
                 future.add_done_callback(lambda p: progress.update())
                 futures.append(future)
 
             for future in futures:
-                pangenome.add_organism(future.result())
+                org = unpack_organism(future.result())
+                pangenome.add_organism(org)
 
     logging.getLogger("PPanGGOLiN").info("Done annotating genomes")
     pangenome.status["genomesAnnotated"] = "Computed"  # the pangenome is now annotated.
@@ -489,6 +489,7 @@ def clustering(
             pangenome.status["defragmented"] = "Computed"
     read_fam2seq(pangenome, fam2seq)
     read_gene2fam(pangenome, genes2fam, disable_bar=disable_bar)
+    pangenome.reset_indexes()
 
     pangenome.status["genesClustered"] = "Computed"
     pangenome.status["geneFamilySequences"] = "Computed"
@@ -736,6 +737,7 @@ def read_clustering(
         pangenome,
         need_annotations=True,
         need_gene_sequences=need_gene_sequences,
+        cpu=cpu,
         disable_bar=disable_bar,
     )
 
@@ -810,6 +812,7 @@ def read_clustering(
                     f"You can either update your cluster file to ensure each gene has a cluster assignment, "
                     f"or use the '--infer_singletons' option to automatically infer a cluster for each non-clustered gene."
                 )
+    pangenome.reset_indexes()
     if pangenome.status["geneSequences"] == "No":
         logging.getLogger("PPanGGOLiN").info(
             "The pangenome has no gene sequences so it is not possible to extract sequence of family representatives."
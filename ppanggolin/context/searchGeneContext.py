@@ -14,6 +14,7 @@ from pathlib import Path
 # installed libraries
 from tqdm import tqdm
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 # local libraries
@@ -468,27 +469,20 @@ def add_edges_to_context_graph(
     """
     contig_graph = nx.Graph()
     contig_genes = contig.get_genes()
+    # gene positions within the contig windows
+    in_windows = np.zeros(len(contig_genes), dtype=bool)
+    for window_start, window_end in contig_windows:
+        in_windows[window_start : window_end + 1] = True
     for window_start, window_end in contig_windows:
         for gene_index in range(window_start, window_end + 1):
             gene = contig_genes[gene_index]
-            next_genes = get_n_next_genes_index(
-                gene_index,
-                next_genes_count=transitivity + 1,
-                contig_size=len(contig_genes),
-                is_circular=contig.is_circular,
-            )
-            next_genes = list(next_genes)
-
-            for i, next_gene_index in enumerate(next_genes):
-                # Check if the next gene is within the contig windows
-                if not any(
-                    lower <= next_gene_index <= upper
-                    for (lower, upper) in contig_windows
-                ):
-                    # next_gene_index is not in any range of genes in the context,
-                    # so it is ignored along with all following genes
-                    break
+            next_genes = contig.get_next_positions(gene_index, transitivity + 1)
+            # next genes that are not in any range of genes in the context are ignored along with all following genes
+            outside = np.flatnonzero(~in_windows[next_genes])
+            if len(outside) > 0:
+                next_genes = next_genes[: outside[0]]
 
+            for i, next_gene_index in enumerate(next_genes.tolist()):
                 next_gene = contig_genes[next_gene_index]
                 if next_gene.family == gene.family:
                     # If the next gene has the same family, the two genes refer to the same node,
@@ -1,10 +1,100 @@
 #!/usr/bin/env python3
 
 # default libraries
+from array import array
 from collections import defaultdict
-from typing import Dict, Generator, List, Tuple
+from typing import Dict, Generator, Iterable, List, Tuple
 
-from ppanggolin.genome import Gene, Organism
+import numpy as np
+
+from ppanggolin.genome import Gene, Organism, Contig
+
+
+def get_contig_gene_pairs(contig: Contig) -> Generator[Tuple[Gene, Gene], None, None]:
+    """Get the pairs of neighbor genes of a contig that make the edges of the neighbors graph
+
+    Genes of families removed from the graph are skipped, and consecutive genes of the same family are not paired
+    if one of them is a fragment. The last gene of a circular contig is paired with its first gene.
+
+    :param contig: Contig with genes in gene families
+
+    :return: Pairs of neighbor genes, the second gene of a pair being the previous one on the contig
+    """
+    prev = None
+    for gene in contig.genes:
+        if not gene.family.removed:
+            if prev is not None and not (
+                prev.family == gene.family and (prev.is_fragment or gene.is_fragment)
+            ):
+                yield gene, prev
+            prev = gene
+    if prev is not None and contig.is_circular and contig.number_of_genes > 0:
+        # if prev is None, the contig is entirely made of duplicated genes, so no edges are added
+        yield contig[0], prev
+
+
+def group_gene_pairs_by_families(
+    sources: np.ndarray, targets: np.ndarray, gene_families: np.ndarray
+) -> List[np.ndarray]:
+    """
+    Group the gene pairs of the graph by the pair of gene families they link
+
+    :param sources: Row index of the source gene of each pair
+    :param targets: Row index of the target gene of each pair
+    :param gene_families: Integer index of the gene family of each gene row
+
+    :return: Index of the gene pairs of each family pair, in order of first appearance
+    """
+    if len(sources) == 0:
+        return []
+    source_families = gene_families[sources].astype(np.int64)
+    target_families = gene_families[targets].astype(np.int64)
+    number_of_families = int(gene_families.max()) + 2
+    keys = (np.minimum(source_families, target_families) + 1) * number_of_families + (
+        np.maximum(source_families, target_families) + 1
+    )
+    order = np.argsort(keys, kind="stable")
+    _, group_starts = np.unique(keys[order], return_index=True)
+    groups = np.split(order, group_starts[1:])
+    groups.sort(key=lambda group: group[0])
+    return groups
+
+
+class OrganismIndex:
+    """
+    Integer index of the organisms shared by the compact edges of a pangenome.
+
+    Methods:
+        - get_index: Returns the index of an organism, indexing it if it is a new one.
+    """
+
+    def __init__(self):
+        """Constructor method"""
+        self._organisms: List[Organism] = []
+        self._index: Dict[Organism, int] = {}
+
+    def __getitem__(self, index: int) -> Organism:
+        """Get the organism corresponding to an index
+
+        :param index: Index of the organism
+
+        :return: Organism
+        """
+        return self._organisms[index]
+
+    def get_index(self, organism: Organism) -> int:
+        """Get the index of an organism, indexing it if it is a new one
+
+        :param organism: Organism
+
+        :return: Index of the organism
+        """
+        index = self._index.get(organism)
+        if index is None:
+            index = len(self._organisms)
+            self._index[organism] = index
+            self._organisms.append(organism)
+        return index
 
 
 class Edge:
@@ -12,10 +102,16 @@ class Edge:
     The Edge class represents an edge between two gene families in the pangenome graph. It is associated with all the
     organisms in which the neighborship is found, and all the involved genes as well.
 
+    A compact edge only stores the index of its organisms and their number of gene pairs.
+    Its gene pairs are then found again on the contigs of the organisms when they are asked for.
+
     Methods:
         - get_org_dict: Returns a dictionary with organisms as keys and an iterable of the pairs in genes as values.
+        - get_organism_pair_counts: Returns a dictionary with organisms as keys and their number of gene pairs as values.
         - gene_pairs: Returns a list of all the gene pairs in the Edge.
         - add_genes: Adds genes to the edge. They are supposed to be in the same organism.
+        - add_gene_pairs: Adds several pairs of already checked genes to the edge.
+        - add_pair_count: Adds a number of gene pairs of an organism to a compact edge.
 
     Fields:
         - source: A GeneFamily object representing the source gene family of the edge.
@@ -23,11 +119,17 @@ class Edge:
         - organisms: A defaultdict object representing the organisms in which the edge is found and the pairs of genes involved.
     """
 
-    def __init__(self, source_gene: Gene, target_gene: Gene):
+    def __init__(
+        self,
+        source_gene: Gene,
+        target_gene: Gene,
+        organism_index: OrganismIndex = None,
+    ):
         """Constructor method
 
         :param source_gene: First gene to initialize the edge
         :param target_gene: Second gene to initialize the edge
+        :param organism_index: Index of the organisms shared by the compact edges. If given, the edge is compact.
         """
         # TODO try to change for gene family ?
         if source_gene.family is None:
@@ -44,16 +146,34 @@ class Edge:
         self.target = target_gene.family
         self.source.set_edge(self.target, self)
         self.target.set_edge(self.source, self)
-        self._organisms = defaultdict(list)
+        self._organism_index = organism_index
+        if organism_index is None:
+            self._organisms = defaultdict(list)
+        else:
+            self._organisms = None
+            self._organism_ids = array("I")
+            self._pair_counts = array("I")
         self.add_genes(source_gene, target_gene)
 
+    @property
+    def is_compact(self) -> bool:
+        """Whether the edge only stores the number of gene pairs of its organisms
+
+        :return: True if the edge is compact
+        """
+        return self._organism_index is not None
+
     @property
     def organisms(self) -> Generator[Organism, None, None]:
         """Get all the organisms belonging to the edge
 
         :return: Generator with organisms as the key and an iterable of the gene pairs as value
         """
-        yield from self._organisms.keys()
+        if self.is_compact:
+            for organism_id in self._organism_ids:
+                yield self._organism_index[organism_id]
+        else:
+            yield from self._organisms.keys()
 
     @property
     def number_of_organisms(self) -> int:
@@ -61,8 +181,35 @@ class Edge:
 
         :return: Number of organisms
         """
+        if self.is_compact:
+            return len(self._organism_ids)
         return len(self._organisms)
 
+    @property
+    def number_of_gene_pairs(self) -> int:
+        """Get the number of gene pairs in the edge
+
+        :return: Number of gene pairs
+        """
+        if self.is_compact:
+            return sum(self._pair_counts)
+        return sum(len(gene_pairs) for gene_pairs in self._organisms.values())
+
+    def get_organism_pair_counts(self) -> Dict[Organism, int]:
+        """Get all the organisms with their number of gene pairs in the edge
+
+        :return: Dictionary with the organism as the key and its number of gene pairs as value
+        """
+        if self.is_compact:
+            return {
+                self._organism_index[organism_id]: count
+                for organism_id, count in zip(self._organism_ids, self._pair_counts)
+            }
+        return {
+            organism: len(gene_pairs)
+            for organism, gene_pairs in self._organisms.items()
+        }
+
     def get_organism_genes_pairs(self, organism: Organism) -> List[Tuple[Gene, Gene]]:
         """Get the gene pair corresponding to the given organism
 
@@ -70,6 +217,8 @@ class Edge:
 
         :return: Pair of genes in the edge corresponding to the given organism
         """
+        if self.is_compact:
+            return self._find_gene_pairs(organism)
         return self._organisms[organism]
 
     def get_organisms_dict(self) -> Dict[Organism, List[Tuple[Gene, Gene]]]:
@@ -77,8 +226,27 @@ class Edge:
 
         :return: Dictionary with the organism as the key and list of gene pairs as value
         """
+        if self.is_compact:
+            return {
+                organism: self._find_gene_pairs(organism) for organism in self.organisms
+            }
         return self._organisms
 
+    def _find_gene_pairs(self, organism: Organism) -> List[Tuple[Gene, Gene]]:
+        """Find the gene pairs of a compact edge on the contigs of an organism
+
+        :param organism: Organism of the edge
+
+        :return: Gene pairs of the edge in the organism
+        """
+        families = {self.source, self.target}
+        return [
+            (gene, prev)
+            for contig in organism.contigs
+            for gene, prev in get_contig_gene_pairs(contig)
+            if {gene.family, prev.family} == families
+        ]
+
     @property
     def gene_pairs(self) -> List[Tuple[Gene, Gene]]:
         """Get the list of all the gene pairs in the Edge
@@ -117,4 +285,47 @@ class Edge:
                 f"You tried to create an edge between two genes that are not even in the same genome ! "
                 f"(genes are '{source_gene.ID}' and '{target_gene.ID}')"
             )
-        self._organisms[source_gene.organism].append((source_gene, target_gene))
+        if self.is_compact:
+            self.add_pair_count(source_gene.organism)
+        else:
+            self._organisms[source_gene.organism].append((source_gene, target_gene))
+
+    def add_gene_pairs(self, gene_pairs: Iterable[Tuple[Gene, Gene]]):
+        """
+        Adds several pairs of genes to the edge at once.
+        Contrary to add_genes, genes are not checked, so the given pairs must already be known to be
+        made of genes from the same organism, as for pairs read back from a pangenome file.
+
+        :param gene_pairs: Pairs of source and target genes
+        """
+        for source_gene, target_gene in gene_pairs:
+            if self.is_compact:
+                self.add_pair_count(source_gene.organism)
+            else:
+                self._organisms[source_gene.organism].append((source_gene, target_gene))
+
+    def add_pair_count(self, organism: Organism, count: int = 1):
+        """
+        Adds a number of gene pairs of an organism to a compact edge.
+
+        :param organism: Organism of the gene pairs
+        :param count: Number of gene pairs
+
+        :raises TypeError: If the edge is not compact
+        """
+        if not self.is_compact:
+            raise TypeError(
+                "Gene pairs must be given to edges that are not compact, not their number."
+            )
+        organism_id = self._organism_index.get_index(organism)
+        if len(self._organism_ids) > 0 and self._organism_ids[-1] == organism_id:
+            # gene pairs of an organism usually come one after the other
+            self._pair_counts[-1] += count
+            return
+        try:
+            position = self._organism_ids.index(organism_id)
+        except ValueError:
+            self._organism_ids.append(organism_id)
+            self._pair_counts.append(count)
+        else:
+            self._pair_counts[position] += count
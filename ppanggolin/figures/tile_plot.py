@@ -76,7 +76,7 @@ def draw_tile_plot(
     families, org_index = prepare_data_structures(pangenome, nocloud)
 
     # Build the presence-absence matrix for the families and generate the dendrogram if required
-    mat_p_a = build_presence_absence_matrix(families, org_index)
+    mat_p_a = build_presence_absence_matrix(pangenome, families)
     order_organisms, dendrogram_fig = generate_dendrogram(mat_p_a, org_index)
 
     # Process the data to be displayed in the tile plot
@@ -123,41 +123,24 @@ def prepare_data_structures(pangenome: Pangenome, nocloud: bool) -> Tuple[set, d
     else:
         families = set(pangenome.gene_families)
 
-    # Get the organism index mapping from the pangenome
-    org_index = pangenome.get_org_index()
+    # Get the organism index mapping from the presence-absence matrix of the pangenome
+    org_index = pangenome.presence_matrix.organism_index
     return families, org_index
 
 
-def build_presence_absence_matrix(families: set, org_index: dict) -> csc_matrix:
+def build_presence_absence_matrix(pangenome: Pangenome, families: set) -> csc_matrix:
     """
     Build the presence-absence matrix for gene families.
 
     This matrix indicates the presence (1) or absence (0) of each gene family across different organisms.
+    It is taken from the presence-absence matrix of the pangenome, with the organisms in the same column order.
 
+    :param pangenome: Pangenome containing the gene families and the organisms.
     :param families: A set of gene families to be included in the matrix.
-    :param org_index: A dictionary mapping each organism to its respective index in the matrix.
     :return: A sparse matrix (Compressed Sparse Column format) representing the presence-absence of gene families.
     """
-
-    # Initialize lists to store matrix data in a sparse format
-    data, all_indexes, all_columns = [], [], []
-
-    # Iterate through each gene family to populate the presence-absence matrix
-    for row, fam in enumerate(families):
-        # Find the indices of organisms that have the current gene family
-        new_col = [org_index[org] for org in fam.organisms]
-        all_indexes.extend([row] * len(new_col))  # Row index repeated for each presence
-        all_columns.extend(new_col)  # Corresponding column indices for the organisms
-        data.extend([1.0] * len(new_col))  # All presences are marked with 1.0
-
-    # Construct the presence-absence matrix using Compressed Sparse Column format
-    mat_p_a = csc_matrix(
-        (data, (all_indexes, all_columns)),
-        shape=(len(families), len(org_index)),
-        dtype="float",
-    )
-
-    return mat_p_a
+    presence_matrix = pangenome.presence_matrix
+    return presence_matrix.subset(families=families).to_sparse()
 
 
 def generate_dendrogram(mat_p_a: csc_matrix, org_index: dict) -> Tuple[List, go.Figure]:
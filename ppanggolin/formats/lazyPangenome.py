@@ -0,0 +1,907 @@
+#!/usr/bin/env python3
+
+# default libraries
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Dict, Generator, Hashable, Set, Tuple
+from weakref import WeakValueDictionary
+
+# installed libraries
+import numpy as np
+import tables
+
+# local libraries
+from ppanggolin.edge import Edge
+from ppanggolin.genome import Organism, Contig, Gene
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import (
+    build_genes,
+    build_rnas,
+    decode_column,
+    get_genedata_chunk_columns,
+    read_genedata_columns,
+)
+
+
+class BoundedCache:
+    """
+    Keeps alive the last used objects, up to a maximum number. The oldest objects are dropped first,
+    and given to a callback when they are.
+    """
+
+    def __init__(self, maxsize: int, on_drop: Callable[[Any], None] = None):
+        """Constructor method
+
+        :param maxsize: Maximum number of objects kept
+        :param on_drop: Function called with each object dropped from the cache
+        """
+        if maxsize < 1:
+            raise ValueError("The cache size must be at least 1.")
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self._objects = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._objects
+
+    def get(self, key: Hashable) -> Any:
+        """Get an object from the cache and mark it as the last used
+
+        :param key: Key of the object
+
+        :return: The object or None if it is not in the cache
+        """
+        obj = self._objects.get(key)
+        if obj is not None:
+            self._objects.move_to_end(key)
+        return obj
+
+    def add(self, key: Hashable, obj: Any):
+        """Add an object to the cache, dropping the oldest ones if needed
+
+        :param key: Key of the object
+        :param obj: Object to keep
+        """
+        self._objects[key] = obj
+        self._objects.move_to_end(key)
+        while len(self._objects) > self.maxsize:
+            _, dropped = self._objects.popitem(last=False)
+            if self.on_drop is not None:
+                self.on_drop(dropped)
+
+
+def group_rows(keys: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group the rows of a table by an integer key, in the fashion of a CSR matrix.
+    The rows with the key k are rows[offsets[k]:offsets[k + 1]], in increasing order.
+
+    :param keys: Key of each row, between 0 and size - 1
+    :param size: Number of keys
+
+    :return: Rows sorted by key and offsets of each key
+    """
+    rows = np.argsort(keys, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return rows, offsets
+
+
+class LazyGeneFamily(GeneFamily):
+    """
+    Gene family of a LazyPangenome. The name, partition and sequence of the family are known from the pangenome
+    file, while its genes and edges are read the first time they are needed.
+    The number of genes, number of genomes and neighbors of the family are given without reading its genes.
+    """
+
+    def __init__(self, family_id: int, name: str, pangenome: "LazyPangenome"):
+        """Constructor method
+
+        :param family_id: Index of the family in the pangenome file
+        :param name: The name of the gene family
+        :param pangenome: Lazy pangenome the family belongs to
+        """
+        super().__init__(family_id, name)
+        self._pangenome = pangenome
+        self._sequence = None
+        self._resolved = False
+
+    @property
+    def sequence(self) -> str:
+        """Get the protein sequence of the family, reading it from the pangenome file if needed
+
+        :return: Protein sequence of the family
+        """
+        if self._sequence is None:
+            self._sequence = self._pangenome._get_family_sequence(self.ID)
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, sequence: str):
+        """Set the protein sequence of the family
+
+        :param sequence: Protein sequence
+        """
+        self._sequence = sequence if sequence != "" else None
+
+    @property
+    def is_resolved(self) -> bool:
+        """Check if the genes and edges of the family have been read from the pangenome file
+
+        :return: True if the genes and edges are loaded
+        """
+        return self._resolved
+
+    def resolve(self):
+        """Read the genes and edges of the family from the pangenome file if they are not loaded yet"""
+        if not self._resolved:
+            self._pangenome._resolve_family(self)
+
+    def unload(self):
+        """Drop the genes and edges of the family. They will be read again the next time they are needed."""
+        self._genes_getter = {}
+        self._genePerOrg.clear()
+        self._edges_getter = {}
+        self._resolved = False
+
+    def __len__(self) -> int:
+        self.resolve()
+        return super().__len__()
+
+    def __getitem__(self, identifier: str) -> Gene:
+        self.resolve()
+        return super().__getitem__(identifier)
+
+    def __delitem__(self, identifier: str):
+        self.resolve()
+        super().__delitem__(identifier)
+
+    def add(self, gene: Gene):
+        self.resolve()
+        super().add(gene)
+
+    def contains_gene_id(self, identifier) -> bool:
+        self.resolve()
+        return super().contains_gene_id(identifier)
+
+    @property
+    def edges(self) -> Generator[Edge, None, None]:
+        self.resolve()
+        yield from super().edges
+
+    @property
+    def neighbors(self) -> Generator[GeneFamily, None, None]:
+        if self._resolved:
+            yield from super().neighbors
+        else:
+            yield from self._pangenome._get_family_neighbors(self.ID)
+
+    @property
+    def genes(self) -> Generator[Gene, None, None]:
+        self.resolve()
+        yield from super().genes
+
+    @property
+    def organisms(self) -> Generator[Organism, None, None]:
+        self.resolve()
+        yield from super().organisms
+
+    @property
+    def number_of_neighbors(self) -> int:
+        return self._pangenome._get_family_number_of_neighbors(self.ID)
+
+    @property
+    def number_of_edges(self) -> int:
+        return self._pangenome._get_family_number_of_neighbors(self.ID)
+
+    @property
+    def number_of_genes(self) -> int:
+        return self._pangenome._get_family_number_of_genes(self.ID)
+
+    @property
+    def number_of_organisms(self) -> int:
+        return self._pangenome._get_family_number_of_organisms(self.ID)
+
+    def get_edge(self, target: GeneFamily) -> Edge:
+        self.resolve()
+        return super().get_edge(target)
+
+    def get_org_dict(self) -> Dict[Organism, Set[Gene]]:
+        self.resolve()
+        return super().get_org_dict()
+
+    def get_genes_per_org(self, org: Organism) -> Generator[Gene, None, None]:
+        """Returns the genes belonging to the gene family in the given Organism.
+        The genes of the family are not read from the other genomes.
+
+        :param org: Organism to look for
+
+        :return: A set of gene(s)
+        """
+        if self._resolved:
+            yield from super().get_genes_per_org(org)
+        else:
+            genes = self._pangenome._get_family_genes_in_organism(self.ID, org)
+            if len(genes) == 0:
+                raise KeyError(
+                    f"Genome {org.name} does not have the gene family: {self.name}"
+                )
+            yield from genes
+
+
+class LazyPangenome(Pangenome):
+    """
+    Pangenome reading its genomes, gene families and graph edges from the pangenome file only when they are accessed.
+
+    Genomes are read as a whole, with their contigs, genes and RNAs, the first time they are asked for.
+    Gene families are known by their name, partition and sequence, and their genes and edges are read when they are
+    needed, which reads the genomes in which they are. At most `cache_size` genomes and gene families with their
+    genes are kept by the lazy pangenome, the least recently used being dropped first. Objects still used elsewhere
+    (e.g. by a region, a module or the caller) are not read twice.
+
+    The other elements of the pangenome (RGP, spots, modules, metadata) are read with the usual functions of
+    :mod:`ppanggolin.formats.readBinaries`, which then read the genomes and gene families they need.
+    """
+
+    def __init__(self, cache_size: int = 128):
+        """Constructor method.
+
+        :param cache_size: Maximum number of genomes and of gene families with their genes kept by the pangenome
+        """
+        super().__init__()
+        self._lock = RLock()
+        self._h5f = None
+        self._organism_cache = BoundedCache(cache_size, self._drop_organism)
+        self._family_cache = BoundedCache(cache_size, self._drop_family)
+        self._organisms_by_row = WeakValueDictionary()
+        self._genes_by_row = WeakValueDictionary()
+        self._families = {}
+        self._pinned_organisms = {}
+        self._family_names = []
+
+    def add_file(self, pangenome_file: Path, check_version: bool = True):
+        """
+        Links an HDF5 file to the pangenome and indexes the genomes, genes, gene families and edges it contains.
+
+        :param pangenome_file: Path to the pangenome file
+        :param check_version: Check ppanggolin version of the pangenome file to be compatible with the current version
+
+        :raises Exception: If the pangenome file does not have annotations
+        """
+        super().add_file(pangenome_file, check_version)
+        if self.status["genomesAnnotated"] != "inFile":
+            raise Exception(
+                f"The pangenome in file '{self.file}' has not been annotated, "
+                "it can not be read lazily."
+            )
+        self._h5f = tables.open_file(self.file, "r")
+        self._index_annotations()
+        self.status["genomesAnnotated"] = "Loaded"
+        if self.status["genesClustered"] == "inFile":
+            self._index_families()
+            self.status["genesClustered"] = "Loaded"
+            for status in ["partitioned", "geneFamilySequences"]:
+                if self.status[status] == "inFile":
+                    self.status[status] = "Loaded"
+            if self.status["neighborsGraph"] == "inFile":
+                self._index_edges()
+                self.status["neighborsGraph"] = "Loaded"
+
+    def close(self):
+        """Close the pangenome file"""
+        if self._h5f is not None:
+            self._h5f.close()
+            self._h5f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    """File indexing methods"""
+
+    def _index_annotations(self):
+        """Index the genomes, contigs, genes and RNAs of the pangenome file"""
+        annotations = self._h5f.root.annotations
+        self._genome_names = decode_column(annotations.genomes.col("name"))
+        self._genome_row = {name: row for row, name in enumerate(self._genome_names)}
+
+        contigs = annotations.contigs.read()
+        self._contigs = contigs
+        self._contig_row = {
+            contig_id: row for row, contig_id in enumerate(contigs["ID"].tolist())
+        }
+        contig_genomes = np.fromiter(
+            (
+                self._genome_row[name]
+                for name in decode_column(contigs["genome"], categorical=True)
+            ),
+            dtype=np.int64,
+            count=len(contigs),
+        )
+        self._contigs_by_genome = group_rows(contig_genomes, len(self._genome_names))
+
+        self._gene_ids = decode_column(annotations.genes.col("ID"))
+        self._gene_row = {gene_id: row for row, gene_id in enumerate(self._gene_ids)}
+        gene_contigs = self._contig_rows(annotations.genes.col("contig"))
+        self._gene_genome = contig_genomes[gene_contigs]
+        self._genes_by_contig = group_rows(gene_contigs, len(contigs))
+        self._rnas_by_contig = group_rows(
+            self._contig_rows(annotations.RNAs.col("contig")), len(contigs)
+        )
+        self._genedata_columns = read_genedata_columns(self._h5f)
+
+    def _contig_rows(self, contig_ids: np.ndarray) -> np.ndarray:
+        """Get the row in the contigs table of contig identifiers
+
+        :param contig_ids: Contig identifiers
+
+        :return: Rows of the contigs
+        """
+        return np.fromiter(
+            (self._contig_row[contig_id] for contig_id in contig_ids.tolist()),
+            dtype=np.int64,
+            count=len(contig_ids),
+        )
+
+    def _index_families(self):
+        """Index the gene families of the pangenome file and the genes they contain"""
+        family_table = self._h5f.root.geneFamilies
+        family_names, gene_families = np.unique(
+            family_table.col("geneFam"), return_inverse=True
+        )
+        gene_families = gene_families.ravel()
+        self._family_names = decode_column(family_names)
+        self._family_index = {
+            name: index for index, name in enumerate(self._family_names)
+        }
+        family_genes = np.fromiter(
+            (
+                self._gene_row[gene_id]
+                for gene_id in decode_column(family_table.col("gene"))
+            ),
+            dtype=np.int64,
+            count=family_table.nrows,
+        )
+        self._gene_family = np.full(len(self._gene_ids), -1, dtype=np.int64)
+        self._gene_family[family_genes] = gene_families
+        rows, offsets = group_rows(gene_families, len(self._family_names))
+        self._genes_by_family = (family_genes[rows], offsets)
+
+        # number of distinct genomes of each family
+        keys = np.unique(
+            self._gene_family[family_genes] * len(self._genome_names)
+            + self._gene_genome[family_genes]
+        )
+        self._family_number_of_organisms = np.bincount(
+            keys // max(len(self._genome_names), 1), minlength=len(self._family_names)
+        )
+
+        self._family_partition = [""] * len(self._family_names)
+        info_table = self._h5f.root.geneFamiliesInfo
+        for name, partition in zip(
+            decode_column(info_table.col("name")),
+            decode_column(info_table.col("partition"), categorical=True),
+        ):
+            self._family_partition[self._family_index[name]] = partition
+        self._family_sequences = None
+
+    def _index_edges(self):
+        """Index the gene pairs of the neighbors graph and the neighbors of each gene family"""
+        edge_table = self._h5f.root.edges
+        sources, targets = edge_table.col("geneSource"), edge_table.col("geneTarget")
+        if edge_table.coltypes["geneSource"] == "string":
+            sources = np.fromiter(
+                (self._gene_row[gene_id] for gene_id in decode_column(sources)),
+                dtype=np.int64,
+                count=len(sources),
+            )
+            targets = np.fromiter(
+                (self._gene_row[gene_id] for gene_id in decode_column(targets)),
+                dtype=np.int64,
+                count=len(targets),
+            )
+        self._edge_sources, self._edge_targets = sources, targets
+
+        pair_rows = np.arange(len(sources))
+        edge_rows, offsets = group_rows(
+            np.concatenate([sources, targets]), len(self._gene_ids)
+        )
+        self._edges_by_gene = (
+            np.concatenate([pair_rows, pair_rows])[edge_rows],
+            offsets,
+        )
+
+        number_of_families = len(self._family_names)
+        source_families = self._gene_family[sources]
+        target_families = self._gene_family[targets]
+        family_pairs = np.unique(
+            np.minimum(source_families, target_families) * number_of_families
+            + np.maximum(source_families, target_families)
+        )
+        first, second = np.divmod(family_pairs, number_of_families)
+        self._number_of_family_edges = len(family_pairs)
+        # edges between genes of the same family are given once
+        distinct = first != second
+        neighbor_rows, offsets = group_rows(
+            np.concatenate([first, second[distinct]]), number_of_families
+        )
+        self._neighbors_by_family = (
+            np.concatenate([second, first[distinct]])[neighbor_rows],
+            offsets,
+        )
+
+    """Genome methods"""
+
+    @property
+    def organisms(self) -> Generator[Organism, None, None]:
+        """Generator of the genomes of the pangenome, read from the file when needed
+
+        :return: Generator of genomes
+        """
+        for name in self._genome_names:
+            yield self.get_organism(name)
+
+    @property
+    def number_of_organisms(self) -> int:
+        """Returns the number of genomes in the pangenome file
+
+        :return: Number of genomes
+        """
+        return len(self._genome_names)
+
+    @property
+    def number_of_contigs(self) -> int:
+        """Returns the number of contigs in the pangenome file
+
+        :return: Number of contigs
+        """
+        return len(self._contigs)
+
+    def get_organism(self, name: str) -> Organism:
+        """
+        Get a genome of the pangenome, reading it from the pangenome file if needed.
+
+        :param name: Name of the genome
+
+        :return: The genome with its contigs, genes and RNAs
+
+        :raises AssertionError: If the genome name is not a string
+        :raises KeyError: If the provided name is not a genome of the pangenome
+        """
+        assert isinstance(name, str), "Genome name should be a string"
+        try:
+            row = self._genome_row[name]
+        except KeyError:
+            raise KeyError(f"{name} does not seem to be in your pangenome")
+        return self._get_organism_by_row(row)
+
+    def _get_organism_by_row(self, row: int) -> Organism:
+        """Get a genome from its row in the genomes table, reading it if needed
+
+        :param row: Row of the genome
+
+        :return: The genome
+        """
+        with self._lock:
+            organism = self._organism_cache.get(row)
+            if organism is None:
+                organism = self._organisms_by_row.get(row)
+                if organism is None:
+                    organism = self._read_organism(row)
+                    self._organisms_by_row[row] = organism
+                self._organism_cache.add(row, organism)
+            return organism
+
+    def _read_organism(self, row: int) -> Organism:
+        """Read a genome with its contigs, genes and RNAs from the pangenome file
+
+        :param row: Row of the genome in the genomes table
+
+        :return: The genome
+        """
+        logging.getLogger("PPanGGOLiN").debug(
+            f"Reading genome {self._genome_names[row]} from the pangenome file"
+        )
+        organism = Organism(self._genome_names[row])
+        contig_rows, contig_offsets = self._contigs_by_genome
+        contigs = self._contigs[
+            contig_rows[contig_offsets[row] : contig_offsets[row + 1]]
+        ]
+        contig_getter = {}
+        for identifier, name, is_circular, length in zip(
+            contigs["ID"].tolist(),
+            decode_column(contigs["name"]),
+            contigs["is_circular"].tolist(),
+            contigs["length"].tolist(),
+        ):
+            contig = Contig(identifier=identifier, name=name, is_circular=is_circular)
+            contig.length = length
+            organism.add(contig)
+            contig_getter[identifier] = contig
+
+        annotations = self._h5f.root.annotations
+        contig_rows = [self._contig_row[identifier] for identifier in contig_getter]
+        gene_rows = self._get_rows(self._genes_by_contig, contig_rows)
+        genes = annotations.genes.read_coordinates(gene_rows)
+        genedata = get_genedata_chunk_columns(genes, self._genedata_columns)
+        for (gene, contig_id), gene_row in zip(
+            build_genes(genes, genedata), gene_rows.tolist()
+        ):
+            contig = contig_getter[contig_id]
+            gene.fill_parents(organism, contig)
+            contig.add(gene)
+            if self.status["genesClustered"] == "Loaded":
+                gene.family = self._get_family(int(self._gene_family[gene_row]))
+            self._genes_by_row[gene_row] = gene
+
+        rnas = annotations.RNAs.read_coordinates(
+            self._get_rows(self._rnas_by_contig, contig_rows)
+        )
+        genedata = get_genedata_chunk_columns(rnas, self._genedata_columns)
+        for rna, contig_id in build_rnas(rnas, genedata):
+            contig = contig_getter[contig_id]
+            rna.fill_parents(organism, contig)
+            contig.add_rna(rna)
+        return organism
+
+    @staticmethod
+    def _get_rows(groups: Tuple[np.ndarray, np.ndarray], keys: list) -> np.ndarray:
+        """Get the sorted rows of several keys grouped with group_rows
+
+        :param groups: Rows and offsets given by group_rows
+        :param keys: Keys to get the rows of
+
+        :return: Sorted rows
+        """
+        rows, offsets = groups
+        selected = [rows[offsets[key] : offsets[key + 1]] for key in keys]
+        if len(selected) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(selected))
+
+    def _drop_organism(self, organism: Organism):
+        """Keep dropped genomes alive if they have been given metadata, as it can not be read again
+
+        :param organism: Genome dropped from the cache
+        """
+        if organism.number_of_metadata > 0 or any(
+            feature.number_of_metadata > 0
+            for contig in organism.contigs
+            for feature in [contig, *contig.genes, *contig.RNAs]
+        ):
+            self._pinned_organisms[organism.name] = organism
+
+    def _get_contig_by_identifier(self, identifier: int = None) -> Contig:
+        """Get a contig from its identifier, reading only its genome from the pangenome file
+
+        :param identifier: Identifier of the contig
+
+        :return: The contig
+        """
+        try:
+            row = self._contig_row[identifier]
+        except KeyError:
+            raise KeyError(f"Contig: {identifier}, does not exist in the pangenome.")
+        genome_row = self._genome_row[self._contigs["genome"][row].decode()]
+        organism = self._get_organism_by_row(genome_row)
+        return organism.get(self._contigs["name"][row].decode())
+
+    """Gene methods"""
+
+    @property
+    def genes(self) -> Generator[Gene, None, None]:
+        """Generator of the genes of the pangenome, reading the genomes one after the other
+
+        :return: Gene generator
+        """
+        for organism in self.organisms:
+            yield from organism.genes
+
+    @property
+    def number_of_genes(self) -> int:
+        """Returns the number of genes in the pangenome file
+
+        :return: The number of genes
+        """
+        return len(self._gene_ids)
+
+    @property
+    def number_of_rnas(self) -> int:
+        """Returns the number of RNAs with valid coordinates in the pangenome file
+
+        :return: The number of RNAs
+        """
+        genedata_ids = self._h5f.root.annotations.RNAs.col("genedata_id")
+        starts = self._genedata_columns["start"][genedata_ids]
+        stops = self._genedata_columns["stop"][genedata_ids]
+        return int(np.count_nonzero((starts <= stops) & (starts >= 1)))
+
+    def get_gene(self, gene_id: str) -> Gene:
+        """Returns the gene that has the given gene ID, reading its genome if needed
+
+        :param gene_id: The gene ID to look for
+
+        :return: Returns the gene that has the ID `gene_id`
+
+        :raises AssertionError: If the `gene_id` is not a string
+        :raises KeyError: If the `gene_id` is not in the pangenome
+        """
+        assert isinstance(
+            gene_id, str
+        ), f"The provided gene id ({gene_id}) should be a string and not a {type(gene_id)}"
+        try:
+            row = self._gene_row[gene_id]
+        except KeyError:
+            raise KeyError(f"{gene_id} does not exist in the pangenome.")
+        return self._get_gene_by_row(row)
+
+    def _get_gene_by_row(self, row: int) -> Gene:
+        """Get a gene from its row in the genes table, reading its genome if needed
+
+        :param row: Row of the gene
+
+        :return: The gene
+        """
+        with self._lock:
+            gene = self._genes_by_row.get(row)
+            if gene is None:
+                # the genome is kept by the cache while the gene is looked for
+                self._get_organism_by_row(int(self._gene_genome[row]))
+                gene = self._genes_by_row[row]
+            return gene
+
+    """Gene families methods"""
+
+    @property
+    def gene_families(self) -> Generator[LazyGeneFamily, None, None]:
+        """Returns all the gene families of the pangenome, without reading their genes
+
+        :return: Generator of gene families
+        """
+        for index in range(len(self._family_names)):
+            yield self._get_family(index)
+
+    @property
+    def number_of_gene_families(self) -> int:
+        """Returns the number of gene families in the pangenome file
+
+        :return: The number of gene families
+        """
+        return len(self._family_names) if self.status["genesClustered"] != "No" else 0
+
+    def get_gene_family(self, name: str) -> LazyGeneFamily:
+        """Returns the gene family with the given name, without reading its genes
+
+        :param name: The gene family name to look for
+
+        :return: Returns the gene family that has the name `name`
+
+        :raises AssertionError: If the `name` is not a string
+        :raises KeyError: If the `name` is not corresponding to any family in the pangenome
+        """
+        assert isinstance(name, str), "Name of gene family should be a string"
+        try:
+            index = self._family_index[name]
+        except (KeyError, AttributeError):
+            raise KeyError(f"Gene family with name={name} is not in pangenome")
+        return self._get_family(index)
+
+    def _get_family(self, index: int) -> LazyGeneFamily:
+        """Get the gene family at the given index of the pangenome file
+
+        :param index: Index of the gene family
+
+        :return: The gene family
+        """
+        with self._lock:
+            family = self._families.get(index)
+            if family is None:
+                family = LazyGeneFamily(index, self._family_names[index], self)
+                family.partition = self._family_partition[index]
+                self._families[index] = family
+            return family
+
+    def _get_family_sequence(self, index: int) -> str:
+        """Get the protein sequence of a gene family, reading all of them at the first call
+
+        :param index: Index of the gene family
+
+        :return: Protein sequence
+        """
+        with self._lock:
+            if self._family_sequences is None:
+                info_table = self._h5f.root.geneFamiliesInfo
+                self._family_sequences = [""] * len(self._family_names)
+                for name, sequence in zip(
+                    decode_column(info_table.col("name")),
+                    decode_column(info_table.col("protein")),
+                ):
+                    self._family_sequences[self._family_index[name]] = sequence
+            return self._family_sequences[index]
+
+    def _get_family_number_of_genes(self, index: int) -> int:
+        """Get the number of genes of a gene family without reading them
+
+        :param index: Index of the gene family
+
+        :return: Number of genes
+        """
+        offsets = self._genes_by_family[1]
+        return int(offsets[index + 1] - offsets[index])
+
+    def _get_family_number_of_organisms(self, index: int) -> int:
+        """Get the number of genomes of a gene family without reading them
+
+        :param index: Index of the gene family
+
+        :return: Number of genomes
+        """
+        return int(self._family_number_of_organisms[index])
+
+    def _get_family_neighbors(
+        self, index: int
+    ) -> Generator[LazyGeneFamily, None, None]:
+        """Get the neighbors of a gene family in the graph without reading its genes
+
+        :param index: Index of the gene family
+
+        :return: Neighbor gene families
+        """
+        if self.status["neighborsGraph"] != "Loaded":
+            return
+        neighbors, offsets = self._neighbors_by_family
+        for neighbor in neighbors[offsets[index] : offsets[index + 1]].tolist():
+            yield self._get_family(neighbor)
+
+    def _get_family_number_of_neighbors(self, index: int) -> int:
+        """Get the number of neighbors of a gene family in the graph without reading its genes
+
+        :param index: Index of the gene family
+
+        :return: Number of neighbors
+        """
+        if self.status["neighborsGraph"] != "Loaded":
+            return 0
+        offsets = self._neighbors_by_family[1]
+        return int(offsets[index + 1] - offsets[index])
+
+    def _get_family_genes_in_organism(self, index: int, organism: Organism) -> list:
+        """Get the genes of a gene family in one genome, reading only this genome
+
+        :param index: Index of the gene family
+        :param organism: Genome of the genes
+
+        :return: Genes of the family in the genome
+        """
+        genome_row = self._genome_row[organism.name]
+        genes, offsets = self._genes_by_family
+        family_genes = genes[offsets[index] : offsets[index + 1]]
+        rows = family_genes[self._gene_genome[family_genes] == genome_row]
+        return [self._get_gene_by_row(row) for row in rows.tolist()]
+
+    def _resolve_family(self, family: LazyGeneFamily):
+        """Read the genes and the edges of a gene family
+
+        :param family: Gene family to resolve
+        """
+        with self._lock:
+            if family.is_resolved:
+                return
+            family._resolved = True
+            genes, offsets = self._genes_by_family
+            gene_rows = genes[offsets[family.ID] : offsets[family.ID + 1]].tolist()
+            for row in gene_rows:
+                gene = self._get_gene_by_row(row)
+                family._genes_getter[gene.ID] = gene
+            if self.status["neighborsGraph"] == "Loaded":
+                self._link_family_edges(family, gene_rows)
+            self._family_cache.add(family.ID, family)
+
+    def _link_family_edges(self, family: LazyGeneFamily, gene_rows: list):
+        """Build the edges of a gene family from the gene pairs involving its genes
+
+        :param family: Gene family
+        :param gene_rows: Rows of the genes of the family
+        """
+        edge_rows, offsets = self._edges_by_gene
+        pairs = np.unique(
+            np.concatenate(
+                [edge_rows[offsets[row] : offsets[row + 1]] for row in gene_rows]
+                + [np.zeros(0, dtype=np.int64)]
+            )
+        )
+        neighbor_to_pairs = {}
+        for source, target in zip(
+            self._edge_sources[pairs].tolist(), self._edge_targets[pairs].tolist()
+        ):
+            other = target if self._gene_family[source] == family.ID else source
+            neighbor_to_pairs.setdefault(int(self._gene_family[other]), []).append(
+                (self._get_gene_by_row(source), self._get_gene_by_row(target))
+            )
+        for neighbor_index, gene_pairs in neighbor_to_pairs.items():
+            neighbor = self._get_family(neighbor_index)
+            # the edge may have been built with the neighbor family
+            edge = family._edges_getter.get(neighbor) or neighbor._edges_getter.get(
+                family
+            )
+            if edge is None:
+                edge = Edge(*gene_pairs[0])
+                edge.add_gene_pairs(gene_pairs[1:])
+            else:
+                family.set_edge(neighbor, edge)
+                neighbor.set_edge(family, edge)
+
+    def _drop_family(self, family: LazyGeneFamily):
+        """Drop the genes and edges of a gene family dropped from the cache
+
+        :param family: Gene family dropped from the cache
+        """
+        family.unload()
+
+    """Edge methods"""
+
+    @property
+    def edges(self) -> Generator[Edge, None, None]:
+        """Returns the edges of the pangenome graph, reading the gene families one after the other
+
+        :return: Generator of edges
+        """
+        seen = set()
+        for family in self.gene_families:
+            for edge in family.edges:
+                key = frozenset([edge.source.ID, edge.target.ID])
+                if key not in seen:
+                    seen.add(key)
+                    yield edge
+
+    @property
+    def number_of_edges(self) -> int:
+        """Returns the number of edges in the pangenome graph
+
+        :return: The number of edges
+        """
+        if self.status["neighborsGraph"] != "Loaded":
+            return 0
+        return self._number_of_family_edges
+
+    def get_multigenics(
+        self, dup_margin: float, persistent: bool = True
+    ) -> Set[GeneFamily]:
+        """
+        Returns the multigenic persistent families of the pangenome graph, computed from the pangenome file without
+        reading the genes. A family is multigenic if it is duplicated in more than `dup_margin` of its genomes.
+
+        :param dup_margin: The ratio of presence in multicopy above which a gene family is considered multigenic
+        :param persistent: if we consider only the persistent genes
+
+        :return: Set of gene families considered multigenic
+        """
+        assert isinstance(dup_margin, float), "Dup margin should be a float"
+        assert isinstance(persistent, bool), "persistent should be a boolean"
+
+        is_fragment = self._h5f.root.annotations.genes.col("is_fragment")
+        genes = np.flatnonzero((self._gene_family >= 0) & ~is_fragment)
+        family_genomes, copies = np.unique(
+            self._gene_family[genes] * len(self._genome_names)
+            + self._gene_genome[genes],
+            return_counts=True,
+        )
+        duplicated = np.bincount(
+            family_genomes[copies > 1] // len(self._genome_names),
+            minlength=len(self._family_names),
+        )
+        multigenics = set()
+        for index in np.flatnonzero(
+            duplicated / np.maximum(self._family_number_of_organisms, 1) >= dup_margin
+        ).tolist():
+            family = self._get_family(index)
+            if family.named_partition == "persistent" or not persistent:
+                multigenics.add(family)
+        return multigenics
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+# default libraries
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Union
+
+# installed libraries
+import numpy as np
+import tables
+
+# key columns of the pangenome tables, indexed to find rows without reading whole tables
+INDEXED_COLUMNS = {
+    "/annotations/genes": ["ID", "genedata_id"],
+    "/annotations/RNAs": ["ID"],
+    "/annotations/genedata": ["genedata_id"],
+    "/annotations/contigs": ["ID"],
+    "/annotations/geneSequences": ["gene", "seqid"],
+    "/annotations/sequences": ["seqid"],
+    "/geneFamilies": ["gene", "geneFam"],
+    "/geneFamiliesInfo": ["name"],
+}
+
+# above this number of values for each row of a table, reading the column is faster than index lookups
+ROWS_PER_LOOKUP = 200
+
+
+def index_pangenome_tables(h5f: tables.File):
+    """
+    Creates completely sorted indexes on the key columns of the tables in a pangenome file.
+    Indexes that already exist are kept, unless they have been invalidated by changes in their table.
+
+    :param h5f: Pangenome file opened in write or append mode
+    """
+    for table_path, columns in INDEXED_COLUMNS.items():
+        if table_path not in h5f:
+            continue
+        table = h5f.get_node(table_path)
+        for column in columns:
+            column_instance = table.colinstances[column]
+            if column_instance.is_indexed:
+                if column_instance.index.is_csi and not column_instance.index.dirty:
+                    continue
+                column_instance.remove_index()
+            logging.getLogger("PPanGGOLiN").debug(
+                f"Indexing column {column} of table {table_path}"
+            )
+            column_instance.create_csindex()
+
+
+def is_indexed(table: tables.Table, column: str) -> bool:
+    """
+    Check that a column of a table has an up-to-date index
+
+    :param table: Table of the pangenome file
+    :param column: Name of the column
+
+    :return: True if lookups on the column can use its index
+    """
+    return table.colindexed[column] and not table.colinstances[column].index.dirty
+
+
+def get_row_coordinates(
+    table: tables.Table,
+    column: str,
+    values: Iterable[Union[str, bytes, int]],
+    chunk: int = 100000,
+) -> np.ndarray:
+    """
+    Get the rows of a table whose column has one of the given values.
+    The index of the column is used for small sets of values, and the column is read by chunks otherwise.
+
+    :param table: Table of the pangenome file
+    :param column: Name of the column to search the values in
+    :param values: Values to search, strings are encoded for string columns
+    :param chunk: Number of rows read at once when the column is read
+
+    :return: Sorted row numbers of the matching rows
+    """
+    if table.coltypes[column] == "string":
+        itemsize = table.coldtypes[column].itemsize
+        # longer values can not be in the column, and would match their truncated form
+        values = {
+            value.encode() if isinstance(value, str) else value for value in values
+        }
+        values = [value for value in values if len(value) <= itemsize]
+    else:
+        values = list(set(values))
+    if len(values) == 0 or table.nrows == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if is_indexed(table, column) and len(values) * ROWS_PER_LOOKUP <= table.nrows:
+        coordinates = [
+            table.get_where_list(f"{column} == value", condvars={"value": value})
+            for value in values
+        ]
+        return np.sort(np.concatenate(coordinates))
+
+    values = np.array(values, dtype=table.coldtypes[column])
+    coordinates = []
+    for start in range(0, table.nrows, chunk):
+        column_chunk = table.read(start, start + chunk, field=column)
+        coordinates.append(np.flatnonzero(np.isin(column_chunk, values)) + start)
+    return np.concatenate(coordinates)
+
+
+def lookup_rows(
+    table: tables.Table,
+    column: str,
+    values: Iterable[Union[str, bytes, int]],
+    field: str = None,
+) -> np.ndarray:
+    """
+    Read the rows of a table whose column has one of the given values
+
+    :param table: Table of the pangenome file
+    :param column: Name of the column to search the values in
+    :param values: Values to search
+    :param field: Name of a single column to read from the matching rows
+
+    :return: Matching rows in the order of the table, or the values of their field
+    """
+    coordinates = get_row_coordinates(table, column, values)
+    if len(coordinates) == 0:
+        return np.empty(
+            0, dtype=table.dtype if field is None else table.coldtypes[field]
+        )
+    return table.read_coordinates(coordinates, field=field)
+
+
+def iter_lookup_rows(
+    table: tables.Table,
+    column: str,
+    values: Iterable[Union[str, bytes, int]],
+    chunk: int = 20000,
+) -> Iterator[np.void]:
+    """
+    Iterate over the rows of a table whose column has one of the given values, reading them chunk by chunk
+    to limit RAM usage on tables with large rows.
+
+    :param table: Table of the pangenome file
+    :param column: Name of the column to search the values in
+    :param values: Values to search
+    :param chunk: Number of matching rows read at once
+
+    :return: Matching rows in the order of the table
+    """
+    coordinates = get_row_coordinates(table, column, values)
+    for start in range(0, len(coordinates), chunk):
+        yield from table.read_coordinates(coordinates[start : start + chunk])
+
+
+def get_gene_families(h5f: tables.File, genes: Iterable[str]) -> Dict[str, str]:
+    """
+    Get the gene family of each given gene
+
+    :param h5f: Pangenome file with gene families
+    :param genes: Gene identifiers
+
+    :return: Gene family name of each gene found in the file
+    """
+    rows = lookup_rows(h5f.root.geneFamilies, "gene", genes)
+    return {
+        gene.decode(): family.decode()
+        for gene, family in zip(rows["gene"].tolist(), rows["geneFam"].tolist())
+    }
+
+
+def get_family_genes(h5f: tables.File, families: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Get the genes of each given gene family
+
+    :param h5f: Pangenome file with gene families
+    :param families: Gene family names
+
+    :return: Gene identifiers of each gene family found in the file
+    """
+    family_to_genes = defaultdict(list)
+    rows = lookup_rows(h5f.root.geneFamilies, "geneFam", families)
+    for gene, family in zip(rows["gene"].tolist(), rows["geneFam"].tolist()):
+        family_to_genes[family.decode()].append(gene.decode())
+    return dict(family_to_genes)
+
+
+def get_gene_genomes(h5f: tables.File, genes: Iterable[str]) -> Dict[str, str]:
+    """
+    Get the genome of each given gene
+
+    :param h5f: Pangenome file with annotations
+    :param genes: Gene identifiers
+
+    :return: Genome name of each gene found in the file
+    """
+    annotations = h5f.root.annotations
+    gene_rows = lookup_rows(annotations.genes, "ID", genes)
+    contig_rows = lookup_rows(annotations.contigs, "ID", gene_rows["contig"].tolist())
+    contig_to_genome = dict(
+        zip(contig_rows["ID"].tolist(), contig_rows["genome"].tolist())
+    )
+    return {
+        gene.decode(): contig_to_genome[contig].decode()
+        for gene, contig in zip(gene_rows["ID"].tolist(), gene_rows["contig"].tolist())
+    }
+
+
+def get_gene_sequences(h5f: tables.File, genes: Iterable[str]) -> Dict[str, str]:
+    """
+    Get the DNA sequence of each given gene
+
+    :param h5f: Pangenome file with gene sequences
+    :param genes: Gene identifiers
+
+    :return: DNA sequence of each gene found in the file
+    """
+    annotations = h5f.root.annotations
+    gene_rows = lookup_rows(annotations.geneSequences, "gene", genes)
+    sequence_rows = lookup_rows(
+        annotations.sequences, "seqid", gene_rows["seqid"].tolist()
+    )
+    seqid_to_dna = dict(
+        zip(sequence_rows["seqid"].tolist(), sequence_rows["dna"].tolist())
+    )
+    return {
+        gene.decode(): seqid_to_dna[seqid].decode()
+        for gene, seqid in zip(gene_rows["gene"].tolist(), gene_rows["seqid"].tolist())
+    }
+
+
+def get_gene_annotations(
+    h5f: tables.File, genes: Iterable[str]
+) -> Dict[str, Dict[str, Union[str, int]]]:
+    """
+    Get the annotation of each given gene, as stored in the genedata table
+
+    :param h5f: Pangenome file with annotations
+    :param genes: Gene identifiers
+
+    :return: Annotation fields of each gene found in the file
+    """
+    annotations = h5f.root.annotations
+    gene_rows = lookup_rows(annotations.genes, "ID", genes)
+    genedata_rows = lookup_rows(
+        annotations.genedata, "genedata_id", gene_rows["genedata_id"].tolist()
+    )
+    genedata_id_to_row = dict(zip(genedata_rows["genedata_id"].tolist(), genedata_rows))
+    gene_to_annotations = {}
+    for gene, genedata_id in zip(
+        gene_rows["ID"].tolist(), gene_rows["genedata_id"].tolist()
+    ):
+        genedata = genedata_id_to_row[genedata_id]
+        gene_to_annotations[gene.decode()] = {
+            field: (
+                genedata[field].decode()
+                if annotations.genedata.coltypes[field] == "string"
+                else genedata[field].item()
+            )
+            for field in annotations.genedata.colnames
+            if field != "genedata_id"
+        }
+    return gene_to_annotations
@@ -3,20 +3,29 @@
 # default libraries
 import logging
 from pathlib import Path
-from typing import Dict, Any, Iterator, Set, List, Tuple, Optional
-from collections import defaultdict
+from typing import Dict, Any, Callable, Iterator, Set, List, Tuple, Optional
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
 # installed libraries
 from tqdm import tqdm
 import tables
+import numpy as np
 
 # local libraries
 from ppanggolin.genome import Organism, Gene, RNA, Contig
 from ppanggolin.pangenome import Pangenome
 from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.edge import Edge
 from ppanggolin.region import Region, Spot, Module
 from ppanggolin.metadata import Metadata
-from ppanggolin.utils import write_compressed_or_not
+from ppanggolin.utils import (
+    write_compressed_or_not,
+    CategoricalValues,
+    ANNOTATION_CATEGORIES,
+)
+from ppanggolin.formats.queryBinaries import lookup_rows, iter_lookup_rows
 
 
 class Genedata:
@@ -112,6 +121,36 @@ def get_number_of_organisms(pangenome: Pangenome) -> int:
     return len(org_set)
 
 
+# number of genes from which tables are read by several processes when more than one cpu is given.
+# Reading whole tables in worker processes was slower than reading them by chunks on the testingDataset (42,000 genes)
+# and faster on a synthetic pangenome of 700,000 genes (see testingDataset/benchmark_loading.py).
+PREFETCH_MIN_GENES = 500000
+
+# status attributes of the steps that depend on the set of genomes, with the command computing them
+STALE_STEP_COMMANDS = {
+    "genesClustered": "cluster",
+    "NeighborsGraph": "graph",
+    "Partitioned": "partition",
+    "predictedRGP": "rgp",
+    "spots": "spot",
+    "modules": "module",
+}
+
+
+def get_stale_steps(h5f: tables.File) -> List[str]:
+    """
+    Get the steps of the pangenome file computed before genomes were added to it
+
+    :param h5f: Pangenome HDF5 file
+
+    :return: Status attribute names of the stale steps
+    """
+    status_attrs = h5f.root.status._v_attrs
+    if "staleSteps" not in status_attrs._f_list():
+        return []
+    return [step for step in status_attrs.staleSteps if status_attrs[step]]
+
+
 def get_status(pangenome: Pangenome, pangenome_file: Path):
     """
     Checks which elements are already present in the file.
@@ -164,6 +203,15 @@ def get_status(pangenome: Pangenome, pangenome_file: Path):
             pangenome.status["metadata"][attr] = "inFile"
             pangenome.status["metasources"][attr] = metasources._v_attrs[attr]
 
+    stale_steps = get_stale_steps(h5f)
+    if len(stale_steps) > 0:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"Genomes have been added to the pangenome file {pangenome_file} after the following steps were computed: "
+            f"{', '.join(STALE_STEP_COMMANDS[step] for step in stale_steps)}. "
+            f"Their results do not include the added genomes. "
+            f"Run these commands again with --force to update them."
+        )
+
     if "/info" in h5f:
         info_group = h5f.root.info
         pangenome.parameters = info_group._v_attrs.parameters
@@ -182,89 +230,178 @@ def read_chunks(table: tables.Table, column: str = None, chunk: int = 10000):
         yield from table.read(start=i, stop=i + chunk, field=column)
 
 
-def read_genedata(h5f: tables.File) -> Dict[int, Genedata]:
+def read_chunks_as_arrays(
+    table: tables.Table, chunk: int = 10000
+) -> Iterator[np.ndarray]:
     """
-    Reads the genedata table and returns a genedata_id2genedata dictionary
+    Reading entirely the provided table chunk per chunk, without splitting chunks into rows.
+
+    Each chunk is given as a numpy structured array, so that its columns can be processed in bulk.
+
+    :param table: Table to read
+    :param chunk: Number of rows per chunk
+
+    :return: Generator of structured arrays
+    """
+    for i in range(0, table.nrows, chunk):
+        yield table.read(start=i, stop=i + chunk)
+
+
+def decode_column(
+    column: np.ndarray,
+    categorical: bool = False,
+    categories: CategoricalValues = None,
+) -> List[str]:
+    """
+    Decode in bulk a column of bytes strings read from a table.
+
+    :param column: Column of bytes strings
+    :param categorical: The column holds few distinct values (strand, type, product, ...),
+                        in that case each distinct value is decoded only once.
+    :param categories: Shared values of the categorical column, so that values read in different chunks
+                       are the same string instances.
+
+    :return: List of decoded strings, in the column order
+    """
+    if categorical and len(column) > 0:
+        uniques, inverse = np.unique(column, return_inverse=True)
+        decoded = [value.decode() for value in uniques.tolist()]
+        if categories is not None:
+            decoded = [categories.intern(value) for value in decoded]
+        return np.array(decoded, dtype=object)[inverse.ravel()].tolist()
+    return [value.decode() for value in column.tolist()]
+
+
+def read_genedata_columns(
+    h5f: tables.File, chunk_size: int = 20000
+) -> Dict[str, np.ndarray]:
+    """
+    Reads the genedata table in bulk and returns its columns as arrays indexed by the genedata identifier.
+
+    Strings are decoded once per chunk and per distinct value, and shared with the annotation categories.
+    The 'coordinates' column is None,
+    except for genedata with joined coordinates where it holds the list of (start, stop) tuples.
 
     :param h5f: the hdf5 file handler
+    :param chunk_size: Size of the chunk reading
 
-    :return: dictionary linking genedata to the genedata identifier
+    :return: Dictionary linking each column name to an array indexed by genedata identifier
 
     :raises KeyError: If a Genedata entry with joined coordinates is not found in the annotations.joinCoordinates table.
     """
+    table = h5f.get_node("/annotations/genedata")
+    genedata_ids = table.col("genedata_id")
+    size = int(genedata_ids.max()) + 1 if len(genedata_ids) > 0 else 0
+
+    numeric_fields = ["start", "stop", "position", "genetic_code"]
+    string_fields = {
+        "strand": "strand",
+        "gene_type": "type",
+        "name": "name",
+        "product": "product",
+    }
+    columns = {field: np.zeros(size, dtype=np.uint32) for field in numeric_fields}
+    columns.update({field: np.empty(size, dtype=object) for field in string_fields})
+    columns["has_joined_coordinates"] = np.zeros(size, dtype=bool)
+    columns["coordinates"] = np.empty(size, dtype=object)
+
+    for chunk in read_chunks_as_arrays(table, chunk=chunk_size):
+        ids = chunk["genedata_id"]
+        for field in numeric_fields:
+            columns[field][ids] = chunk[field]
+        for field, category in string_fields.items():
+            columns[field][ids] = decode_column(
+                chunk[field],
+                categorical=True,
+                categories=ANNOTATION_CATEGORIES[category],
+            )
+        if "has_joined_coordinates" in chunk.dtype.names:
+            # manage gene with joined coordinates if the info exists
+            columns["has_joined_coordinates"][ids] = chunk["has_joined_coordinates"]
 
     genedata_id_to_coordinates = read_join_coordinates(h5f)
+    for genedata_id in np.flatnonzero(columns["has_joined_coordinates"]).tolist():
+        try:
+            columns["coordinates"][genedata_id] = genedata_id_to_coordinates[
+                genedata_id
+            ]
+        except KeyError:
+            raise KeyError(
+                f"Genedata {genedata_id} is supposed to have joined "
+                "coordinates but is not found in annotations.joinCoordinates table"
+            )
+    return columns
 
-    table = h5f.root.annotations.genedata
-    genedata_id2genedata = {}
-    for row in read_chunks(table, chunk=20000):
-        start = int(row["start"])
-        stop = int(row["stop"])
 
-        if (
-            "has_joined_coordinates" in row.dtype.names
-            and row["has_joined_coordinates"]
-        ):
-            # manage gene with joined coordinates if the info exists
+def read_genedata(h5f: tables.File) -> Dict[int, Genedata]:
+    """
+    Reads the genedata table and returns a genedata_id2genedata dictionary
 
-            try:
-                coordinates = genedata_id_to_coordinates[row["genedata_id"]]
-            except KeyError:
-                raise KeyError(
-                    f'Genedata {row["genedata_id"]} is supposed to have joined '
-                    "coordinates but is not found in annotations.joinCoordinates table"
-                )
-        else:
-            coordinates = [(start, stop)]
+    :param h5f: the hdf5 file handler
 
-        genedata = Genedata(
+    :return: dictionary linking genedata to the genedata identifier
+
+    :raises KeyError: If a Genedata entry with joined coordinates is not found in the annotations.joinCoordinates table.
+    """
+    columns = read_genedata_columns(h5f)
+    genedata_ids = h5f.root.annotations.genedata.col("genedata_id").tolist()
+
+    genedata_id2genedata = {}
+    for genedata_id in genedata_ids:
+        start = int(columns["start"][genedata_id])
+        stop = int(columns["stop"][genedata_id])
+        coordinates = columns["coordinates"][genedata_id]
+        genedata_id2genedata[genedata_id] = Genedata(
             start=start,
             stop=stop,
-            strand=row["strand"].decode(),
-            gene_type=row["gene_type"].decode(),
-            position=int(row["position"]),
-            name=row["name"].decode(),
-            product=row["product"].decode(),
-            genetic_code=int(row["genetic_code"]),
-            coordinates=coordinates,
+            strand=columns["strand"][genedata_id],
+            gene_type=columns["gene_type"][genedata_id],
+            position=int(columns["position"][genedata_id]),
+            name=columns["name"][genedata_id],
+            product=columns["product"][genedata_id],
+            genetic_code=int(columns["genetic_code"][genedata_id]),
+            coordinates=coordinates if coordinates is not None else [(start, stop)],
         )
 
-        genedata_id = row["genedata_id"]
-        genedata_id2genedata[genedata_id] = genedata
-
     return genedata_id2genedata
 
 
-def read_join_coordinates(h5f: tables.File) -> Dict[str, List[Tuple[int, int]]]:
+def read_join_coordinates(h5f: tables.File) -> Dict[int, List[Tuple[int, int]]]:
     """
     Read join coordinates from a HDF5 file and return a dictionary mapping genedata_id to coordinates.
 
     :param h5f: An HDF5 file object.
     :return: A dictionary mapping genedata_id to a list of tuples representing start and stop coordinates.
     """
-    genedata_id_to_coordinates = defaultdict(list)
-
-    if not hasattr(h5f.root.annotations, "joinedCoordinates"):
+    if (
+        "/annotations/joinedCoordinates" not in h5f
+        or h5f.get_node("/annotations/joinedCoordinates").nrows == 0
+    ):
         # then the pangenome file has no joined annotations
         # or has been made before the joined annotations coordinates
         return {}
 
-    table = h5f.root.annotations.joinedCoordinates
+    table = h5f.get_node("/annotations/joinedCoordinates")
+    coordinates = np.concatenate(list(read_chunks_as_arrays(table, chunk=20000)))
 
-    for row in read_chunks(table, chunk=20000):
-        genedata_id = row["genedata_id"]
-
-        genedata_id_to_coordinates[genedata_id].append(
-            (int(row["coordinate_rank"]), int(row["start"]), int(row["stop"]))
-        )
+    # sort coordinate by their genedata and then by their rank
+    coordinates = coordinates[
+        np.lexsort((coordinates["coordinate_rank"], coordinates["genedata_id"]))
+    ]
+    genedata_ids, first_indexes = np.unique(
+        coordinates["genedata_id"], return_index=True
+    )
+    starts = coordinates["start"].tolist()
+    stops = coordinates["stop"].tolist()
+    last_indexes = first_indexes[1:].tolist() + [len(coordinates)]
 
-    # sort coordinate by their rank
     genedata_id_to_sorted_coordinates = {}
-    for genedata_id, coordinates in genedata_id_to_coordinates.items():
-        sorted_coordinates = [
-            (start, stop) for rank, start, stop in sorted(coordinates)
-        ]
-        genedata_id_to_sorted_coordinates[genedata_id] = sorted_coordinates
+    for genedata_id, first, last in zip(
+        genedata_ids.tolist(), first_indexes.tolist(), last_indexes
+    ):
+        genedata_id_to_sorted_coordinates[genedata_id] = list(
+            zip(starts[first:last], stops[first:last])
+        )
 
     return genedata_id_to_sorted_coordinates
 
@@ -275,13 +412,184 @@ def read_sequences(h5f: tables.File) -> dict:
     :param h5f: the hdf5 file handler
     :return: dictionary linking sequences to the seq identifier
     """
-    table = h5f.root.annotations.sequences
+    table = h5f.get_node("/annotations/sequences")
     seqid2seq = {}
     for row in read_chunks(table, chunk=20000):
         seqid2seq[row["seqid"]] = row["dna"].decode()
     return seqid2seq
 
 
+def read_table(h5f: tables.File, path: str) -> np.ndarray:
+    """
+    Reads a whole table of the pangenome file
+
+    :param h5f: Pangenome HDF5 file
+    :param path: Path of the table in the file
+
+    :return: Rows of the table as a numpy structured array
+    """
+    return h5f.get_node(path).read()
+
+
+def read_file_part(filename: str, reader: Callable, *args) -> Any:
+    """
+    Opens the pangenome file to read a part of it. Used by worker processes, which cannot share
+    the file opened by the main process.
+
+    :param filename: Path to the pangenome file
+    :param reader: Function reading the part of the file, with the opened file as first argument
+    :param args: Other arguments of the reader
+
+    :return: What is returned by the reader
+    """
+    with tables.open_file(filename, "r") as h5f:
+        return reader(h5f, *args)
+
+
+class PrefetchedTable:
+    """
+    Table of the pangenome file already read in memory.
+    It provides the part of the tables.Table interface used by the pangenome readers.
+
+    :param rows: Rows of the table as a numpy structured array
+    """
+
+    def __init__(self, rows: np.ndarray):
+        """Constructor method"""
+        self.rows = rows
+
+    @property
+    def nrows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.rows.dtype
+
+    @property
+    def colnames(self) -> List[str]:
+        return list(self.rows.dtype.names)
+
+    @property
+    def coldtypes(self) -> Dict[str, np.dtype]:
+        return {name: self.rows.dtype[name] for name in self.rows.dtype.names}
+
+    @property
+    def coltypes(self) -> Dict[str, str]:
+        return {
+            name: "string" if dtype.kind == "S" else dtype.name
+            for name, dtype in self.coldtypes.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def read(
+        self, start: int = None, stop: int = None, field: str = None
+    ) -> np.ndarray:
+        rows = self.rows[start:stop]
+        return rows if field is None else rows[field]
+
+    def col(self, name: str) -> np.ndarray:
+        return self.rows[name]
+
+
+class PrefetchedFile:
+    """
+    Pangenome file whose tables are read by worker processes while the main process uses them.
+
+    Tables are decompressed and decoded concurrently, in the order they were requested, and the main process
+    only waits for a table if it has not been read yet when it needs it. Other tables and attributes
+    are read from the file opened by the main process, like with a tables.File.
+
+    :param h5f: Pangenome HDF5 file opened by the main process
+    :param executor: Pool of worker processes reading the file
+    """
+
+    def __init__(self, h5f: tables.File, executor: ProcessPoolExecutor):
+        """Constructor method"""
+        self.h5f = h5f
+        self.executor = executor
+        self._tables = {}
+        self._uses = Counter()
+        self._parts = {}
+
+    @property
+    def root(self) -> tables.Group:
+        return self.h5f.root
+
+    @property
+    def filename(self) -> str:
+        return self.h5f.filename
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.h5f
+
+    def prefetch_table(self, path: str):
+        """
+        Starts reading a table in a worker process, if it is in the file.
+        A table prefetched several times is kept until it has been got as many times.
+
+        :param path: Path of the table in the file
+        """
+        if path in self.h5f:
+            if path not in self._tables:
+                self._tables[path] = self.executor.submit(
+                    read_file_part, self.filename, read_table, path
+                )
+            self._uses[path] += 1
+
+    def prefetch_part(self, reader: Callable):
+        """
+        Starts reading a part of the file in a worker process
+
+        :param reader: Function reading the part of the file, with the opened file as only argument
+        """
+        if reader not in self._parts:
+            self._parts[reader] = self.executor.submit(
+                read_file_part, self.filename, reader
+            )
+
+    def get_part(self, reader: Callable) -> Any:
+        """
+        Gets a part of the file read by a worker process, or reads it if it has not been prefetched
+
+        :param reader: Function reading the part of the file, as given to prefetch_part
+
+        :return: What is returned by the reader
+        """
+        if reader in self._parts:
+            return self._parts.pop(reader).result()
+        return reader(self)
+
+    def get_node(self, path: str):
+        """
+        Gets a table read by a worker process, or a node of the file if it has not been prefetched
+
+        :param path: Path of the node in the file
+
+        :return: The prefetched table or the node of the file
+        """
+        if path in self._tables:
+            table = PrefetchedTable(self._tables[path].result())
+            self._uses[path] -= 1
+            if self._uses[path] == 0:
+                # the table is released as soon as it is not needed anymore
+                del self._tables[path]
+            return table
+        return self.h5f.get_node(path)
+
+    def close(self):
+        """
+        Stops the worker processes and closes the file
+        """
+        # shutdown(cancel_futures=True) is not available before python 3.9
+        for future in list(self._tables.values()) + list(self._parts.values()):
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        self.h5f.close()
+
+
 def get_non_redundant_gene_sequences_from_file(
     pangenome_filename: str, output: Path, add: str = "", disable_bar: bool = False
 ):
@@ -390,12 +698,7 @@ def get_families_from_genes(h5f: tables.File, genes: Set[bytes]) -> Set[bytes]:
     :return: A set of gene family names (as bytes) associated with the specified genes.
     """
 
-    families = set()
-    for row in read_chunks(h5f.root.geneFamilies, chunk=20000):
-        if row["gene"] in genes:
-            families.add(row["geneFam"])
-
-    return families
+    return set(lookup_rows(h5f.root.geneFamilies, "gene", genes, "geneFam").tolist())
 
 
 def read_module_families_from_pangenome_file(
@@ -459,15 +762,7 @@ def get_genes_from_families(h5f: tables.File, families: List[bytes]) -> Set[byte
     :return: A set of genes (as bytes) that belong to the specified families.
     """
 
-    matching_genes = set()
-
-    gene_fam_table = h5f.root.geneFamilies
-
-    for row in read_chunks(gene_fam_table, chunk=20000):
-        if row["geneFam"] in families:
-            matching_genes.add(row["gene"])
-
-    return matching_genes
+    return set(lookup_rows(h5f.root.geneFamilies, "geneFam", families, "gene").tolist())
 
 
 def get_seqid_to_genes(
@@ -490,16 +785,18 @@ def get_seqid_to_genes(
     seq_id_to_genes = defaultdict(list)
     gene_seq_table = h5f.root.annotations.geneSequences
     match_count = 0
+    if get_all_genes:
+        rows = read_chunks(gene_seq_table, chunk=20000)
+    else:
+        rows = lookup_rows(gene_seq_table, "gene", genes)
     for row in tqdm(
-        read_chunks(gene_seq_table, chunk=20000),
-        total=gene_seq_table.nrows,
+        rows,
+        total=gene_seq_table.nrows if get_all_genes else len(rows),
         unit="gene",
         disable=disable_bar,
     ):
-
-        if get_all_genes or row["gene"] in genes:
-            seq_id_to_genes[row["seqid"]].append(row["gene"].decode())
-            match_count += 1
+        seq_id_to_genes[row["seqid"]].append(row["gene"].decode())
+        match_count += 1
 
     assert get_all_genes or match_count == len(
         genes
@@ -535,14 +832,12 @@ def write_genes_seq_from_pangenome_file(
             total=len(seq_id_to_genes), unit="sequence", disable=disable_bar
         ) as pbar:
 
-            for row in read_chunks(table=seq_table, chunk=20000):
-                if row["seqid"] in seq_id_to_genes:
+            for row in iter_lookup_rows(seq_table, "seqid", seq_id_to_genes.keys()):
+                for seq_name in seq_id_to_genes[row["seqid"]]:
+                    file_obj.write(f">{seq_name}\n")
+                    file_obj.write(row["dna"].decode() + "\n")
 
-                    for seq_name in seq_id_to_genes[row["seqid"]]:
-                        file_obj.write(f">{seq_name}\n")
-                        file_obj.write(row["dna"].decode() + "\n")
-
-                    pbar.update(1)
+                pbar.update(1)
 
 
 def get_gene_to_genome(h5f: tables.File) -> Dict[bytes, bytes]:
@@ -566,6 +861,92 @@ def get_gene_to_genome(h5f: tables.File) -> Dict[bytes, bytes]:
     return gene_to_genome
 
 
+def get_presence_absence_names(h5f: tables.File) -> Tuple[List[str], List[str]]:
+    """
+    Get the gene families and the genomes corresponding to the rows and columns of the presence/absence matrix.
+
+    :param h5f: The open HDF5 pangenome file containing the presence/absence matrix.
+    :return: Names of the gene families, in the row order, and names of the genomes, in the column order.
+    """
+    group = h5f.root.presenceAbsence
+    return decode_column(group.families.read()), decode_column(group.genomes.read())
+
+
+def get_presence_absence_partitions(h5f: tables.File) -> List[str]:
+    """
+    Get the partition of the gene families in the row order of the presence/absence matrix.
+
+    :param h5f: The open HDF5 pangenome file containing the presence/absence matrix and the gene families information.
+    :return: Partition of each gene family of the matrix. Empty if the pangenome has not been partitioned.
+    """
+    fam_info = h5f.root.geneFamiliesInfo
+    family_to_partition = dict(
+        zip(fam_info.col("name").tolist(), fam_info.col("partition").tolist())
+    )
+    return [
+        family_to_partition[family].decode()
+        for family in h5f.root.presenceAbsence.families.read().tolist()
+    ]
+
+
+def read_presence_absence(
+    h5f: tables.File,
+    start: int = 0,
+    stop: int = None,
+    genomes: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Read a slice of the presence/absence matrix. Only the chunks of the matrix holding the asked rows are read.
+
+    :param h5f: The open HDF5 pangenome file containing the presence/absence matrix.
+    :param start: First gene family row to read
+    :param stop: Row after the last gene family to read. Default is the last row.
+    :param genomes: Indexes of the genome columns to keep, in the wanted order. Default is all genomes.
+    :return: Boolean matrix with the gene families in rows and the genomes in columns
+    """
+    group = h5f.root.presenceAbsence
+    presence = np.unpackbits(
+        group.matrix[start:stop], axis=1, count=group.genomes.nrows
+    ).astype(bool)
+    return presence if genomes is None else presence[:, genomes]
+
+
+def read_copy_number(
+    h5f: tables.File,
+    start: int = 0,
+    stop: int = None,
+    genomes: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Read a slice of the matrix of the number of copies of the gene families in the genomes.
+
+    :param h5f: The open HDF5 pangenome file containing the presence/absence matrix.
+    :param start: First gene family row to read
+    :param stop: Row after the last gene family to read. Default is the last row.
+    :param genomes: Indexes of the genome columns to keep, in the wanted order. Default is all genomes.
+    :return: Matrix with the number of genes of each gene family (rows) in each genome (columns)
+    """
+    copy_number = h5f.root.presenceAbsence.copyNumber[start:stop]
+    return copy_number if genomes is None else copy_number[:, genomes]
+
+
+def iter_presence_absence(
+    h5f: tables.File, copy_number: bool = False
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Read the presence/absence matrix by blocks of rows matching the chunks of the file.
+
+    :param h5f: The open HDF5 pangenome file containing the presence/absence matrix.
+    :param copy_number: Read the number of copies instead of the presence/absence
+    :return: Index of the first gene family of each block, and the block
+    """
+    group = h5f.root.presenceAbsence
+    chunk_rows = group.matrix.chunkshape[0]
+    read = read_copy_number if copy_number else read_presence_absence
+    for start in range(0, group.matrix.nrows, chunk_rows):
+        yield start, read(h5f, start, start + chunk_rows)
+
+
 def get_family_to_genome_count(h5f: tables.File) -> Dict[bytes, int]:
     """
     Computes the number of unique genomes associated with each gene family.
@@ -573,6 +954,16 @@ def get_family_to_genome_count(h5f: tables.File) -> Dict[bytes, int]:
     :param h5f: The open HDF5 pangenome file containing contig, gene, and gene family data.
     :return: A dictionary mapping gene family names (as bytes) to the count of unique genomes.
     """
+    if "/presenceAbsence" in h5f:
+        genome_counts = np.concatenate(
+            [block.sum(axis=1) for _, block in iter_presence_absence(h5f)]
+        )
+        return dict(
+            zip(
+                h5f.root.presenceAbsence.families.read().tolist(),
+                genome_counts.tolist(),
+            )
+        )
 
     contig_id_to_genome = {
         row["ID"]: row["genome"]
@@ -617,6 +1008,51 @@ def get_soft_core_families(h5f: tables.File, soft_core: float) -> Set[bytes]:
     return soft_core_families
 
 
+def get_family_edges(h5f: tables.File) -> Dict[Tuple[bytes, bytes], Tuple[int, int]]:
+    """
+    Get the edges of the pangenome graph at the gene family level, with the number of genomes and gene pairs
+    supporting each edge. Files written without the family level table get it aggregated from the gene pairs.
+
+    :param h5f: The open HDF5 pangenome file containing the graph.
+    :return: A dictionary mapping the pair of gene family names (as bytes) of each edge to its number of genomes
+             and number of gene pairs.
+    """
+    if "/familyEdges" in h5f:
+        return {
+            (row["familySource"], row["familyTarget"]): (
+                row["genomes"],
+                row["genePairs"],
+            )
+            for row in read_chunks(h5f.root.familyEdges, chunk=20000)
+        }
+
+    edge_table = h5f.root.edges
+    sources, targets = edge_table.col("geneSource"), edge_table.col("geneTarget")
+    if edge_table.coltypes["geneSource"] != "string":
+        gene_ids = h5f.root.annotations.genes.col("ID")
+        sources, targets = gene_ids[sources], gene_ids[targets]
+
+    gene_to_genome = get_gene_to_genome(h5f)
+    gene_to_family = {
+        row["gene"]: row["geneFam"]
+        for row in read_chunks(h5f.root.geneFamilies, chunk=20000)
+    }
+    edge_to_genomes = {}
+    edge_to_pairs = Counter()
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        families = (gene_to_family[source], gene_to_family[target])
+        key = frozenset(families)
+        if key not in edge_to_genomes:
+            edge_to_genomes[key] = (families, set())
+        edge_to_genomes[key][1].add(gene_to_genome[source])
+        edge_to_pairs[key] += 1
+
+    return {
+        edge: (len(genomes), edge_to_pairs[key])
+        for key, (edge, genomes) in edge_to_genomes.items()
+    }
+
+
 def write_fasta_gene_fam_from_pangenome_file(
     pangenome_filename: str,
     output: Path,
@@ -817,15 +1253,59 @@ def write_genes_from_pangenome_file(
     )
 
 
-def read_graph(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False):
+def read_graph_gene_ids(
+    pangenome: Pangenome, table: tables.Table, disable_bar: bool = False
+):
+    """
+    Read the graph edges of pangenome files written with gene identifiers instead of gene row indexes
+
+    :param pangenome: Pangenome object without graph information
+    :param table: Edges table with gene identifiers
+    :param disable_bar: Disable the progress bar
+    """
+    for row in tqdm(
+        read_chunks(table, chunk=20000),
+        total=table.nrows,
+        unit="contig adjacency",
+        disable=disable_bar,
+    ):
+        source = pangenome.get_gene(row["geneSource"].decode())
+        target = pangenome.get_gene(row["geneTarget"].decode())
+        pangenome.add_edge(source, target)
+
+
+def flag_removed_families(pangenome: Pangenome):
+    """
+    Flag again the gene families removed from the graph because of their copy number when it was computed,
+    so that the gene pairs of compact edges are found again as they were built.
+
+    :param pangenome: Pangenome object with gene families
+    """
+    from ppanggolin.graph.makeGraph import remove_high_copy_number
+
+    # importing on call instead of importing on top to avoid cross-reference problems.
+    remove_copy_number = pangenome.parameters.get("graph", {}).get(
+        "remove_high_copy_number", 0
+    )
+    if remove_copy_number > 0:
+        remove_high_copy_number(pangenome, remove_copy_number)
+
+
+def read_graph(
+    pangenome: Pangenome,
+    h5f: tables.File,
+    disable_bar: bool = False,
+    compact: bool = False,
+):
     """
     Read information about graph in pangenome hdf5 file to add in pangenome object
 
     :param pangenome: Pangenome object without graph information
     :param h5f: Pangenome HDF5 file with graph information
     :param disable_bar: Disable the progress bar
+    :param compact: Build compact edges storing the number of gene pairs of each genome instead of the pairs
     """
-    table = h5f.root.edges
+    table = h5f.get_node("/edges")
 
     if pangenome.status["genomesAnnotated"] not in [
         "Computed",
@@ -835,15 +1315,50 @@ def read_graph(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
             "It's not possible to read the graph "
             "if the annotations and the gene families have not been loaded."
         )
-    for row in tqdm(
-        read_chunks(table, chunk=20000),
-        total=table.nrows,
-        unit="contig adjacency",
-        disable=disable_bar,
-    ):
-        source = pangenome.get_gene(row["geneSource"].decode())
-        target = pangenome.get_gene(row["geneTarget"].decode())
-        pangenome.add_edge(source, target)
+    if compact:
+        pangenome.use_compact_edges()
+        flag_removed_families(pangenome)
+    if table.coltypes["geneSource"] == "string":
+        read_graph_gene_ids(pangenome, table, disable_bar=disable_bar)
+    else:
+        genes = [
+            pangenome.get_gene(gene_id)
+            for gene_id in decode_column(h5f.get_node("/annotations/genes").col("ID"))
+        ]
+        family_index = {
+            family: index for index, family in enumerate(pangenome.gene_families)
+        }
+        gene_families = np.fromiter(
+            (family_index.get(gene.family, -1) for gene in genes),
+            dtype=np.int64,
+            count=len(genes),
+        )
+        organism_index = {
+            organism: index for index, organism in enumerate(pangenome.organisms)
+        }
+        gene_organisms = np.fromiter(
+            (organism_index.get(gene.organism, -1) for gene in genes),
+            dtype=np.int64,
+            count=len(genes),
+        )
+        sources = table.col("geneSource")
+        targets = table.col("geneTarget")
+        mismatch = np.flatnonzero(
+            (gene_organisms[sources] != gene_organisms[targets])
+            | (gene_organisms[sources] == -1)
+        )
+        if len(mismatch) > 0:
+            # let the edge raise the error corresponding to the first invalid pair
+            Edge(genes[sources[mismatch[0]]], genes[targets[mismatch[0]]])
+
+        pangenome.add_gene_pairs(
+            genes,
+            sources,
+            targets,
+            gene_families,
+            gene_organisms,
+            disable_bar=disable_bar,
+        )
     pangenome.status["neighborsGraph"] = "Loaded"
 
 
@@ -857,7 +1372,7 @@ def read_gene_families(
     :param h5f: Pangenome HDF5 file with gene families information
     :param disable_bar: Disable the progress bar
     """
-    table = h5f.root.geneFamilies
+    table = h5f.get_node("/geneFamilies")
 
     link = (
         True
@@ -883,6 +1398,7 @@ def read_gene_families(
         else:  # else, no
             gene_obj = Gene(row["gene"].decode())
         fam.add(gene_obj)
+    pangenome.reset_indexes()
     pangenome.status["genesClustered"] = "Loaded"
 
 
@@ -896,7 +1412,7 @@ def read_gene_families_info(
     :param h5f: Pangenome HDF5 file with gene families information
     :param disable_bar: Disable the progress bar
     """
-    table = h5f.root.geneFamiliesInfo
+    table = h5f.get_node("/geneFamiliesInfo")
 
     for row in tqdm(
         read_chunks(table, chunk=20000),
@@ -915,13 +1431,17 @@ def read_gene_families_info(
 
 
 def read_gene_sequences(
-    pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
+    pangenome: Pangenome,
+    h5f: tables.File,
+    seqid2seq: Dict[int, str] = None,
+    disable_bar: bool = False,
 ):
     """
     Read gene sequences in pangenome hdf5 file to add in pangenome object
 
     :param pangenome: Pangenome object without gene sequence associate to gene
     :param h5f: Pangenome HDF5 file with gene sequence associate to gene
+    :param seqid2seq: Sequences of the file by sequence identifier, as given by read_sequences. Read if not given.
     :param disable_bar: Disable the progress bar
     """
     if pangenome.status["genomesAnnotated"] not in ["Computed", "Loaded"]:
@@ -929,9 +1449,10 @@ def read_gene_sequences(
             "It's not possible to read the pangenome gene dna sequences "
             "if the annotations have not been loaded."
         )
-    table = h5f.root.annotations.geneSequences
+    table = h5f.get_node("/annotations/geneSequences")
 
-    seqid2seq = read_sequences(h5f)
+    if seqid2seq is None:
+        seqid2seq = read_sequences(h5f)
     for row in tqdm(
         read_chunks(table, chunk=20000),
         total=table.nrows,
@@ -959,7 +1480,7 @@ def read_rgp(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False):
             "It's not possible to read the RGP "
             "if the annotations and the gene families have not been loaded."
         )
-    table = h5f.root.RGP
+    table = h5f.get_node("/RGP")
 
     for row in tqdm(
         read_chunks(table, chunk=20000),
@@ -985,7 +1506,7 @@ def read_spots(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
     :param h5f: Pangenome HDF5 file with spot computed
     :param disable_bar: Disable the progress bar
     """
-    table = h5f.root.spots
+    table = h5f.get_node("/spots")
     spots = {}
     for row in tqdm(
         read_chunks(table, chunk=20000),
@@ -1017,7 +1538,7 @@ def read_modules(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = Fal
         raise Exception(
             "It's not possible to read the modules if the gene families have not been loaded."
         )
-    table = h5f.root.modules
+    table = h5f.get_node("/modules")
     modules = {}  # id2mod
     for row in tqdm(
         read_chunks(table, chunk=20000),
@@ -1049,14 +1570,11 @@ def read_organisms(
     :param chunk_size: Size of the chunk reading
     :param disable_bar: Disable progress bar
     """
-    for row in tqdm(
-        read_chunks(table, chunk=chunk_size),
-        total=table.nrows,
-        unit="genome",
-        disable=disable_bar,
-    ):
-        organism = Organism(row["name"].decode())
-        pangenome.add_organism(organism)
+    with tqdm(total=table.nrows, unit="genome", disable=disable_bar) as progress:
+        for chunk in read_chunks_as_arrays(table, chunk=chunk_size):
+            for name in decode_column(chunk["name"]):
+                pangenome.add_organism(Organism(name))
+            progress.update(len(chunk))
 
 
 def read_contigs(
@@ -1072,30 +1590,155 @@ def read_contigs(
     :param chunk_size: Size of the chunk reading
     :param disable_bar: Disable progress bar
     """
-    for row in tqdm(
-        read_chunks(table, chunk=chunk_size),
-        total=table.nrows,
-        unit="contig",
-        disable=disable_bar,
+    with tqdm(total=table.nrows, unit="contig", disable=disable_bar) as progress:
+        for chunk in read_chunks_as_arrays(table, chunk=chunk_size):
+            for identifier, name, is_circular, length, genome_name in zip(
+                chunk["ID"].tolist(),
+                decode_column(chunk["name"]),
+                chunk["is_circular"].tolist(),
+                chunk["length"].tolist(),
+                decode_column(chunk["genome"], categorical=True),
+            ):
+                contig = Contig(
+                    identifier=identifier, name=name, is_circular=is_circular
+                )
+                contig.length = length
+                try:
+                    organism = pangenome.get_organism(genome_name)
+                except KeyError:
+                    pass
+                else:
+                    organism.add(contig)
+            progress.update(len(chunk))
+
+
+def get_genedata_chunk_columns(
+    chunk: np.ndarray, genedata_columns: Dict[str, np.ndarray]
+) -> Dict[str, list]:
+    """
+    Join the genedata columns to a chunk of the genes or RNAs table with their genedata identifiers.
+
+    :param chunk: Chunk of a table with a 'genedata_id' column
+    :param genedata_columns: Columns of the genedata table, indexed by genedata identifier
+
+    :return: Dictionary linking each genedata column name to its values for the rows of the chunk
+    """
+    genedata_ids = chunk["genedata_id"]
+    return {
+        field: column[genedata_ids].tolist()
+        for field, column in genedata_columns.items()
+    }
+
+
+def build_genes(
+    chunk: np.ndarray, genedata: Dict[str, list]
+) -> Iterator[Tuple[Gene, int]]:
+    """
+    Build the genes of a chunk of the genes table
+
+    :param chunk: Chunk of the genes table
+    :param genedata: Genedata columns of the chunk rows, as given by get_genedata_chunk_columns
+
+    :return: Genes with the identifier of their contig
+    """
+    if "local" in chunk.dtype.names:
+        local_identifiers = decode_column(chunk["local"])
+    else:
+        local_identifiers = [""] * len(chunk)
+    for (
+        gene_id,
+        local,
+        is_fragment,
+        contig_id,
+        start,
+        stop,
+        strand,
+        gene_type,
+        name,
+        position,
+        genetic_code,
+        product,
+        coordinates,
+    ) in zip(
+        decode_column(chunk["ID"]),
+        local_identifiers,
+        chunk["is_fragment"].tolist(),
+        chunk["contig"].tolist(),
+        genedata["start"],
+        genedata["stop"],
+        genedata["strand"],
+        genedata["gene_type"],
+        genedata["name"],
+        genedata["position"],
+        genedata["genetic_code"],
+        genedata["product"],
+        genedata["coordinates"],
     ):
-        contig = Contig(
-            identifier=int(row["ID"]),
-            name=row["name"].decode(),
-            is_circular=row["is_circular"],
+        gene = Gene(gene_id)
+        gene.fill_annotations(
+            start=start,
+            stop=stop,
+            strand=strand,
+            gene_type=gene_type,
+            name=name,
+            position=position,
+            genetic_code=genetic_code,
+            product=product,
+            local_identifier=local,
+            coordinates=coordinates if coordinates is not None else [(start, stop)],
         )
-        contig.length = int(row["length"])
-        try:
-            organism = pangenome.get_organism(row["genome"].decode())
-        except KeyError:
-            pass
-        else:
-            organism.add(contig)
+        gene.is_fragment = is_fragment
+        yield gene, contig_id
+
+
+def build_rnas(
+    chunk: np.ndarray, genedata: Dict[str, list]
+) -> Iterator[Tuple[RNA, int]]:
+    """
+    Build the RNAs of a chunk of the RNAs table. RNAs with invalid coordinates are ignored.
+
+    :param chunk: Chunk of the RNAs table
+    :param genedata: Genedata columns of the chunk rows, as given by get_genedata_chunk_columns
+
+    :return: RNAs with the identifier of their contig
+    """
+    for rna_id, contig_id, start, stop, strand, gene_type, name, product in zip(
+        decode_column(chunk["ID"]),
+        chunk["contig"].tolist(),
+        genedata["start"],
+        genedata["stop"],
+        genedata["strand"],
+        genedata["gene_type"],
+        genedata["name"],
+        genedata["product"],
+    ):
+        if start > stop:
+            logging.warning(
+                f"Wrong coordinates in RNA gene {name}: Start ({start}) should not be greater than stop ({stop}). This gene is ignored."
+            )
+            continue
+        if start < 1 or stop < 1:
+            logging.warning(
+                f"Wrong coordinates in RNA gene {name}: Start ({start}) and stop ({stop}) should be greater than 0.  This gene is ignored."
+            )
+            continue
+
+        rna = RNA(rna_id)
+        rna.fill_annotations(
+            start=start,
+            stop=stop,
+            strand=strand,
+            gene_type=gene_type,
+            name=name,
+            product=product,
+        )
+        yield rna, contig_id
 
 
 def read_genes(
     pangenome: Pangenome,
     table: tables.Table,
-    genedata_dict: Dict[int, Genedata],
+    genedata_columns: Dict[str, np.ndarray],
     link: bool = True,
     chunk_size: int = 20000,
     disable_bar: bool = False,
@@ -1104,46 +1747,27 @@ def read_genes(
 
     :param pangenome: Pangenome object
     :param table: Genes table
-    :param genedata_dict: Dictionary to link genedata with gene
+    :param genedata_columns: Columns of the genedata table, indexed by genedata identifier
     :param link: Allow to link gene to organism and contig
     :param chunk_size: Size of the chunk reading
     :param disable_bar: Disable progress bar
     """
-    for row in tqdm(
-        read_chunks(table, chunk=chunk_size),
-        total=table.nrows,
-        unit="gene",
-        disable=disable_bar,
-    ):
-        gene = Gene(row["ID"].decode())
-        genedata = genedata_dict[row["genedata_id"]]
-        try:
-            local = row["local"].decode()
-        except ValueError:
-            local = ""
-        gene.fill_annotations(
-            start=genedata.start,
-            stop=genedata.stop,
-            strand=genedata.strand,
-            gene_type=genedata.gene_type,
-            name=genedata.name,
-            position=genedata.position,
-            genetic_code=genedata.genetic_code,
-            product=genedata.product,
-            local_identifier=local,
-            coordinates=genedata.coordinates,
-        )
-        gene.is_fragment = row["is_fragment"]
-        if link:
-            contig = pangenome.get_contig(identifier=int(row["contig"]))
-            gene.fill_parents(contig.organism, contig)
-            contig.add(gene)
+    contig_getter = {contig.ID: contig for contig in pangenome.contigs} if link else {}
+    with tqdm(total=table.nrows, unit="gene", disable=disable_bar) as progress:
+        for chunk in read_chunks_as_arrays(table, chunk=chunk_size):
+            genedata = get_genedata_chunk_columns(chunk, genedata_columns)
+            for gene, contig_id in build_genes(chunk, genedata):
+                if link:
+                    contig = contig_getter[contig_id]
+                    gene.fill_parents(contig.organism, contig)
+                    contig.add(gene)
+            progress.update(len(chunk))
 
 
 def read_rnas(
     pangenome: Pangenome,
     table: tables.Table,
-    genedata_dict: Dict[int, Genedata],
+    genedata_columns: Dict[str, np.ndarray],
     link: bool = True,
     chunk_size: int = 20000,
     disable_bar: bool = False,
@@ -1152,42 +1776,21 @@ def read_rnas(
 
     :param pangenome: Pangenome object
     :param table: RNAs table
-    :param genedata_dict: Dictionary to link genedata with gene
+    :param genedata_columns: Columns of the genedata table, indexed by genedata identifier
     :param link: Allow to link gene to organism and contig
     :param chunk_size: Size of the chunk reading
     :param disable_bar: Disable progress bar
     """
-    for row in tqdm(
-        read_chunks(table, chunk=chunk_size),
-        total=table.nrows,
-        unit="gene",
-        disable=disable_bar,
-    ):
-        rna = RNA(row["ID"].decode())
-        genedata = genedata_dict[row["genedata_id"]]
-        if genedata.start > genedata.stop:
-            logging.warning(
-                f"Wrong coordinates in RNA gene {genedata.name}: Start ({genedata.start}) should not be greater than stop ({genedata.stop}). This gene is ignored."
-            )
-            continue
-        if genedata.start < 1 or genedata.stop < 1:
-            logging.warning(
-                f"Wrong coordinates in RNA gene {genedata.name}: Start ({genedata.start}) and stop ({genedata.stop}) should be greater than 0.  This gene is ignored."
-            )
-            continue
-
-        rna.fill_annotations(
-            start=genedata.start,
-            stop=genedata.stop,
-            strand=genedata.strand,
-            gene_type=genedata.gene_type,
-            name=genedata.name,
-            product=genedata.product,
-        )
-        if link:
-            contig = pangenome.get_contig(int(row["contig"]))
-            rna.fill_parents(contig.organism, contig)
-            contig.add_rna(rna)
+    contig_getter = {contig.ID: contig for contig in pangenome.contigs} if link else {}
+    with tqdm(total=table.nrows, unit="gene", disable=disable_bar) as progress:
+        for chunk in read_chunks_as_arrays(table, chunk=chunk_size):
+            genedata = get_genedata_chunk_columns(chunk, genedata_columns)
+            for rna, contig_id in build_rnas(chunk, genedata):
+                if link:
+                    contig = contig_getter[contig_id]
+                    rna.fill_parents(contig.organism, contig)
+                    contig.add_rna(rna)
+            progress.update(len(chunk))
 
 
 def read_annotation(
@@ -1197,6 +1800,7 @@ def read_annotation(
     load_contigs: bool = True,
     load_genes: bool = True,
     load_rnas: bool = True,
+    genedata_columns: Dict[str, np.ndarray] = None,
     chunk_size: int = 20000,
     disable_bar: bool = False,
 ):
@@ -1209,15 +1813,17 @@ def read_annotation(
     :param load_contigs: Flag to load contigs
     :param load_genes: Flag to load genes
     :param load_rnas: Flag to load RNAs
+    :param genedata_columns: Columns of the genedata table, as given by read_genedata_columns. Read if not given.
     :param chunk_size: Size of chunks reading
     :param disable_bar: Disable the progress bar
     """
-    annotations = h5f.root.annotations
-    genedata_dict = None
+    if (load_genes or load_rnas) and genedata_columns is None:
+        genedata_columns = read_genedata_columns(h5f, chunk_size=chunk_size)
+
     if load_organisms:
         read_organisms(
             pangenome,
-            annotations.genomes,
+            h5f.get_node("/annotations/genomes"),
             chunk_size=chunk_size,
             disable_bar=disable_bar,
         )
@@ -1225,17 +1831,16 @@ def read_annotation(
     if load_contigs:
         read_contigs(
             pangenome,
-            annotations.contigs,
+            h5f.get_node("/annotations/contigs"),
             chunk_size=chunk_size,
             disable_bar=disable_bar,
         )
 
     if load_genes:
-        genedata_dict = read_genedata(h5f)
         read_genes(
             pangenome,
-            annotations.genes,
-            genedata_dict,
+            h5f.get_node("/annotations/genes"),
+            genedata_columns,
             all([load_organisms, load_contigs]),
             chunk_size=chunk_size,
             disable_bar=disable_bar,
@@ -1243,8 +1848,8 @@ def read_annotation(
     if load_rnas:
         read_rnas(
             pangenome,
-            annotations.RNAs,
-            read_genedata(h5f) if genedata_dict is None else genedata_dict,
+            h5f.get_node("/annotations/RNAs"),
+            genedata_columns,
             all([load_organisms, load_contigs]),
             chunk_size=chunk_size,
             disable_bar=disable_bar,
@@ -1340,80 +1945,122 @@ def read_info(h5f):
         return {"Content": content}
 
 
+def get_metadata_element_getter(pangenome: Pangenome, metatype: str) -> Callable:
+    """
+    Get the method of the pangenome giving the element with metadata from its identifier
+
+    :param pangenome: Pangenome object
+    :param metatype: Object type associated to the metadata
+
+    :return: Method getting the pangenome element from its identifier
+
+    :raises KeyError: The metatype is not an object type with metadata
+    """
+    getters = {
+        "families": pangenome.get_gene_family,
+        "genomes": pangenome.get_organism,
+        "contigs": pangenome.get_contig,
+        "genes": pangenome.get_gene,
+        "RGPs": pangenome.get_region,
+        "spots": pangenome.get_spot,
+        "modules": pangenome.get_module,
+    }
+    if metatype not in getters:
+        raise KeyError(
+            f"The metatype {metatype} is unexpected. Object associated with metadata are {list(getters)}"
+        )
+    return getters[metatype]
+
+
+def read_metadata_columns(
+    rows: np.ndarray,
+) -> Tuple[np.ndarray, Optional[List[int]], Dict[str, list]]:
+    """
+    Splits rows of a metadata table into the element identifiers, the metadata identifiers
+    and the decoded values of the metadata fields.
+
+    :param rows: Rows of a metadata table as a numpy structured array
+
+    :return: Element identifiers as stored in the table, metadata identifiers (None for files written
+             without them) and values of each field of the metadata
+    """
+    meta_ids = (
+        rows["metadata_id"].tolist() if "metadata_id" in rows.dtype.names else None
+    )
+    fields = {}
+    for field in rows.dtype.names:
+        if field not in ["ID", "name"]:
+            if rows.dtype[field].kind == "S":
+                fields[field] = decode_column(rows[field], categorical=True)
+            else:
+                fields[field] = rows[field].tolist()
+    return rows["ID"], meta_ids, fields
+
+
 def read_metadata(
     pangenome: Pangenome,
     h5f: tables.File,
     metatype: str,
     sources: Set[str] = None,
+    chunk_size: int = 20000,
     disable_bar: bool = False,
 ):
     """Read metadata to add them to the pangenome object
 
+    Each chunk of a source table is read as a structured array.
+    The elements of the chunk are then resolved once per distinct identifier.
+
     :param pangenome: Pangenome object
     :param h5f: Pangenome file
     :param metatype: Object type to associate metadata
     :param sources: Source name of metadata
+    :param chunk_size: Size of chunks reading
     :param disable_bar: Disable progress bar
     """
-    metadata_group = h5f.root.metadata._f_get_child(metatype)
+    get_element = get_metadata_element_getter(pangenome, metatype)
     for source in sources:
-        source_table = metadata_group._f_get_child(source)
-        for row in tqdm(
-            read_chunks(source_table),
-            total=source_table.nrows,
-            unit="metadata",
-            disable=disable_bar,
-        ):
-            meta_dict = {"source": source}
-            try:
-                meta_id = int(row["metadata_id"])
-            except KeyError:
-                meta_id = None
-            identifier = (
-                row["ID"].decode("utf-8")
-                if isinstance(row["ID"], bytes)
-                else int(row["ID"])
-            )
-            # else:
-            #     identifier = row["name"].decode()
-            if metatype == "families":
-                element = pangenome.get_gene_family(identifier)
-            elif metatype == "genomes":
-                element = pangenome.get_organism(identifier)
-            elif metatype == "genes":
-                element = pangenome.get_gene(identifier)
-            elif metatype == "RGPs":
-                element = pangenome.get_region(identifier)
-            elif metatype == "spots":
-                element = pangenome.get_spot(identifier)
-            elif metatype == "modules":
-                element = pangenome.get_module(identifier)
-            elif metatype == "contigs":
-                element = pangenome.get_contig(identifier)
-            else:
-                expected_types = [
-                    "families",
-                    "genomes",
-                    "contigs",
-                    "genes",
-                    "RGPs",
-                    "spots",
-                    "modules",
-                ]
-                raise KeyError(
-                    f"The metatype {metatype} is unexpected. Object associated with metadata are {expected_types}"
-                )
-            for field in row.dtype.names:
-                if field not in ["ID", "name"]:
-                    meta_dict[field] = (
-                        row[field].decode()
-                        if isinstance(row[field], bytes)
-                        else row[field]
+        source_table = h5f.get_node(f"/metadata/{metatype}/{source}")
+        with tqdm(
+            total=source_table.nrows, unit="metadata", disable=disable_bar
+        ) as progress:
+            for rows in read_chunks_as_arrays(source_table, chunk=chunk_size):
+                identifiers, meta_ids, fields = read_metadata_columns(rows)
+                uniques, inverse = np.unique(identifiers, return_inverse=True)
+                if uniques.dtype.kind == "S":
+                    uniques = decode_column(uniques)
+                else:
+                    uniques = uniques.tolist()
+                elements = [get_element(identifier) for identifier in uniques]
+                for index, element_index in enumerate(inverse.ravel().tolist()):
+                    meta_dict = {
+                        field: values[index] for field, values in fields.items()
+                    }
+                    elements[element_index].add_metadata(
+                        metadata=Metadata(source, **meta_dict),
+                        metadata_id=None if meta_ids is None else meta_ids[index],
                     )
-            element.add_metadata(metadata=Metadata(**meta_dict), metadata_id=meta_id)
+                progress.update(len(rows))
     pangenome.status["metadata"][metatype] = "Loaded"
 
 
+def read_partition_model(h5f: tables.File) -> Dict[str, Any]:
+    """
+    Read the partition model saved by the last partitioning of all the genomes at once
+
+    :param h5f: Pangenome HDF5 file
+    :return: Arrays and values of the partition model, empty if the pangenome file has none
+    """
+    if "/info/partitionModel" not in h5f:
+        return {}
+    group = h5f.root.info.partitionModel
+    partition_model = {
+        name: group._v_attrs[name] for name in group._v_attrs._f_list("user")
+    }
+    for array in group._f_iter_nodes("Array"):
+        partition_model[array.name] = array.read()
+    return partition_model
+
+
 def read_parameters(h5f: tables.File):
     """
     Read pangenome parameters
@@ -1447,6 +2094,83 @@ def get_pangenome_parameters(h5f: tables.File) -> Dict[str, Dict[str, Any]]:
             return info_group._v_attrs["parameters"]
 
 
+def get_metadata_sources(
+    h5f: tables.File, metatype: str, sources: Set[str] = None
+) -> Set[str]:
+    """
+    Get the sources of a metatype with metadata in the pangenome file
+
+    :param h5f: Pangenome HDF5 file
+    :param metatype: Object type associated to the metadata
+    :param sources: Sources of the metadata to get (None means all sources)
+
+    :return: Sources of the metatype metadata found in the file
+    """
+    metastatus = h5f.root.status._f_get_child("metastatus")
+    metasources = h5f.root.status._f_get_child("metasources")
+    if (
+        metatype not in metastatus._v_attrs._f_list()
+        or not metastatus._v_attrs[metatype]
+    ):
+        return set()
+    metatype_sources = set(metasources._v_attrs[metatype])
+    return metatype_sources if sources is None else metatype_sources & sources
+
+
+def prefetch_pangenome(
+    h5f: PrefetchedFile,
+    annotation: bool = False,
+    gene_families: bool = False,
+    graph: bool = False,
+    rgp: bool = False,
+    spots: bool = False,
+    gene_sequences: bool = False,
+    modules: bool = False,
+    metadata: bool = False,
+    metatypes: Set[str] = None,
+    sources: Set[str] = None,
+):
+    """
+    Starts reading the tables needed to read the asked parts of the pangenome, in the order they are used.
+
+    :param h5f: Pangenome file read by worker processes
+    :param annotation: get annotation
+    :param gene_families: get gene families
+    :param graph: get graph
+    :param rgp: get RGP
+    :param spots: get hotspot
+    :param gene_sequences: get gene sequences
+    :param modules: get modules
+    :param metadata: get metadata
+    :param metatypes: metatypes of the metadata to get
+    :param sources: sources of the metadata to get (None means all sources)
+    """
+    status = h5f.root.status._v_attrs
+    if annotation and status.genomesAnnotated:
+        h5f.prefetch_part(read_genedata_columns)
+        for table in ["genomes", "contigs", "genes", "RNAs"]:
+            h5f.prefetch_table(f"/annotations/{table}")
+    if gene_sequences and status.geneSequences:
+        h5f.prefetch_part(read_sequences)
+        h5f.prefetch_table("/annotations/geneSequences")
+    if gene_families and status.genesClustered:
+        h5f.prefetch_table("/geneFamilies")
+        h5f.prefetch_table("/geneFamiliesInfo")
+    if graph and status.NeighborsGraph:
+        h5f.prefetch_table("/annotations/genes")
+        h5f.prefetch_table("/edges")
+    if rgp and status.predictedRGP:
+        h5f.prefetch_table("/RGP")
+    if spots and status.spots:
+        h5f.prefetch_table("/spots")
+    if modules and status.modules:
+        h5f.prefetch_table("/modules")
+    if metadata and status.metadata:
+        for metatype in metatypes:
+            for source in get_metadata_sources(h5f, metatype, sources):
+                h5f.prefetch_table(f"/metadata/{metatype}/{source}")
+
+
 def read_pangenome(
     pangenome,
     annotation: bool = False,
@@ -1459,6 +2183,8 @@ def read_pangenome(
     metadata: bool = False,
     metatypes: Set[str] = None,
     sources: Set[str] = None,
+    cpu: int = 1,
+    compact_graph: bool = False,
     disable_bar: bool = False,
 ):
     """
@@ -1476,6 +2202,11 @@ def read_pangenome(
     :param metadata: get metadata
     :param metatypes: metatypes of the metadata to get
     :param sources: sources of the metadata to get (None means all sources)
+    :param cpu: Number of processes reading and decoding the tables of the file while the pangenome objects
+                are built, for pangenomes with at least PREFETCH_MIN_GENES genes. Tables are then read whole
+                instead of by chunks, which uses more memory, so a single process is used if the pangenome
+                is estimated to need more memory than available.
+    :param compact_graph: Read compact edges storing the number of gene pairs of each genome instead of the pairs
     :param disable_bar: Allow to disable the progress bar
     """
     if pangenome.file is None:
@@ -1484,14 +2215,81 @@ def read_pangenome(
         )
     filename = pangenome.file
 
+    # importing on call instead of importing on top to avoid cross-reference problems.
+    from ppanggolin.info.info import (
+        estimate_loading_memory,
+        format_memory,
+        get_available_memory,
+    )
+
+    estimated_memory = estimate_loading_memory(
+        pangenome,
+        annotation,
+        gene_families,
+        graph,
+        rgp,
+        spots,
+        modules,
+        metadata,
+    )
+    logging.getLogger("PPanGGOLiN").debug(
+        f"Reading the pangenome is estimated to need {format_memory(estimated_memory)} of memory"
+    )
+    available_memory = get_available_memory()
+    enough_memory = available_memory is None or estimated_memory <= available_memory
+    if not enough_memory:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"Reading the pangenome is estimated to need {format_memory(estimated_memory)} of memory, "
+            f"more than the {format_memory(available_memory)} available."
+        )
+
     h5f = tables.open_file(filename, "r")
+    prefetch = (
+        cpu > 1
+        and "/annotations/genes" in h5f
+        and h5f.root.annotations.genes.nrows >= PREFETCH_MIN_GENES
+    )
+    if cpu > 1 and not prefetch:
+        logging.getLogger("PPanGGOLiN").debug(
+            f"The pangenome has less than {PREFETCH_MIN_GENES} genes: tables are read by chunks in a single process."
+        )
+    elif prefetch and not enough_memory:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"{cpu} cpus were requested to read the pangenome, but its tables are read by chunks "
+            f"in a single process instead, as reading them whole in several processes would need more memory."
+        )
+        prefetch = False
+    if prefetch:
+        h5f = PrefetchedFile(
+            h5f, ProcessPoolExecutor(max_workers=cpu, mp_context=get_context("fork"))
+        )
+        prefetch_pangenome(
+            h5f,
+            annotation,
+            gene_families,
+            graph,
+            rgp,
+            spots,
+            gene_sequences,
+            modules,
+            metadata,
+            metatypes,
+            sources,
+        )
 
     if (
         annotation
     ):  # I place annotation here, to link gene to gene families if organism are not loaded
         if h5f.root.status._v_attrs.genomesAnnotated:
             logging.getLogger("PPanGGOLiN").info("Reading pangenome annotations...")
-            read_annotation(pangenome, h5f, disable_bar=disable_bar)
+            read_annotation(
+                pangenome,
+                h5f,
+                genedata_columns=(
+                    h5f.get_part(read_genedata_columns) if prefetch else None
+                ),
+                disable_bar=disable_bar,
+            )
         else:
             raise Exception(
                 f"The pangenome in file '{filename}' has not been annotated, or has been improperly filled"
@@ -1502,7 +2300,12 @@ def read_pangenome(
             logging.getLogger("PPanGGOLiN").info(
                 "Reading pangenome gene dna sequences..."
             )
-            read_gene_sequences(pangenome, h5f, disable_bar=disable_bar)
+            read_gene_sequences(
+                pangenome,
+                h5f,
+                seqid2seq=h5f.get_part(read_sequences) if prefetch else None,
+                disable_bar=disable_bar,
+            )
         else:
             raise Exception(
                 f"The pangenome in file '{filename}' does not have gene sequences, "
@@ -1522,7 +2325,7 @@ def read_pangenome(
     if graph:
         if h5f.root.status._v_attrs.NeighborsGraph:
             logging.getLogger("PPanGGOLiN").info("Reading the neighbors graph edges...")
-            read_graph(pangenome, h5f, disable_bar=disable_bar)
+            read_graph(pangenome, h5f, disable_bar=disable_bar, compact=compact_graph)
         else:
             raise Exception(
                 f"The pangenome in file '{filename}' does not have graph information, "
@@ -1563,11 +2366,8 @@ def read_pangenome(
         for metatype in metatypes:
 
             if h5f.root.status._v_attrs.metadata:
-                metastatus = h5f.root.status._f_get_child("metastatus")
-                metasources = h5f.root.status._f_get_child("metasources")
-
-                metatype_sources = set(metasources._v_attrs[metatype]) & sources
-                if metastatus._v_attrs[metatype] and len(metatype_sources) > 0:
+                metatype_sources = get_metadata_sources(h5f, metatype, sources)
+                if len(metatype_sources) > 0:
                     logging.getLogger("PPanGGOLiN").info(
                         f"Reading the {metatype} metadata from sources {metatype_sources}..."
                     )
@@ -1751,6 +2551,8 @@ def check_pangenome_info(
     need_metadata: bool = False,
     metatypes: Optional[Set[str]] = None,
     sources: Optional[Set[str]] = None,
+    cpu: int = 1,
+    compact_graph: bool = False,
     disable_bar: bool = False,
 ):
     """
@@ -1769,6 +2571,8 @@ def check_pangenome_info(
     :param need_metadata: get metadata
     :param metatypes: metatypes of the metadata to get (None means all types with metadata)
     :param sources: sources of the metadata to get (None means all possible sources)
+    :param cpu: Number of processes reading the tables of the file concurrently
+    :param compact_graph: Read compact edges storing the number of gene pairs of each genome instead of the pairs
     :param disable_bar: Allow to disable the progress bar
     """
     need_info = get_need_info(
@@ -1787,4 +2591,10 @@ def check_pangenome_info(
     )
     if any([v for k, v in need_info.items() if k not in ["metatypes", "sources"]]):
         # if no flag is true, then nothing is needed.
-        read_pangenome(pangenome, disable_bar=disable_bar, **need_info)
+        read_pangenome(
+            pangenome,
+            cpu=cpu,
+            compact_graph=compact_graph,
+            disable_bar=disable_bar,
+            **need_info,
+        )
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+
+# default libraries
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Set
+
+# installed libraries
+import numpy as np
+import tables
+
+# local libraries
+from ppanggolin.formats.readBinaries import read_chunks_as_arrays, STALE_STEP_COMMANDS
+from ppanggolin.formats.writeAnnotations import TableWriter
+from ppanggolin.formats.writeBinaries import family_graph_desc
+from ppanggolin.formats.writeMetadata import write_metadata_group
+from ppanggolin.formats.queryBinaries import index_pangenome_tables
+
+# steps whose results cannot be restricted to a subset of genomes, and are not copied
+SUBSET_DROPPED_STEPS = ["Partitioned", "predictedRGP", "spots", "modules"]
+
+# metatypes whose metadata are copied for the elements kept in the subset
+SUBSET_METATYPES = ["genomes", "contigs", "genes", "families"]
+
+
+def get_rows(column: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Get the row index of each value in a column with unique values
+
+    :param column: Column of a table, with unique values
+    :param values: Values of the column to look for
+
+    :return: Row index of each value
+    """
+    order = np.argsort(column)
+    return order[np.searchsorted(column, values, sorter=order)]
+
+
+def copy_filtered_table(
+    table: tables.Table,
+    where: tables.Group,
+    mask: np.ndarray,
+    transform: Callable[[np.ndarray], np.ndarray] = None,
+    chunk: int = 100000,
+) -> tables.Table:
+    """
+    Copies the rows of a table selected by a mask into a new table with the same name and description
+
+    :param table: Table to copy
+    :param where: Group of the other file where the table is created
+    :param mask: Boolean array selecting the rows to copy
+    :param transform: Function modifying the selected rows of each chunk before they are written
+    :param chunk: Number of rows read at once
+
+    :return: The new table
+    """
+    new_table = where._v_file.create_table(
+        where,
+        table.name,
+        table.description,
+        expectedrows=max(int(mask.sum()), 1),
+    )
+    for start, rows in zip(
+        range(0, table.nrows, chunk), read_chunks_as_arrays(table, chunk=chunk)
+    ):
+        rows = rows[mask[start : start + len(rows)]]
+        if transform is not None:
+            rows = transform(rows)
+        new_table.append(rows)
+    new_table.flush()
+    return new_table
+
+
+def reset_family_partitions(rows: np.ndarray) -> np.ndarray:
+    """
+    Remove the partition of the gene families, as the subset is not partitioned
+
+    :param rows: Rows of the gene families info table
+
+    :return: Rows without partition
+    """
+    rows["partition"] = b""
+    return rows
+
+
+def write_subset_family_edges(
+    h5f: tables.File,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    gene_family: np.ndarray,
+    gene_genome: np.ndarray,
+    family_names: np.ndarray,
+) -> int:
+    """
+    Writes the family level table of the neighbors graph of a subset pangenome from its gene pairs
+
+    :param h5f: Subset pangenome file
+    :param sources: Row index of the source gene of each gene pair
+    :param targets: Row index of the target gene of each gene pair
+    :param gene_family: Index of the family of each gene, by row index
+    :param gene_genome: Index of the genome of each gene, by row index
+    :param family_names: Name of each family, by family index
+
+    :return: Number of edges between gene families
+    """
+    families = np.sort(
+        np.stack([gene_family[sources], gene_family[targets]], axis=1), axis=1
+    )
+    pairs, pair_index, gene_pairs = np.unique(
+        families, axis=0, return_inverse=True, return_counts=True
+    )
+    pair_index = pair_index.ravel()
+    genome_pairs = np.unique(
+        np.stack([pair_index, gene_genome[sources]], axis=1), axis=0
+    )
+    genomes = np.bincount(genome_pairs[:, 0], minlength=len(pairs))
+
+    family_edge_table = h5f.create_table(
+        "/", "familyEdges", family_graph_desc(), expectedrows=max(len(pairs), 1)
+    )
+    with TableWriter(h5f, family_edge_table) as writer:
+        for (source, target), number_of_genomes, number_of_gene_pairs in zip(
+            pairs.tolist(), genomes.tolist(), gene_pairs.tolist()
+        ):
+            writer.append(
+                familySource=family_names[source],
+                familyTarget=family_names[target],
+                genomes=number_of_genomes,
+                genePairs=number_of_gene_pairs,
+            )
+    return len(pairs)
+
+
+def write_subset_graph(
+    source: tables.File,
+    h5f: tables.File,
+    gene_mask: np.ndarray,
+    family_mask: np.ndarray,
+) -> int:
+    """
+    Copies the gene pairs of the neighbors graph between genes of the subset pangenome,
+    and writes the family level table of the graph from them.
+
+    :param source: Pangenome file
+    :param h5f: Subset pangenome file
+    :param gene_mask: Boolean array selecting the rows of the genes table in the subset
+    :param family_mask: Boolean array selecting the rows of the gene families table in the subset
+
+    :return: Number of edges between gene families
+    """
+    annotations = source.root.annotations
+    table = source.root.edges
+    sources, targets = table.col("geneSource"), table.col("geneTarget")
+    if table.coltypes["geneSource"] == "string":
+        # files written with gene identifiers in the edges table
+        sources = get_rows(annotations.genes.col("ID"), sources)
+        targets = get_rows(annotations.genes.col("ID"), targets)
+    edge_mask = gene_mask[sources] & gene_mask[targets]
+    new_gene_rows = np.cumsum(gene_mask, dtype=np.int64) - 1
+
+    def reindex(rows: np.ndarray) -> np.ndarray:
+        if rows.dtype["geneSource"].kind != "S":
+            rows["geneSource"] = new_gene_rows[rows["geneSource"]]
+            rows["geneTarget"] = new_gene_rows[rows["geneTarget"]]
+        return rows
+
+    copy_filtered_table(table, h5f.root, edge_mask, transform=reindex)
+
+    # family and genome of each gene of the subset, by row index
+    family_names, family_index = np.unique(
+        source.root.geneFamilies.col("geneFam")[family_mask], return_inverse=True
+    )
+    gene_family = np.empty(int(gene_mask.sum()), dtype=np.int64)
+    gene_family[
+        get_rows(
+            annotations.genes.col("ID")[gene_mask],
+            source.root.geneFamilies.col("gene")[family_mask],
+        )
+    ] = family_index.ravel()
+    contig_mask = np.isin(
+        annotations.contigs.col("ID"), annotations.genes.col("contig")[gene_mask]
+    )
+    _, contig_genome = np.unique(
+        annotations.contigs.col("genome")[contig_mask], return_inverse=True
+    )
+    gene_genome = contig_genome.ravel()[
+        get_rows(
+            annotations.contigs.col("ID")[contig_mask],
+            annotations.genes.col("contig")[gene_mask],
+        )
+    ]
+    return write_subset_family_edges(
+        h5f,
+        new_gene_rows[sources[edge_mask]],
+        new_gene_rows[targets[edge_mask]],
+        gene_family,
+        gene_genome,
+        family_names,
+    )
+
+
+def write_subset_status(source: tables.File, h5f: tables.File, metatypes: Set[str]):
+    """
+    Copies the statuses of a pangenome file into its subset.
+    Steps that depend on the whole set of genomes are marked as not computed, so that they are computed again.
+
+    :param source: Pangenome file
+    :param h5f: Subset pangenome file
+    :param metatypes: Metatypes with metadata copied in the subset
+    """
+    status_group = source.root.status._f_copy(h5f.root, recursive=True)
+    status_attrs = status_group._v_attrs
+    for step in SUBSET_DROPPED_STEPS:
+        status_attrs[step] = False
+    if "staleSteps" in status_attrs._f_list():
+        status_attrs.staleSteps = [
+            step for step in status_attrs.staleSteps if step not in SUBSET_DROPPED_STEPS
+        ]
+    if "metastatus" in status_group:
+        metastatus = status_group.metastatus._v_attrs
+        for metatype in metastatus._f_list():
+            if metatype not in metatypes:
+                metastatus[metatype] = False
+                status_group.metasources._v_attrs[metatype] = []
+    status_attrs.metadata = len(metatypes) > 0
+
+
+def write_subset_metadata(
+    source: tables.File, h5f: tables.File, identifiers: Dict[str, np.ndarray]
+) -> Set[str]:
+    """
+    Copies the metadata of the elements kept in the subset pangenome
+
+    :param source: Pangenome file
+    :param h5f: Subset pangenome file
+    :param identifiers: Identifiers of the elements kept in the subset for each metatype
+
+    :return: Metatypes with metadata in the subset
+    """
+    metatypes = set()
+    if "/metadata" not in source:
+        return metatypes
+    for metatype, kept_identifiers in identifiers.items():
+        if metatype not in source.root.metadata:
+            continue
+        metatype_group = write_metadata_group(h5f, metatype)
+        for source_table in source.root.metadata._f_get_child(metatype):
+            copy_filtered_table(
+                source_table,
+                metatype_group,
+                np.isin(source_table.col("ID"), kept_identifiers),
+            )
+        metatypes.add(metatype)
+    return metatypes
+
+
+def write_subset_pangenome(pangenome_file: Path, output: Path, genomes: Iterable[str]):
+    """
+    Writes a pangenome file restricted to some of the genomes of another pangenome file.
+
+    The rows of the selected genomes, of their contigs, genes, RNAs, gene sequences, gene families and graph edges
+    are copied with filtered reads of the tables, without building the pangenome objects.
+    Partitions, RGPs, spots and modules are not copied and have to be computed again on the subset.
+
+    :param pangenome_file: Pangenome file
+    :param output: Subset pangenome file to create
+    :param genomes: Names of the genomes to keep
+
+    :raises KeyError: Some genomes are not in the pangenome file
+    """
+    with tables.open_file(pangenome_file, "r") as source:
+        status = source.root.status._v_attrs
+        if not status.genomesAnnotated:
+            raise Exception(
+                f"The pangenome in file '{pangenome_file}' has not been annotated, or has been improperly filled"
+            )
+        annotations = source.root.annotations
+        selected = np.array([genome.encode() for genome in set(genomes)])
+        genome_names = annotations.genomes.col("name")
+        missing = np.setdiff1d(selected, genome_names)
+        if len(missing) > 0:
+            raise KeyError(
+                f"The following genomes are not in the pangenome file '{pangenome_file}': "
+                f"{', '.join(name.decode() for name in missing.tolist())}"
+            )
+
+        genome_mask = np.isin(genome_names, selected)
+        contig_mask = np.isin(annotations.contigs.col("genome"), selected)
+        contig_ids = annotations.contigs.col("ID")[contig_mask]
+        gene_mask = np.isin(annotations.genes.col("contig"), contig_ids)
+        rna_mask = np.isin(annotations.RNAs.col("contig"), contig_ids)
+        gene_ids = annotations.genes.col("ID")[gene_mask]
+        genedata_ids = np.union1d(
+            annotations.genes.col("genedata_id")[gene_mask],
+            annotations.RNAs.col("genedata_id")[rna_mask],
+        )
+        logging.getLogger("PPanGGOLiN").info(
+            f"Extracting {len(selected)} genomes with {len(gene_ids)} genes "
+            f"out of {len(genome_names)} genomes..."
+        )
+
+        with tables.open_file(output, "w", filters=source.filters) as h5f:
+            group = h5f.create_group(
+                "/", "annotations", "Annotations of the pangenome organisms"
+            )
+            copy_filtered_table(annotations.genomes, group, genome_mask)
+            copy_filtered_table(annotations.contigs, group, contig_mask)
+            copy_filtered_table(annotations.genes, group, gene_mask)
+            copy_filtered_table(annotations.RNAs, group, rna_mask)
+            copy_filtered_table(
+                annotations.genedata,
+                group,
+                np.isin(annotations.genedata.col("genedata_id"), genedata_ids),
+            )
+            if "joinedCoordinates" in annotations:
+                table = annotations.joinedCoordinates
+                copy_filtered_table(
+                    table, group, np.isin(table.col("genedata_id"), genedata_ids)
+                )
+            if status.geneSequences:
+                logging.getLogger("PPanGGOLiN").info("Extracting gene sequences...")
+                table = annotations.geneSequences
+                sequence_mask = np.isin(table.col("gene"), gene_ids)
+                copy_filtered_table(table, group, sequence_mask)
+                copy_filtered_table(
+                    annotations.sequences,
+                    group,
+                    np.isin(
+                        annotations.sequences.col("seqid"),
+                        table.col("seqid")[sequence_mask],
+                    ),
+                )
+
+            identifiers = {
+                "genomes": selected,
+                "contigs": contig_ids,
+                "genes": gene_ids,
+            }
+            number_of_families, number_of_edges = None, None
+            if status.genesClustered:
+                logging.getLogger("PPanGGOLiN").info("Extracting gene families...")
+                table = source.root.geneFamilies
+                family_mask = np.isin(table.col("gene"), gene_ids)
+                copy_filtered_table(table, h5f.root, family_mask)
+                family_names = np.unique(table.col("geneFam")[family_mask])
+                table = source.root.geneFamiliesInfo
+                copy_filtered_table(
+                    table,
+                    h5f.root,
+                    np.isin(table.col("name"), family_names),
+                    transform=reset_family_partitions,
+                )
+                identifiers["families"] = family_names
+                number_of_families = len(family_names)
+
+                if status.NeighborsGraph:
+                    logging.getLogger("PPanGGOLiN").info(
+                        "Extracting the neighbors graph..."
+                    )
+                    number_of_edges = write_subset_graph(
+                        source, h5f, gene_mask, family_mask
+                    )
+
+            metatypes = write_subset_metadata(
+                source,
+                h5f,
+                {
+                    metatype: ids
+                    for metatype, ids in identifiers.items()
+                    if metatype in SUBSET_METATYPES
+                },
+            )
+            write_subset_status(source, h5f, metatypes)
+
+            info_group = h5f.create_group(
+                "/", "info", "Information about the pangenome content"
+            )
+            info_group._v_attrs.numberOfGenes = len(gene_ids)
+            info_group._v_attrs.numberOfGenomes = len(selected)
+            if number_of_families is not None:
+                info_group._v_attrs.numberOfClusters = number_of_families
+            if number_of_edges is not None:
+                info_group._v_attrs.numberOfEdges = number_of_edges
+            if "parameters" in source.root.info._v_attrs._f_list():
+                # the parameters of the dropped steps would be compared with the ones of their next run
+                dropped_commands = [
+                    STALE_STEP_COMMANDS[step] for step in SUBSET_DROPPED_STEPS
+                ]
+                info_group._v_attrs.parameters = {
+                    command: parameters
+                    for command, parameters in source.root.info._v_attrs.parameters.items()
+                    if command not in dropped_commands
+                }
+
+            logging.getLogger("PPanGGOLiN").debug(
+                "Indexing the key columns of the tables..."
+            )
+            index_pangenome_tables(h5f)
@@ -6,6 +6,7 @@ from typing import Dict, Tuple, Union
 
 # installed libraries
 from tqdm import tqdm
+import numpy as np
 import tables
 
 # local libraries
@@ -13,7 +14,6 @@ from ppanggolin.pangenome import Pangenome
 from ppanggolin.genome import Gene, RNA
 from ppanggolin.formats.readBinaries import Genedata
 
-
 genedata_counter = 0
 
 
@@ -56,11 +56,11 @@ def get_max_len_annotations(pangenome: Pangenome) -> Tuple[int, int, int, int, i
     )
 
 
-def organism_desc(org_len: int) -> Dict[str, tables.StringCol]:
+def organism_desc(org_len: int = 1) -> Dict[str, tables.StringCol]:
     """
     Table description to save organism-related information
 
-    :param org_len: Maximum size of organism name.
+    :param org_len: Initial size of organism name, widened when writing longer names.
 
     :return: Formatted table
     """
@@ -88,25 +88,23 @@ def write_organisms(
     logging.getLogger("PPanGGOLiN").debug(
         f"Writing {pangenome.number_of_organisms} genomes"
     )
-    organism_row = organism_table.row
-    for org in tqdm(
-        pangenome.organisms,
-        total=pangenome.number_of_organisms,
-        unit="genome",
-        disable=disable_bar,
-    ):
-        organism_row["name"] = org.name
-        organism_row.append()
-    organism_table.flush()
+    with TableWriter(h5f, organism_table) as writer:
+        for org in tqdm(
+            pangenome.organisms,
+            total=pangenome.number_of_organisms,
+            unit="genome",
+            disable=disable_bar,
+        ):
+            writer.append(name=org.name)
 
 
 def contig_desc(
-    contig_len: int, org_len: int
+    contig_len: int = 1, org_len: int = 1
 ) -> Dict[str, Union[tables.StringCol, tables.BoolCol, tables.UInt32Col]]:
     """Table description to save contig-related information
 
-    :param contig_len: Maximum size of contig name
-    :param org_len: Maximum size of organism name.
+    :param contig_len: Initial size of contig name
+    :param org_len: Initial size of organism name.
 
     :return: Formatted table
     """
@@ -139,29 +137,29 @@ def write_contigs(
     logging.getLogger("PPanGGOLiN").debug(
         f"Writing {pangenome.number_of_contigs} contigs"
     )
-    contig_row = contig_table.row
-    for contig in tqdm(
-        pangenome.contigs,
-        total=pangenome.number_of_contigs,
-        unit="contigs",
-        disable=disable_bar,
-    ):
-        contig_row["ID"] = contig.ID
-        contig_row["name"] = contig.name
-        contig_row["is_circular"] = contig.is_circular
-        contig_row["length"] = len(contig)
-        contig_row["genome"] = contig.organism.name
-        contig_row.append()
-    contig_table.flush()
+    with TableWriter(h5f, contig_table) as writer:
+        for contig in tqdm(
+            pangenome.contigs,
+            total=pangenome.number_of_contigs,
+            unit="contigs",
+            disable=disable_bar,
+        ):
+            writer.append(
+                ID=contig.ID,
+                name=contig.name,
+                is_circular=contig.is_circular,
+                length=len(contig),
+                genome=contig.organism.name,
+            )
 
 
 def gene_desc(
-    id_len: int, max_local_id: int
+    id_len: int = 1, max_local_id: int = 1
 ) -> Dict[str, Union[tables.StringCol, tables.UInt32Col, tables.BoolCol]]:
     """Table description to save gene-related information
 
-    :param id_len: Maximum size of gene name
-    :param max_local_id: Maximum size of gene local identifier
+    :param id_len: Initial size of gene name
+    :param max_local_id: Initial size of gene local identifier
 
     :return: Formatted table
     """
@@ -197,34 +195,33 @@ def write_genes(
         annotation, "genes", gene_desc, expectedrows=pangenome.number_of_genes
     )
     logging.getLogger("PPanGGOLiN").debug(f"Writing {pangenome.number_of_genes} genes")
-    gene_row = gene_table.row
-    for gene in tqdm(
-        pangenome.genes,
-        total=pangenome.number_of_genes,
-        unit="gene",
-        disable=disable_bar,
-    ):
-        gene_row["ID"] = gene.ID
-        gene_row["is_fragment"] = gene.is_fragment
-        gene_row["local"] = gene.local_identifier
-        gene_row["contig"] = gene.contig.ID
-        genedata = get_genedata(gene)
-        genedata_id = genedata2gene.get(genedata)
-        if genedata_id is None:
-            genedata_id = genedata_counter
-            genedata2gene[genedata] = genedata_id
-            genedata_counter += 1
-        gene_row["genedata_id"] = genedata_id
-        gene_row.append()
-    gene_table.flush()
+    with TableWriter(h5f, gene_table) as writer:
+        for gene in tqdm(
+            pangenome.genes,
+            total=pangenome.number_of_genes,
+            unit="gene",
+            disable=disable_bar,
+        ):
+            genedata = get_genedata(gene)
+            genedata_id = genedata2gene.get(genedata)
+            if genedata_id is None:
+                genedata_id = genedata_counter
+                genedata2gene[genedata] = genedata_id
+                genedata_counter += 1
+            writer.append(
+                ID=gene.ID,
+                is_fragment=gene.is_fragment,
+                local=gene.local_identifier,
+                contig=gene.contig.ID,
+                genedata_id=genedata_id,
+            )
     return genedata2gene
 
 
-def rna_desc(id_len: int) -> Dict[str, Union[tables.StringCol, tables.UInt32Col]]:
+def rna_desc(id_len: int = 1) -> Dict[str, Union[tables.StringCol, tables.UInt32Col]]:
     """Table description to save rna-related information
 
-    :param id_len: Maximum size of RNA identifier
-    :param max_contig_len: Maximum size of contig identifier
+    :param id_len: Initial size of RNA identifier
 
     :return: Formatted table
     """
@@ -258,33 +255,32 @@ def write_rnas(
         annotation, "RNAs", rna_desc, expectedrows=pangenome.number_of_genes
     )
     logging.getLogger("PPanGGOLiN").debug(f"Writing {pangenome.number_of_genes} genes")
-    rna_row = rna_table.row
-    for rna in tqdm(
-        pangenome.RNAs, total=pangenome.number_of_rnas, unit="RNA", disable=disable_bar
-    ):
-        rna_row["ID"] = rna.ID
-        rna_row["contig"] = rna.contig.ID
-        genedata = get_genedata(rna)
-        genedata_id = genedata2rna.get(genedata)
-        if genedata_id is None:
-            genedata_id = genedata_counter
-            genedata2rna[genedata] = genedata_id
-            genedata_counter += 1
-        rna_row["genedata_id"] = genedata_id
-        rna_row.append()
-    rna_table.flush()
+    with TableWriter(h5f, rna_table) as writer:
+        for rna in tqdm(
+            pangenome.RNAs,
+            total=pangenome.number_of_rnas,
+            unit="RNA",
+            disable=disable_bar,
+        ):
+            genedata = get_genedata(rna)
+            genedata_id = genedata2rna.get(genedata)
+            if genedata_id is None:
+                genedata_id = genedata_counter
+                genedata2rna[genedata] = genedata_id
+                genedata_counter += 1
+            writer.append(ID=rna.ID, contig=rna.contig.ID, genedata_id=genedata_id)
     return genedata2rna
 
 
 def genedata_desc(
-    type_len: int, name_len: int, product_len: int
+    type_len: int = 1, name_len: int = 1, product_len: int = 1
 ) -> Dict[str, Union[tables.UIntCol, tables.StringCol]]:
     """
     Creates a table for gene-related data
 
-    :param type_len: Maximum size of gene Type.
-    :param name_len: Maximum size of gene name
-    :param product_len: Maximum size of gene product
+    :param type_len: Initial size of gene Type.
+    :param name_len: Initial size of gene name
+    :param product_len: Initial size of gene product
     :return: Formatted table for gene metadata
     """
     return {
@@ -450,27 +446,26 @@ def write_genedata(
         f"Writing {len(genedata2gene)} gene-related data "
         "(can be lower than the number of genes)"
     )
-    genedata_row = genedata_table.row
-    for genedata, genedata_id in tqdm(
-        genedata2gene.items(), unit="genedata", disable=disable_bar
-    ):
-        genedata_row["genedata_id"] = genedata_id
-        genedata_row["start"] = genedata.start
-        genedata_row["stop"] = genedata.stop
-        genedata_row["strand"] = genedata.strand
-        genedata_row["gene_type"] = genedata.gene_type
-
-        if genedata.gene_type == "CDS":
-            genedata_row["position"] = genedata.position
-            genedata_row["genetic_code"] = genedata.genetic_code
-
-        genedata_row["name"] = genedata.name
-        genedata_row["product"] = genedata.product
-        genedata_row["has_joined_coordinates"] = genedata.has_joined_coordinates
-
-        genedata_row.append()
-
-    genedata_table.flush()
+    with TableWriter(h5f, genedata_table) as writer:
+        for genedata, genedata_id in tqdm(
+            genedata2gene.items(), unit="genedata", disable=disable_bar
+        ):
+            cds_values = (
+                {"position": genedata.position, "genetic_code": genedata.genetic_code}
+                if genedata.gene_type == "CDS"
+                else {}
+            )
+            writer.append(
+                genedata_id=genedata_id,
+                start=genedata.start,
+                stop=genedata.stop,
+                strand=genedata.strand,
+                gene_type=genedata.gene_type,
+                name=genedata.name,
+                product=genedata.product,
+                has_joined_coordinates=genedata.has_joined_coordinates,
+                **cds_values,
+            )
 
 
 def write_annotations(
@@ -553,13 +548,13 @@ def get_gene_sequences_len(pangenome: Pangenome) -> Tuple[int, int]:
 
 
 def gene_sequences_desc(
-    gene_id_len: int, gene_type_len: int
+    gene_id_len: int = 1, gene_type_len: int = 1
 ) -> Dict[str, Union[tables.UIntCol, tables.StringCol]]:
     """
     Create table to save gene sequences
 
-    :param gene_id_len: Maximum size of gene sequence identifier
-    :param gene_type_len: Maximum size of gene type
+    :param gene_id_len: Initial size of gene sequence identifier
+    :param gene_type_len: Initial size of gene type
 
     :return: Formatted table
     """
@@ -584,11 +579,11 @@ def get_sequence_len(pangenome: Pangenome) -> int:
 
 
 def sequence_desc(
-    max_seq_len: int,
+    max_seq_len: int = 1,
 ) -> Dict[str, Union[tables.UIntCol, tables.StringCol]]:
     """
     Table description to save sequences
-    :param max_seq_len: Maximum size of gene type
+    :param max_seq_len: Initial size of sequences
     :return: Formatted table
     """
     return {"seqid": tables.UInt32Col(), "dna": tables.StringCol(itemsize=max_seq_len)}
@@ -612,23 +607,19 @@ def write_gene_sequences(
     # process sequences to save them only once
     seq2seqid = {}
     id_counter = 0
-    gene_row = gene_seq.row
-    for gene in tqdm(
-        sorted(pangenome.genes, key=lambda x: x.ID),
-        total=pangenome.number_of_genes,
-        unit="gene",
-        disable=disable_bar,
-    ):
-        curr_seq_id = seq2seqid.get(gene.dna)
-        if curr_seq_id is None:
-            curr_seq_id = id_counter
-            seq2seqid[gene.dna] = id_counter
-            id_counter += 1
-        gene_row["gene"] = gene.ID
-        gene_row["seqid"] = curr_seq_id
-        gene_row["type"] = gene.type
-        gene_row.append()
-    gene_seq.flush()
+    with TableWriter(h5f, gene_seq) as writer:
+        for gene in tqdm(
+            sorted(pangenome.genes, key=lambda x: x.ID),
+            total=pangenome.number_of_genes,
+            unit="gene",
+            disable=disable_bar,
+        ):
+            curr_seq_id = seq2seqid.get(gene.dna)
+            if curr_seq_id is None:
+                curr_seq_id = id_counter
+                seq2seqid[gene.dna] = id_counter
+                id_counter += 1
+            writer.append(gene=gene.ID, seqid=curr_seq_id, type=gene.type)
 
     seq_table = h5f.create_table(
         "/annotations",
@@ -637,9 +628,320 @@ def write_gene_sequences(
         expectedrows=len(seq2seqid),
     )
 
-    seq_row = seq_table.row
-    for seq, seqid in seq2seqid.items():
-        seq_row["dna"] = seq
-        seq_row["seqid"] = seqid
-        seq_row.append()
-    seq_table.flush()
+    with TableWriter(h5f, seq_table) as writer:
+        for seq, seqid in seq2seqid.items():
+            writer.append(dna=seq, seqid=seqid)
+
+
+def resize_table(
+    h5f: tables.File, table: tables.Table, columns: Dict[str, tables.Col]
+) -> tables.Table:
+    """
+    Rewrites a table with some of its columns replaced or added, to store longer strings or new fields.
+    The rows already in the table are copied, added columns get their default value.
+
+    :param h5f: Pangenome file
+    :param table: Table to rewrite
+    :param columns: New description of the columns to replace or add
+
+    :return: The rewritten table, with the same name and parent group
+    """
+    description = dict(table.description._v_colobjects)
+    description.update(columns)
+    new_table = h5f.create_table(
+        table._v_parent,
+        f"{table.name}_resized",
+        description,
+        expectedrows=table.nrows,
+    )
+    for start in range(0, table.nrows, 100000):
+        old_rows = table.read(start, start + 100000)
+        new_rows = np.zeros(len(old_rows), dtype=new_table.dtype)
+        for name in new_table.colnames:
+            if name in old_rows.dtype.names:
+                new_rows[name] = old_rows[name]
+            else:
+                new_rows[name] = new_table.coldflts[name]
+        new_table.append(new_rows)
+    new_table.flush()
+    name = table.name
+    table.remove()
+    new_table.rename(name)
+    return new_table
+
+
+def append_to_table(
+    h5f: tables.File, table: tables.Table, columns: Dict[str, list]
+) -> tables.Table:
+    """
+    Appends rows given column by column to a table.
+    String columns too short for the new values are widened before appending. Once the table has rows, the widths
+    are at least doubled, so that the rows are copied to a wider table a logarithmic number of times only,
+    as the space of the former tables is not reclaimed in the file.
+
+    :param h5f: Pangenome file
+    :param table: Table to append the rows to
+    :param columns: Values of each column of the new rows. Missing columns get their default value.
+
+    :return: The table with the new rows, which is a new table object if the table has been widened
+    """
+    number_of_rows = len(next(iter(columns.values()), []))
+    if number_of_rows == 0:
+        return table
+    wider_columns = {}
+    for name, values in columns.items():
+        if table.coltypes[name] == "string":
+            max_len = max((len(value) for value in values), default=1)
+            itemsize = table.coldtypes[name].itemsize
+            if max_len > itemsize:
+                wider_columns[name] = tables.StringCol(
+                    itemsize=(
+                        max_len if table.nrows == 0 else max(max_len, 2 * itemsize)
+                    ),
+                    dflt=table.coldflts[name],
+                    pos=table.description._v_colobjects[name]._v_pos,
+                )
+    if len(wider_columns) > 0:
+        logging.getLogger("PPanGGOLiN").debug(
+            f"Widening the columns {', '.join(wider_columns)} of table {table._v_pathname}"
+        )
+        table = resize_table(h5f, table, wider_columns)
+    rows = np.zeros(number_of_rows, dtype=table.dtype)
+    for name in table.colnames:
+        rows[name] = columns.get(name, table.coldflts[name])
+    table.append(rows)
+    table.flush()
+    return table
+
+
+class TableWriter:
+    """
+    Appends rows to a table of the pangenome file by batches, as they are produced.
+    String columns are widened when a batch holds longer values than the table can store,
+    so that rows can be written before the longest values are known. The first batch sets the widths of
+    an empty table, and later batches at least double them.
+    Widening copies the rows already written, so tables written from a pangenome are created with the widths
+    of its longest values.
+
+    :param h5f: Pangenome file
+    :param table: Table to write the rows in
+    :param batch_size: Number of rows kept in memory before being appended to the table
+    """
+
+    def __init__(self, h5f: tables.File, table: tables.Table, batch_size: int = 100000):
+        """Constructor method"""
+        self.h5f = h5f
+        self.table = table
+        self.batch_size = batch_size
+        self._defaults = {name: table.coldflts[name] for name in table.colnames}
+        self._columns = {name: [] for name in table.colnames}
+        self._number_of_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def append(self, **values):
+        """
+        Adds a row to the current batch. Columns not given get their default value.
+
+        :param values: Value of each column of the row
+        """
+        for name, column in self._columns.items():
+            column.append(values.get(name, self._defaults[name]))
+        self._number_of_rows += 1
+        if self._number_of_rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the current batch to the table
+        """
+        if self._number_of_rows > 0:
+            self.table = append_to_table(self.h5f, self.table, self._columns)
+            self._columns = {name: [] for name in self.table.colnames}
+            self._number_of_rows = 0
+
+
+def get_next_id(table: tables.Table, column: str) -> int:
+    """
+    Get the identifier following the largest one of a column
+
+    :param table: Table with integer identifiers
+    :param column: Name of the identifier column
+
+    :return: First free identifier
+    """
+    if table.nrows == 0:
+        return 0
+    return int(table.col(column).max()) + 1
+
+
+def append_annotations(
+    pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
+):
+    """
+    Appends the genomes of a pangenome, with their contigs, genes and RNAs, to the annotations of a pangenome file.
+    The rows of the genomes already in the file are not modified.
+
+    :param pangenome: Pangenome with only the genomes to append
+    :param h5f: Pangenome HDF5 file with annotations
+    :param disable_bar: Allow to disable progress bar
+    """
+    annotation = h5f.root.annotations
+    organisms = list(pangenome.organisms)
+    contigs = list(pangenome.contigs)
+    logging.getLogger("PPanGGOLiN").debug(
+        f"Appending {len(organisms)} genomes and {len(contigs)} contigs"
+    )
+    append_to_table(h5f, annotation.genomes, {"name": [org.name for org in organisms]})
+    append_to_table(
+        h5f,
+        annotation.contigs,
+        {
+            "ID": [contig.ID for contig in contigs],
+            "name": [contig.name for contig in contigs],
+            "is_circular": [contig.is_circular for contig in contigs],
+            "length": [len(contig) for contig in contigs],
+            "genome": [contig.organism.name for contig in contigs],
+        },
+    )
+
+    genedata2id = {}
+    next_genedata_id = get_next_id(annotation.genedata, "genedata_id")
+
+    def get_genedata_id(feature: Union[Gene, RNA]) -> int:
+        nonlocal next_genedata_id
+        genedata = get_genedata(feature)
+        genedata_id = genedata2id.get(genedata)
+        if genedata_id is None:
+            genedata_id = next_genedata_id
+            genedata2id[genedata] = genedata_id
+            next_genedata_id += 1
+        return genedata_id
+
+    genes = list(
+        tqdm(
+            pangenome.genes,
+            total=pangenome.number_of_genes,
+            unit="gene",
+            disable=disable_bar,
+        )
+    )
+    append_to_table(
+        h5f,
+        annotation.genes,
+        {
+            "ID": [gene.ID for gene in genes],
+            "genedata_id": [get_genedata_id(gene) for gene in genes],
+            "local": [gene.local_identifier for gene in genes],
+            "is_fragment": [gene.is_fragment for gene in genes],
+            "contig": [gene.contig.ID for gene in genes],
+        },
+    )
+    rnas = list(pangenome.RNAs)
+    append_to_table(
+        h5f,
+        annotation.RNAs,
+        {
+            "ID": [rna.ID for rna in rnas],
+            "genedata_id": [get_genedata_id(rna) for rna in rnas],
+            "contig": [rna.contig.ID for rna in rnas],
+        },
+    )
+
+    genedata_items = list(genedata2id.items())
+    append_to_table(
+        h5f,
+        annotation.genedata,
+        {
+            "genedata_id": [genedata_id for _, genedata_id in genedata_items],
+            "start": [genedata.start for genedata, _ in genedata_items],
+            "stop": [genedata.stop for genedata, _ in genedata_items],
+            "strand": [genedata.strand for genedata, _ in genedata_items],
+            "gene_type": [genedata.gene_type for genedata, _ in genedata_items],
+            "position": [
+                genedata.position if genedata.gene_type == "CDS" else 0
+                for genedata, _ in genedata_items
+            ],
+            "name": [genedata.name for genedata, _ in genedata_items],
+            "product": [genedata.product for genedata, _ in genedata_items],
+            "genetic_code": [
+                genedata.genetic_code if genedata.gene_type == "CDS" else 11
+                for genedata, _ in genedata_items
+            ],
+            "has_joined_coordinates": [
+                genedata.has_joined_coordinates for genedata, _ in genedata_items
+            ],
+        },
+    )
+
+    joined_coordinates = [
+        (genedata_id, rank, start, stop)
+        for genedata, genedata_id in genedata_items
+        if genedata.has_joined_coordinates
+        for rank, (start, stop) in enumerate(genedata.coordinates)
+    ]
+    if len(joined_coordinates) > 0:
+        if "joinedCoordinates" not in annotation:
+            h5f.create_table(
+                annotation,
+                "joinedCoordinates",
+                gene_joined_coordinates_desc(),
+                expectedrows=len(joined_coordinates),
+            )
+        genedata_ids, ranks, starts, stops = zip(*joined_coordinates)
+        append_to_table(
+            h5f,
+            annotation.joinedCoordinates,
+            {
+                "genedata_id": genedata_ids,
+                "coordinate_rank": ranks,
+                "start": starts,
+                "stop": stops,
+            },
+        )
+
+
+def append_gene_sequences(
+    pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
+):
+    """
+    Appends the gene sequences of a pangenome to the gene sequences of a pangenome file.
+    Sequences are stored once for the appended genes, but are not compared to the sequences already in the file.
+
+    :param pangenome: Pangenome with only the genomes to append
+    :param h5f: Pangenome HDF5 file with gene sequences
+    :param disable_bar: Disable progress bar
+    """
+    annotation = h5f.root.annotations
+    seq2seqid = {}
+    next_seqid = get_next_id(annotation.sequences, "seqid")
+    gene_ids, seqids, gene_types = [], [], []
+    for gene in tqdm(
+        sorted(pangenome.genes, key=lambda x: x.ID),
+        total=pangenome.number_of_genes,
+        unit="gene",
+        disable=disable_bar,
+    ):
+        seqid = seq2seqid.get(gene.dna)
+        if seqid is None:
+            seqid = next_seqid
+            seq2seqid[gene.dna] = seqid
+            next_seqid += 1
+        gene_ids.append(gene.ID)
+        seqids.append(seqid)
+        gene_types.append(gene.type)
+    append_to_table(
+        h5f,
+        annotation.geneSequences,
+        {"gene": gene_ids, "seqid": seqids, "type": gene_types},
+    )
+    append_to_table(
+        h5f,
+        annotation.sequences,
+        {"seqid": list(seq2seqid.values()), "dna": list(seq2seqid.keys())},
+    )
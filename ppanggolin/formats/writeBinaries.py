@@ -4,24 +4,48 @@
 import logging
 from collections import Counter, defaultdict
 import statistics
-from typing import Tuple, Union
+from typing import Dict, List, Tuple, Union
 from importlib.metadata import distribution
 
 # installed libraries
 from tqdm import tqdm
+import numpy as np
 import tables
 from gmpy2 import popcount
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
-from ppanggolin.formats.writeAnnotations import write_annotations, write_gene_sequences
+from ppanggolin.formats.writeAnnotations import (
+    write_annotations,
+    write_gene_sequences,
+    append_annotations,
+    append_gene_sequences,
+    TableWriter,
+)
 from ppanggolin.formats.writeMetadata import (
     write_metadata,
     erase_metadata,
     write_metadata_status,
+    append_metadata_metatype,
 )
+from ppanggolin.formats.queryBinaries import index_pangenome_tables
 from ppanggolin.genome import Feature, Gene
-from ppanggolin.formats.readBinaries import read_genedata, Genedata
+from ppanggolin.formats.readBinaries import (
+    read_genedata,
+    Genedata,
+    get_stale_steps,
+    STALE_STEP_COMMANDS,
+)
+
+# pangenome status of the steps that can be stale in a pangenome file
+STALE_STEP_TO_STATUS = {
+    "genesClustered": "genesClustered",
+    "NeighborsGraph": "neighborsGraph",
+    "Partitioned": "partitioned",
+    "predictedRGP": "predictedRGP",
+    "spots": "spots",
+    "modules": "modules",
+}
 
 
 def getmean(arg: iter) -> float:
@@ -65,14 +89,14 @@ def getmin(arg: iter) -> float:
 
 
 def gene_fam_desc(
-    max_name_len: int, max_sequence_length: int, max_part_len: int
+    max_name_len: int = 1, max_sequence_length: int = 1, max_part_len: int = 3
 ) -> dict:
     """
     Create a formatted table for gene families description
 
-    :param max_name_len: Maximum size of gene family name
-    :param max_sequence_length: Maximum size of gene family representing gene sequences
-    :param max_part_len: Maximum size of gene family partition
+    :param max_name_len: Initial size of gene family name
+    :param max_sequence_length: Initial size of gene family representing gene sequences
+    :param max_part_len: Initial size of gene family partition
 
     :return: Formatted table
     """
@@ -132,26 +156,22 @@ def write_gene_fam_info(
         expectedrows=pangenome.number_of_gene_families,
     )
 
-    row = gene_fam_seq.row
-    for fam in tqdm(
-        pangenome.gene_families,
-        total=pangenome.number_of_gene_families,
-        unit="gene family",
-        disable=disable_bar,
-    ):
-        row["name"] = fam.name
-        row["protein"] = fam.sequence
-        row["partition"] = fam.partition
-        row.append()
-    gene_fam_seq.flush()
+    with TableWriter(h5f, gene_fam_seq) as writer:
+        for fam in tqdm(
+            pangenome.gene_families,
+            total=pangenome.number_of_gene_families,
+            unit="gene family",
+            disable=disable_bar,
+        ):
+            writer.append(name=fam.name, protein=fam.sequence, partition=fam.partition)
 
 
-def gene_to_fam_desc(gene_fam_name_len: int, gene_id_len: int) -> dict:
+def gene_to_fam_desc(gene_fam_name_len: int = 1, gene_id_len: int = 1) -> dict:
     """
     Create a formatted table for gene in gene families information
 
-    :param gene_fam_name_len: Maximum size of gene family names
-    :param gene_id_len: Maximum size of gene identifier
+    :param gene_fam_name_len: Initial size of gene family names
+    :param gene_id_len: Initial size of gene identifier
 
     :return: formatted table
     """
@@ -202,49 +222,148 @@ def write_gene_families(
             "/", "geneFamilies"
         )  # erasing the table, and rewriting a new one.
     gene_families = h5f.create_table(
-        "/", "geneFamilies", gene_to_fam_desc(*get_gene_to_fam_len(pangenome))
+        "/",
+        "geneFamilies",
+        gene_to_fam_desc(*get_gene_to_fam_len(pangenome)),
+        expectedrows=pangenome.number_of_genes,
     )
-    gene_row = gene_families.row
-    for family in tqdm(
-        pangenome.gene_families,
-        total=pangenome.number_of_gene_families,
-        unit="gene family",
-        disable=disable_bar,
-    ):
-        for gene in family.genes:
-            gene_row["gene"] = gene.ID
-            gene_row["geneFam"] = family.name
-            gene_row.append()
-    gene_families.flush()
+    with TableWriter(h5f, gene_families) as writer:
+        for family in tqdm(
+            pangenome.gene_families,
+            total=pangenome.number_of_gene_families,
+            unit="gene family",
+            disable=disable_bar,
+        ):
+            for gene in family.genes:
+                writer.append(gene=gene.ID, geneFam=family.name)
+
+
+def get_presence_absence_chunk_rows(number_of_genomes: int) -> int:
+    """
+    Get the number of gene families stored in each chunk of the presence/absence matrices,
+    so that a chunk of the number of copies weighs about 1 MB.
+
+    :param number_of_genomes: Number of genomes in the pangenome
+
+    :return: Number of gene families in a chunk
+    """
+    return max(1, 2**18 // max(1, number_of_genomes))
+
+
+def write_presence_absence(
+    pangenome: Pangenome,
+    h5f: tables.File,
+    force: bool = False,
+    disable_bar: bool = False,
+):
+    """
+    Writes the presence/absence of the gene families in the genomes as a bit-packed matrix,
+    with the number of copies of each family in each genome.
+    Rows follow the 'families' array and columns the 'genomes' array of the group.
+
+    :param pangenome: Pangenome with gene families computed
+    :param h5f: HDF5 file to write the matrices
+    :param force: force to write information if precedent information exist
+    :param disable_bar: Disable progress bar
+    """
+    if "/presenceAbsence" in h5f and force is True:
+        logging.getLogger("PPanGGOLiN").info(
+            "Erasing the formerly computed presence/absence matrix..."
+        )
+        h5f.remove_node("/", "presenceAbsence", recursive=True)
+
+    organisms = list(pangenome.organisms)
+    families = list(pangenome.gene_families)
+    if len(organisms) == 0 or len(families) == 0:
+        return
+    org_index = {org: index for index, org in enumerate(organisms)}
+    chunk_rows = get_presence_absence_chunk_rows(len(organisms))
+    matrix_filter = tables.Filters(complevel=1, shuffle=True, complib="blosc:zstd")
+
+    group = h5f.create_group(
+        "/",
+        "presenceAbsence",
+        "Presence/absence and number of copies of the gene families in the genomes",
+    )
+    h5f.create_array(
+        group, "genomes", np.array([org.name.encode() for org in organisms])
+    )
+    h5f.create_array(
+        group, "families", np.array([fam.name.encode() for fam in families])
+    )
+    presence = h5f.create_carray(
+        group,
+        "matrix",
+        tables.UInt8Atom(),
+        shape=(len(families), (len(organisms) + 7) // 8),
+        chunkshape=(chunk_rows, (len(organisms) + 7) // 8),
+        filters=matrix_filter,
+    )
+    copy_number = h5f.create_carray(
+        group,
+        "copyNumber",
+        tables.UInt32Atom(),
+        shape=(len(families), len(organisms)),
+        chunkshape=(chunk_rows, len(organisms)),
+        filters=matrix_filter,
+    )
+
+    with tqdm(total=len(families), unit="gene family", disable=disable_bar) as progress:
+        for start in range(0, len(families), chunk_rows):
+            counts = np.zeros(
+                (min(chunk_rows, len(families) - start), len(organisms)),
+                dtype=np.uint32,
+            )
+            for row, family in enumerate(families[start : start + chunk_rows]):
+                for gene in family.genes:
+                    counts[row, org_index[gene.organism]] += 1
+            copy_number[start : start + len(counts)] = counts
+            presence[start : start + len(counts)] = np.packbits(counts > 0, axis=1)
+            progress.update(len(counts))
+    h5f.flush()
+
+
+def graph_desc() -> dict:
+    """
+    Create a formatted table for pangenome graph.
+    Genes are given by their row index in the '/annotations/genes' table.
+
+    :return: formatted table
+    """
+    return {
+        "geneTarget": tables.UInt32Col(),
+        "geneSource": tables.UInt32Col(),
+    }
 
 
-def graph_desc(max_gene_id_len):
+def family_graph_desc(max_fam_name_len: int = 1) -> dict:
     """
-    Create a formatted table for pangenome graph
+    Create a formatted table for the pangenome graph aggregated at the gene family level
 
-    :param max_gene_id_len: Maximum size of gene id
+    :param max_fam_name_len: Initial size of gene family name
 
     :return: formatted table
     """
     return {
-        "geneTarget": tables.StringCol(itemsize=max_gene_id_len),
-        "geneSource": tables.StringCol(itemsize=max_gene_id_len),
+        "familySource": tables.StringCol(itemsize=max_fam_name_len),
+        "familyTarget": tables.StringCol(itemsize=max_fam_name_len),
+        "genomes": tables.UInt32Col(),
+        "genePairs": tables.UInt32Col(),
     }
 
 
-def get_gene_id_len(pangenome: Pangenome) -> int:
+def get_gene_row_index(h5f: tables.File) -> Dict[str, int]:
     """
-    Get maximum size of gene id in pangenome graph
+    Get the row index of each gene in the annotation table of the pangenome file
 
-    :param pangenome: Pangenome with graph computed
+    :param h5f: HDF5 file with annotations written
 
-    :return: Maximum size of gene id
+    :return: Dictionary linking gene identifier to its row index
     """
-    max_gene_len = 1
-    for gene in pangenome.genes:
-        if len(gene.ID) > max_gene_len:
-            max_gene_len = len(gene.ID)
-    return max_gene_len
+    return {
+        gene_id.decode(): index
+        for index, gene_id in enumerate(h5f.root.annotations.genes.col("ID").tolist())
+    }
 
 
 def write_graph(
@@ -254,45 +373,65 @@ def write_graph(
     disable_bar: bool = False,
 ):
     """
-    Function writing the pangenome graph
+    Function writing the pangenome graph.
+    Gene pairs are written with the integer row index of the genes in the annotation table, and each edge is
+    also written once in a family level table that can be read without loading the annotations.
+    As in files written with gene identifiers, the first gene of a pair is written as its target and the second one
+    as its source, so edges read back are oriented as they always were.
 
     :param pangenome: pangenome with graph computed
     :param h5f: HDF5 file to save pangenome graph
     :param force: Force to write graph in hdf5 file if there is already one
     :param disable_bar: Disable progress bar
     """
-    # TODO if we want to be able to read the graph without reading the annotations (because it's one of the most time
-    #  consumming parts to read), it might be good to add the organism name in the table here.
-    #  for now, forcing the read of annotations.
-    if "/edges" in h5f and force is True:
-        logging.getLogger("PPanGGOLiN").info("Erasing the formerly computed edges")
-        h5f.remove_node("/", "edges")
+    if force is True:
+        if "/edges" in h5f:
+            logging.getLogger("PPanGGOLiN").info("Erasing the formerly computed edges")
+            h5f.remove_node("/", "edges")
+        if "/familyEdges" in h5f:
+            h5f.remove_node("/", "familyEdges")
+    gene_row_index = get_gene_row_index(h5f)
+    number_of_gene_pairs = sum(edge.number_of_gene_pairs for edge in pangenome.edges)
     edge_table = h5f.create_table(
         "/",
         "edges",
-        graph_desc(get_gene_id_len(pangenome)),
+        graph_desc(),
+        expectedrows=number_of_gene_pairs,
+    )
+    family_edge_table = h5f.create_table(
+        "/",
+        "familyEdges",
+        family_graph_desc(get_gene_fam_len(pangenome)[0]),
         expectedrows=pangenome.number_of_edges,
     )
-    edge_row = edge_table.row
-    for edge in tqdm(
-        pangenome.edges,
-        total=pangenome.number_of_edges,
-        unit="edge",
-        disable=disable_bar,
-    ):
-        for gene1, gene2 in edge.gene_pairs:
-            edge_row["geneTarget"] = gene1.ID
-            edge_row["geneSource"] = gene2.ID
-            edge_row.append()
-    edge_table.flush()
+    with TableWriter(h5f, edge_table) as edge_writer, TableWriter(
+        h5f, family_edge_table
+    ) as family_edge_writer:
+        for _, gene1, gene2 in tqdm(
+            pangenome.edge_gene_pairs,
+            total=number_of_gene_pairs,
+            unit="gene pair",
+            disable=disable_bar,
+        ):
+            edge_writer.append(
+                geneSource=gene_row_index[gene2.ID],
+                geneTarget=gene_row_index[gene1.ID],
+            )
+        for edge in pangenome.edges:
+            family_edge_writer.append(
+                familySource=edge.target.name,
+                familyTarget=edge.source.name,
+                genomes=edge.number_of_organisms,
+                genePairs=edge.number_of_gene_pairs,
+            )
 
 
-def rgp_desc(max_rgp_len, max_gene_len):
+def rgp_desc(max_rgp_len=1, max_gene_len=1):
     """
     Create a formatted table for region of genomic plasticity
 
-    :param max_rgp_len: Maximum size of RGP
-    :param max_gene_len: Maximum sizez of gene
+    :param max_rgp_len: Initial size of RGP
+    :param max_gene_len: Initial size of gene
 
     :return: formatted table
     """
@@ -345,25 +484,22 @@ def write_rgp(
         rgp_desc(*get_rgp_len(pangenome)),
         expectedrows=sum([len(region) for region in pangenome.regions]),
     )
-    rgp_row = rgp_table.row
-    for region in tqdm(
-        pangenome.regions,
-        total=pangenome.number_of_rgp,
-        unit="region",
-        disable=disable_bar,
-    ):
-        for gene in region.genes:
-            rgp_row["RGP"] = region.name
-            rgp_row["gene"] = gene.ID
-            rgp_row.append()
-    rgp_table.flush()
+    with TableWriter(h5f, rgp_table) as writer:
+        for region in tqdm(
+            pangenome.regions,
+            total=pangenome.number_of_rgp,
+            unit="region",
+            disable=disable_bar,
+        ):
+            for gene in region.genes:
+                writer.append(RGP=region.name, gene=gene.ID)
 
 
-def spot_desc(max_rgp_len):
+def spot_desc(max_rgp_len=1):
     """
     Create a formatted table for hotspot
 
-    :param max_rgp_len: Maximum size of RGP
+    :param max_rgp_len: Initial size of RGP
 
     :return: formatted table
     """
@@ -410,25 +546,22 @@ def write_spots(
         spot_desc(get_spot_desc(pangenome)),
         expectedrows=sum([len(spot) for spot in pangenome.spots]),
     )
-    spot_row = spot_table.row
-    for spot in tqdm(
-        pangenome.spots,
-        total=pangenome.number_of_spots,
-        unit="spot",
-        disable=disable_bar,
-    ):
-        for region in spot.regions:
-            spot_row["spot"] = spot.ID
-            spot_row["RGP"] = region.name
-            spot_row.append()
-    spot_table.flush()
+    with TableWriter(h5f, spot_table) as writer:
+        for spot in tqdm(
+            pangenome.spots,
+            total=pangenome.number_of_spots,
+            unit="spot",
+            disable=disable_bar,
+        ):
+            for region in spot.regions:
+                writer.append(spot=spot.ID, RGP=region.name)
 
 
-def mod_desc(gene_fam_name_len):
+def mod_desc(gene_fam_name_len=1):
     """
     Create a formatted table for hotspot
 
-    :param gene_fam_name_len: Maximum size of gene families name
+    :param gene_fam_name_len: Initial size of gene families name
 
     :return: formatted table
     """
@@ -478,19 +611,15 @@ def write_modules(
         mod_desc(get_mod_desc(pangenome)),
         expectedrows=sum([len(mod) for mod in pangenome.modules]),
     )
-    mod_row = mod_table.row
-
-    for mod in tqdm(
-        pangenome.modules,
-        total=pangenome.number_of_modules,
-        unit="modules",
-        disable=disable_bar,
-    ):
-        for fam in mod.families:
-            mod_row["geneFam"] = fam.name
-            mod_row["module"] = mod.ID
-            mod_row.append()
-    mod_table.flush()
+    with TableWriter(h5f, mod_table) as writer:
+        for mod in tqdm(
+            pangenome.modules,
+            total=pangenome.number_of_modules,
+            unit="modules",
+            disable=disable_bar,
+        ):
+            for fam in mod.families:
+                writer.append(geneFam=fam.name, module=mod.ID)
 
     write_info_modules(pangenome, h5f)
 
@@ -560,6 +689,42 @@ def write_status(pangenome: Pangenome, h5f: tables.File):
     status_group._v_attrs.version = distribution("ppanggolin").version
 
 
+def mark_stale_steps(h5f: tables.File):
+    """
+    Marks the steps computed in a pangenome file as stale, as they do not include genomes added afterward.
+    Their results are kept in the file until they are computed again.
+
+    :param h5f: Pangenome file
+    """
+    status_attrs = h5f.root.status._v_attrs
+    stale_steps = [
+        step
+        for step in STALE_STEP_COMMANDS
+        if step in status_attrs._f_list() and status_attrs[step]
+    ]
+    status_attrs.staleSteps = stale_steps
+    if len(stale_steps) > 0:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"The following steps do not include the added genomes anymore: "
+            f"{', '.join(STALE_STEP_COMMANDS[step] for step in stale_steps)}. "
+            f"Run these commands again with --force to update them."
+        )
+
+
+def unmark_stale_steps(h5f: tables.File, steps: List[str]):
+    """
+    Removes the given steps from the stale steps of a pangenome file, once they have been computed again.
+
+    :param h5f: Pangenome file
+    :param steps: Status attribute names of the computed steps
+    """
+    status_attrs = h5f.root.status._v_attrs
+    if "staleSteps" in status_attrs._f_list():
+        status_attrs.staleSteps = [
+            step for step in get_stale_steps(h5f) if step not in steps
+        ]
+
+
 def write_info(pangenome: Pangenome, h5f: tables.File):
     """
     Writes information and numbers to be eventually called with the 'info' submodule
@@ -640,6 +805,32 @@ def write_info(pangenome: Pangenome, h5f: tables.File):
     )  # saving the pangenome parameters
 
 
+def write_partition_model(pangenome: Pangenome, h5f: tables.File):
+    """
+    Writes the partition model of the pangenome in the info group, replacing the former one.
+    Arrays of the model are stored as arrays of the partitionModel group, and the other values as its attributes.
+
+    :param pangenome: Partitioned pangenome
+    :param h5f: Pangenome file to save the partition model
+    """
+    if "/info" not in h5f:
+        h5f.create_group("/", "info", "Information about the pangenome content")
+    if "/info/partitionModel" in h5f:
+        h5f.remove_node("/info", "partitionModel", recursive=True)
+    if len(pangenome.partition_model) == 0:
+        return
+    group = h5f.create_group(
+        "/info",
+        "partitionModel",
+        "Parameters and family partitions of the last partitioning, to start the next one from",
+    )
+    for key, value in pangenome.partition_model.items():
+        if isinstance(value, np.ndarray):
+            h5f.create_array(group, key, value)
+        else:
+            group._v_attrs[key] = value
+
+
 def write_info_modules(pangenome: Pangenome, h5f: tables.File):
     """
     Writes information about modules
@@ -788,6 +979,8 @@ def erase_pangenome(
         if "/edges" in h5f and (graph or gene_families):
             logging.getLogger("PPanGGOLiN").info("Erasing the formerly computed edges")
             h5f.remove_node("/", "edges")
+            if "/familyEdges" in h5f:
+                h5f.remove_node("/", "familyEdges")
             status_group._v_attrs.NeighborsGraph = False
             pangenome.status["neighborsGraph"] = "No"
             h5f.del_node_attr(info_group, "numberOfEdges")
@@ -805,6 +998,12 @@ def erase_pangenome(
 
             h5f.del_node_attr(info_group, "numberOfClusters")
 
+        if "/presenceAbsence" in h5f and gene_families:
+            logging.getLogger("PPanGGOLiN").info(
+                "Erasing the formerly computed presence/absence matrix..."
+            )
+            h5f.remove_node("/", "presenceAbsence", recursive=True)
+
         if "/geneFamiliesInfo" in h5f and gene_families:
             logging.getLogger("PPanGGOLiN").info(
                 "Erasing the formerly computed gene family representative sequences..."
@@ -904,6 +1103,13 @@ def write_pangenome(
             pangenome.status["genomesAnnotated"] = "Loaded"
             h5f.close()
 
+    # steps computed in this run include all the genomes of the file
+    computed_steps = [
+        step
+        for step, status in STALE_STEP_TO_STATUS.items()
+        if pangenome.status[status] == "Computed"
+    ]
+
     # from there, appending to existing file
     h5f = tables.open_file(filename, "a")
 
@@ -923,6 +1129,10 @@ def write_pangenome(
             "Writing gene families information in pangenome..."
         )
         write_gene_fam_info(pangenome, h5f, force, disable_bar=disable_bar)
+        logging.getLogger("PPanGGOLiN").info(
+            "Writing the presence/absence matrix of gene families in genomes..."
+        )
+        write_presence_absence(pangenome, h5f, force, disable_bar=disable_bar)
         if (
             pangenome.status["genomesAnnotated"] in ["Loaded", "inFile"]
             and pangenome.status["defragmented"] == "Computed"
@@ -931,6 +1141,17 @@ def write_pangenome(
             # and there has been a clustering with defragmentation, then the annotations can be updated
             update_gene_fragments(pangenome, h5f, disable_bar=disable_bar)
         pangenome.status["genesClustered"] = "Loaded"
+    elif (
+        "/presenceAbsence" not in h5f
+        and pangenome.status["genesClustered"] == "Loaded"
+        and pangenome.status["genomesAnnotated"] in ["Computed", "Loaded"]
+        and "genesClustered" not in get_stale_steps(h5f)
+    ):
+        # files written before the matrix existed get it as soon as their families are loaded
+        logging.getLogger("PPanGGOLiN").info(
+            "Writing the presence/absence matrix of gene families in genomes..."
+        )
+        write_presence_absence(pangenome, h5f, disable_bar=disable_bar)
     if pangenome.status["neighborsGraph"] == "Computed":
         logging.getLogger("PPanGGOLiN").info(
             "Writing the edges of neighbors graph in pangenome..."
@@ -945,6 +1166,8 @@ def write_pangenome(
     ]:  # otherwise, it's been written already.
         update_gene_fam_partition(pangenome, h5f, disable_bar=disable_bar)
         pangenome.status["partitioned"] = "Loaded"
+    if "Partitioned" in computed_steps:
+        write_partition_model(pangenome, h5f)
 
     if pangenome.status["predictedRGP"] == "Computed":
         logging.getLogger("PPanGGOLiN").info(
@@ -968,9 +1191,77 @@ def write_pangenome(
     write_metadata(pangenome, h5f, disable_bar)
 
     write_status(pangenome, h5f)
+    unmark_stale_steps(h5f, computed_steps)
     write_info(pangenome, h5f)
 
+    logging.getLogger("PPanGGOLiN").debug("Indexing the key columns of the tables...")
+    index_pangenome_tables(h5f)
+
     h5f.close()
     logging.getLogger("PPanGGOLiN").info(
         f"Done writing the pangenome. It is in file : {filename}"
     )
+
+
+def append_genomes(
+    pangenome: Pangenome, new_genomes: Pangenome, disable_bar: bool = False
+):
+    """
+    Appends new genomes to the annotations of a pangenome file without rewriting it.
+    Steps computed from the genomes already in the file are kept, but marked as stale.
+
+    :param pangenome: Pangenome associated to the file, with its status read
+    :param new_genomes: Pangenome with only the genomes to append, annotated and not written
+    :param disable_bar: Allow to disable progress bar
+    """
+    with tables.open_file(pangenome.file, "a") as h5f:
+        logging.getLogger("PPanGGOLiN").info(
+            f"Appending {new_genomes.number_of_organisms} genomes to the pangenome file..."
+        )
+        append_annotations(new_genomes, h5f, disable_bar=disable_bar)
+
+        if pangenome.status["geneSequences"] in ["Loaded", "inFile"]:
+            if new_genomes.status["geneSequences"] in ["Computed", "Loaded"]:
+                logging.getLogger("PPanGGOLiN").info(
+                    "Appending the protein coding gene dna sequences..."
+                )
+                append_gene_sequences(new_genomes, h5f, disable_bar=disable_bar)
+            else:
+                logging.getLogger("PPanGGOLiN").warning(
+                    "The added genomes do not have gene sequences. "
+                    "The gene sequences of the pangenome file are removed as they would be incomplete."
+                )
+                h5f.remove_node("/annotations", "geneSequences")
+                h5f.remove_node("/annotations", "sequences")
+                pangenome.status["geneSequences"] = "No"
+
+        for metatype in ["genomes", "contigs"]:
+            if new_genomes.status["metadata"][metatype] == "Computed":
+                for source in new_genomes.status["metasources"][metatype]:
+                    logging.getLogger("PPanGGOLiN").info(
+                        f"Appending {metatype} metadata of source {source}..."
+                    )
+                    append_metadata_metatype(
+                        h5f,
+                        source,
+                        metatype,
+                        list(new_genomes.get_elem_by_source(source, metatype)),
+                        disable_bar,
+                    )
+                    if source not in pangenome.status["metasources"][metatype]:
+                        pangenome.status["metasources"][metatype].append(source)
+                pangenome.status["metadata"][metatype] = "Loaded"
+
+        if "/presenceAbsence" in h5f:
+            # the matrix is written again with the gene families, once they include the added genomes
+            h5f.remove_node("/", "presenceAbsence", recursive=True)
+
+        info_group = h5f.root.info
+        info_group._v_attrs.numberOfGenes += new_genomes.number_of_genes
+        info_group._v_attrs.numberOfGenomes += new_genomes.number_of_organisms
+        if "genomes_fluidity" in info_group._v_attrs._f_list():
+            h5f.del_node_attr(info_group, "genomes_fluidity")
+
+        write_status(pangenome, h5f)
+        mark_stale_steps(h5f)
+        index_pangenome_tables(h5f)
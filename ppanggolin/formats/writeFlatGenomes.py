@@ -29,6 +29,7 @@ from ppanggolin.utils import (
     parse_input_paths_file,
 )
 from ppanggolin.formats.readBinaries import check_pangenome_info
+from ppanggolin.formats.lazyPangenome import LazyPangenome
 from ppanggolin.formats.write_proksee import write_proksee_organism
 from ppanggolin.formats.writeSequences import read_genome_file, write_spaced_fasta
 
@@ -712,7 +713,7 @@ def write_flat_genome_files(
     # Place here to raise an error if file doesn't found before to read pangenome
     organisms_file = fasta if fasta is not None else anno
 
-    check_pangenome_info(pangenome, disable_bar=disable_bar, **need_dict)
+    check_pangenome_info(pangenome, cpu=cpu, disable_bar=disable_bar, **need_dict)
 
     organisms_list = get_organism_list(organisms_filt, pangenome)
     if not organisms_list:
@@ -769,10 +770,12 @@ def write_flat_genome_files(
                 organism_args["annotation_sources"] = {}
 
         if table:
-            # create _genePerOrg dict with get_org_dict methodbefore the multiprocessing to prevent putative errors.
-            # As this is used in multiprocessing when computing nb_copy_in_genome.
-            for family in pangenome.gene_families:
-                family.get_org_dict()
+            if not isinstance(pangenome, LazyPangenome):
+                # create _genePerOrg dict with get_org_dict methodbefore the multiprocessing to prevent putative errors.
+                # As this is used in multiprocessing when computing nb_copy_in_genome.
+                # Lazy gene families give the genes of a genome without it.
+                for family in pangenome.gene_families:
+                    family.get_org_dict()
 
             organism_args.update(
                 {
@@ -817,7 +820,11 @@ def launch(args: argparse.Namespace):
     """
     mk_outdir(args.output, args.force)
 
-    pangenome = Pangenome()
+    if args.genomes == "all":
+        pangenome = Pangenome()
+    else:
+        # Only the selected genomes, and the gene families in them, are read from the file
+        pangenome = LazyPangenome()
     pangenome.add_file(args.pangenome)
 
     write_flat_genome_files(
@@ -836,6 +843,8 @@ def launch(args: argparse.Namespace):
         cpu=args.cpu,
         disable_bar=args.disable_prog_bar,
     )
+    if isinstance(pangenome, LazyPangenome):
+        pangenome.close()
 
 
 def subparser(sub_parser: argparse._SubParsersAction) -> argparse.ArgumentParser:
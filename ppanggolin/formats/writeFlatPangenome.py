@@ -15,6 +15,7 @@ import os
 import csv
 
 # installed libraries
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
@@ -152,7 +153,7 @@ def write_json_edge(edge: Edge, json: TextIO):
     """
     json.write("{")
     json.write(
-        f'"weight": {len(edge.gene_pairs)}, "source": "{edge.source.name}", "target": "{edge.target.name}"'
+        f'"weight": {edge.number_of_gene_pairs}, "source": "{edge.source.name}", "target": "{edge.target.name}"'
     )
     json.write(', "genomes": {')
     orgstr = []
@@ -206,6 +207,35 @@ def write_json(output: Path, compress: bool = False):
     )
 
 
+def write_sparse_graph(output: Path, compress: bool = False):
+    """Writes the graph as the adjacency matrix of the gene families, weighted by the number of genomes of the edges.
+
+    The file can be read with scipy.sparse.load_npz, and the gene family names of the rows and columns are in its
+    'families' array.
+
+    :param output: Path to output directory
+    :param compress: Compress the arrays of the npz file
+    """
+    logging.getLogger("PPanGGOLiN").info(
+        "Writing the sparse matrix of the pangenome graph..."
+    )
+    outname = output / "pangenomeGraph.npz"
+    matrix = pan.to_sparse_graph(weight="genomes")
+    save = np.savez_compressed if compress else np.savez
+    save(
+        outname,
+        format=matrix.format.encode("ascii"),
+        shape=matrix.shape,
+        data=matrix.data,
+        indices=matrix.indices,
+        indptr=matrix.indptr,
+        families=np.array([family.name for family in pan.get_fam_index()]),
+    )
+    logging.getLogger("PPanGGOLiN").info(
+        f"Done writing the sparse matrix of the pangenome graph : '{outname.as_posix()}'"
+    )
+
+
 def write_gexf_header(gexf: TextIO, light: bool = True):
     """Write the header of gexf file to save graph
 
@@ -291,16 +321,19 @@ def write_gexf_nodes(gexf: TextIO, light: bool = True, soft_core: False = 0.95):
 
     pan_metadata_sources = pan.metadata_sources("families")
 
+    gene_index = pan.gene_index
     for fam in pan.gene_families:
         name = Counter()
         product = Counter()
         gtype = Counter()
-        lis = []
         for gene in fam.genes:
             name[gene.name] += 1
             product[gene.product.replace("&", "and")] += 1
             gtype[gene.type] += 1
-            lis.append(gene.stop - gene.start)
+        genes = gene_index.family_genes(fam)
+        lis = (
+            gene_index.stop[genes].astype(np.int64) - gene_index.start[genes]
+        ).tolist()
 
         gexf.write(f'      <node id="{fam.ID}" label="{fam.name}">\n')
         gexf.write(f"        <viz:color {colors[fam.named_partition]} />\n")
@@ -389,11 +422,13 @@ def write_gexf_edges(gexf: TextIO, light: bool = True):
         )
         gexf.write(f'        <viz:thickness value="{edge.number_of_organisms}" />\n')
         gexf.write("        <attvalues>\n")
-        gexf.write(f'          <attvalue for="11" value="{len(edge.gene_pairs)}" />\n')
+        gexf.write(
+            f'          <attvalue for="11" value="{edge.number_of_gene_pairs}" />\n'
+        )
         if not light:
-            for org, genes_pairs in edge.get_organisms_dict().items():
+            for org, number_of_gene_pairs in edge.get_organism_pair_counts().items():
                 gexf.write(
-                    f'          <attvalue for="{index[org] + len(index) + metadata_count + shift}" value="{len(genes_pairs)}" />\n'
+                    f'          <attvalue for="{index[org] + len(index) + metadata_count + shift}" value="{number_of_gene_pairs}" />\n'
                 )
         gexf.write("        </attvalues>\n")
         gexf.write("      </edge>\n")
@@ -496,9 +531,9 @@ def write_matrix(
             else ["0"] * pan.number_of_organisms
         )
         org_index = pan.get_org_index()  # should just return things
+        gene_index = pan.gene_index
         for fam in pan.gene_families:
             genes = default_genes.copy()
-            lis = []
             genenames = Counter()
             product = Counter()
             for org, gene_list in fam.get_org_dict().items():
@@ -508,7 +543,6 @@ def write_matrix(
                     else str(len(gene_list))
                 )
                 for gene in gene_list:
-                    lis.append(gene.stop - gene.start)
                     product[gene.product] += 1
                     genenames[gene.name] += 1
 
@@ -517,7 +551,11 @@ def write_matrix(
             else:
                 alt = str(product.most_common(1)[0][0])
 
-            lis = [gene.stop - gene.start for gene in fam.genes]
+            fam_genes = gene_index.family_genes(fam)
+            lis = (
+                gene_index.stop[fam_genes].astype(np.int64)
+                - gene_index.start[fam_genes]
+            ).tolist()
             matrix.write(
                 sep.join(
                     [
@@ -567,11 +605,11 @@ def write_gene_presence_absence(output: Path, compress: bool = False):
             "\t".join(["Gene"] + [str(org) for org in pan.organisms]) + "\n"  # 14
         )  # 15
         default_genes = ["0"] * pan.number_of_organisms
-        org_index = pan.get_org_index()  # should just return things
+        gene_index = pan.gene_index  # organisms are indexed in the same order
         for fam in pan.gene_families:
             genes = default_genes.copy()
-            for org in fam.organisms:
-                genes[org_index[org]] = "1"
+            for org_id in gene_index.family_organisms(fam).tolist():
+                genes[org_id] = "1"
 
             matrix.write("\t".join([fam.name] + genes) + "\n")  # 14  # 15
     logging.getLogger("PPanGGOLiN").info(
@@ -933,16 +971,19 @@ def write_partitions(output: Path, soft_core: float = 0.95):
     ]:
         part_sets[needed_key] = set()
 
-    for fam in pan.gene_families:
+    gene_index = pan.gene_index
+    for fam, nb_organisms in zip(
+        gene_index.families, gene_index.family_organism_counts().tolist()
+    ):
         part_sets[fam.named_partition].add(fam.name)
 
         # write sub shell partitions
         if fam.partition.startswith("S"):
             part_sets[fam.partition].add(fam.name)
 
-        if fam.number_of_organisms >= pan.number_of_organisms * soft_core:
+        if nb_organisms >= pan.number_of_organisms * soft_core:
             part_sets["soft_core"].add(fam.name)
-            if fam.number_of_organisms == pan.number_of_organisms:
+            if nb_organisms == pan.number_of_organisms:
                 part_sets["exact_core"].add(fam.name)
             else:
                 part_sets["exact_accessory"].add(fam.name)
@@ -1234,13 +1275,20 @@ def write_org_modules(output: Path, compress: bool = False):
     logging.getLogger("PPanGGOLiN").info("Writing modules to genomes associations...")
     with write_compressed_or_not(output / "modules_in_genomes.tsv", compress) as fout:
         fout.write("module_id\tgenome\tcompletion\n")
+        gene_index = pan.gene_index
         for mod in pan.modules:
-            mod_orgs = set()
-            for fam in mod.families:
-                mod_orgs |= set(fam.organisms)
-            for org in mod_orgs:
-                completion = len(set(org.families) & set(mod.families)) / len(mod)
-                fout.write(f"module_{mod.ID}\t{org.name}\t{completion:.2}\n")
+            # number of families of the module in each genome
+            mod_counts = np.bincount(
+                np.concatenate(
+                    [gene_index.family_organisms(fam) for fam in mod.families]
+                ),
+                minlength=len(gene_index.organisms),
+            )
+            for org_id in np.flatnonzero(mod_counts).tolist():
+                completion = mod_counts[org_id] / len(mod)
+                fout.write(
+                    f"module_{mod.ID}\t{gene_index.organisms[org_id].name}\t{completion:.2}\n"
+                )
         fout.close()
     logging.getLogger("PPanGGOLiN").info(
         f"Done writing modules to genomes associations to: '{output.as_posix() + '/modules_in_genomes.tsv'}'"
@@ -1336,6 +1384,7 @@ def write_pangenome_flat_files(
     light_gexf: bool = False,
     stats: bool = False,
     json: bool = False,
+    sparse_graph: bool = False,
     partitions: bool = False,
     families_tsv: bool = False,
     regions: bool = False,
@@ -1360,6 +1409,7 @@ def write_pangenome_flat_files(
     :param light_gexf: write pangenome graph with only gene families
     :param stats: write statistics about pangenome
     :param json: write pangenome graph in json file
+    :param sparse_graph: write pangenome graph as a sparse adjacency matrix of the gene families in a npz file
     :param partitions: write the gene families for each partition
     :param families_tsv: write gene families information
     :param regions: write RGP information
@@ -1380,6 +1430,7 @@ def write_pangenome_flat_files(
             light_gexf,
             stats,
             json,
+            sparse_graph,
             partitions,
             spots,
             borders,
@@ -1413,6 +1464,7 @@ def write_pangenome_flat_files(
         or light_gexf
         or stats
         or json
+        or sparse_graph
         or partitions
         or spots
         or families_tsv
@@ -1425,6 +1477,8 @@ def write_pangenome_flat_files(
         needFamilies = True
     if stats or partitions or spots or borders:
         needPartitions = True
+    if sparse_graph:
+        needGraph = True
     if gexf or light_gexf or json or stats:
         needGraph = True
         needRegions = True if pan.status["predictedRGP"] == "inFile" else False
@@ -1454,9 +1508,12 @@ def write_pangenome_flat_files(
         need_metadata=needMetadata,
         metatypes=[metatype],
         sources=None,
+        cpu=cpu,
         disable_bar=disable_bar,
     )
     pan.get_org_index()  # make the index because it will be used most likely
+    if gene_pa or partitions or modules:
+        _ = pan.gene_index  # index the genes once before the writers are forked
     with get_context("fork").Pool(processes=cpu) as p:
         if csv:
             processes.append(
@@ -1484,6 +1541,10 @@ def write_pangenome_flat_files(
             )
         if json:
             processes.append(p.apply_async(func=write_json, args=(output, compress)))
+        if sparse_graph:
+            processes.append(
+                p.apply_async(func=write_sparse_graph, args=(output, compress))
+            )
         if partitions:
             processes.append(
                 p.apply_async(func=write_partitions, args=(output, soft_core))
@@ -1543,6 +1604,7 @@ def launch(args: argparse.Namespace):
         light_gexf=args.light_gexf,
         stats=args.stats,
         json=args.json,
+        sparse_graph=args.sparse_graph,
         partitions=args.partitions,
         families_tsv=args.families_tsv,
         regions=args.regions,
@@ -1629,6 +1691,14 @@ def parser_flat(parser: argparse.ArgumentParser):
         help="Writes the graph in a json file format",
     )
 
+    optional.add_argument(
+        "--sparse_graph",
+        required=False,
+        action="store_true",
+        help="Writes the graph as a sparse adjacency matrix of the gene families, weighted by the number of "
+        "genomes of the edges, in a npz file readable with scipy.sparse.load_npz",
+    )
+
     optional.add_argument(
         "--csv",
         required=False,
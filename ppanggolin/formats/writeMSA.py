@@ -2,6 +2,7 @@
 
 # default libraries
 import argparse
+import gc
 import logging
 import tempfile
 import time
@@ -238,10 +239,15 @@ def compute_msa(
             "Use --verbose 2 to see genes that are partial"
         )
     logging.getLogger("PPanGGOLiN").info("Computing the MSA ...")
-    with get_context("fork").Pool(cpu) as p:
-        with tqdm(total=len(families), unit="family", disable=disable_bar) as bar:
-            for _ in p.imap_unordered(launch_multi_mafft, args):
-                bar.update()
+    # workers only read the files written above, and the inherited objects are left out of their garbage collection
+    gc.freeze()
+    try:
+        with get_context("fork").Pool(cpu) as p:
+            with tqdm(total=len(families), unit="family", disable=disable_bar) as bar:
+                for _ in p.imap_unordered(launch_multi_mafft, args):
+                    bar.update()
+    finally:
+        gc.unfreeze()
 
 
 def write_whole_genome_msa(
@@ -369,6 +375,7 @@ def write_msa_files(
         need_families=True,
         need_partitions=need_partitions,
         need_gene_sequences=True,
+        cpu=cpu,
         disable_bar=disable_bar,
     )
     logging.getLogger("PPanGGOLiN").info(f"Doing MSA for {partition} families...")
@@ -14,6 +14,7 @@ from ppanggolin.pangenome import Pangenome
 from ppanggolin.genome import Organism, Gene, Contig
 from ppanggolin.geneFamily import GeneFamily
 from ppanggolin.region import Region, Spot, Module
+from ppanggolin.formats.writeAnnotations import append_to_table, resize_table
 
 
 def write_metadata_status(
@@ -102,180 +103,112 @@ def desc_metadata(
     return desc_dict
 
 
-def get_metadata_contig_len(
-    select_ctg: List[Contig], source: str
-) -> Tuple[Dict[str, int], Dict[str, tables.Col], int]:
-    """Get maximum size of contig metadata information
+def get_element_identifier(
+    element: Union[Gene, Organism, Contig, GeneFamily, Region, Spot, Module],
+    metatype: str,
+) -> Union[str, int]:
+    """Get the identifier of a pangenome element written in the metadata tables
 
-    :param select_ctg: selected elements from source
-    :param source: Name of the metadata source
+    :param element: Pangenome element with metadata
+    :param metatype: Type of the pangenome element
 
-    :return: Maximum type and size of each element
+    :return: Identifier of the element
     """
-    type_dict = {"metadata_id": tables.Int64Col(), "ID": tables.Int64Col()}
-    max_len_dict = {}
-    expected_rows = 0
-
-    for contig in select_ctg:
-        for metadata in contig.get_metadata_by_source(source).values():
-            for attr, value in (
-                (k, v) for k, v in metadata.__dict__.items() if k != "source"
-            ):
-                if isinstance(value, bytes):
-                    value = value.decode("UTF-8")
-                if isinstance(value, float) or isinstance(value, int):
-                    if attr in type_dict:
-                        if type_dict[attr] != type(value):
-                            if isinstance(value, float) and type_dict[attr] == int:
-                                type_dict[attr] = tables.Float64Col()
-                    else:
-                        if isinstance(value, float):
-                            type_dict[attr] = tables.Float64Col()
-                        else:
-                            type_dict[attr] = tables.Int64Col()
-                elif isinstance(value, str):
-                    if attr in max_len_dict:
-                        if len(value) > max_len_dict[attr]:
-                            max_len_dict[attr] = len(value)
-                    else:
-                        max_len_dict[attr] = len(value)
-                else:
-                    logging.getLogger("PPanGGOLiN").debug(
-                        f"attr: {attr}, value: {value}"
-                    )
-                    raise TypeError(f"{type(value)} is not acceptable")
-            expected_rows += 1
-
-    return max_len_dict, type_dict, expected_rows
-
-
-def write_metadata_contig(
-    h5f: tables.File,
-    source: str,
-    select_contigs: List[Contig],
-    disable_bar: bool = False,
-):
-    """Writing a table containing the metadata associated to contig
-
-    :param h5f: HDF5 file to write gene families
-    :param source: name of the metadata source
-    :param select_contigs: List of contig withj metadata
-    :param disable_bar: Disable progress bar
-    """
-    metatype_group = write_metadata_group(h5f, "contigs")
-    meta_len = get_metadata_contig_len(select_contigs, source)
-    # h5f.remove_node(metatype_group, source)
-    source_table = h5f.create_table(
-        metatype_group, source, desc_metadata(*meta_len[:-1]), expectedrows=meta_len[-1]
+    if metatype == "contigs":
+        return element.ID
+    if hasattr(element, "name") and element.name:
+        return element.name
+    if hasattr(element, "ID"):
+        if isinstance(
+            element.ID,
+            (str, int, numpy.uint8, numpy.uint16, numpy.uint32, numpy.uint64),
+        ):
+            return element.ID
+        raise TypeError(
+            f"Invalid type for 'ID' in element '{element}': expected integer-like type but got "
+            f"{type(element.ID).__name__}."
+        )
+    raise AttributeError(
+        f"Unexpected attribute in element '{element}': missing 'name' or 'ID'. "
+        "Please report this error on our GitHub."
     )
-    meta_row = source_table.row
-    for contig in tqdm(
-        select_contigs, unit="contigs", desc=f"Source = {source}", disable=disable_bar
-    ):
-        for meta_id, metadata in contig.get_metadata_by_source(source).items():
-            meta_row["metadata_id"] = meta_id
-            for desc in source_table.colnames:
-                if desc == "ID":
-                    meta_row[desc] = contig.ID
-                elif desc == "metadata_id":
-                    meta_row[desc] = meta_id
-                else:
-                    if hasattr(metadata, desc):
-                        value = metadata.__getattribute__(desc)
-                        if isinstance(value, bytes):
-                            value = value.decode("UTF-8")
-                        meta_row[desc] = value
-                    else:
-                        meta_row[desc] = None
-            meta_row.append()
-    source_table.flush()
-
-
-def get_metadata_len(
+
+
+def get_metadata_columns(
     select_elem: Union[
         List[Gene],
         List[Organism],
+        List[Contig],
         List[GeneFamily],
         List[Region],
         List[Spot],
         List[Module],
     ],
     source: str,
-) -> Tuple[Dict[str, int], Dict[str, tables.Col], int]:
-    """Get maximum size of metadata information
+    metatype: str,
+    disable_bar: bool = False,
+) -> Tuple[Dict[str, list], Dict[str, tables.Col]]:
+    """Get the metadata of a source column by column, with the description of the columns,
+    in a single pass over the elements
 
     :param select_elem: selected elements from source
     :param source: Name of the metadata source
+    :param metatype: Type of the selected elements
+    :param disable_bar: Disable progress bar
 
-    :return: Maximum type and size of each element
+    :return: Values of each column and description of the columns
     """
+    columns = {"metadata_id": [], "ID": []}
     type_dict = {"metadata_id": tables.Int64Col()}
     max_len_dict = {}
-    expected_rows = 0
-
-    for element in select_elem:
-        if hasattr(element, "name") and element.name:
-            max_len_dict["ID"] = max(max_len_dict.get("ID", 0), len(element.name))
-        elif hasattr(element, "ID"):
-            if isinstance(element.ID, str):
-                max_len_dict["ID"] = max(max_len_dict.get("ID", 0), len(element.ID))
-            elif isinstance(
-                element.ID, (int, numpy.uint8, numpy.uint16, numpy.uint32, numpy.uint64)
-            ):
-                type_dict["ID"] = tables.Int64Col()
-            else:
-                raise TypeError(
-                    f"Invalid type for 'ID' in element '{element}': expected integer-like type but got "
-                    f"{type(element.ID).__name__}."
-                )
+
+    def add_value(attr: str, value):
+        if isinstance(value, bytes):
+            value = value.decode("UTF-8")
+        if isinstance(value, str):
+            max_len_dict[attr] = max(max_len_dict.get(attr, 0), len(value))
+        elif isinstance(value, float):
+            type_dict[attr] = tables.Float64Col()
+        elif isinstance(value, (int, numpy.integer)):
+            if attr not in type_dict:
+                type_dict[attr] = tables.Int64Col()
         else:
-            raise AttributeError(
-                f"Unexpected attribute in element '{element}': missing 'name' or 'ID'. "
-                "Please report this error on our GitHub."
+            raise TypeError(
+                f"Invalid metadata type: The attribute '{attr}' from the pangenome element '{element}' "
+                f"has an unexpected value '{value}' of type '{type(value).__name__}'."
             )
+        if attr not in columns:
+            columns[attr] = [None] * (len(columns["ID"]) - 1)
+        columns[attr].append(value)
 
-        for metadata in element.get_metadata_by_source(source).values():
-            for attr, value in (
-                (k, v) for k, v in metadata.__dict__.items() if k != "source"
-            ):
-                if isinstance(value, bytes):
-                    value = value.decode("UTF-8")
-                if isinstance(value, float) or isinstance(value, int):
-                    if attr in type_dict:
-                        if isinstance(type_dict[attr], type(value)):
-                            if isinstance(value, float) and isinstance(
-                                type_dict[attr], int
-                            ):
-                                type_dict[attr] = tables.Float64Col()
-                    else:
-                        if isinstance(value, float):
-                            type_dict[attr] = tables.Float64Col()
-                        else:
-                            type_dict[attr] = tables.Int64Col()
-                elif isinstance(value, str):
-                    if attr in max_len_dict:
-                        if len(value) > max_len_dict[attr]:
-                            max_len_dict[attr] = len(value)
-                    else:
-                        max_len_dict[attr] = len(value)
-                else:
-                    logging.getLogger("PPanGGOLiN").debug(
-                        f"attr: {attr}, value: {value}"
-                    )
-                    raise TypeError(
-                        f"Invalid metadata type: The attribute '{attr}' from the pangenome element '{element}' "
-                        f"has an unexpected value '{value}' of type '{type(value).__name__}'."
-                    )
-
-            expected_rows += 1
+    for element in tqdm(
+        select_elem, unit=metatype, desc=f"Source = {source}", disable=disable_bar
+    ):
+        identifier = get_element_identifier(element, metatype)
+        if isinstance(identifier, str):
+            max_len_dict["ID"] = max(max_len_dict.get("ID", 0), len(identifier))
+        else:
+            type_dict["ID"] = tables.Int64Col()
+        for meta_id, metadata in element.get_metadata_by_source(source).items():
+            columns["metadata_id"].append(meta_id)
+            columns["ID"].append(identifier)
+            for attr, value in metadata.__dict__.items():
+                if attr not in ["source", "metadata_id"]:
+                    add_value(attr, value)
+            for values in columns.values():
+                if len(values) < len(columns["ID"]):
+                    values.append(None)
 
     for attribute, max_length in max_len_dict.items():
         if max_length == 0:
             raise ValueError(
                 f"Metadata attribute '{attribute}' has a length of 0, which is not allowed."
             )
-
-    return max_len_dict, type_dict, expected_rows
+    description = desc_metadata(max_len_dict, type_dict)
+    for attr, values in columns.items():
+        default = description[attr].dflt
+        columns[attr] = [default if value is None else value for value in values]
+    return columns, description
 
 
 def write_metadata_metatype(
@@ -285,6 +218,7 @@ def write_metadata_metatype(
     select_elements: Union[
         List[Gene],
         List[Organism],
+        List[Contig],
         List[GeneFamily],
         List[Region],
         List[Spot],
@@ -301,37 +235,16 @@ def write_metadata_metatype(
     :param disable_bar: Disable progress bar
     """
     metatype_group = write_metadata_group(h5f, metatype)
-    max_len_dict, type_dict, expected_rows = get_metadata_len(select_elements, source)
-
-    desc_metadata(max_len_dict, type_dict)
-
+    columns, description = get_metadata_columns(
+        select_elements, source, metatype, disable_bar
+    )
     source_table = h5f.create_table(
         metatype_group,
         source,
-        desc_metadata(max_len_dict, type_dict),
-        expectedrows=expected_rows,
+        description,
+        expectedrows=len(columns["ID"]),
     )
-    meta_row = source_table.row
-    for element in tqdm(
-        select_elements, unit=metatype, desc=f"Source = {source}", disable=disable_bar
-    ):
-        for meta_id, metadata in element.get_metadata_by_source(source).items():
-            for desc in source_table.colnames:
-                if desc == "ID":
-                    if hasattr(element, "name") and len(element.name) > 0:
-                        meta_row[desc] = element.name
-                    else:
-                        meta_row[desc] = element.ID
-                elif desc == "metadata_id":
-                    meta_row[desc] = meta_id
-                else:
-                    if hasattr(metadata, desc):
-                        value = metadata.__getattribute__(desc)
-                        if isinstance(value, bytes):
-                            value = value.decode("UTF-8")
-                        meta_row[desc] = value
-            meta_row.append()
-    source_table.flush()
+    append_to_table(h5f, source_table, columns)
 
 
 def erase_metadata(
@@ -432,9 +345,10 @@ def write_metadata(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = F
                 metatype="contigs",
             )
         )
-        write_metadata_contig(
+        write_metadata_metatype(
             h5f,
             pangenome.status["metasources"]["contigs"][-1],
+            "contigs",
             select_contigs,
             disable_bar,
         )
@@ -504,3 +418,38 @@ def write_metadata(pangenome: Pangenome, h5f: tables.File, disable_bar: bool = F
             disable_bar,
         )
         pangenome.status["metadata"]["modules"] = "Loaded"
+
+
+def append_metadata_metatype(
+    h5f: tables.File,
+    source: str,
+    metatype: str,
+    select_elements: Union[List[Organism], List[Contig]],
+    disable_bar: bool = False,
+):
+    """Appends the metadata of new genomes or contigs to the table of their source,
+    adding the columns of attributes that were not in the table yet.
+
+    :param h5f: HDF5 file with pangenome
+    :param source: name of the metadata source
+    :param metatype: select to which pangenome element metadata should be written, either 'genomes' or 'contigs'
+    :param select_elements: Elements selected to write metadata
+    :param disable_bar: Disable progress bar
+    """
+    metatype_group = write_metadata_group(h5f, metatype)
+    if source not in metatype_group:
+        write_metadata_metatype(h5f, source, metatype, select_elements, disable_bar)
+        return
+
+    source_table = metatype_group._f_get_child(source)
+    columns, description = get_metadata_columns(
+        select_elements, source, metatype, disable_bar
+    )
+    new_columns = {
+        attr: col
+        for attr, col in description.items()
+        if attr not in source_table.colnames
+    }
+    if len(new_columns) > 0:
+        source_table = resize_table(h5f, source_table, new_columns)
+    append_to_table(h5f, source_table, columns)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+# default libraries
+from __future__ import annotations
+from typing import Dict, Iterable, List
+
+# installed libraries
+import numpy as np
+
+# local libraries
+from ppanggolin.genome import Gene, Contig, Organism
+from ppanggolin.geneFamily import GeneFamily
+
+STRAND_CODES = {"+": 1, "-": -1}
+
+
+class GeneIndex:
+    """
+    Columnar index of the numeric and categorical fields of genes, by integer gene id.
+
+    The index is derived from the Gene objects, which remain the primary representation of the genes: their fields are
+    copied in the arrays, so it adds memory on top of them, about 60 bytes per gene, and must be built again when genes
+    change. Gene ids follow the order of the genes given to the constructor.
+    Bulk queries over genes, such as the positions or the lengths of the genes of a family, are array slices.
+    The genes of each gene family, organism and contig, and the organisms of each gene family and the gene families of
+    each organism, are indexed in a single pass as CSR arrays, i.e. values grouped by key with the offsets of each key.
+
+    Methods:
+        - get_gene: returns the Gene object corresponding to a gene id.
+        - nbytes: returns the memory used by the arrays of the index.
+        - get_index: returns the gene id of a gene from its identifier.
+        - family_genes: returns the gene ids of the genes of a family.
+        - organism_genes: returns the gene ids of the genes of an organism.
+        - contig_genes: returns the gene ids of the genes of a contig.
+        - family_organisms: returns the indexes of the organisms of a family.
+        - organism_families: returns the indexes of the families of an organism.
+        - family_organism_counts: returns the number of organisms of each family.
+
+    Fields:
+        - start, stop, length, strand, position, genetic_code, is_fragment: gene fields by gene id.
+          Strand is encoded as 1 for '+', -1 for '-' and 0 if unknown.
+          Position is -1 if it is not set, other numeric fields are 0.
+        - family, contig, organism: index of the gene family, contig and organism of each gene, -1 if not set.
+        - families, contigs, organisms: objects corresponding to the indexes.
+        - genes: Gene objects in the order of their gene id.
+    """
+
+    def __init__(
+        self,
+        genes: Iterable[Gene],
+        families: Iterable[GeneFamily] = (),
+        organisms: Iterable[Organism] = (),
+    ):
+        """Constructor method
+
+        :param genes: Genes to index
+        :param families: Gene families to index. Families of the genes not given are indexed after them.
+        :param organisms: Organisms to index. Organisms of the genes not given are indexed after them.
+        """
+        self._genes = list(genes)
+        self.families: List[GeneFamily] = list(families)
+        self.contigs: List[Contig] = []
+        self.organisms: List[Organism] = list(organisms)
+        family_index = {family: index for index, family in enumerate(self.families)}
+        contig_index = {}
+        organism_index = {
+            organism: index for index, organism in enumerate(self.organisms)
+        }
+
+        number_of_genes = len(self._genes)
+        # coordinates have the width of the columns of the pangenome file, indexes the one of the numbers of genes
+        self.start = np.zeros(number_of_genes, dtype=np.uint32)
+        self.stop = np.zeros(number_of_genes, dtype=np.uint32)
+        self.length = np.zeros(number_of_genes, dtype=np.uint32)
+        self.strand = np.zeros(number_of_genes, dtype=np.int8)
+        self.position = np.full(number_of_genes, -1, dtype=np.int32)
+        self.genetic_code = np.zeros(number_of_genes, dtype=np.uint8)
+        self.is_fragment = np.zeros(number_of_genes, dtype=bool)
+        self.family = np.full(number_of_genes, -1, dtype=np.int32)
+        self.contig = np.full(number_of_genes, -1, dtype=np.int32)
+        self.organism = np.full(number_of_genes, -1, dtype=np.int32)
+
+        for index, gene in enumerate(self._genes):
+            if gene.start is not None:
+                self.start[index] = gene.start
+            if gene.stop is not None:
+                self.stop[index] = gene.stop
+            if gene.coordinates is not None:
+                self.length[index] = len(gene)
+            self.strand[index] = STRAND_CODES.get(gene.strand, 0)
+            if gene.position is not None:
+                self.position[index] = gene.position
+            if gene.genetic_code is not None:
+                self.genetic_code[index] = gene.genetic_code
+            self.is_fragment[index] = gene.is_fragment
+            if gene.family is not None:
+                self.family[index] = self._get_object_index(
+                    gene.family, family_index, self.families
+                )
+            if gene.contig is not None:
+                self.contig[index] = self._get_object_index(
+                    gene.contig, contig_index, self.contigs
+                )
+            if gene.organism is not None:
+                self.organism[index] = self._get_object_index(
+                    gene.organism, organism_index, self.organisms
+                )
+
+        self._family_index = family_index
+        self._organism_index = organism_index
+        self._contig_index = contig_index
+        self._family_genes, self._family_offsets = self._group_by(
+            self.family, len(self.families)
+        )
+        self._organism_genes, self._organism_offsets = self._group_by(
+            self.organism, len(self.organisms)
+        )
+        self._contig_genes, self._contig_offsets = self._group_by(
+            self.contig, len(self.contigs)
+        )
+
+        # distinct pairs of family and organism, sorted by family then by organism
+        number_of_organisms = max(len(self.organisms), 1)
+        indexed = (self.family >= 0) & (self.organism >= 0)
+        pairs = np.unique(
+            self.family[indexed].astype(np.int64) * number_of_organisms
+            + self.organism[indexed]
+        )
+        pair_families = (pairs // number_of_organisms).astype(np.int32)
+        pair_organisms = (pairs % number_of_organisms).astype(np.int32)
+        self._family_organisms = pair_organisms
+        self._family_organism_offsets = np.searchsorted(
+            pair_families, np.arange(len(self.families) + 1)
+        )
+        order = np.argsort(pair_organisms, kind="stable")
+        self._organism_families = pair_families[order]
+        self._organism_family_offsets = np.searchsorted(
+            pair_organisms[order], np.arange(len(self.organisms) + 1)
+        )
+        self._id_index = None
+
+    @staticmethod
+    def _get_object_index(obj, object_index: Dict, objects: List) -> int:
+        """Get the index of an object, indexing it if it is a new one
+
+        :param obj: Object to index
+        :param object_index: Index of the objects already indexed
+        :param objects: Objects already indexed
+
+        :return: Index of the object
+        """
+        index = object_index.get(obj)
+        if index is None:
+            index = len(objects)
+            object_index[obj] = index
+            objects.append(obj)
+        return index
+
+    @staticmethod
+    def _group_by(keys: np.ndarray, number_of_keys: int):
+        """Group the gene ids by key, genes without key being left out
+
+        :param keys: Key of each gene, -1 if the gene has none
+        :param number_of_keys: Number of distinct keys
+
+        :return: Gene ids ordered by key and the offsets of each key in them
+        """
+        order = np.argsort(keys, kind="stable").astype(np.int32)
+        offsets = np.searchsorted(keys[order], np.arange(number_of_keys + 1))
+        return order, offsets
+
+    def __len__(self) -> int:
+        """Get the number of genes in the index
+
+        :return: Number of genes
+        """
+        return len(self._genes)
+
+    @property
+    def genes(self) -> List[Gene]:
+        """Get the genes of the index
+
+        :return: Gene objects in the order of their gene id
+        """
+        return self._genes
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory used by the arrays of the index, without the Gene objects it refers to
+
+        :return: Number of bytes of the arrays
+        """
+        return sum(
+            value.nbytes
+            for value in vars(self).values()
+            if isinstance(value, np.ndarray)
+        )
+
+    def get_gene(self, index: int) -> Gene:
+        """Get the gene corresponding to a gene id
+
+        :param index: Gene id
+
+        :return: Gene object
+        """
+        return self._genes[index]
+
+    def get_index(self, gene_id: str) -> int:
+        """Get the gene id of a gene from its identifier
+
+        :param gene_id: Identifier of the gene
+
+        :return: Gene id in the index
+
+        :raises KeyError: The gene is not in the index
+        """
+        if self._id_index is None:
+            self._id_index = {gene.ID: index for index, gene in enumerate(self._genes)}
+        try:
+            return self._id_index[gene_id]
+        except KeyError:
+            raise KeyError(f"Gene {gene_id} is not in the gene index")
+
+    def family_genes(self, family: GeneFamily) -> np.ndarray:
+        """Get the gene ids of the genes belonging to a gene family
+
+        :param family: Gene family
+
+        :return: Gene ids of the family genes
+
+        :raises KeyError: The gene family is not indexed in the index
+        """
+        try:
+            index = self._family_index[family]
+        except KeyError:
+            raise KeyError(f"Gene family {family.name} is not in the gene index")
+        return self._family_genes[
+            self._family_offsets[index] : self._family_offsets[index + 1]
+        ]
+
+    def organism_genes(self, organism: Organism) -> np.ndarray:
+        """Get the gene ids of the genes belonging to an organism
+
+        :param organism: Organism
+
+        :return: Gene ids of the organism genes
+
+        :raises KeyError: The organism has no gene in the index
+        """
+        try:
+            index = self._organism_index[organism]
+        except KeyError:
+            raise KeyError(f"Genome {organism.name} has no gene in the gene index")
+        return self._organism_genes[
+            self._organism_offsets[index] : self._organism_offsets[index + 1]
+        ]
+
+    def contig_genes(self, contig: Contig) -> np.ndarray:
+        """Get the gene ids of the genes belonging to a contig
+
+        :param contig: Contig
+
+        :return: Gene ids of the contig genes, in the order they were given to the index
+
+        :raises KeyError: The contig has no gene in the index
+        """
+        try:
+            index = self._contig_index[contig]
+        except KeyError:
+            raise KeyError(f"Contig {contig.name} has no gene in the gene index")
+        return self._contig_genes[
+            self._contig_offsets[index] : self._contig_offsets[index + 1]
+        ]
+
+    def family_organisms(self, family: GeneFamily) -> np.ndarray:
+        """Get the organisms in which a gene family has genes
+
+        :param family: Gene family
+
+        :return: Sorted indexes of the organisms of the family in the organisms of the index
+
+        :raises KeyError: The gene family is not indexed in the index
+        """
+        try:
+            index = self._family_index[family]
+        except KeyError:
+            raise KeyError(f"Gene family {family.name} is not in the gene index")
+        return self._family_organisms[
+            self._family_organism_offsets[index] : self._family_organism_offsets[
+                index + 1
+            ]
+        ]
+
+    def organism_families(self, organism: Organism) -> np.ndarray:
+        """Get the gene families having genes in an organism
+
+        :param organism: Organism
+
+        :return: Sorted indexes of the families of the organism in the families of the index
+
+        :raises KeyError: The organism is not indexed in the index
+        """
+        try:
+            index = self._organism_index[organism]
+        except KeyError:
+            raise KeyError(f"Genome {organism.name} is not in the gene index")
+        return self._organism_families[
+            self._organism_family_offsets[index] : self._organism_family_offsets[
+                index + 1
+            ]
+        ]
+
+    def family_organism_counts(self) -> np.ndarray:
+        """Get the number of organisms in which each gene family has genes
+
+        :return: Number of organisms of each family, in the order of the families of the index
+        """
+        return np.diff(self._family_organism_offsets)
@@ -7,10 +7,11 @@ from collections import defaultdict
 
 # installed libraries
 import gmpy2
+import numpy as np
 
 # local libraries
 from ppanggolin.metadata import MetaFeatures
-from ppanggolin.utils import get_consecutive_region_positions
+from ppanggolin.utils import get_consecutive_region_positions, ANNOTATION_CATEGORIES
 
 
 class Feature(MetaFeatures):
@@ -36,6 +37,24 @@ class Feature(MetaFeatures):
     - dna: DNA sequence of the feature.
     """
 
+    # Genes are the most numerous objects of a pangenome, so their attributes are stored in slots
+    __slots__ = (
+        "ID",
+        "is_fragment",
+        "type",
+        "start",
+        "stop",
+        "coordinates",
+        "strand",
+        "product",
+        "name",
+        "local_identifier",
+        "_organism",
+        "_contig",
+        "dna",
+        "__weakref__",
+    )
+
     def __init__(self, identifier: str):
         """Constructor Method
 
@@ -235,6 +254,17 @@ class Feature(MetaFeatures):
         self.name = name
         self.local_identifier = local_identifier
         self.coordinates = coordinates
+        self.intern_annotations()
+
+    def intern_annotations(self):
+        """Replace the strand, type, name and product of the feature by the instances shared by all features
+
+        Those values are repeated across many features, so each distinct value is only stored once.
+        """
+        self.strand = ANNOTATION_CATEGORIES["strand"].intern(self.strand)
+        self.type = ANNOTATION_CATEGORIES["type"].intern(self.type)
+        self.name = ANNOTATION_CATEGORIES["name"].intern(self.name)
+        self.product = ANNOTATION_CATEGORIES["product"].intern(self.product)
 
     def fill_parents(self, organism: Organism = None, contig: Contig = None):
         """Associate object to an organism and a contig
@@ -294,6 +324,8 @@ class RNA(Feature):
     :param rna_id: Identifier of the rna
     """
 
+    __slots__ = ()
+
     def __init__(self, rna_id: str):
         super().__init__(rna_id)
 
@@ -314,6 +346,16 @@ class Gene(Feature):
     - Protein: the protein sequence corresponding to the translated gene.
     """
 
+    __slots__ = (
+        "position",
+        "_family",
+        "_RGP",
+        "genetic_code",
+        "protein",
+        "is_partial",
+        "_frame",
+    )
+
     def __init__(self, gene_id: str):
         """Constructor method
 
@@ -348,6 +390,8 @@ class Gene(Feature):
         if not isinstance(family, GeneFamily):
             raise TypeError(f"Expected type GeneFamily, got {type(family)}")
         self._family = family
+        if self.contig is not None:
+            self.contig.reset_gene_arrays()
 
     @property
     def RGP(self):
@@ -473,11 +517,18 @@ class Contig(MetaFeatures):
     - genes: Returns a list of gene objects present in the contig.
     - add_rna: Adds an RNA object to the contig.
     - add_gene: Adds a gene object to the contig.
+    - get_positions: Returns the gene positions between two positions, wrapping around circular contigs.
+    - get_window: Returns the gene positions around a gene position.
+    - get_next_positions, get_previous_positions: Return the gene positions following or preceding a gene position.
+    - get_positions_in_range: Returns the positions of the genes overlapping a range of nucleotides.
 
     Fields:
     - name: Name of the contig.
     - is_circular: Boolean value indicating whether the contig is circular or not.
     - RNAs: Set of RNA annotations present in the contig.
+    - gene_starts, gene_stops, gene_families: Arrays of the start, stop and gene family identifier of the genes,
+      indexed by gene position. They are -1 for positions without gene, and family identifiers are -1 for genes
+      without family.
 
     TODO: Getter gene should be based on gene ID, and 2 other attributes should exist to get them by start or position.
           Also, when set a new gene in contig, start, stop and strand should be check to check difference, maybe define __eq__ method in gene class.
@@ -498,6 +549,7 @@ class Contig(MetaFeatures):
         )  # Saving the rna annotations. We're not using them in the vast majority of cases.
         self._genes_getter = {}
         self._genes_position = []
+        self._gene_arrays = None
         self._organism = None
         self._length = None
 
@@ -547,6 +599,7 @@ class Contig(MetaFeatures):
         )
         self._genes_position[gene.position] = gene
         self._genes_getter[coordinate] = gene
+        self.reset_gene_arrays()
 
     # TODO define eq function
 
@@ -619,6 +672,7 @@ class Contig(MetaFeatures):
             del self._genes_position[position]
         except KeyError:
             raise KeyError("Position of the gene in the contig does not exist")
+        self.reset_gene_arrays()
 
     def add(self, gene: Gene):
         """Add a gene to the contig
@@ -723,6 +777,126 @@ class Contig(MetaFeatures):
             else:
                 return self._genes_position[begin:end]
 
+    def reset_gene_arrays(self):
+        """Reset the arrays of the gene fields, to be built again on next access"""
+        self._gene_arrays = None
+
+    def _get_gene_arrays(self) -> Dict[str, np.ndarray]:
+        """Get the arrays of the gene fields indexed by gene position, building them if needed
+
+        :return: Arrays of the gene starts, stops and family identifiers
+        """
+        if self._gene_arrays is None:
+            starts = np.full(len(self._genes_position), -1, dtype=np.int64)
+            stops = np.full(len(self._genes_position), -1, dtype=np.int64)
+            families = np.full(len(self._genes_position), -1, dtype=np.int64)
+            for position, gene in enumerate(self._genes_position):
+                if gene is not None:
+                    starts[position] = gene.start
+                    stops[position] = gene.stop
+                    if gene.family is not None:
+                        families[position] = gene.family.ID
+            self._gene_arrays = {"starts": starts, "stops": stops, "families": families}
+        return self._gene_arrays
+
+    @property
+    def gene_starts(self) -> np.ndarray:
+        """Get the start of the genes, indexed by gene position
+
+        :return: Array of gene starts, -1 for positions without gene
+        """
+        return self._get_gene_arrays()["starts"]
+
+    @property
+    def gene_stops(self) -> np.ndarray:
+        """Get the stop of the genes, indexed by gene position
+
+        :return: Array of gene stops, -1 for positions without gene
+        """
+        return self._get_gene_arrays()["stops"]
+
+    @property
+    def gene_families(self) -> np.ndarray:
+        """Get the gene family identifier of the genes, indexed by gene position
+
+        :return: Array of gene family identifiers, -1 for positions without gene or genes without family
+        """
+        return self._get_gene_arrays()["families"]
+
+    def get_positions(self, begin: int, end: int) -> np.ndarray:
+        """
+        Get the gene positions from begin to end excluded.
+        On circular contigs, positions out of the contig wrap around it, and begin can be negative.
+        On linear contigs, positions out of the contig are left out.
+        Each position is given once, even if the range is larger than the contig.
+
+        :param begin: First position
+        :param end: Position after the last one
+
+        :return: Gene positions in order
+        """
+        number_of_genes = len(self._genes_position)
+        if self.is_circular:
+            end = min(end, begin + number_of_genes)
+            return np.arange(begin, end, dtype=np.int64) % max(number_of_genes, 1)
+        return np.arange(max(begin, 0), min(end, number_of_genes), dtype=np.int64)
+
+    def get_window(self, position: int, before: int, after: int) -> np.ndarray:
+        """
+        Get the gene positions around a gene position, wrapping around circular contigs
+
+        :param position: Position of the gene at the center of the window
+        :param before: Number of genes to take before the position
+        :param after: Number of genes to take after the position
+
+        :return: Gene positions of the window in order, with the given position
+        """
+        return self.get_positions(position - before, position + after + 1)
+
+    def get_next_positions(self, position: int, count: int) -> np.ndarray:
+        """
+        Get the positions of the genes following a gene position, wrapping around circular contigs
+        without going back to the position.
+
+        :param position: Gene position
+        :param count: Maximum number of following genes
+
+        :return: Following gene positions, from the closest one
+        """
+        count = min(count, len(self._genes_position) - 1)
+        return self.get_positions(position + 1, position + 1 + count)
+
+    def get_previous_positions(self, position: int, count: int) -> np.ndarray:
+        """
+        Get the positions of the genes preceding a gene position, wrapping around circular contigs
+        without going back to the position.
+
+        :param position: Gene position
+        :param count: Maximum number of preceding genes
+
+        :return: Preceding gene positions, from the closest one
+        """
+        count = min(count, len(self._genes_position) - 1)
+        return self.get_positions(position - count, position)[::-1]
+
+    def get_positions_in_range(self, start: int, stop: int) -> np.ndarray:
+        """
+        Get the positions of the genes overlapping a range of nucleotides.
+        Genes joined over the end of a circular contig, which stop before they start, overlap both ends of the contig.
+
+        :param start: First nucleotide of the range
+        :param stop: Last nucleotide of the range
+
+        :return: Positions of the genes overlapping the range, in order
+        """
+        starts, stops = self.gene_starts, self.gene_stops
+        overlap = np.where(
+            starts <= stops,
+            (starts <= stop) & (stops >= start),
+            (starts <= stop) | (stops >= start),
+        )
+        return np.flatnonzero((starts >= 0) & overlap)
+
     @property
     def number_of_genes(self) -> int:
         """Get the number of genes in the contig
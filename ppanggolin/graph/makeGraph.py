@@ -4,8 +4,10 @@
 import logging
 import argparse
 from pathlib import Path
+from typing import Dict
 
 # installed libraries
+import numpy as np
 from tqdm import tqdm
 
 # local libraries
@@ -84,11 +86,98 @@ def remove_high_copy_number(pangenome, number):
                 fam.removed = True
 
 
+def get_graph_arrays(pangenome: Pangenome) -> Dict[str, np.ndarray]:
+    """
+    Get the gene data needed to find the neighbor gene pairs of the genomes as arrays.
+    Genes are given by their id in the gene index of the pangenome, which follows the genomes, contigs and genes order.
+
+    :param pangenome: Pangenome with gene families
+
+    :return: Gene family, contig and genome of each gene, whether a gene is a fragment, whether a gene family is
+             removed from the graph, whether a contig is circular, and offsets of the genes of each genome
+
+    :raises AttributeError: If a gene has no gene family
+    """
+    gene_index = pangenome.gene_index
+    if np.any(gene_index.family < 0):
+        raise AttributeError("a Gene does not have a GeneFamily object associated")
+    return {
+        "family": gene_index.family,
+        "contig": gene_index.contig,
+        "organism": gene_index.organism,
+        "is_fragment": gene_index.is_fragment,
+        "removed": np.array(
+            [family.removed for family in gene_index.families], dtype=bool
+        ),
+        "is_circular": np.array(
+            [contig.is_circular for contig in gene_index.contigs], dtype=bool
+        ),
+        "organism_offsets": np.searchsorted(
+            gene_index.organism, np.arange(len(gene_index.organisms) + 1)
+        ),
+    }
+
+
+def get_organism_gene_pairs(
+    graph_arrays: Dict[str, np.ndarray], organism: int
+) -> np.ndarray:
+    """
+    Find the pairs of neighbor genes of a genome that make the edges of the neighbors graph, from the graph arrays.
+    Pairs are the same and in the same order as the ones of :func:`ppanggolin.edge.get_contig_gene_pairs` on each
+    contig of the genome.
+
+    :param graph_arrays: Gene data of the pangenome, as given by :func:`get_graph_arrays`
+    :param organism: Index of the genome
+
+    :return: Gene id of the source (first row) and of the target (second row) of each gene pair
+    """
+    genes = np.arange(
+        graph_arrays["organism_offsets"][organism],
+        graph_arrays["organism_offsets"][organism + 1],
+    )
+    if len(genes) == 0:
+        return np.zeros((2, 0), dtype=np.int64)
+    contigs = graph_arrays["contig"][genes]
+    first_genes = genes[np.r_[True, contigs[1:] != contigs[:-1]]]
+    first_contig = contigs[0]
+
+    # genes of families removed from the graph are skipped
+    genes = genes[~graph_arrays["removed"][graph_arrays["family"][genes]]]
+    if len(genes) == 0:
+        # the genome is entirely made of genes of removed families, so no edges are added
+        return np.zeros((2, 0), dtype=np.int64)
+    contigs = graph_arrays["contig"][genes]
+    families = graph_arrays["family"][genes]
+    is_fragment = graph_arrays["is_fragment"][genes]
+    linked = (contigs[1:] == contigs[:-1]) & ~(
+        (families[1:] == families[:-1]) & (is_fragment[1:] | is_fragment[:-1])
+    )
+    sources = genes[1:][linked]
+    targets = genes[:-1][linked]
+
+    # the last remaining gene of a circular contig is linked to the first gene of the contig
+    last_genes = genes[np.r_[contigs[1:] != contigs[:-1], True]]
+    last_genes = last_genes[
+        graph_arrays["is_circular"][graph_arrays["contig"][last_genes]]
+    ]
+    circular_sources = first_genes[graph_arrays["contig"][last_genes] - first_contig]
+
+    # pairs of a contig come in the order of the genes, with the pair closing a circular contig last
+    order = np.argsort(np.concatenate([sources * 2, last_genes * 2 + 1]))
+    return np.stack(
+        [
+            np.concatenate([sources, circular_sources])[order],
+            np.concatenate([targets, last_genes])[order],
+        ]
+    )
+
+
 def compute_neighbors_graph(
     pangenome: Pangenome,
     remove_copy_number: int = 0,
     force: bool = False,
     disable_bar: bool = False,
+    compact: bool = False,
 ):
     """
     Creates the Pangenome Graph. Will either load the information from the pangenome file if they are not loaded,
@@ -98,42 +187,39 @@ def compute_neighbors_graph(
     :param remove_copy_number: Maximum authorized repeat presence of gene families. if zero no remove
     :param force: Allow to force write on Pangenome file
     :param disable_bar: Disable progress bar
+    :param compact: Build compact edges storing the number of gene pairs of each genome instead of the pairs
     """
     check_pangenome_for_neighbors_graph(pangenome, force, disable_bar=disable_bar)
 
     if remove_copy_number > 0:
         remove_high_copy_number(pangenome, remove_copy_number)
 
+    if compact:
+        pangenome.use_compact_edges()
+
     logging.getLogger("PPanGGOLiN").info("Computing the neighbors graph...")
-    bar = tqdm(
-        pangenome.organisms,
-        total=pangenome.number_of_organisms,
-        unit="genome",
-        disable=disable_bar,
+    arrays = get_graph_arrays(pangenome)
+    gene_pairs = [
+        get_organism_gene_pairs(arrays, organism)
+        for organism in tqdm(
+            range(pangenome.number_of_organisms),
+            unit="genome",
+            disable=disable_bar,
+        )
+    ]
+
+    gene_pairs = np.concatenate([np.zeros((2, 0), dtype=np.int64)] + gene_pairs, axis=1)
+    logging.getLogger("PPanGGOLiN").debug(
+        f"Adding {gene_pairs.shape[1]} gene pairs to the neighbors graph..."
+    )
+    pangenome.add_gene_pairs(
+        pangenome.gene_index.genes,
+        gene_pairs[0],
+        gene_pairs[1],
+        arrays["family"],
+        arrays["organism"],
+        disable_bar=disable_bar,
     )
-    for org in bar:
-        bar.set_description(f"Processing {org.name}")
-        bar.refresh()
-        for contig in org.contigs:
-            prev = None
-            for gene in contig.genes:
-                try:
-                    if not gene.family.removed:
-                        if prev is not None and not (
-                            prev.family == gene.family
-                            and (prev.is_fragment or gene.is_fragment)
-                        ):
-                            pangenome.add_edge(gene, prev)
-                        prev = gene
-                except AttributeError:
-                    raise AttributeError(
-                        "a Gene does not have a GeneFamily object associated"
-                    )
-                except Exception:
-                    raise Exception("Unexpected error. Please report on our github.")
-            if prev is not None and contig.is_circular and contig.number_of_genes > 0:
-                # if prev is None, the contig is entirely made of duplicated genes, so no edges are added
-                pangenome.add_edge(contig[0], prev)
     logging.getLogger("PPanGGOLiN").info("Done making the neighbors graph.")
     pangenome.status["neighborsGraph"] = "Computed"
 
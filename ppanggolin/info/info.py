@@ -2,14 +2,56 @@
 
 # default libraries
 import argparse
+import sys
+from array import array
 from pathlib import Path
+from typing import Dict, Iterable, Set, Union
 
 # installed libraries
+import numpy as np
 import tables
 import yaml
 
 # local libraries
-from ppanggolin.formats import read_info, read_parameters
+from ppanggolin.formats import read_info, read_parameters, read_pangenome
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.genome import Organism, Contig, Gene, RNA
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.edge import Edge
+from ppanggolin.region import Region, Spot, Module
+
+# objects measured in their own component, and not with the objects referring to them
+COMPONENT_TYPES = (
+    Pangenome,
+    Organism,
+    Contig,
+    Gene,
+    RNA,
+    GeneFamily,
+    Edge,
+    Region,
+    Spot,
+    Module,
+)
+
+# estimated memory in bytes of each element, and of each link between elements, of the pangenome components.
+# They were calibrated with measure_memory on pangenomes read from their file.
+BYTES_PER_GENOME = 600
+BYTES_PER_CONTIG = 1100
+BYTES_PER_CONTIG_GENE = 180
+BYTES_PER_GENE = 480
+BYTES_PER_RNA = 330
+BYTES_PER_FAMILY = 1500
+BYTES_PER_FAMILY_GENE = 40
+BYTES_PER_EDGE = 550
+BYTES_PER_GENE_PAIR = 85
+BYTES_PER_RGP = 1000
+BYTES_PER_RGP_GENE = 40
+BYTES_PER_SPOT = 900
+BYTES_PER_SPOT_RGP = 40
+BYTES_PER_MODULE = 900
+BYTES_PER_MODULE_FAMILY = 40
+BYTES_PER_METADATA = 500
 
 
 def print_yaml(yaml_dict: dict) -> None:
@@ -66,12 +108,293 @@ def read_metadata_status(h5f: tables.File):
     return {"Metadata": metadata_info}
 
 
+def get_table_rows(h5f: tables.File, path: str) -> int:
+    """
+    Get the number of rows of a table of the pangenome file
+
+    :param h5f: the h5f file object of the pangenome file
+    :param path: Path of the table in the file
+
+    :return: Number of rows of the table, 0 if it is not in the file
+    """
+    return h5f.get_node(path).nrows if path in h5f else 0
+
+
+def estimate_memory(h5f: tables.File) -> Dict[str, int]:
+    """
+    Estimate the memory used by each component of the pangenome once loaded, from the number of elements in the file.
+    The estimate is an order of magnitude to know beforehand if the pangenome can be loaded,
+    as the real memory depends on the length of the names and annotations of the elements.
+
+    :param h5f: the h5f file object of the pangenome file
+
+    :return: Estimated memory in bytes of each component of the pangenome present in the file
+    """
+    content = read_info(h5f)
+    content = {} if content is None else content["Content"]
+    status_group = h5f.root.status
+    estimates = {}
+    if status_group._v_attrs.genomesAnnotated:
+        estimates["genomes"] = (
+            get_table_rows(h5f, "/annotations/genomes") * BYTES_PER_GENOME
+        )
+        estimates["contigs"] = (
+            get_table_rows(h5f, "/annotations/contigs") * BYTES_PER_CONTIG
+            + content.get("Genes", 0) * BYTES_PER_CONTIG_GENE
+        )
+        estimates["genes"] = content.get("Genes", 0) * BYTES_PER_GENE
+        estimates["RNAs"] = get_table_rows(h5f, "/annotations/RNAs") * BYTES_PER_RNA
+    if status_group._v_attrs.genesClustered:
+        estimates["families"] = (
+            content.get("Families", 0) * BYTES_PER_FAMILY
+            + get_table_rows(h5f, "/geneFamilies") * BYTES_PER_FAMILY_GENE
+        )
+    if status_group._v_attrs.NeighborsGraph:
+        estimates["edges"] = (
+            content.get("Edges", 0) * BYTES_PER_EDGE
+            + get_table_rows(h5f, "/edges") * BYTES_PER_GENE_PAIR
+        )
+    if getattr(status_group._v_attrs, "predictedRGP", False):
+        estimates["RGPs"] = (
+            content.get("RGP", 0) * BYTES_PER_RGP
+            + get_table_rows(h5f, "/RGP") * BYTES_PER_RGP_GENE
+        )
+    if getattr(status_group._v_attrs, "spots", False):
+        estimates["spots"] = (
+            content.get("Spots", 0) * BYTES_PER_SPOT
+            + get_table_rows(h5f, "/spots") * BYTES_PER_SPOT_RGP
+        )
+    if getattr(status_group._v_attrs, "modules", False):
+        estimates["modules"] = (
+            content.get("Modules", {}).get("Number_of_modules", 0) * BYTES_PER_MODULE
+            + get_table_rows(h5f, "/modules") * BYTES_PER_MODULE_FAMILY
+        )
+    if "/metadata" in h5f:
+        estimates["metadata"] = (
+            sum(table.nrows for table in h5f.walk_nodes("/metadata", "Table"))
+            * BYTES_PER_METADATA
+        )
+    return estimates
+
+
+def estimate_loading_memory(
+    pangenome: Pangenome,
+    annotation: bool = False,
+    gene_families: bool = False,
+    graph: bool = False,
+    rgp: bool = False,
+    spots: bool = False,
+    modules: bool = False,
+    metadata: bool = False,
+) -> int:
+    """
+    Estimate the memory needed to read the asked parts of the pangenome file, before reading them.
+    The arguments are the ones given to read_pangenome, and the parts already loaded are not counted.
+
+    :param pangenome: Pangenome object associated to its file
+    :param annotation: get annotation
+    :param gene_families: get gene families
+    :param graph: get graph
+    :param rgp: get RGP
+    :param spots: get hotspot
+    :param modules: get modules
+    :param metadata: get metadata
+
+    :return: Estimated memory in bytes
+
+    :raises FileNotFoundError: If the pangenome is not associated to a file
+    """
+    if pangenome.file is None:
+        raise FileNotFoundError(
+            "Your pangenome object has not been associated to any file."
+        )
+    part_to_components = {
+        "genomesAnnotated": (annotation, ["genomes", "contigs", "genes", "RNAs"]),
+        "genesClustered": (gene_families, ["families"]),
+        "neighborsGraph": (graph, ["edges"]),
+        "predictedRGP": (rgp, ["RGPs"]),
+        "spots": (spots, ["spots"]),
+        "modules": (modules, ["modules"]),
+    }
+    components = [
+        component
+        for status, (asked, status_components) in part_to_components.items()
+        if asked and pangenome.status[status] == "inFile"
+        for component in status_components
+    ]
+    if metadata and any(
+        status == "inFile" for status in pangenome.status["metadata"].values()
+    ):
+        components.append("metadata")
+    with tables.open_file(pangenome.file, "r") as h5f:
+        estimates = estimate_memory(h5f)
+    return sum(estimates.get(component, 0) for component in components)
+
+
+def get_available_memory(meminfo: Path = Path("/proc/meminfo")) -> Union[int, None]:
+    """
+    Get the memory available to new processes without swapping, as estimated by the Linux kernel.
+    Unlike the free memory, it includes the page cache that can be reclaimed.
+
+    :param meminfo: File reporting the memory of the system
+
+    :return: Available memory in bytes, None if the system does not report it
+    """
+    try:
+        with open(meminfo) as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith("MemAvailable:"):
+                    # the memory is reported in kB
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def get_objects_size(objects: Iterable, seen: Set[int]) -> int:
+    """
+    Measure the memory used by objects and by what they refer to, except for the pangenome elements of other
+    components and for their metadata, which are measured apart.
+
+    :param objects: Objects to measure
+    :param seen: Identifiers of the objects already measured, which are not measured again
+
+    :return: Memory in bytes
+    """
+    size = 0
+    stack = list(objects)
+    roots = {id(obj) for obj in stack}
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, array, np.ndarray, type)):
+            continue
+        if isinstance(obj, dict):
+            children = [*obj.keys(), *obj.values()]
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            children = list(obj)
+        else:
+            children = [obj.__dict__] if hasattr(obj, "__dict__") else []
+            for cls in type(obj).__mro__:
+                for slot in cls.__dict__.get("__slots__", ()):
+                    if slot not in ["__dict__", "__weakref__", "_metadata_getter"]:
+                        children.append(getattr(obj, slot, None))
+        stack.extend(
+            child
+            for child in children
+            if not isinstance(child, COMPONENT_TYPES) or id(child) in roots
+        )
+    return size
+
+
+def measure_memory(pangenome: Pangenome) -> Dict[str, int]:
+    """
+    Measure the memory used by each component of the pangenome loaded in memory.
+    The objects shared between components, such as the repeated annotation strings, are counted once.
+
+    :param pangenome: Pangenome object
+
+    :return: Memory in bytes of each component of the pangenome
+    """
+    components = {
+        "genomes": list(pangenome.organisms),
+        "contigs": list(pangenome.contigs),
+        "genes": list(pangenome.genes),
+        "RNAs": list(pangenome.RNAs),
+        "families": list(pangenome.gene_families),
+        "edges": list(pangenome.edges),
+        "RGPs": list(pangenome.regions),
+        "spots": list(pangenome.spots),
+        "modules": list(pangenome.modules),
+    }
+    seen = set()
+    memory = {
+        component: get_objects_size(elements, seen)
+        for component, elements in components.items()
+    }
+    memory["metadata"] = get_objects_size(
+        [
+            element._metadata_getter
+            for elements in components.values()
+            for element in elements
+            if getattr(element, "_metadata_getter", None) is not None
+        ],
+        seen,
+    )
+    return memory
+
+
+def format_memory(size: int) -> str:
+    """
+    Format a memory size with a readable unit
+
+    :param size: Memory in bytes
+
+    :return: Memory with its unit
+    """
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def read_memory(pangenome_file: Path, disable_bar: bool = False) -> dict:
+    """
+    Estimate the memory used by each component of the pangenome from the file,
+    then measure it once the whole pangenome is loaded.
+
+    :param pangenome_file: Path to the pangenome file
+    :param disable_bar: Disable the progress bars of the pangenome reading
+
+    :return: Estimated and measured memory of each component
+    """
+    with tables.open_file(pangenome_file, "r") as h5f:
+        estimates = estimate_memory(h5f)
+    pangenome = Pangenome()
+    pangenome.add_file(pangenome_file)
+    metatypes = {
+        metatype
+        for metatype, status in pangenome.status["metadata"].items()
+        if status == "inFile"
+    }
+    read_pangenome(
+        pangenome,
+        annotation=pangenome.status["genomesAnnotated"] == "inFile",
+        gene_families=pangenome.status["genesClustered"] == "inFile",
+        graph=pangenome.status["neighborsGraph"] == "inFile",
+        rgp=pangenome.status["predictedRGP"] == "inFile",
+        spots=pangenome.status["spots"] == "inFile",
+        modules=pangenome.status["modules"] == "inFile",
+        metadata=len(metatypes) > 0,
+        metatypes=metatypes,
+        disable_bar=disable_bar,
+    )
+    measures = measure_memory(pangenome)
+    memory = {
+        component: {
+            "Estimated": format_memory(estimates[component]),
+            "Measured": format_memory(measures[component]),
+        }
+        for component in estimates
+    }
+    memory["Total"] = {
+        "Estimated": format_memory(sum(estimates.values())),
+        "Measured": format_memory(sum(measures[component] for component in estimates)),
+    }
+    return {"Memory": memory}
+
+
 def print_info(
     pangenome: str,
     status: bool = False,
     content: bool = False,
     parameters: bool = False,
     metadata: bool = False,
+    memory: bool = False,
 ):
     """
     Main function to return information about pangenome
@@ -80,8 +403,10 @@ def print_info(
     :param status: Get pangenome status
     :param content: Get pangenome content
     :param parameters: Get pangenome parameters
+    :param metadata: Get pangenome metadata summary
+    :param memory: Get the estimated and measured memory of the pangenome components, which loads the pangenome
     """
-    if not (status or content or parameters or metadata):
+    if not (status or content or parameters or metadata or memory):
         status, content, parameters, metadata = (True, True, True, True)
 
     h5f = tables.open_file(pangenome, "r+")
@@ -94,6 +419,8 @@ def print_info(
     if metadata:
         print_yaml(read_metadata_status(h5f))
     h5f.close()
+    if memory:
+        print_yaml(read_memory(Path(pangenome), disable_bar=True))
 
 
 def launch(args: argparse.Namespace):
@@ -103,7 +430,12 @@ def launch(args: argparse.Namespace):
     :param args: All arguments provide by user
     """
     print_info(
-        args.pangenome, args.status, args.content, args.parameters, args.metadata
+        args.pangenome,
+        args.status,
+        args.content,
+        args.parameters,
+        args.metadata,
+        args.memory,
     )
 
 
@@ -172,6 +504,13 @@ def parser_info(parser: argparse.ArgumentParser):
         action="store_true",
         help="Display a summary of the metadata saved in the pangenome",
     )
+    options.add_argument(
+        "--memory",
+        required=False,
+        action="store_true",
+        help="Display the memory estimated from the file for each component of the pangenome, "
+        "and the memory measured once the pangenome is loaded. Not displayed by default as it loads the pangenome",
+    )
 
 
 if __name__ == "__main__":
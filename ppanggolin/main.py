@@ -69,6 +69,7 @@ def cmd_line() -> argparse.Namespace:
     desc += "  \n"
     desc += "  Expert:\n"
     desc += "    annotate      Annotate genomes\n"
+    desc += "    add_genomes   Add genomes to the annotations of a pangenome file\n"
     desc += "    cluster       Cluster genes into gene families\n"
     desc += "    graph         Create the pangenome graph\n"
     desc += "    partition     Partition the pangenome graph\n"
@@ -168,7 +169,11 @@ def cmd_line() -> argparse.Namespace:
     else:
         set_verbosity_level(args)
 
-    if args.subcommand == "annotate" and args.fasta is None and args.anno is None:
+    if (
+        args.subcommand in ["annotate", "add_genomes"]
+        and args.fasta is None
+        and args.anno is None
+    ):
         parser.error(
             "Please provide either a sequence file using the --fasta option or "
             "an annotation file using the --anno option to enable annotation. "
@@ -176,6 +181,7 @@ def cmd_line() -> argparse.Namespace:
         )
 
     cmds_pangenome_required = [
+        "add_genomes",
         "cluster",
         "info",
         "module",
@@ -202,6 +208,13 @@ def cmd_line() -> argparse.Namespace:
             "either through the command line or the config file."
         )
 
+    if args.subcommand == "utils" and args.subset is not None:
+        if args.pangenome is None or args.output is None:
+            parser.error(
+                "Please specify the pangenome file to subset with the --pangenome argument "
+                "and the pangenome file to write with the --output argument."
+            )
+
     if args.subcommand == "align" and args.sequences is None:
         parser.error(
             "Please provide sequences (nucleotides or amino acids) for alignment "
@@ -237,6 +250,8 @@ def main():
 
     if args.subcommand == "annotate":
         ppanggolin.annotate.launch(args)
+    elif args.subcommand == "add_genomes":
+        ppanggolin.annotate.addGenomes.launch(args)
     elif args.subcommand == "cluster":
         ppanggolin.cluster.launch(args)
     elif args.subcommand == "graph":
@@ -4,6 +4,7 @@
 import logging
 from typing import Generator, List, Tuple, Union, Any, Dict
 from collections import defaultdict
+from types import MappingProxyType
 
 # installed libraries
 from pandas import isna
@@ -101,14 +102,27 @@ class MetaFeatures:
     max_metadata_by_source: Gets the source with the maximum number of metadata and the corresponding count.
     """
 
+    __slots__ = ("_metadata_getter",)
+
     def __init__(self):
         """Constructor method"""
-        self._metadata_getter = defaultdict(dict)
+        # Most features never get metadata, so the storage is created with the first one
+        self._metadata_getter = None
+
+    @property
+    def _metadata(self) -> Dict[str, Dict[int, Metadata]]:
+        """Get the metadata storage of the feature without creating it
+
+        :return: Metadata by identifier for each source
+        """
+        if self._metadata_getter is None:
+            return _NO_METADATA
+        return self._metadata_getter
 
     @property
     def number_of_metadata(self) -> int:
         """Get the number of metadata associated to feature"""
-        return sum(len(meta_dict) for meta_dict in self._metadata_getter.values())
+        return sum(len(meta_dict) for meta_dict in self._metadata.values())
 
     @property
     def metadata(self) -> Generator[Metadata, None, None]:
@@ -117,7 +131,7 @@ class MetaFeatures:
         :return: Metadata from all sources
         """
 
-        for meta_dict in self._metadata_getter.values():
+        for meta_dict in self._metadata.values():
             yield from meta_dict.values()
 
     @property
@@ -126,7 +140,7 @@ class MetaFeatures:
 
         :return: Metadata source
         """
-        yield from self._metadata_getter.keys()
+        yield from self._metadata.keys()
 
     def formatted_metadata_dict(self, separator: str = "|") -> Dict[str, str]:
         """
@@ -168,6 +182,9 @@ class MetaFeatures:
             metadata, Metadata
         ), f"Metadata is not with type Metadata but with {type(metadata)}"
 
+        if self._metadata_getter is None:
+            self._metadata_getter = defaultdict(dict)
+
         # Metadata_id should not already exist because the metadata are added from scratch to a new source,
         # or they are ridden
         if metadata_id is None:
@@ -196,7 +213,7 @@ class MetaFeatures:
         :raises KeyError: No metadata with ID or source is found
         """
         try:
-            metadata = self._metadata_getter[source][metadata_id]
+            metadata = self._metadata[source][metadata_id]
         except KeyError:
             raise KeyError(
                 f"No metadata exist with ID {metadata_id}"
@@ -217,7 +234,7 @@ class MetaFeatures:
         assert isinstance(
             source, str
         ), f"Source is not a string but with {type(source)}"
-        return self._metadata_getter.get(
+        return self._metadata.get(
             source
         )  # if source in _metadata_getter return value else None
 
@@ -248,14 +265,17 @@ class MetaFeatures:
         assert isinstance(
             source, str
         ), f"Source is not a string but with {type(source)}"
-        if self._metadata_getter.pop(source, None) is None:
+        if (
+            self._metadata_getter is None
+            or self._metadata_getter.pop(source, None) is None
+        ):
             logging.getLogger("PPanGGOLiN").warning(
                 "The source to remove does not exist"
             )
 
     def del_metadata_by_attribute(self, **kwargs):
         """Remove a source from the feature"""
-        for source, metadata_dict in self._metadata_getter.items():
+        for source, metadata_dict in self._metadata.items():
             for attr, value in kwargs.items():
                 for meta_id, metadata in metadata_dict.items():
                     if hasattr(metadata, attr):
@@ -272,9 +292,7 @@ class MetaFeatures:
 
         :return: Name of the source with the maximum annotation and the number of metadata corresponding
         """
-        max_source, max_meta = max(
-            self._metadata_getter.items(), key=lambda x: len(x[1])
-        )
+        max_source, max_meta = max(self._metadata.items(), key=lambda x: len(x[1]))
         return max_source, len(max_meta)
 
     def has_metadata(self) -> bool:
@@ -293,4 +311,8 @@ class MetaFeatures:
 
         :return: True if the source is in the metadata feature else False
         """
-        return source in self._metadata_getter
+        return source in self._metadata
+
+
+# Shared read-only storage of the features without metadata
+_NO_METADATA = MappingProxyType({})
@@ -4,72 +4,140 @@
 import logging
 
 # installed libraries
-from gmpy2 import popcount
-from itertools import combinations
 from tqdm import tqdm
+import numpy as np
+import tables
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
 from ppanggolin.formats import check_pangenome_info
+from ppanggolin.formats.readBinaries import (
+    get_presence_absence_partitions,
+    read_presence_absence,
+)
+
+partition_subsets = {
+    "all": None,
+    "shell": ("S",),
+    "cloud": ("C",),
+    "accessory": ("S", "C"),
+}
+
+
+def has_presence_absence_matrix(pangenome: Pangenome) -> bool:
+    """Check if the fluidity can be computed from the presence/absence matrix of the pangenome file,
+    i.e. the matrix is in the file and the gene families have not been changed since.
+
+    :param pangenome: Pangenome to compute the fluidity of
+
+    :return: True if the presence/absence matrix of the file can be used
+    """
+    if pangenome.file is None or pangenome.status["genesClustered"] not in [
+        "Loaded",
+        "inFile",
+    ]:
+        return False
+    with tables.open_file(pangenome.file, "r") as h5f:
+        return "/presenceAbsence" in h5f
+
+
+def read_partition_presence_absence(pangenome: Pangenome) -> dict:
+    """Read the presence/absence matrix of the pangenome file and the gene families of each partition subset
+
+    :param pangenome: Pangenome with the presence/absence matrix in its file
+
+    :return: The presence/absence matrix and, for each partition subset, a mask of its gene families
+    """
+    with tables.open_file(pangenome.file, "r") as h5f:
+        presence = read_presence_absence(h5f)
+        partitions = np.array(
+            [partition[:1] for partition in get_presence_absence_partitions(h5f)]
+        )
+    if np.any(partitions == ""):
+        raise ValueError("The gene family has not been associated to a partition.")
+    masks = {
+        subset: (
+            np.ones(len(partitions), dtype=bool)
+            if letters is None
+            else np.isin(partitions, letters)
+        )
+        for subset, letters in partition_subsets.items()
+    }
+    return presence, masks
+
+
+def pairwise_fluidity(
+    presence: np.ndarray,
+    number_of_elements: int,
+    chunk: int = 1024,
+    disable_bar: bool = False,
+) -> float:
+    """Compute the fluidity between all pairs of rows of a presence/absence matrix,
+    in the same way as it is computed from the bitarrays of the genomes or gene families
+
+    :param presence: Boolean matrix with the compared elements in rows
+    :param number_of_elements: Number of elements to average the fluidity over
+    :param chunk: Number of rows compared to all the others at once
+    :param disable_bar: Disable the progress bar
+
+    :return: Fluidity of the elements
+    """
+    values = presence.astype(np.float32)
+    sizes = presence.sum(axis=1)
+    f_sum = 0.0
+    for start in tqdm(range(0, len(values), chunk), unit="block", disable=disable_bar):
+        stop = min(start + chunk, len(values))
+        # shared elements, the bitarrays count one less than the actual number
+        common = (
+            np.rint(values[start:stop] @ values[start + 1 :].T).astype(np.int64) - 1
+        )
+        total = sizes[start:stop, None] + sizes[None, start + 1 :]
+        # only pairs with the first row before the second one
+        pairs = (
+            np.arange(start + 1, len(values))[None, :] > np.arange(start, stop)[:, None]
+        )
+        valid = pairs & (total > 0) & (common > 0)
+        f_sum += float(np.sum((total[valid] - 2 * common[valid]) / total[valid]))
+    return (2 / (number_of_elements * (number_of_elements - 1))) * f_sum
 
 
 def compute_genomes_fluidity(pangenome: Pangenome, disable_bar: bool = False) -> dict:
     """Compute the genomes' fluidity from the pangenome
 
+    If the pangenome file holds the presence/absence matrix of the gene families,
+    the fluidity is computed from it without reading the annotations.
+
     :param pangenome: pangenome which will be used to compute the genomes' fluidity
     :param disable_bar: Disable the progress bar
 
     :return: Genomes fluidity value from the pangenome for each partition
     """
+    if has_presence_absence_matrix(pangenome):
+        logging.getLogger("PPanGGOLiN").info(
+            "Read the presence/absence matrix of the pangenome"
+        )
+        presence, masks = read_partition_presence_absence(pangenome)
+        return {
+            subset: pairwise_fluidity(
+                presence[mask].T, presence.shape[1], disable_bar=disable_bar
+            )
+            for subset, mask in masks.items()
+        }
 
     # check statuses and load info
     logging.getLogger("PPanGGOLiN").info("Check information in pangenome")
     check_pangenome_info(
         pangenome, need_annotations=True, need_families=True, disable_bar=disable_bar
     )
-    fluidity_dict = {"all": None, "shell": None, "cloud": None, "accessory": None}
-    for subset in fluidity_dict.keys():
-        logging.getLogger("PPanGGOLiN").debug(
-            f"Compute binaries for {subset} partition"
+    presence_matrix = pangenome.presence_matrix
+    return {
+        subset: pairwise_fluidity(
+            presence_matrix.to_dense(subset).T,
+            pangenome.number_of_organisms,
+            disable_bar=disable_bar,
         )
-        pangenome.compute_org_bitarrays(part=subset)
-        # Compute binaries corresponding to presence / absence of families in organisms
-        g_sum = 0
-        logging.getLogger("PPanGGOLiN").debug("Get number of families in each genomes")
-        org2_nb_fam = nb_fam_per_org(pangenome, disable_bar)
-        logging.getLogger("PPanGGOLiN").info(
-            f"Compute rate of unique family for each genome combination in {subset}"
-        )
-        for c_organisms in tqdm(
-            list(combinations(pangenome.organisms, 2)),
-            unit="combination",
-            disable=disable_bar,
-        ):
-            tot_fam = org2_nb_fam.get(c_organisms[0].name) + org2_nb_fam.get(
-                c_organisms[1].name
-            )
-            common_fam = popcount(c_organisms[0].bitarray & c_organisms[1].bitarray) - 1
-            if tot_fam > 0 and common_fam > 0:
-                g_sum += (tot_fam - 2 * common_fam) / tot_fam
-        fluidity_dict[subset] = (
-            2 / (pangenome.number_of_organisms * (pangenome.number_of_organisms - 1))
-        ) * g_sum
-    return fluidity_dict
-
-
-def nb_fam_per_org(pangenome: Pangenome, disable_bar: bool = False) -> dict:
-    """
-    Create a dictionary with for each organism the number of gene families
-
-    :param pangenome: Pangenome which contain the organisms and gene families
-    :param disable_bar: Disable the progress bar
-
-    :return: Dictionary with organisms as key and number of families as value
-    """
-    org2_nb_fam = dict()
-    for org in tqdm(pangenome.organisms, unit="genome", disable=disable_bar):
-        org2_nb_fam[org.name] = popcount(org.bitarray)
-    return org2_nb_fam
+        for subset in partition_subsets
+    }
 
 
 # TODO Function to normalize genome fluidity
@@ -87,53 +155,28 @@ def fam_fluidity(pangenome: Pangenome, disable_bar: bool = False) -> dict:
 
     :return: family fluidity value from the pangenome for each partition
     """
+    if has_presence_absence_matrix(pangenome):
+        logging.getLogger("PPanGGOLiN").info(
+            "Read the presence/absence matrix of the pangenome"
+        )
+        presence, masks = read_partition_presence_absence(pangenome)
+        return {
+            subset: pairwise_fluidity(
+                presence[mask], presence.shape[0], disable_bar=disable_bar
+            )
+            for subset, mask in masks.items()
+        }
     # check statuses and load info
     logging.getLogger("PPanGGOLiN").info("Check information in pangenome")
     check_pangenome_info(
         pangenome, need_annotations=True, need_families=True, disable_bar=disable_bar
     )
-    fluidity_dict = {"all": None, "shell": None, "cloud": None, "accessory": None}
-    for subset in fluidity_dict.keys():
-        logging.getLogger("PPanGGOLiN").debug(
-            f"Compute binaries for {subset} partition"
-        )
-        pangenome.compute_family_bitarrays(part=subset)
-        # Compute binaries corresponding to presence / absence of families in organisms
-        f_sum = 0
-        logging.getLogger("PPanGGOLiN").debug("Get number of families in each genome")
-        fam_2_nb_org = nb_org_per_fam(pangenome, disable_bar)
-        logging.getLogger("PPanGGOLiN").info(
-            "Compute rate of unique organism for each family combination"
+    presence_matrix = pangenome.presence_matrix
+    return {
+        subset: pairwise_fluidity(
+            presence_matrix.to_dense(subset),
+            pangenome.number_of_gene_families,
+            disable_bar=disable_bar,
         )
-        for c_fam in tqdm(
-            list(combinations(pangenome.gene_families, 2)),
-            unit="combination",
-            disable=disable_bar,
-        ):
-            tot_org = fam_2_nb_org.get(c_fam[0].name) + fam_2_nb_org.get(c_fam[1].name)
-            common_fam = popcount(c_fam[0].bitarray & c_fam[1].bitarray) - 1
-            if tot_org > 0 and common_fam > 0:
-                f_sum += (tot_org - 2 * common_fam) / tot_org
-        fluidity_dict[subset] = (
-            2
-            / (
-                pangenome.number_of_gene_families
-                * (pangenome.number_of_gene_families - 1)
-            )
-        ) * f_sum
-    return fluidity_dict
-
-
-def nb_org_per_fam(pangenome: Pangenome, disable_bar: bool = False) -> dict:
-    """
-    Create a dictionary with for each gene families the number of organism
-
-    :param pangenome: Pangenome which contain the organisms and gene families
-    :param disable_bar: Disable the progress bar
-
-    :return: Dictionary with organisms as key and number of families as value
-    """
-    fam_2_nb_org = dict()
-    for fam in tqdm(pangenome.gene_families, unit="gene families", disable=disable_bar):
-        fam_2_nb_org[fam.name] = popcount(fam.bitarray)
-    return fam_2_nb_org
+        for subset in partition_subsets
+    }
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+
+# default libraries
+import math
+from typing import Dict, List, Sequence, Tuple
+
+# installed libraries
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# below this value, class sizes, proportions and dispersions are considered null, as in NEM
+EPSILON = 1e-20
+# seed of the priorities used to split the gene families in groups updated at once
+GROUPS_SEED = 42
+
+
+def init_parameters(
+    kval: int, nb_org: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the initial parameters of the Bernoulli mixture, the same as the ones given to NEM in the parameter file.
+    The first half of the classes are centered on presence in all genomes, the others on absence, with a dispersion
+    growing towards the middle classes.
+
+    :param kval: Number of classes
+    :param nb_org: Number of genomes
+
+    :return: Proportion of each class, and center and dispersion of each class in each genome
+    """
+    proportions = [round(1 / float(kval), 2)] * (kval - 1)
+    # the last proportion is determined by subtraction, as in NEM
+    proportions.append(1 - sum(proportions))
+    centers = np.zeros((kval, nb_org), dtype=np.int64)
+    dispersions = np.zeros((kval, nb_org))
+    step = 0.5 / (math.ceil(kval / 2))
+    pichenette = 0.1 if kval == 2 else 0
+    for k in range(1, kval + 1):
+        if k <= kval / 2:
+            centers[k - 1] = 1
+            dispersions[k - 1] = (step * k) - pichenette
+        else:
+            dispersions[k - 1] = (step * (kval - k + 1)) - pichenette
+    return np.array(proportions), centers, dispersions
+
+
+def get_update_groups(neighbors: csr_matrix) -> List[np.ndarray]:
+    """
+    Split the gene families in groups without neighbors in common, so that the classification of all the gene families
+    of a group can be updated at once from the current classification of their neighbors. Updating the groups one
+    after the other is a sequential update of the classification, like the one of NEM but in another order.
+
+    :param neighbors: Weights of the neighbors of each gene family
+
+    :return: Rows of the gene families of each group, the first one being the gene families without neighbors
+    """
+    has_neighbors = np.diff(neighbors.indptr) > 0
+    groups = [np.flatnonzero(~has_neighbors)]
+    # gene families are in conflict if one is a neighbor of the other
+    coo = neighbors.tocoo()
+    kept = (coo.row != coo.col) & has_neighbors[coo.row] & has_neighbors[coo.col]
+    sources = np.concatenate([coo.row[kept], coo.col[kept]]).astype(np.int64)
+    targets = np.concatenate([coo.col[kept], coo.row[kept]]).astype(np.int64)
+    # groups are the gene families with a priority higher than the ones of their neighbors left to group
+    rng = np.random.default_rng(GROUPS_SEED)
+    priorities = rng.permutation(len(has_neighbors)) + 1
+    remaining = has_neighbors.copy()
+    while remaining.any():
+        highest = np.zeros(len(has_neighbors), dtype=priorities.dtype)
+        np.maximum.at(
+            highest, sources, np.where(remaining[targets], priorities[targets], 0)
+        )
+        selected = remaining & (priorities > highest)
+        groups.append(np.flatnonzero(selected))
+        remaining &= ~selected
+    return [group for group in groups if len(group) > 0]
+
+
+def normalize(logits: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Get the probabilities of the classes from their logarithm up to a constant, by block of classes.
+    Gene families with a null probability in all the classes of a block are equally spread among them, as in NEM.
+
+    :param logits: Logarithm of the unnormalized probabilities of each gene family (rows) in each class (columns)
+    :param offsets: Offsets of the classes of each block in the columns
+
+    :return: Probabilities of each gene family in each class, summing to 1 in each block
+    """
+    sizes = np.diff(offsets)
+    maxima = np.maximum.reduceat(logits, offsets[:-1], axis=1)
+    maxima[~np.isfinite(maxima)] = 0
+    with np.errstate(invalid="ignore"):
+        probabilities = np.exp(logits - np.repeat(maxima, sizes, axis=1))
+    sums = np.add.reduceat(probabilities, offsets[:-1], axis=1)
+    null = sums <= 0
+    sums[null] = 1
+    probabilities /= np.repeat(sums, sizes, axis=1)
+    if null.any():
+        spread = np.repeat(null, sizes, axis=1)
+        probabilities[spread] = np.broadcast_to(
+            np.repeat(1 / sizes, sizes), probabilities.shape
+        )[spread]
+    return probabilities
+
+
+def log_sum_exp(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Get the logarithm of the sum of the exponential of the values of each row, by block of columns
+
+    :param values: Matrix of values
+    :param offsets: Offsets of the columns of each block
+
+    :return: Matrix with the result of each row in each block
+    """
+    maxima = np.maximum.reduceat(values, offsets[:-1], axis=1)
+    maxima[~np.isfinite(maxima)] = 0
+    sums = np.add.reduceat(
+        np.exp(values - np.repeat(maxima, np.diff(offsets), axis=1)),
+        offsets[:-1],
+        axis=1,
+    )
+    with np.errstate(divide="ignore"):
+        return np.log(sums) + maxima
+
+
+def estimate_parameters(
+    presence: np.ndarray,
+    classification: np.ndarray,
+    centers: np.ndarray,
+    dispersions: np.ndarray,
+    free_dispersion: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Estimate the parameters of the Bernoulli mixture from a fuzzy classification (M-step).
+    Centers are the weighted medians of the presence in each genome and dispersions the mean distance to the centers,
+    as in NEM. Empty classes keep their previous centers and dispersions.
+
+    :param presence: Presence/absence of each gene family (rows) in each genome (columns)
+    :param classification: Probability of each gene family to belong to each class
+    :param centers: Previous center of each class in each genome
+    :param dispersions: Previous dispersion of each class in each genome
+    :param free_dispersion: Estimate one dispersion by genome in each class instead of one by class
+
+    :return: Proportion of each class, center and dispersion of each class in each genome, and empty classes
+    """
+    sizes = classification.sum(axis=0, dtype=np.float64).astype(classification.dtype)
+    empty = sizes <= EPSILON
+    # weighted number of gene families present and absent in each genome, by class
+    present = classification.T @ presence
+    absent = sizes[:, None] - present
+    new_centers = np.where(present > absent, 1, np.where(present < absent, 0, 0.5))
+    new_centers = new_centers.astype(classification.dtype)
+    inertia = np.maximum(new_centers * absent + (1 - new_centers) * present, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if free_dispersion:
+            new_dispersions = inertia / sizes[:, None]
+        else:
+            new_dispersions = np.repeat(
+                inertia.sum(axis=1, keepdims=True)
+                / (presence.shape[1] * sizes[:, None]),
+                presence.shape[1],
+                axis=1,
+            )
+    new_centers[empty] = centers[empty]
+    new_dispersions[empty] = dispersions[empty]
+    proportions = sizes / presence.shape[0]
+    return proportions, new_centers, new_dispersions.astype(classification.dtype), empty
+
+
+def log_densities(
+    presence: np.ndarray,
+    proportions: np.ndarray,
+    centers: np.ndarray,
+    dispersions: np.ndarray,
+) -> np.ndarray:
+    """
+    Get the logarithm of the density of each gene family in each class of the Bernoulli mixture, weighted by the
+    proportion of the class. The density is null for a gene family differing from a center where the dispersion is.
+
+    :param presence: Presence/absence of each gene family (rows) in each genome (columns)
+    :param proportions: Proportion of each class
+    :param centers: Center of each class in each genome
+    :param dispersions: Dispersion of each class in each genome
+
+    :return: Logarithm of the proportion times the density of each gene family (rows) in each class (columns)
+    """
+    # a presence differs from a center of 0, an absence from a center of 1, none of them from a center of 1/2
+    differ_if_present = (centers == 0).astype(presence.dtype)
+    differ_if_absent = (centers == 1).astype(presence.dtype)
+    valid = dispersions > EPSILON
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_odds = np.where(valid, np.log((1 - dispersions) / dispersions), 0)
+        log_agreement = np.where(valid, np.log(1 - dispersions), 0)
+        log_proportions = np.where(
+            proportions > EPSILON, np.log(proportions), -np.inf
+        ).astype(presence.dtype)
+    log_odds = log_odds.astype(presence.dtype)
+    distances = presence @ ((differ_if_present - differ_if_absent) * log_odds).T + (
+        (differ_if_absent * log_odds).sum(axis=1) - log_agreement.sum(axis=1)
+    )
+    densities = log_proportions - distances
+    if not valid.all():
+        # count the differences with the centers without dispersion
+        null = (~valid).astype(presence.dtype)
+        differences = presence @ ((differ_if_present - differ_if_absent) * null).T + (
+            differ_if_absent * null
+        ).sum(axis=1)
+        densities[differences > 0] = -np.inf
+    return densities
+
+
+def update_classification(
+    densities: np.ndarray,
+    classification: np.ndarray,
+    neighbors: List[csr_matrix],
+    groups: List[np.ndarray],
+    beta: float,
+    offsets: np.ndarray,
+):
+    """
+    Update the fuzzy classification of the gene families from the parameters and the classification of their
+    neighbors, by mean field approximation (E-step). Groups of gene families are updated one after the other.
+
+    :param densities: Logarithm of the proportion times the density of each gene family in each class
+    :param classification: Probability of each gene family to belong to each class, updated in place
+    :param neighbors: Weights of the neighbors of the gene families of each group
+    :param groups: Rows of the gene families of each group
+    :param beta: Strength of the smoothing by the neighbors
+    :param offsets: Offsets of the classes of each block in the columns
+    """
+    for rows, group_neighbors in zip(groups, neighbors):
+        logits = densities[rows]
+        if beta != 0 and group_neighbors.nnz > 0:
+            logits = logits + beta * (group_neighbors @ classification)
+        classification[rows] = normalize(logits, offsets)
+
+
+def get_criteria(
+    densities: np.ndarray,
+    classification: np.ndarray,
+    neighbors: csr_matrix,
+    beta: float,
+    offsets: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the criteria of the classification by block of classes, as NEM does
+
+    :param densities: Logarithm of the proportion times the density of each gene family in each class
+    :param classification: Probability of each gene family to belong to each class
+    :param neighbors: Weights of the neighbors of each gene family
+    :param beta: Strength of the smoothing by the neighbors
+    :param offsets: Offsets of the classes of each block in the columns
+
+    :return: NEM criterion (U), markov pseudo-likelihood (M), mixture likelihood (L) and entropy of each block
+    """
+    context = neighbors @ classification
+    member = classification > np.finfo(np.float32).tiny
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_classification = np.where(member, np.log(classification), 0)
+        hathaway = np.where(
+            member, classification * (densities - log_classification), 0
+        )
+    smoothing = np.where(member, classification * context, 0)
+    hathaway = np.add.reduceat(hathaway.sum(axis=0, dtype=np.float64), offsets[:-1])
+    smoothing = np.add.reduceat(smoothing.sum(axis=0, dtype=np.float64), offsets[:-1])
+    pseudo = -log_sum_exp(beta * context, offsets).sum(axis=0, dtype=np.float64)
+    entropy = np.add.reduceat(
+        (classification * log_classification).sum(axis=0, dtype=np.float64),
+        offsets[:-1],
+    )
+    return {
+        "U": hathaway + 0.5 * beta * smoothing,
+        "M": hathaway + beta * smoothing + pseudo,
+        "L": log_sum_exp(densities, offsets).sum(axis=0, dtype=np.float64),
+        "entropy": entropy,
+    }
+
+
+def nem(
+    presence: np.ndarray,
+    neighbors: csr_matrix,
+    kvals: Sequence[int],
+    beta: float = 0.0,
+    free_dispersion: bool = False,
+    itermax: int = 100,
+    convergence_th: float = 0.01,
+    parameters: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    initial_classification: Sequence[np.ndarray] = None,
+    updated: np.ndarray = None,
+    dtype: np.dtype = np.float32,
+) -> List[Dict]:
+    """
+    Partition gene families with the Neighborhood EM algorithm of NEM on a multivariate Bernoulli mixture, with
+    vectorized operations. Like NEM is used by PPanGGOLiN, class proportions are free, the dispersion is the same in
+    all genomes unless it is free, and the run stops once no probability changes by more than the threshold.
+    Classifications for several numbers of classes are computed at once, their classes side by side in the same
+    matrices, so that the products of the presence/absence matrix are single multithreaded BLAS calls for all of them.
+
+    Unlike NEM, which updates gene families one at a time in the order of the rows, gene families are updated by
+    groups without neighbors in common, which is still a sequential update. Probabilities are computed from their
+    logarithm, so that gene families with a density too low to be represented by NEM are still classified.
+
+    :param presence: Presence/absence of each gene family (rows) in each genome (columns)
+    :param neighbors: Weights of the neighbors of each gene family, as a square matrix
+    :param kvals: Numbers of classes to compute classifications with
+    :param beta: Strength of the smoothing by the neighbors. 0 deactivates the smoothing.
+    :param free_dispersion: Estimate one dispersion by genome in each class instead of one by class
+    :param itermax: Maximum number of iterations
+    :param convergence_th: Threshold of the largest change of probability between two iterations to stop at
+    :param parameters: Initial proportions, centers and dispersions for each number of classes.
+                       Default is the initial parameters used with NEM.
+    :param initial_classification: Classification for each number of classes of the gene families not updated
+    :param updated: Gene families whose classification is updated, the others keeping their initial classification
+                    throughout the run while still being used to estimate the parameters. Default is all of them.
+    :param dtype: Floating point type of the computations
+
+    :return: Result for each number of classes, with the classification (probability of each gene family in each
+             class), the proportions, centers and dispersions, the criteria, the number of iterations done, and
+             whether the run converged or stopped on an empty class
+
+    :raises ValueError: Gene families are not updated but have no initial classification
+    """
+    if updated is not None and initial_classification is None:
+        raise ValueError(
+            "Gene families can only be left out of the updates with an initial classification"
+        )
+    kvals = list(kvals)
+    presence = np.asarray(presence, dtype=dtype)
+    number_of_families, number_of_organisms = presence.shape
+    offsets = np.concatenate([[0], np.cumsum(kvals)]).astype(np.int64)
+    if parameters is None:
+        parameters = [init_parameters(kval, number_of_organisms) for kval in kvals]
+    proportions = np.concatenate([para[0] for para in parameters]).astype(dtype)
+    centers = np.concatenate([para[1] for para in parameters]).astype(dtype)
+    dispersions = np.concatenate([para[2] for para in parameters]).astype(dtype)
+
+    neighbors = csr_matrix(neighbors, dtype=dtype)
+    if beta != 0:
+        groups = get_update_groups(neighbors)
+    else:
+        groups = [np.arange(number_of_families)]
+    if updated is not None:
+        groups = [rows[updated[rows]] for rows in groups]
+        groups = [rows for rows in groups if len(rows) > 0]
+    group_neighbors = [neighbors[rows] for rows in groups]
+
+    # initial classification from the parameters, without then with the smoothing
+    densities = log_densities(presence, proportions, centers, dispersions)
+    classification = normalize(densities, offsets)
+    if updated is not None:
+        classification[~updated] = np.concatenate(initial_classification, axis=1)[
+            ~updated
+        ]
+    update_classification(
+        densities, classification, group_neighbors, groups, beta, offsets
+    )
+
+    iterations = np.zeros(len(kvals), dtype=np.int64)
+    converged = np.zeros(len(kvals), dtype=bool)
+    empty = np.zeros(len(kvals), dtype=bool)
+    for _ in range(itermax):
+        running = ~(converged | empty)
+        if not running.any():
+            break
+        blocks = np.flatnonzero(running)
+        columns = np.concatenate(
+            [np.arange(offsets[block], offsets[block + 1]) for block in blocks]
+        )
+        block_offsets = np.concatenate(
+            [[0], np.cumsum(np.diff(offsets)[blocks])]
+        ).astype(np.int64)
+        old_classification = classification[:, columns]
+
+        # M-step, stopping the blocks with an empty class
+        (
+            block_proportions,
+            block_centers,
+            block_dispersions,
+            empty_classes,
+        ) = estimate_parameters(
+            presence,
+            old_classification,
+            centers[columns],
+            dispersions[columns],
+            free_dispersion,
+        )
+        iterations[blocks] += 1
+        empty[blocks] = np.logical_or.reduceat(empty_classes, block_offsets[:-1])
+        kept = ~np.repeat(empty[blocks], np.diff(block_offsets))
+        proportions[columns[kept]] = block_proportions[kept]
+        centers[columns[kept]] = block_centers[kept]
+        dispersions[columns[kept]] = block_dispersions[kept]
+
+        # E-step
+        block_densities = log_densities(
+            presence, block_proportions, block_centers, block_dispersions
+        )
+        block_classification = old_classification.copy()
+        update_classification(
+            block_densities,
+            block_classification,
+            group_neighbors,
+            groups,
+            beta,
+            block_offsets,
+        )
+        densities[:, columns[kept]] = block_densities[:, kept]
+        classification[:, columns[kept]] = block_classification[:, kept]
+        changes = np.abs(block_classification - old_classification).max(
+            axis=0, initial=0
+        )
+        converged[blocks] = (
+            np.maximum.reduceat(changes, block_offsets[:-1]) < convergence_th
+        ) & ~empty[blocks]
+
+    criteria = get_criteria(densities, classification, neighbors, beta, offsets)
+    results = []
+    for block, kval in enumerate(kvals):
+        columns = slice(offsets[block], offsets[block + 1])
+        results.append(
+            {
+                "classification": classification[:, columns],
+                "proportions": proportions[columns],
+                "centers": centers[columns],
+                "dispersions": dispersions[columns],
+                "U": float(criteria["U"][block]),
+                "M": float(criteria["M"][block]),
+                "L": float(criteria["L"][block]),
+                "entropy": float(criteria["entropy"][block]),
+                "iterations": int(iterations[block]),
+                "converged": bool(converged[block]),
+                "empty_class": bool(empty[block]),
+            }
+        )
+    return results
@@ -2,6 +2,7 @@
 
 # default libraries
 import logging
+import gc
 import random
 import tempfile
 import time
@@ -10,26 +11,247 @@ import os
 import argparse
 from collections import defaultdict, Counter
 import math
+import re
 from shutil import copytree
 from pathlib import Path
 
 # installed libraries
-from typing import Union, Tuple, List
+from typing import Dict, Union, Tuple, List, Sequence
 
+import numpy as np
+import tables
+from scipy.sparse import csr_matrix
 from tqdm import tqdm
 import plotly.offline as out_plotly
 import plotly.graph_objs as go
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
+from ppanggolin.sharedArrays import SharedArrays
 from ppanggolin.utils import mk_outdir
-from ppanggolin.formats import check_pangenome_info, write_pangenome, erase_pangenome
+from ppanggolin.formats import (
+    check_pangenome_info,
+    write_pangenome,
+    erase_pangenome,
+    read_partition_model,
+)
+from ppanggolin.nem.numpyNem import (
+    init_parameters,
+    estimate_parameters,
+    nem as numpy_nem,
+)
 
 # cython library (local)
 import nem_stats
 
 pan = Pangenome()
 samples = []
+# arrays of the pangenome read to write the NEM input files, shared with the partitioning workers
+nem_arrays = None
+
+
+def get_nem_arrays(pangenome: Pangenome) -> Dict[str, np.ndarray]:
+    """
+    Get the pangenome data needed to write the NEM input files of any genome sample as arrays.
+    Gene families and genomes are given by their index in the presence/absence matrix of the pangenome.
+
+    :param pangenome: Pangenome with gene families and neighbors graph
+
+    :return: Packed presence/absence matrix, names of the gene families and genomes, neighbors of each gene family
+             with the edge linking them, and number of gene pairs of each edge in each genome
+    """
+    presence_matrix = pangenome.presence_matrix
+    edge_index = {}
+    pair_edges, pair_organisms, pair_counts = [], [], []
+    for index, edge in enumerate(pangenome.edges):
+        edge_index[edge] = index
+        for organism, count in edge.get_organism_pair_counts().items():
+            pair_edges.append(index)
+            pair_organisms.append(presence_matrix.organism_index[organism])
+            pair_counts.append(count)
+
+    neighbor_offsets, neighbor_families, neighbor_edges = [0], [], []
+    for family in presence_matrix.families:
+        for edge in family.edges:
+            neighbor = edge.target if family == edge.source else edge.source
+            neighbor_families.append(presence_matrix.family_index[neighbor])
+            neighbor_edges.append(edge_index[edge])
+        neighbor_offsets.append(len(neighbor_edges))
+
+    return {
+        "presence": presence_matrix.packed,
+        "family_names": np.array(
+            [family.name.encode() for family in presence_matrix.families], dtype=bytes
+        ),
+        "organism_names": np.array(
+            [organism.name.encode() for organism in presence_matrix.organisms],
+            dtype=bytes,
+        ),
+        "neighbor_offsets": np.array(neighbor_offsets, dtype=np.int64),
+        "neighbor_families": np.array(neighbor_families, dtype=np.int64),
+        "neighbor_edges": np.array(neighbor_edges, dtype=np.int64),
+        "pair_edges": np.array(pair_edges, dtype=np.int64),
+        "pair_organisms": np.array(pair_organisms, dtype=np.int64),
+        "pair_counts": np.array(pair_counts, dtype=np.int64),
+    }
+
+
+def share_nem_arrays(pangenome: Pangenome) -> SharedArrays:
+    """
+    Export the pangenome data needed to write the NEM input files to shared memory, once for all the workers.
+    The shared memory must be freed with the unlink method of the returned object once partitioning is done.
+
+    :param pangenome: Pangenome with gene families and neighbors graph
+
+    :return: Arrays in shared memory
+    """
+    global nem_arrays
+    nem_arrays = SharedArrays(get_nem_arrays(pangenome))
+    return nem_arrays
+
+
+def attach_nem_arrays(descriptor: tuple):
+    """
+    Attach a worker to the shared arrays used to write the NEM input files.
+    Used as initializer of the worker pools.
+
+    :param descriptor: Descriptor of the shared arrays
+    """
+    global nem_arrays
+    nem_arrays = SharedArrays.attach(descriptor)
+
+
+def get_sample_presence(organisms: np.ndarray) -> np.ndarray:
+    """
+    Get the presence/absence of all the gene families in a genome sample from the shared arrays
+
+    :param organisms: Indexes of the genomes of the sample
+
+    :return: Matrix with 1 where a gene family (row) is present in a genome of the sample (column)
+    """
+    return (
+        nem_arrays["presence"][:, organisms >> 3]
+        >> (7 - (organisms & 7)).astype(np.uint8)
+    ) & 1
+
+
+def get_partition_parameters(
+    proportions: Sequence[float],
+    centers: Sequence[Sequence[float]],
+    dispersions: Sequence[Sequence[float]],
+) -> Dict[str, Tuple[List[bool], List[float], float]]:
+    """
+    Name the parameters of each class of the partitioning after the partition it corresponds to
+
+    :param proportions: Proportion of each class
+    :param centers: Center of each class in each genome
+    :param dispersions: Dispersion of each class in each genome
+
+    :return: Centers as booleans, dispersions and proportion of each partition
+    """
+    kval = len(proportions)
+    all_parameters = {}
+    for k in range(kval):
+        parameters = (
+            [bool(mu_kj) for mu_kj in centers[k]],
+            [float(epsilon_kj) for epsilon_kj in dispersions[k]],
+            float(proportions[k]),
+        )
+        if k == 0:
+            all_parameters["persistent"] = parameters
+        elif k == kval - 1:
+            all_parameters["cloud"] = parameters
+        else:
+            all_parameters["shell_" + str(k)] = parameters
+    return all_parameters
+
+
+def get_partitions(probabilities: np.ndarray, kval: int) -> List[str]:
+    """
+    Assign each gene family to the partition it most likely belongs to
+
+    :param probabilities: Probability of each gene family (rows) to belong to each class (columns)
+    :param kval: Number of classes
+
+    :return: Partition of each gene family
+    """
+    parti = {0: "P", kval - 1: "C"}
+    for i in range(1, kval - 1):
+        parti[i] = "S" + str(i)
+    max_prob = probabilities.max(axis=1)
+    # SHELL in case of doubt gene families is attributed to shell
+    doubt = ((probabilities == max_prob[:, None]).sum(axis=1) > 1) | (max_prob < 0.5)
+    labels = np.array([parti[k] for k in range(kval)] + ["S_"], dtype=object)
+    return labels[np.where(doubt, kval, probabilities.argmax(axis=1))].tolist()
+
+
+def get_entropy(probabilities: np.ndarray) -> float:
+    """
+    Compute the entropy term of the ICL of a fuzzy classification
+
+    :param probabilities: Probability of each gene family (rows) to belong to each class (columns)
+
+    :return: Sum of the probabilities times their logarithm
+    """
+    terms = probabilities * np.log(
+        probabilities,
+        out=np.zeros_like(probabilities),
+        where=probabilities > 0,
+    )
+    entropy = 0
+    # summed by gene family, then over the gene families, in order
+    for family_terms in terms.tolist():
+        entropy += sum(family_terms)
+    return entropy
+
+
+def write_init_parameters(
+    nem_dir_path: Path,
+    kval: int,
+    proportions: np.ndarray,
+    centers: np.ndarray,
+    dispersions: np.ndarray,
+):
+    """
+    Write the parameter file NEM starts from
+
+    :param nem_dir_path: Path to directory with nem files
+    :param kval: Number of partitions
+    :param proportions: Proportion of each class
+    :param centers: Center of each class in each genome
+    :param dispersions: Dispersion of each class in each genome
+    """
+    with open(nem_dir_path / f"nem_file_init_{str(kval)}.m", "w") as m_file:
+        m_file.write("1 ")  # 1 to initialize parameter,
+        m_file.write(
+            " ".join([str(value) for value in proportions[:-1].tolist()]) + " "
+        )
+        # 1/K give the initial proportion to each class
+        # (the last proportion is automatically determined by subtraction in nem)
+        m_file.write(
+            " ".join([str(value) for value in centers.ravel().tolist()])
+            + " "
+            + " ".join([str(value) for value in dispersions.ravel().tolist()])
+        )
+
+
+def get_nem_iterations(nem_dir_path: Path, kval: int) -> Union[int, None]:
+    """
+    Get the number of iterations done by NEM from its log
+
+    :param nem_dir_path: Path to directory with nem files
+    :param kval: Number of partitions used
+
+    :return: Number of iterations, None if NEM did not report it
+    """
+    stderr_path = nem_dir_path / f"nem_file_{str(kval)}.stderr"
+    if stderr_path.is_file():
+        with open(stderr_path) as stderr_file:
+            for line in stderr_file:
+                match = re.search(r"after (\d+) iterations", line)
+                if match:
+                    return int(match.group(1))
+    return None
 
 
 def run_partitioning(
@@ -53,7 +275,8 @@ def run_partitioning(
     :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
     :param kval: Number of partitions to use. Must be at least 2. If under 2, it will be detected automatically.
     :param seed: seed used to generate random numbers
-    :param init: Initiate nem parameters with pangenome parameters or randomly
+    :param init: Initiate nem parameters with the default parameters ('param_file'), with the parameters already
+                 written in the parameter file by write_init_parameters ('init_from_old') or randomly
     :param keep_files: True if you want to keep the NEM files
     :param itermax: Maximum iteration to compute partitioning
     :param just_log_likelihood: Return only nem parameter result
@@ -62,24 +285,7 @@ def run_partitioning(
     """
     logging.getLogger("PPanGGOLiN").debug("run_partitioning...")
     if init == "param_file":
-        with open(nem_dir_path / f"nem_file_init_{str(kval)}.m", "w") as m_file:
-            m_file.write("1 ")  # 1 to initialize parameter,
-            m_file.write(" ".join([str(round(1 / float(kval), 2))] * (kval - 1)) + " ")
-            # 1/K give the initial proportion to each class
-            # (the last proportion is automatically determined by subtraction in nem)
-            mu = []
-            epsilon = []
-            step = 0.5 / (math.ceil(kval / 2))
-            pichenette = 0.1 if kval == 2 else 0
-            for k in range(1, kval + 1):
-                if k <= kval / 2:
-                    mu += ["1"] * nb_org
-                    epsilon += [str((step * k) - pichenette)] * nb_org
-                else:
-                    mu += ["0"] * nb_org
-                    epsilon += [str((step * (kval - k + 1)) - pichenette)] * nb_org
-
-            m_file.write(" ".join(mu) + " " + " ".join(epsilon))
+        write_init_parameters(nem_dir_path, kval, *init_parameters(kval, nb_org))
 
     algo = b"nem"  # fuzzy classification by mean field approximation
     model = b"bern"  # multivariate Bernoulli mixture model
@@ -179,49 +385,24 @@ def run_partitioning(
             parameters = parameters_nem_file.readlines()
             log_likelihood = float(parameters[2].split()[3])
 
-            sum_mu_k = []
-            sum_epsilon_k = []
-
-            for k, line in enumerate(parameters[-kval:]):
+            centers, dispersions, proportions = [], [], []
+            for line in parameters[-kval:]:
                 vector = line.split()
-                mu_k = [bool(float(mu_kj)) for mu_kj in vector[0:nb_org]]
-                epsilon_k = [float(epsilon_kj) for epsilon_kj in vector[nb_org + 1 :]]
-                proportion = float(vector[nb_org])
-                sum_mu_k.append(sum(mu_k))
-                sum_epsilon_k.append(sum(epsilon_k))
-                if k == 0:
-                    all_parameters["persistent"] = (mu_k, epsilon_k, proportion)
-                elif k == kval - 1:
-                    all_parameters["cloud"] = (mu_k, epsilon_k, proportion)
-                else:
-                    all_parameters["shell_" + str(k)] = (mu_k, epsilon_k, proportion)
-
-            parti = {0: "P", kval - 1: "C"}
-
-            for i in range(1, kval - 1):
-                parti[i] = "S" + str(i)
-            entropy = 0
-
-            for i, line in enumerate(partitions_nem_file):
-                elements = [float(el) for el in line.split()]
-                if just_log_likelihood:
-                    entropy += sum(
-                        [
-                            math.log(float(el)) * float(el) if float(el) > 0 else 0
-                            for el in elements
-                        ]
-                    )
-                else:
-                    max_prob = max([float(el) for el in elements])
-                    positions_max_prob = [
-                        pos for pos, prob in enumerate(elements) if prob == max_prob
-                    ]
-                    if len(positions_max_prob) > 1 or max_prob < 0.5:
-                        partitions_list[i] = (
-                            "S_"  # SHELL in case of doubt gene families is attributed to shell
-                        )
-                    else:
-                        partitions_list[i] = parti[positions_max_prob.pop()]
+                centers.append([float(mu_kj) for mu_kj in vector[0:nb_org]])
+                dispersions.append(
+                    [float(epsilon_kj) for epsilon_kj in vector[nb_org + 1 :]]
+                )
+                proportions.append(float(vector[nb_org]))
+            all_parameters = get_partition_parameters(proportions, centers, dispersions)
+
+            probabilities = np.loadtxt(partitions_nem_file, ndmin=2)
+            if just_log_likelihood:
+                entropy = get_entropy(probabilities)
+            elif probabilities.size > 0:
+                partitions_list[: len(probabilities)] = get_partitions(
+                    probabilities, kval
+                )
+
     except OSError:
         logging.getLogger("PPanGGOLiN").warning(
             "Partitioning did not work (the number of genomes used is probably too low), "
@@ -262,6 +443,7 @@ def partition_nem(
     init: str = "param_file",
     tmpdir: Path = None,
     keep_tmp_files: bool = False,
+    engine: str = "nem",
 ) -> Union[Tuple[dict, None, None], Tuple[int, float, float], Tuple[dict, dict, float]]:
     """
 
@@ -274,12 +456,23 @@ def partition_nem(
     :param seed: seed used to generate random numbers
     :param init: Initiate nem parameters with pangenome parameters or randomly
     :param keep_tmp_files: True if you want to keep the temporary NEM files
+    :param engine: Partitioning engine, 'nem' or 'numpy'
 
     :return:
     """
     currtmpdir = tmpdir / f"{str(index)}"  # unique directory name
     samp = samples[index]  # org_samples accessible because it is a global variable.
 
+    if engine == "numpy":
+        nem_input, edges_weight = get_nem_input(samp, sm_degree)
+        return run_numpy_partitioning(
+            nem_input,
+            len(samp),
+            beta * (len(nem_input["families"]) / edges_weight),
+            free_dispersion,
+            kvals=[kval],
+        )[0]
+
     edges_weight, nb_fam = write_nem_input_files(
         tmpdir=currtmpdir, organisms=samp, sm_degree=sm_degree
     )
@@ -299,109 +492,569 @@ def nem_samples(
     pack: tuple,
 ) -> Union[Tuple[dict, None, None], Tuple[int, float, float], Tuple[dict, dict, float]]:
     """run partitioning
-    :param pack: {index: int, tmpdir: str, beta: float, sm_degree: int, free_dispersion: bool, kval: int, seed: int, init: str, keep_tmp_files: bool}
+    :param pack: {index: int, tmpdir: str, beta: float, sm_degree: int, free_dispersion: bool, kval: int, seed: int, init: str, keep_tmp_files: bool, engine: str}
 
     :return:
     """
     return partition_nem(*pack)
 
 
+def get_nem_input(
+    organisms: Sequence[int], sm_degree: int = 10
+) -> Tuple[Dict[str, np.ndarray], float]:
+    """
+    Build the input of NEM for a genome sample in memory, from the shared arrays of the pangenome.
+    Gene families are the ones present in the sample, in the order of the shared arrays, and their neighbors are the
+    ones used in the smoothing process, i.e. linked in the sample by an edge and with less than sm_degree neighbors.
+
+    :param organisms: Indexes of the genomes of the sample in the shared arrays
+    :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
+
+    :return: Arrays of the NEM input, and total edge weight to ponderate beta. Arrays are the indexes of the gene
+             families in the shared arrays, their presence/absence in the sample genomes, and their neighbors as the
+             offsets of the neighbors of each gene family, the row of each neighbor and the number of gene pairs
+             of the edge linking them in the sample.
+    """
+    organisms = np.asarray(organisms, dtype=np.int64)
+    presence = get_sample_presence(organisms)
+    families = np.flatnonzero(presence.any(axis=1))
+    # row of the gene families present in the sample, -1 for the others
+    family_rows = np.full(len(presence), -1, dtype=np.int64)
+    family_rows[families] = np.arange(len(families))
+
+    # number of gene pairs of each edge in the genomes of the sample. Edges are all in the neighbors, twice.
+    organisms_mask = np.zeros(len(nem_arrays["organism_names"]), dtype=bool)
+    organisms_mask[organisms] = True
+    edges_coverage = np.bincount(
+        nem_arrays["pair_edges"],
+        weights=nem_arrays["pair_counts"]
+        * organisms_mask[nem_arrays["pair_organisms"]],
+        minlength=len(nem_arrays["neighbor_edges"]),
+    ).astype(np.int64)
+
+    # neighbors of the gene families of the sample, linked by an edge existing in the sample
+    starts = nem_arrays["neighbor_offsets"][families]
+    lengths = nem_arrays["neighbor_offsets"][families + 1] - starts
+    entries = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths - starts, lengths
+    )
+    rows = np.repeat(np.arange(len(families)), lengths)
+    coverages = edges_coverage[nem_arrays["neighbor_edges"][entries]]
+    linked = coverages > 0
+    rows, coverages = rows[linked], coverages[linked]
+    neighbors = family_rows[nem_arrays["neighbor_families"][entries[linked]]]
+
+    # gene families with too many neighbors are left out of the smoothing process
+    neighbor_counts = np.bincount(rows, minlength=len(families))
+    smoothed = (neighbor_counts > 0) & (neighbor_counts < sm_degree)
+    kept = smoothed[rows]
+    rows, neighbors, coverages = rows[kept], neighbors[kept], coverages[kept]
+    # weights are summed by gene family, then over the gene families, in order
+    offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(rows, minlength=len(families)))]
+    ).astype(np.int64)
+    weights = (coverages / len(organisms)).tolist()
+    total_edges_weight = 0
+    for start, stop in zip(
+        offsets[:-1][smoothed].tolist(), offsets[1:][smoothed].tolist()
+    ):
+        total_edges_weight += sum(weights[start:stop])
+
+    nem_input = {
+        "families": families,
+        "presence": presence[families],
+        "neighbor_offsets": offsets,
+        "neighbors": neighbors,
+        "neighbor_coverages": coverages,
+    }
+    return nem_input, total_edges_weight / 2
+
+
 def write_nem_input_files(
-    tmpdir: Path, organisms: set, sm_degree: int = 10
+    tmpdir: Path, organisms: Sequence[int], sm_degree: int = 10
 ) -> Tuple[float, int]:
     """
-    Create and format input files for partitioning with NEM
+    Create and format input files for partitioning with NEM, from the shared arrays of the pangenome
 
     :param tmpdir: temporary directory path
-    :param organisms: Set of organism from pangenome
+    :param organisms: Indexes of the genomes of the sample in the shared arrays
     :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
 
     :return: total edge weight to ponderate beta and number of families
     """
     mk_outdir(tmpdir, force=False)
-    total_edges_weight = 0
+    organisms = np.asarray(organisms, dtype=np.int64)
+    nem_input, total_edges_weight = get_nem_input(organisms, sm_degree)
+    number_of_families = len(nem_input["families"])
 
     with open(tmpdir / "column_org_file", "w") as org_file:
-        org_file.write(" ".join([f'"{org.name}"' for org in organisms]) + "\n")
+        org_file.write(
+            " ".join(
+                [
+                    f'"{name.decode()}"'
+                    for name in nem_arrays["organism_names"][organisms]
+                ]
+            )
+            + "\n"
+        )
 
     logging.getLogger("PPanGGOLiN").debug(
         "Writing nem_file.str nem_file.index nem_file.nei and nem_file.dat files"
     )
-    with open(tmpdir / "nem_file.str", "w") as str_file, open(
-        tmpdir / "nem_file.index", "w"
-    ) as index_file, open(tmpdir / "nem_file.nei", "w") as nei_file, open(
-        tmpdir / "nem_file.dat", "w"
-    ) as dat_file:
-
-        nei_file.write("1\n")
-        index_fam = {}
-
-        index_org = {}
-        default_dat = []
-        for index, org in enumerate(organisms):
-            default_dat.append("0")
-            index_org[org] = index
-
-        for fam in pan.gene_families:
-            fam_organisms = set(fam.organisms)
-            # could use bitarrays if this part is limiting?
-            if not organisms.isdisjoint(fam_organisms):
-                curr_dat = list(default_dat)
-                curr_orgs = fam_organisms & organisms
-                for org in curr_orgs:
-                    curr_dat[index_org[org]] = "1"
-                dat_file.write("\t".join(curr_dat) + "\n")
-                index_fam[fam] = len(index_fam) + 1
-                index_file.write(f"{len(index_fam)}\t{fam.name}\n")
-
-        for fam in index_fam.keys():
-            row_fam = []
-            row_dist_score = []
-            neighbor_number = 0
-            sum_dist_score = 0
-            for edge in fam.edges:  # iter on the family's edges.
-                coverage = sum(
-                    [
-                        len(gene_list)
-                        for org, gene_list in edge.get_organisms_dict().items()
-                        if org in organisms
-                    ]
-                )
-                if coverage == 0:
-                    continue  # nothing interesting to write, this edge does not exist with this subset of organisms.
-                distance_score = coverage / len(organisms)
-                sum_dist_score += distance_score
-                row_fam.append(
-                    str(index_fam[edge.target if fam == edge.source else edge.source])
-                )
-                row_dist_score.append(str(round(distance_score, 4)))
-                neighbor_number += 1
-            if neighbor_number > 0 and float(neighbor_number) < sm_degree:
-                total_edges_weight += sum_dist_score
-                nei_file.write(
+    with open(tmpdir / "nem_file.dat", "wb") as dat_file:
+        # rows of tab separated digits, written at once from their characters
+        characters = np.full(
+            (number_of_families, 2 * len(organisms)), ord("\t"), dtype=np.uint8
+        )
+        characters[:, 0::2] = nem_input["presence"] + ord("0")
+        characters[:, -1:] = ord("\n")
+        dat_file.write(characters.tobytes())
+
+    with open(tmpdir / "nem_file.index", "w") as index_file:
+        index_file.writelines(
+            f"{index}\t{name.decode()}\n"
+            for index, name in enumerate(
+                nem_arrays["family_names"][nem_input["families"]], start=1
+            )
+        )
+
+    with open(tmpdir / "nem_file.nei", "w") as nei_file:
+        # NEM index of the gene families starts at 1, and the weight of a neighbor is the ratio of the sample
+        # genomes with the edge, which only takes the values of the possible gene pair numbers
+        indexes = [str(index) for index in range(1, number_of_families + 1)]
+        coverages = nem_input["neighbor_coverages"]
+        weights = [
+            str(round(coverage / len(organisms), 4))
+            for coverage in range(int(coverages.max(initial=0)) + 1)
+        ]
+        neighbor_indexes = [indexes[row] for row in nem_input["neighbors"].tolist()]
+        neighbor_weights = [weights[coverage] for coverage in coverages.tolist()]
+        offsets = nem_input["neighbor_offsets"].tolist()
+        lines = ["1\n"]
+        for row in range(number_of_families):
+            start, stop = offsets[row], offsets[row + 1]
+            if start == stop:
+                lines.append(f"{indexes[row]}\t0\n")
+            else:
+                lines.append(
                     "\t".join(
-                        [
-                            str(item)
-                            for sublist in [
-                                [index_fam[fam]],
-                                [neighbor_number],
-                                row_fam,
-                                row_dist_score,
-                            ]
-                            for item in sublist
-                        ]
+                        [indexes[row], str(stop - start)]
+                        + neighbor_indexes[start:stop]
+                        + neighbor_weights[start:stop]
                     )
                     + "\n"
                 )
-            else:
-                nei_file.write(str(index_fam[fam]) + "\t0\n")
+        nei_file.writelines(lines)
+
+    with open(tmpdir / "nem_file.str", "w") as str_file:
+        str_file.write(f"S\t{number_of_families}\t{len(organisms)}\n")
+    return total_edges_weight, number_of_families
+
+
+def get_neighbors_matrix(nem_input: Dict[str, np.ndarray], nb_org: int) -> csr_matrix:
+    """
+    Get the weights of the neighbors of the gene families of a NEM input, as they are written in the NEM files
+
+    :param nem_input: Arrays of the NEM input of a genome sample
+    :param nb_org: Number of genomes of the sample
+
+    :return: Square matrix with the weight of each neighbor (column) of each gene family (row)
+    """
+    coverages = nem_input["neighbor_coverages"]
+    weights = np.array(
+        [
+            round(coverage / nb_org, 4)
+            for coverage in range(int(coverages.max(initial=0)) + 1)
+        ]
+    )
+    number_of_families = len(nem_input["families"])
+    return csr_matrix(
+        (weights[coverages], nem_input["neighbors"], nem_input["neighbor_offsets"]),
+        shape=(number_of_families, number_of_families),
+    )
+
+
+def get_numpy_result(
+    result: dict, kval: int, family_names: List[str], just_log_likelihood: bool = False
+) -> Union[Tuple[dict, None, None], Tuple[int, float, float], Tuple[dict, dict, float]]:
+    """
+    Format a result of the NumPy implementation of NEM as the results of run_partitioning
+
+    :param result: Result of the NumPy implementation of NEM for one number of partitions
+    :param kval: Number of partitions used
+    :param family_names: Names of the gene families, in the rows order
+    :param just_log_likelihood: Return only nem parameter result
+
+    :return: Nem parameters and if not just log likelihood the families associated to partition
+    """
+    logging.getLogger("PPanGGOLiN").debug(
+        f"NumPy NEM with {kval} partitions "
+        f"{'converged' if result['converged'] else 'stopped'} after {result['iterations']} iterations"
+    )
+    if result["empty_class"]:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"Partitioning with {kval} partitions did not work because a partition became empty "
+            "(the number of genomes used is probably too low)"
+        )
+        return {}, None, None
+    # probabilities are rounded as in the NEM output file, to assign the partitions the same way
+    probabilities = np.round(result["classification"].astype(np.float64), 3)
+    if just_log_likelihood:
+        return kval, result["M"], get_entropy(probabilities)
+    return (
+        dict(zip(family_names, get_partitions(probabilities, kval))),
+        get_partition_parameters(
+            result["proportions"], result["centers"], result["dispersions"]
+        ),
+        result["M"],
+    )
 
-        str_file.write("S\t" + str(len(index_fam)) + "\t" + str(len(organisms)) + "\n")
-    return total_edges_weight / 2, len(index_fam)
+
+def run_numpy_partitioning(
+    nem_input: Dict[str, np.ndarray],
+    nb_org: int,
+    beta: float = 2.5,
+    free_dispersion: bool = False,
+    kvals: Sequence[int] = (3,),
+    itermax: int = 100,
+    just_log_likelihood: bool = False,
+) -> List[
+    Union[Tuple[dict, None, None], Tuple[int, float, float], Tuple[dict, dict, float]]
+]:
+    """
+    Make partitioning with the NumPy implementation of NEM, in memory, for one or several numbers of partitions at once
+
+    :param nem_input: Arrays of the NEM input of a genome sample
+    :param nb_org: Number of genomes of the sample
+    :param beta: strength of the smoothing using the graph topology during partitioning. 0 deactivate spatial smoothing
+    :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
+    :param kvals: Numbers of partitions to use
+    :param itermax: Maximum iteration to compute partitioning
+    :param just_log_likelihood: Return only nem parameter result
+
+    :return: Result of each number of partitions, in the same format as the one of run_partitioning
+    """
+    family_names = [
+        name.decode() for name in nem_arrays["family_names"][nem_input["families"]]
+    ]
+    results = numpy_nem(
+        nem_input["presence"],
+        get_neighbors_matrix(nem_input, nb_org),
+        kvals,
+        beta,
+        free_dispersion,
+        itermax,
+    )
+    return [
+        get_numpy_result(result, kval, family_names, just_log_likelihood)
+        for kval, result in zip(kvals, results)
+    ]
+
+
+def get_nem_classification(nem_dir_path: Path, kval: int) -> Union[np.ndarray, None]:
+    """
+    Get the classification computed by NEM from its output file
+
+    :param nem_dir_path: Path to directory with nem files
+    :param kval: Number of partitions used
+
+    :return: Probability of each gene family (rows) to belong to each class (columns), None if NEM did not write it
+    """
+    uf_path = nem_dir_path / f"nem_file_{str(kval)}.uf"
+    if not uf_path.is_file():
+        return None
+    try:
+        return np.loadtxt(uf_path, ndmin=2)
+    except ValueError:
+        return None
+
+
+def get_partition_model(
+    partitions: Dict[str, str],
+    parameters: Dict[str, Tuple[List[bool], List[float], float]],
+    organisms: Sequence[int],
+    iterations: Union[int, None],
+    classification: np.ndarray = None,
+    families: np.ndarray = None,
+) -> Dict[str, Union[np.ndarray, int, None]]:
+    """
+    Get the partition model of a partitioning, to start a later partitioning from it
+
+    :param partitions: Partition of each gene family
+    :param parameters: Centers, dispersions and proportion of each partition
+    :param organisms: Indexes of the partitioned genomes in the shared arrays
+    :param iterations: Number of iterations done by the partitioning
+    :param classification: Probability of the partitioned gene families to belong to each class.
+                           Default is to keep only their partition.
+    :param families: Indexes in the shared arrays of the gene families of the classification rows
+
+    :return: Names of the genomes and gene families, presence/absence of the gene families in the genomes packed by
+             8 genomes, partition of each gene family, proportion, center and dispersion of each class, number of
+             iterations, and the probability of each gene family to belong to each class if given
+    """
+    organisms = np.asarray(organisms, dtype=np.int64)
+    family_names = nem_arrays["family_names"].copy()
+    partition_model = {
+        "genomes": nem_arrays["organism_names"][organisms],
+        "families": family_names,
+        "partitions": np.array(
+            [partitions.get(name.decode(), "").encode() for name in family_names]
+        ),
+        "presence": np.packbits(get_sample_presence(organisms).astype(bool), axis=1),
+        "proportions": np.array(
+            [proportion for _, _, proportion in parameters.values()]
+        ),
+        "centers": np.array([mu for mu, _, _ in parameters.values()], dtype=np.uint8),
+        "dispersions": np.array([epsilon for _, epsilon, _ in parameters.values()]),
+        "iterations": iterations,
+    }
+    if classification is not None:
+        all_classification = np.full(
+            (len(family_names), len(parameters)), np.nan, dtype=np.float32
+        )
+        all_classification[families[: len(classification)]] = classification
+        partition_model["classification"] = all_classification
+    return partition_model
+
+
+def get_class_vectors(partitions: np.ndarray, kval: int) -> np.ndarray:
+    """
+    Get the classification corresponding to partitions
+
+    :param partitions: Partition of each gene family
+    :param kval: Number of partitions
+
+    :return: Probability of each gene family (rows) to belong to each class (columns), NaN for undefined partitions
+    """
+    class_index = {b"P": 0, b"C": kval - 1}
+    for k in range(1, kval - 1):
+        class_index[f"S{k}".encode()] = k
+    names, inverse = np.unique(partitions, return_inverse=True)
+    vectors = np.full((len(names), kval), np.nan)
+    for row, name in enumerate(names.tolist()):
+        if name in class_index:
+            vectors[row] = 0
+            vectors[row, class_index[name]] = 1
+        elif name == b"S_":
+            # gene families in doubt are spread over the shell partitions
+            shell = slice(1, kval - 1) if kval > 2 else slice(None)
+            vectors[row] = 0
+            vectors[row, shell] = 1 / len(range(kval)[shell])
+    return vectors[inverse.ravel()]
+
+
+def get_warm_start(
+    partition_model: Dict[str, Union[np.ndarray, int, None]],
+    nem_input: Dict[str, np.ndarray],
+    organisms: Sequence[int],
+    free_dispersion: bool = False,
+) -> Union[Dict[str, Union[list, np.ndarray]], None]:
+    """
+    Get the state a partitioning starts from to resume a former partitioning, whose genomes may have changed.
+    Genomes and gene families are matched by name with the ones of the partition model.
+    The parameters in the genomes already partitioned are the ones of the model, and the ones in the added genomes
+    are estimated from the former classification of the gene families.
+    Gene families keep their former classification, unless they have not been partitioned or their presence/absence
+    changed: their presence in the genomes kept is not the same, or their presence in the added or removed genomes
+    differs from the center of their former partition. Gene families in doubt are re-evaluated as soon as genomes
+    are added or removed.
+
+    :param partition_model: Partition model of the former partitioning
+    :param nem_input: Arrays of the NEM input of the genome sample
+    :param organisms: Indexes of the genomes of the sample in the shared arrays
+    :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
+
+    :return: Initial parameters and classification, and gene families to re-evaluate, as arguments of the NumPy
+             implementation of NEM. None if none of the genomes has been partitioned before.
+    """
+    organisms = np.asarray(organisms, dtype=np.int64)
+    kval = len(partition_model["proportions"])
+    presence = nem_input["presence"].astype(bool)
+    # column of each genome in the model, -1 for the added genomes
+    former_columns = {
+        name: column for column, name in enumerate(partition_model["genomes"].tolist())
+    }
+    columns = np.array(
+        [
+            former_columns.get(name, -1)
+            for name in nem_arrays["organism_names"][organisms].tolist()
+        ],
+        dtype=np.int64,
+    )
+    kept = columns >= 0
+    if not kept.any():
+        return None
+    lost = np.ones(len(partition_model["genomes"]), dtype=bool)
+    lost[columns[kept]] = False
+
+    # row of each gene family in the model, -1 for the new gene families
+    former_rows = {
+        name: row for row, name in enumerate(partition_model["families"].tolist())
+    }
+    rows = np.array(
+        [
+            former_rows.get(name, -1)
+            for name in nem_arrays["family_names"][nem_input["families"]].tolist()
+        ],
+        dtype=np.int64,
+    )
+    known = rows >= 0
+    classification = np.zeros((len(rows), kval))
+    if "classification" in partition_model:
+        classification[known] = partition_model["classification"][rows[known]]
+    else:
+        classification[known] = get_class_vectors(
+            partition_model["partitions"][rows[known]], kval
+        )
+    partitioned = known & ~np.isnan(classification).any(axis=1)
+    classification[~partitioned] = 0
+
+    centers = np.zeros((kval, len(organisms)))
+    dispersions = np.zeros((kval, len(organisms)))
+    centers[:, kept] = partition_model["centers"][:, columns[kept]]
+    dispersions[:, kept] = partition_model["dispersions"][:, columns[kept]]
+    if not kept.all():
+        _, added_centers, added_dispersions, _ = estimate_parameters(
+            presence[partitioned][:, ~kept].astype(float),
+            classification[partitioned],
+            centers[:, ~kept],
+            dispersions[:, ~kept],
+            free_dispersion=True,
+        )
+        centers[:, ~kept] = added_centers
+        if free_dispersion:
+            dispersions[:, ~kept] = added_dispersions
+        else:
+            dispersions[:, ~kept] = dispersions[:, kept].mean(axis=1, keepdims=True)
+
+    former_presence = np.unpackbits(
+        partition_model["presence"][rows[partitioned]],
+        axis=1,
+        count=len(partition_model["genomes"]),
+    ).astype(bool)
+    classes = classification[partitioned].argmax(axis=1)
+    in_doubt = partition_model["partitions"][rows[partitioned]] == b"S_"
+    updated = np.ones(len(rows), dtype=bool)
+    updated[partitioned] = (
+        (presence[partitioned][:, kept] != former_presence[:, columns[kept]]).any(
+            axis=1
+        )
+        | (presence[partitioned][:, ~kept] != centers[classes][:, ~kept]).any(axis=1)
+        | (
+            former_presence[:, lost] != partition_model["centers"][classes][:, lost]
+        ).any(axis=1)
+        | (in_doubt & (not kept.all() or lost.any()))
+    )
+    return {
+        "parameters": [(partition_model["proportions"], centers, dispersions)],
+        "initial_classification": [classification],
+        "updated": updated,
+    }
+
+
+def partition_all_genomes(
+    organisms: Sequence[int],
+    kval: int,
+    tmpdir: Path,
+    beta: float = 2.5,
+    sm_degree: int = 10,
+    free_dispersion: bool = False,
+    seed: int = 42,
+    keep_tmp_files: bool = False,
+    engine: str = "nem",
+    partition_model: Dict[str, Union[np.ndarray, int, None]] = None,
+) -> Tuple[
+    Union[Tuple[dict, None, None], Tuple[dict, dict, float]],
+    Dict[str, Union[np.ndarray, int, None]],
+    Union[int, None],
+]:
+    """
+    Partition all the genomes at once, eventually starting from a former partitioning.
+    With NEM, a warm start only starts from the parameters of the former partitioning, as all the gene families
+    are re-evaluated by NEM.
+
+    :param organisms: Indexes of the genomes in the shared arrays
+    :param kval: Number of partitions to use
+    :param tmpdir: temporary directory path
+    :param beta: strength of the smoothing using the graph topology during partitioning. 0 deactivate spatial smoothing
+    :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
+    :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
+    :param seed: seed used to generate random numbers
+    :param keep_tmp_files: True if you want to keep the temporary NEM files
+    :param engine: Partitioning engine, 'nem' or 'numpy'
+    :param partition_model: Partition model of the former partitioning to start from. Default is to start from the
+                            default parameters.
+
+    :return: Result of the partitioning in the same format as the one of run_partitioning, its partition model
+             (empty if it did not work), and number of gene families re-evaluated if the partitioning started from
+             the former one
+    """
+    nem_input, edges_weight = get_nem_input(organisms, sm_degree)
+    beta = beta * (len(nem_input["families"]) / edges_weight)
+    warm_start = None
+    if partition_model:
+        warm_start = get_warm_start(
+            partition_model, nem_input, organisms, free_dispersion
+        )
+        if warm_start is None:
+            logging.getLogger("PPanGGOLiN").warning(
+                "None of the genomes was in the former partitioning. "
+                "Partitioning starts from the default parameters."
+            )
+
+    if engine == "numpy":
+        family_names = [
+            name.decode() for name in nem_arrays["family_names"][nem_input["families"]]
+        ]
+        (result,) = numpy_nem(
+            nem_input["presence"],
+            get_neighbors_matrix(nem_input, len(organisms)),
+            [kval],
+            beta,
+            free_dispersion,
+            **(warm_start if warm_start is not None else {}),
+        )
+        partitioning_results = get_numpy_result(result, kval, family_names)
+        iterations = result["iterations"]
+        classification = result["classification"]
+        nb_updated = None if warm_start is None else int(warm_start["updated"].sum())
+    else:
+        write_nem_input_files(tmpdir, organisms, sm_degree=sm_degree)
+        init = "param_file"
+        if warm_start is not None:
+            write_init_parameters(tmpdir, kval, *warm_start["parameters"][0])
+            init = "init_from_old"
+        partitioning_results = run_partitioning(
+            tmpdir,
+            len(organisms),
+            beta,
+            free_dispersion,
+            kval=kval,
+            seed=seed,
+            init=init,
+            keep_files=keep_tmp_files,
+        )
+        iterations = get_nem_iterations(tmpdir, kval)
+        classification = get_nem_classification(tmpdir, kval)
+        nb_updated = None if warm_start is None else len(nem_input["families"])
+    if partitioning_results == ({}, None, None):
+        return partitioning_results, {}, nb_updated
+    return (
+        partitioning_results,
+        get_partition_model(
+            partitioning_results[0],
+            partitioning_results[1],
+            organisms,
+            iterations,
+            classification,
+            nem_input["families"],
+        ),
+        nb_updated,
+    )
 
 
 def evaluate_nb_partitions(
-    organisms: set,
+    organisms: Sequence[int],
     output: Path = None,
     sm_degree: int = 10,
     free_dispersion: bool = False,
@@ -413,11 +1066,12 @@ def evaluate_nb_partitions(
     seed: int = 42,
     tmpdir: Path = None,
     disable_bar: bool = False,
+    engine: str = "nem",
 ) -> int:
     """
     Evaluate the optimal number of partition for the pangenome
 
-    :param organisms: Set of organisms from pangenome
+    :param organisms: Indexes of the genomes in the shared arrays of the pangenome
     :param tmpdir: temporary directory path
     :param output: output directory path to draw ICL
     :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
@@ -429,6 +1083,7 @@ def evaluate_nb_partitions(
     :param cpu: Number of available core
     :param seed: seed used to generate random numbers
     :param disable_bar: Disable progress bar
+    :param engine: Partitioning engine, 'nem' or 'numpy'
 
     :return: Ideal number of partition computed
     """
@@ -436,46 +1091,60 @@ def evaluate_nb_partitions(
     newtmpdir = tmpdir / "eval_partitions"
 
     if len(organisms) > chunk_size:
-        select_organisms = set(random.sample(list(organisms), chunk_size))
+        select_organisms = random.sample(list(organisms), chunk_size)
     else:
-        select_organisms = set(organisms)
+        select_organisms = list(organisms)
 
-    _, nb_fam = write_nem_input_files(newtmpdir, select_organisms, sm_degree)
     max_icl_k = 0
-    args_partitionning = []
-    for k in range(krange[0] - 1, krange[1] + 1):
-        args_partitionning.append(
-            (
-                newtmpdir,
-                len(select_organisms),
-                0,
-                free_dispersion,
-                k,
-                seed,
-                "param_file",
-                True,
-                10,
-                True,
-            )
-        )  # follow order run_partitionning args
-    all_log_likelihood = []
-
-    if cpu > 1:
-        bar = tqdm(
-            range(len(args_partitionning)),
-            unit="Number of partitions",
-            disable=disable_bar,
+    if engine == "numpy":
+        # all the K values are evaluated at once
+        nem_input, _ = get_nem_input(select_organisms, sm_degree)
+        nb_fam = len(nem_input["families"])
+        all_log_likelihood = run_numpy_partitioning(
+            nem_input,
+            len(select_organisms),
+            0,
+            free_dispersion,
+            kvals=range(krange[0] - 1, krange[1] + 1),
+            itermax=10,
+            just_log_likelihood=True,
         )
-        with get_context("fork").Pool(processes=cpu) as p:
-            for result in p.imap_unordered(nem_single, args_partitionning):
-                all_log_likelihood.append(result)
-                bar.update()
-            p.close()
-            p.join()
-        bar.close()
-    else:  # for the case where it is called in a daemonic subprocess with a single cpu
-        for arguments in args_partitionning:
-            all_log_likelihood.append(nem_single(arguments))
+    else:
+        _, nb_fam = write_nem_input_files(newtmpdir, select_organisms, sm_degree)
+        args_partitionning = []
+        for k in range(krange[0] - 1, krange[1] + 1):
+            args_partitionning.append(
+                (
+                    newtmpdir,
+                    len(select_organisms),
+                    0,
+                    free_dispersion,
+                    k,
+                    seed,
+                    "param_file",
+                    True,
+                    10,
+                    True,
+                )
+            )  # follow order run_partitionning args
+        all_log_likelihood = []
+
+        if cpu > 1:
+            bar = tqdm(
+                range(len(args_partitionning)),
+                unit="Number of partitions",
+                disable=disable_bar,
+            )
+            with get_context("fork").Pool(processes=cpu) as p:
+                for result in p.imap_unordered(nem_single, args_partitionning):
+                    all_log_likelihood.append(result)
+                    bar.update()
+                p.close()
+                p.join()
+            bar.close()
+        else:  # for the case where it is called in a daemonic subprocess with a single cpu
+            for arguments in args_partitionning:
+                all_log_likelihood.append(nem_single(arguments))
 
     all_bics = defaultdict(float)
     all_icls = defaultdict(float)
@@ -631,6 +1300,8 @@ def partition(
     keep_tmp_files: bool = False,
     force: bool = False,
     disable_bar: bool = False,
+    engine: str = "nem",
+    warm_start: bool = False,
 ):
     """
     Partitioning the pangenome
@@ -651,13 +1322,13 @@ def partition(
     :param keep_tmp_files: True if you want to keep the temporary NEM files
     :param force: Allow to force write on Pangenome file
     :param disable_bar: Disable progress bar
+    :param engine: Partitioning engine, 'nem' to use NEM or 'numpy' to use its NumPy implementation
+    :param warm_start: Start from the partition model saved by the former partitioning of the pangenome
     """
     tmpdir = Path(tempfile.gettempdir()) if tmpdir is None else tmpdir
     kmm = [3, 20] if krange is None else krange
     global samples
-    global pan
 
-    pan = pangenome
     if draw_icl and output is None:
         raise Exception(
             "Combination of option impossible: "
@@ -669,9 +1340,13 @@ def partition(
         need_annotations=True,
         need_families=True,
         need_graph=True,
+        cpu=cpu,
+        compact_graph=True,
         disable_bar=disable_bar,
     )
-    organisms = set(pangenome.organisms)
+    share_nem_arrays(pangenome)
+    # genomes are given to the NEM input files writers by their index in the shared arrays
+    organisms = list(range(pangenome.number_of_organisms))
 
     if keep_tmp_files:
         # Create a temporary directory without auto-cleanup
@@ -694,12 +1369,44 @@ def partition(
     pangenome.parameters["partition"]["free_dispersion"] = free_dispersion
     pangenome.parameters["partition"]["ICL_margin"] = icl_margin
     pangenome.parameters["partition"]["seed"] = seed
+    pangenome.parameters["partition"]["engine"] = engine
+    pangenome.parameters["partition"]["warm_start"] = warm_start
     if len(organisms) > chunk_size:
         pangenome.parameters["partition"]["chunk_size"] = chunk_size
     pangenome.parameters["partition"]["# computed nb of partitions"] = False
 
     # the K value initially given by the user
     pangenome.parameters["partition"]["nb_of_partitions"] = kval
+    partition_model = {}
+    if warm_start:
+        with tables.open_file(pangenome.file, "r") as h5f:
+            partition_model = read_partition_model(h5f)
+        if len(partition_model) == 0:
+            logging.getLogger("PPanGGOLiN").warning(
+                "The pangenome file has no partition model to start from. "
+                "Partitioning starts from the default parameters."
+            )
+        elif len(organisms) > chunk_size:
+            logging.getLogger("PPanGGOLiN").warning(
+                "Partitioning by chunks of genomes cannot start from a former partitioning. "
+                "Partitioning starts from the default parameters."
+            )
+            partition_model = {}
+        elif kval >= 2 and kval != len(partition_model["proportions"]):
+            logging.getLogger("PPanGGOLiN").warning(
+                f"The former partitioning used {len(partition_model['proportions'])} partitions instead of {kval}. "
+                "Partitioning starts from the default parameters."
+            )
+            partition_model = {}
+        else:
+            # the number of partitions of the former partitioning is kept
+            kval = len(partition_model["proportions"])
+            if engine == "nem":
+                logging.getLogger("PPanGGOLiN").warning(
+                    "With NEM, partitioning only starts from the parameters of the former partitioning: "
+                    "all the gene families are re-evaluated and their former partitions are not reused. "
+                    "Use '--engine numpy' to only re-evaluate the gene families whose presence/absence changed."
+                )
     if kval < 2:
         pangenome.parameters["partition"]["# computed nb of partitions"] = True
         logging.getLogger("PPanGGOLiN").info(
@@ -718,6 +1425,7 @@ def partition(
             seed,
             tmp_path,
             disable_bar,
+            engine,
         )
         logging.getLogger("PPanGGOLiN").info(
             f"The number of partitions has been evaluated at {kval}"
@@ -776,7 +1484,7 @@ def partition(
                 shuffled_orgs = list(organisms)  # copy select_organisms
                 random.shuffle(shuffled_orgs)  # shuffle the copied list
                 while len(shuffled_orgs) > chunk_size:
-                    samples.append(set(shuffled_orgs[:chunk_size]))
+                    samples.append(shuffled_orgs[:chunk_size])
                     for org in samples[-1]:
                         org_nb_sample[org] += 1
                     shuffled_orgs = shuffled_orgs[chunk_size:]
@@ -794,28 +1502,38 @@ def partition(
                         init,
                         tmp_path,
                         keep_tmp_files,
+                        engine,
                     )
                 )
 
             logging.getLogger("PPanGGOLiN").info("Launching NEM")
-            with get_context("fork").Pool(processes=cpu) as p:
-                # launch partitioning
-                bar = tqdm(
-                    range(len(args)), unit=" samples partitioned", disable=disable_bar
-                )
-                for result in p.imap_unordered(nem_samples, args):
-                    validate_family(result)
-                    bar.update()
-
-                bar.close()
-                condition += (
-                    1  # if len(validated) < pan_size, we will want to resample more.
-                )
-                logging.getLogger("PPanGGOLiN").debug(
-                    f"There are {len(validated)} validated families out of {pansize} families."
-                )
-                p.close()
-                p.join()
+            # workers read the shared arrays, and the inherited objects are left out of their garbage collection
+            gc.freeze()
+            try:
+                with get_context("fork").Pool(
+                    processes=cpu,
+                    initializer=attach_nem_arrays,
+                    initargs=(nem_arrays.descriptor,),
+                ) as p:
+                    # launch partitioning
+                    bar = tqdm(
+                        range(len(args)),
+                        unit=" samples partitioned",
+                        disable=disable_bar,
+                    )
+                    for result in p.imap_unordered(nem_samples, args):
+                        validate_family(result)
+                        bar.update()
+
+                    bar.close()
+                    condition += 1  # if len(validated) < pan_size, we will want to resample more.
+                    logging.getLogger("PPanGGOLiN").debug(
+                        f"There are {len(validated)} validated families out of {pansize} families."
+                    )
+                    p.close()
+                    p.join()
+            finally:
+                gc.unfreeze()
         for fam, data in cpt_partition.items():
             partitioning_results[fam] = max(data, key=data.get)
 
@@ -827,29 +1545,34 @@ def partition(
             f"{len(organisms)} genomes in {round(time.time() - start_partitioning, 2)} seconds."
         )
     else:
-        edges_weight, nb_fam = write_nem_input_files(
-            tmp_path / f"{str(cpt)}", organisms, sm_degree=sm_degree
-        )
-        partitioning_results = run_partitioning(
+        partitioning_results, partition_model, nb_updated = partition_all_genomes(
+            organisms,
+            kval,
             tmp_path / f"{str(cpt)}",
-            len(organisms),
-            beta * (nb_fam / edges_weight),
+            beta,
+            sm_degree,
             free_dispersion,
-            kval=kval,
-            seed=seed,
-            init=init,
-            keep_files=keep_tmp_files,
+            seed,
+            keep_tmp_files,
+            engine,
+            partition_model,
         )
-        if partitioning_results == [{}, None, None]:
+        if partitioning_results == ({}, None, None):
             raise Exception(
                 "Statistical partitioning does not work on your data. "
                 "This usually happens because you used very few (<15) genomes."
             )
+        pangenome.partition_model = partition_model
         cpt += 1
         logging.getLogger("PPanGGOLiN").info(
             f"Partitioned {len(organisms)} genomes in "
             f"{round(time.time() - start_partitioning, 2)} seconds."
         )
+        if nb_updated is not None:
+            logging.getLogger("PPanGGOLiN").info(
+                f"Starting from the former partitioning, {nb_updated} of {pansize} gene families were re-evaluated "
+                f"and partitioning took {partition_model['iterations']} iterations."
+            )
 
     # pangenome.savePartitionParameters(K, beta, free_dispersion, sm_degree, partitioning_results[1], chunk_size)
 
@@ -857,6 +1580,7 @@ def partition(
         pangenome.get_gene_family(fam_name).partition = part
 
     pangenome.status["partitioned"] = "Computed"
+    nem_arrays.unlink()
     if not keep_tmp_files:
         tmp_dir.cleanup()
     else:
@@ -890,6 +1614,8 @@ def launch(args: argparse.Namespace):
         args.keep_tmp_files,
         args.force,
         disable_bar=args.disable_prog_bar,
+        engine=args.engine,
+        warm_start=args.warm_start,
     )
     logging.getLogger("PPanGGOLiN").debug("Write partition in pangenome")
     write_pangenome(pan, pan.file, args.force, disable_bar=args.disable_prog_bar)
@@ -1018,6 +1744,23 @@ def parser_partition(parser: argparse.ArgumentParser):
         action="store_true",
         help="Use if you want to keep the temporary NEM files",
     )
+    optional.add_argument(
+        "--engine",
+        required=False,
+        default="nem",
+        choices=["nem", "numpy"],
+        help="Partitioning engine. 'nem' runs NEM on files, 'numpy' runs the same algorithm in memory with "
+        "vectorized NumPy operations, in float32 and evaluating all the K values at once.",
+    )
+    optional.add_argument(
+        "--warm_start",
+        required=False,
+        default=False,
+        action="store_true",
+        help="Start from the parameters and the gene family partitions of the former partitioning of the pangenome, "
+        "with its number of partitions, for instance after adding genomes to it. "
+        "With the 'numpy' engine, only the gene families whose presence/absence changed are re-evaluated.",
+    )
     optional.add_argument(
         "-se",
         "--seed",
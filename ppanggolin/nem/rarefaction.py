@@ -2,6 +2,7 @@
 
 # default libraries
 import argparse
+import gc
 import logging
 from collections import Counter
 import random
@@ -15,7 +16,6 @@ from typing import Union, Tuple, Dict
 
 # installed libraries
 from tqdm import tqdm
-import gmpy2
 import numpy
 from pandas import Series, read_csv
 import plotly.offline as out_plotly
@@ -28,7 +28,7 @@ from ppanggolin.utils import mk_outdir
 from ppanggolin.formats import check_pangenome_info
 import ppanggolin.nem.partition as ppp
 
-# import this way to use the global variable pangenome defined in ppanggolin.nem.partition
+# import this way to use the global shared arrays of the pangenome defined in ppanggolin.nem.partition
 
 samples = []
 
@@ -76,7 +76,7 @@ def raref_nem(
 
     if len(samp) <= chunk_size:  # all good, just write stuff.
         edges_weight, nb_fam = ppp.write_nem_input_files(
-            tmpdir=currtmpdir, organisms=set(samp), sm_degree=sm_degree
+            tmpdir=currtmpdir, organisms=samp, sm_degree=sm_degree
         )
         cpt_partition = ppp.run_partitioning(
             currtmpdir,
@@ -117,12 +117,13 @@ def raref_nem(
                             cpt_partition[node]["U"] = len(samp)
                         validated.add(node)
 
-        for fam in ppp.pan.gene_families:
-            if not samp.isdisjoint(
-                set(fam.organisms)
-            ):  # otherwise, useless to keep track of
-                families.add(fam)
-                cpt_partition[fam.name] = {"P": 0, "S": 0, "C": 0, "U": 0}
+        # families absent from the sample are useless to keep track of
+        sample_families = numpy.flatnonzero(
+            ppp.get_sample_presence(numpy.asarray(samp)).any(axis=1)
+        )
+        for name in ppp.nem_arrays["family_names"][sample_families]:
+            families.add(name.decode())
+            cpt_partition[name.decode()] = {"P": 0, "S": 0, "C": 0, "U": 0}
 
         org_nb_sample = Counter()
         for org in samp:
@@ -137,7 +138,7 @@ def raref_nem(
                 shuffled_orgs = list(samp)  # copy select_organisms
                 random.shuffle(shuffled_orgs)  # shuffle the copied list
                 while len(shuffled_orgs) > chunk_size:
-                    org_samples.append(set(shuffled_orgs[:chunk_size]))
+                    org_samples.append(shuffled_orgs[:chunk_size])
                     for org in org_samples[-1]:
                         org_nb_sample[org] += 1
                     shuffled_orgs = shuffled_orgs[chunk_size:]
@@ -576,16 +577,15 @@ def make_rarefaction_curve(
     tmpdir = Path(tempfile.gettempdir()) if tmpdir is None else tmpdir
     if krange is None:
         krange = [3, -1]
-    ppp.pan = pangenome  # use the global from partition to store the pangenome, so that it is usable
 
     try:
         krange[0] = (
-            ppp.pan.parameters["partition"]["# final nb of partitions"]
+            pangenome.parameters["partition"]["# final nb of partitions"]
             if krange[0] < 0
             else krange[0]
         )
         krange[1] = (
-            ppp.pan.parameters["partition"]["# final nb of partitions"]
+            pangenome.parameters["partition"]["# final nb of partitions"]
             if krange[1] < 0
             else krange[1]
         )
@@ -596,9 +596,12 @@ def make_rarefaction_curve(
         need_annotations=True,
         need_families=True,
         need_graph=True,
+        cpu=cpu,
+        compact_graph=True,
         disable_bar=disable_bar,
     )
 
+    ppp.share_nem_arrays(pangenome)
     tmpdir_obj = tempfile.TemporaryDirectory(dir=tmpdir)
     tmp_path = Path(tmpdir_obj.name)
 
@@ -609,7 +612,7 @@ def make_rarefaction_curve(
 
     if kval < 3 and kestimate is False:  # estimate K once and for all.
         try:
-            kval = ppp.pan.parameters["partition"]["# final nb of partitions"]
+            kval = pangenome.parameters["partition"]["# final nb of partitions"]
             logging.getLogger("PPanGGOLiN").info(
                 f"Reuse the number of partitions {kval}"
             )
@@ -618,7 +621,7 @@ def make_rarefaction_curve(
                 "Estimating the number of partitions..."
             )
             kval = ppp.evaluate_nb_partitions(
-                organisms=set(pangenome.organisms),
+                organisms=range(pangenome.number_of_organisms),
                 sm_degree=sm_degree,
                 free_dispersion=free_dispersion,
                 chunk_size=chunk_size,
@@ -632,53 +635,40 @@ def make_rarefaction_curve(
             )
 
     logging.getLogger("PPanGGOLiN").info("Extracting samples ...")
+    # samples are made of the indexes of the genomes in the shared arrays
     all_samples = []
     for i in range(min_sampling, max_sampling):  # each point
         for _ in range(depth):  # number of samples per points
-            all_samples.append(set(random.sample(list(pangenome.organisms), i + 1)))
+            all_samples.append(
+                random.sample(range(pangenome.number_of_organisms), i + 1)
+            )
     logging.getLogger("PPanGGOLiN").info(
         f"Done sampling genomes in the pan, there are {len(all_samples)} samples"
     )
     samp_nb_per_part = []
 
-    logging.getLogger("PPanGGOLiN").info("Computing bitarrays for each family...")
-    index_org = pangenome.compute_family_bitarrays()
+    presence_matrix = pangenome.presence_matrix
     logging.getLogger("PPanGGOLiN").info(
-        "Done computing bitarrays. Comparing them to get exact and soft core stats "
+        "Comparing the presence/absence matrix to the samples to get exact and soft core stats "
         f"for {len(all_samples)} samples..."
     )
-    bar = tqdm(
-        range(len(all_samples) * pangenome.number_of_gene_families),
-        unit="gene family",
-        disable=disable_bar,
-    )
-    for samp in all_samples:
-        # make the sample's organism bitarray.
-        samp_bitarray = gmpy2.xmpz()  # pylint: disable=no-member
-        for org in samp:
-            samp_bitarray[index_org[org]] = 1
+    bar = tqdm(all_samples, unit="sample", disable=disable_bar)
+    for samp in bar:
+        # number of genomes of the sample in which each family is present
+        nb_common_org = presence_matrix.family_counts(
+            organisms=[presence_matrix.organisms[index] for index in samp]
+        )
+        present = nb_common_org != 0  # otherwise the node 'does not exist'
+        soft = nb_common_org >= len(samp) * soft_core
 
         part = Counter()
-        part["soft_core"] = 0
-        part["exact_core"] = 0
-        part["exact_accessory"] = 0
-        part["soft_accessory"] = 0
-        for fam in pangenome.gene_families:
-            nb_common_org = gmpy2.popcount(
-                fam.bitarray & samp_bitarray
-            )  # pylint: disable=no-member
-            part["nborgs"] = len(samp)
-            if nb_common_org != 0:  # in that case the node 'does not exist'
-                if nb_common_org == len(samp):
-                    part["exact_core"] += 1
-                else:
-                    part["exact_accessory"] += 1
-
-                if float(nb_common_org) >= len(samp) * soft_core:
-                    part["soft_core"] += 1
-                else:
-                    part["soft_accessory"] += 1
-            bar.update()
+        part["nborgs"] = len(samp)
+        part["exact_core"] = int(numpy.count_nonzero(nb_common_org == len(samp)))
+        part["exact_accessory"] = int(
+            numpy.count_nonzero(present & (nb_common_org != len(samp)))
+        )
+        part["soft_core"] = int(numpy.count_nonzero(present & soft))
+        part["soft_accessory"] = int(numpy.count_nonzero(present & ~soft))
         samp_nb_per_part.append(part)
     bar.close()
     # done with frequency of each family for each sample.
@@ -702,17 +692,32 @@ def make_rarefaction_curve(
             )
         )
 
-    with get_context("fork").Pool(processes=cpu) as p:
-        # launch partitioning
-        logging.getLogger("PPanGGOLiN").info(" Partitioning all samples...")
-        bar = tqdm(range(len(args)), unit="samples partitioned", disable=disable_bar)
-        random.shuffle(
-            args
-        )  # shuffling the processing so that the progress bar is closer to reality.
-        for result in p.imap_unordered(launch_raref_nem, args):
-            samp_nb_per_part[result[1]] = {**result[0], **samp_nb_per_part[result[1]]}
-            bar.update()
-    bar.close()
+    # workers read the shared arrays, and the inherited objects are left out of their garbage collection
+    gc.freeze()
+    try:
+        with get_context("fork").Pool(
+            processes=cpu,
+            initializer=ppp.attach_nem_arrays,
+            initargs=(ppp.nem_arrays.descriptor,),
+        ) as p:
+            # launch partitioning
+            logging.getLogger("PPanGGOLiN").info(" Partitioning all samples...")
+            bar = tqdm(
+                range(len(args)), unit="samples partitioned", disable=disable_bar
+            )
+            random.shuffle(
+                args
+            )  # shuffling the processing so that the progress bar is closer to reality.
+            for result in p.imap_unordered(launch_raref_nem, args):
+                samp_nb_per_part[result[1]] = {
+                    **result[0],
+                    **samp_nb_per_part[result[1]],
+                }
+                bar.update()
+        bar.close()
+    finally:
+        gc.unfreeze()
+        ppp.nem_arrays.unlink()
 
     logging.getLogger("PPanGGOLiN").info("Done  partitioning everything")
     warnings.filterwarnings("ignore")
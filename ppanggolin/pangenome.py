@@ -3,17 +3,31 @@
 # default libraries
 import logging
 import re
-from typing import List, Union, Dict, Set, Generator
+from typing import List, Union, Dict, Set, Generator, Tuple, Sequence
 from pathlib import Path
 
+import numpy as np
 import tables
+from scipy.sparse import csr_matrix
+from tqdm import tqdm
 
 # local libraries
 from ppanggolin.genome import Organism, Contig, Gene
 from ppanggolin.region import Region, Spot, Module
 from ppanggolin.geneFamily import GeneFamily
-from ppanggolin.edge import Edge
+from ppanggolin.edge import (
+    Edge,
+    OrganismIndex,
+    get_contig_gene_pairs,
+    group_gene_pairs_by_families,
+)
+from ppanggolin.geneIndex import GeneIndex
+from ppanggolin.presenceMatrix import PresenceMatrix
 from ppanggolin.metadata import Metadata
+from ppanggolin.utils import paused_garbage_collection
+
+# weights of the edges in the sparse matrix of the neighbors graph
+SPARSE_GRAPH_WEIGHTS = ("genomes", "gene_pairs", "binary")
 
 
 class Pangenome:
@@ -38,6 +52,9 @@ class Pangenome:
         self._region_getter = {}
         self._spot_getter = {}
         self._module_getter = {}
+        self._gene_index = None
+        self._presence_matrix = None
+        self._edge_organism_index = None
         self.status = {
             "genomesAnnotated": "No",
             "geneSequences": "No",
@@ -69,6 +86,9 @@ class Pangenome:
             },
         }
         self.parameters = {}
+        # parameters and family partitions of the last partitioning of all the genomes at once, with the genomes and
+        # the presence/absence matrix it was computed on, to start the next partitioning from
+        self.partition_model = {}
 
     def add_file(self, pangenome_file: Path, check_version: bool = True):
         """
@@ -174,6 +194,30 @@ class Pangenome:
         else:
             return nb_genes
 
+    @property
+    def gene_index(self) -> GeneIndex:
+        """Get the columnar index of the gene fields by integer gene id, derived from the genes of the pangenome.
+
+        As for the gene getter, the index is built on first call with the assumption that the genes and their families
+        will not change. It is reset when a genome or a gene family is added to the pangenome.
+
+        :return: Gene index of the pangenome genes
+        """
+        if self._gene_index is None:
+            self._gene_index = GeneIndex(self.genes, self.gene_families, self.organisms)
+        return self._gene_index
+
+    def reset_indexes(self):
+        """Resets the integer indexes built from the genes, gene families and genomes of the pangenome.
+
+        They are reset when a genome or a gene family is added to the pangenome, and must be reset after genes
+        are added to gene families or renamed so that they are built again on next use.
+        """
+        self._gene_index = None
+        self._presence_matrix = None
+        self._org_index = None
+        self._fam_index = None
+
     """RNAs methods"""
 
     @property
@@ -258,6 +302,7 @@ class Pangenome:
         except KeyError:
             # Family does not exist, so add it
             self._fam_getter[family.name] = family
+            self.reset_indexes()
             self.max_fam_id += 1
         except Exception as error:
             raise Exception(
@@ -303,12 +348,103 @@ class Pangenome:
         key = frozenset([family_1, family_2])
         edge = self._edge_getter.get(key)
         if edge is None:
-            edge = Edge(gene1, gene2)
+            edge = Edge(gene1, gene2, self._edge_organism_index)
             self._edge_getter[key] = edge
         else:
             edge.add_genes(gene1, gene2)
         return edge
 
+    def add_gene_pairs(
+        self,
+        genes: Sequence[Gene],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        gene_families: np.ndarray,
+        gene_organisms: np.ndarray,
+        disable_bar: bool = False,
+    ):
+        """
+        Adds the edges of many gene pairs at once. Pairs are grouped by the gene families they link, so that each edge
+        is created once and then given all its gene pairs, instead of being looked up for each pair.
+        Genes are not checked, so the pairs must be known to be made of genes from the same genome.
+
+        :param genes: Genes indexed by the gene pairs
+        :param sources: Index of the source gene of each pair
+        :param targets: Index of the target gene of each pair
+        :param gene_families: Integer index of the gene family of each gene
+        :param gene_organisms: Index of the genome of each gene, in the genomes of the pangenome
+        :param disable_bar: Disable the progress bar
+        """
+        groups = group_gene_pairs_by_families(sources, targets, gene_families)
+        organisms = list(self.organisms)
+        compact = self._edge_organism_index is not None
+        if compact and len(groups) > 0:
+            # number of gene pairs of each genome in each edge, the first pair being added with the edge
+            number_of_organisms = max(len(organisms), 1)
+            group_ids = np.repeat(
+                np.arange(len(groups)), [len(group) - 1 for group in groups]
+            )
+            others = np.concatenate([group[1:] for group in groups])
+            keys, counts = np.unique(
+                group_ids * number_of_organisms + gene_organisms[sources[others]],
+                return_counts=True,
+            )
+            count_offsets = np.searchsorted(
+                keys // number_of_organisms, np.arange(len(groups) + 1)
+            ).tolist()
+            count_organisms = (keys % number_of_organisms).tolist()
+            counts = counts.tolist()
+        sources, targets = sources.tolist(), targets.tolist()
+        with paused_garbage_collection():
+            for index, group in enumerate(
+                tqdm(groups, unit="edge", disable=disable_bar)
+            ):
+                pairs = group.tolist()
+                edge = self.add_edge(genes[sources[pairs[0]]], genes[targets[pairs[0]]])
+                if compact:
+                    for position in range(
+                        count_offsets[index], count_offsets[index + 1]
+                    ):
+                        edge.add_pair_count(
+                            organisms[count_organisms[position]], counts[position]
+                        )
+                else:
+                    edge.add_gene_pairs(
+                        (genes[sources[pair]], genes[targets[pair]])
+                        for pair in pairs[1:]
+                    )
+
+    def use_compact_edges(self):
+        """
+        Makes the edges added to the pangenome compact. They only store the number of gene pairs of each organism,
+        and their gene pairs are found again on the contigs when they are asked for.
+
+        :raises Exception: If edges have already been added to the pangenome
+        """
+        if self.number_of_edges > 0:
+            raise Exception(
+                "Edges can only be made compact before any edge is added to the pangenome."
+            )
+        self._edge_organism_index = OrganismIndex()
+
+    @property
+    def edge_gene_pairs(self) -> Generator[Tuple[Edge, Gene, Gene], None, None]:
+        """Returns the gene pairs of all the edges of the pangenome graph.
+
+        Gene pairs of compact edges are found again in a single pass over the contigs instead of one pass per edge.
+
+        :return: Generator of the edges with each of their gene pairs
+        """
+        if self._edge_organism_index is None:
+            for edge in self.edges:
+                for gene1, gene2 in edge.gene_pairs:
+                    yield edge, gene1, gene2
+        else:
+            for contig in self.contigs:
+                for gene1, gene2 in get_contig_gene_pairs(contig):
+                    edge = self._edge_getter[frozenset([gene1.family, gene2.family])]
+                    yield edge, gene1, gene2
+
     @property
     def number_of_edges(self) -> int:
         """Returns the number of edge present in the pangenome
@@ -317,6 +453,53 @@ class Pangenome:
         """
         return len(self._edge_getter)
 
+    def to_sparse_graph(self, weight: str = "genomes") -> csr_matrix:
+        """Get the neighbors graph as the adjacency matrix of the gene families.
+
+        Rows and columns follow the order of the gene families of the pangenome, as given by get_fam_index.
+        The matrix is symmetric, and an edge linking a gene family to itself is on the diagonal.
+
+        :param weight: Weight of the edges, 'genomes' for their number of genomes, 'gene_pairs' for their number of
+                       gene pairs or 'binary' for 1
+
+        :return: Sparse matrix in Compressed Sparse Row format with the weight of the edge linking two gene families
+
+        :raises ValueError: If the weight is unknown
+        """
+        if weight not in SPARSE_GRAPH_WEIGHTS:
+            raise ValueError(
+                f"Unknown edge weight '{weight}'. "
+                f"Choose among {', '.join(SPARSE_GRAPH_WEIGHTS)}."
+            )
+        fam_index = self.get_fam_index()
+        if weight == "genomes":
+            edge_weights = (edge.number_of_organisms for edge in self.edges)
+        elif weight == "gene_pairs":
+            edge_weights = (edge.number_of_gene_pairs for edge in self.edges)
+        else:
+            edge_weights = (1 for _ in self.edges)
+        edges = np.fromiter(
+            (
+                (fam_index[edge.source], fam_index[edge.target], edge_weight)
+                for edge, edge_weight in zip(self.edges, edge_weights)
+            ),
+            dtype=[("source", np.int64), ("target", np.int64), ("weight", np.int64)],
+            count=self.number_of_edges,
+        )
+        # each edge is set in both directions, except the ones linking a gene family to itself
+        other_side = edges["source"] != edges["target"]
+        size = len(fam_index)
+        return csr_matrix(
+            (
+                np.concatenate([edges["weight"], edges["weight"][other_side]]),
+                (
+                    np.concatenate([edges["source"], edges["target"][other_side]]),
+                    np.concatenate([edges["target"], edges["source"][other_side]]),
+                ),
+            ),
+            shape=(size, size),
+        )
+
     """Organism methods"""
 
     @property
@@ -471,6 +654,7 @@ class Pangenome:
             self.get_organism(organism.name)
         except KeyError:
             self._org_getter[organism.name] = organism
+            self.reset_indexes()
         else:
             raise KeyError(
                 f"Redondant genome name was found ({organism.name})."
@@ -509,6 +693,20 @@ class Pangenome:
         # case where there is an index but the bitarrays have not been computed???
         return self._org_index
 
+    @property
+    def presence_matrix(self) -> PresenceMatrix:
+        """Get the bit-packed presence/absence matrix of the gene families in the genomes.
+
+        The matrix is built on first call with the assumption that the genes of the gene families will not change,
+        and is reset when a genome or a gene family is added to the pangenome.
+        Its partition masks are computed with the partitions the gene families have when they are first asked for.
+
+        :return: Presence/absence matrix with the gene families in rows and the genomes in columns
+        """
+        if self._presence_matrix is None:
+            self._presence_matrix = PresenceMatrix(self.gene_families, self.organisms)
+        return self._presence_matrix
+
     def get_fam_index(
         self,
     ) -> Dict[GeneFamily, int]:  # will not make a new index if it exists already
@@ -809,13 +1007,11 @@ class Pangenome:
         :return: A set containing gene families identified as part of the soft core.
         """
         minimum_organism_threshold = self.number_of_organisms * soft_core_threshold
-        soft_core_families = set()
-
-        for fam in self.gene_families:
-            if fam.number_of_organisms >= minimum_organism_threshold:
-                soft_core_families.add(fam)
-
-        return soft_core_families
+        presence_matrix = self.presence_matrix
+        rows = np.flatnonzero(
+            presence_matrix.family_counts() >= minimum_organism_threshold
+        )
+        return {presence_matrix.families[row] for row in rows.tolist()}
 
     def exact_core_families(self) -> Set[GeneFamily]:
         """
@@ -823,13 +1019,11 @@ class Pangenome:
 
         :return: A set containing gene families identified as the exact core.
         """
-        exact_core_families = set()
-
-        for fam in self.gene_families:
-            if fam.number_of_organisms == self.number_of_organisms:
-                exact_core_families.add(fam)
-
-        return exact_core_families
+        presence_matrix = self.presence_matrix
+        rows = np.flatnonzero(
+            presence_matrix.family_counts() == self.number_of_organisms
+        )
+        return {presence_matrix.families[row] for row in rows.tolist()}
 
     """Metadata"""
 
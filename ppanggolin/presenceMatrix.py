@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+# default libraries
+from __future__ import annotations
+from typing import Dict, Iterable, List
+
+# installed libraries
+import numpy as np
+from scipy.sparse import csc_matrix
+
+# local libraries
+from ppanggolin.genome import Organism
+from ppanggolin.geneFamily import GeneFamily
+
+# first letter of the partitions of the gene families in each partition subset
+PARTITION_SUBSETS = {
+    "all": None,
+    "persistent": ("P",),
+    "shell": ("S",),
+    "cloud": ("C",),
+    "accessory": ("S", "C"),
+}
+
+# number of bits set in each byte value
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class PresenceMatrix:
+    """
+    Bit-packed presence/absence matrix of the gene families (rows) in the genomes (columns).
+
+    Each row stores the presence of a gene family in the genomes as bits packed in bytes, in the same layout as the
+    presence/absence matrix of the pangenome file. Row and column counts, pairwise intersections and genome samples
+    are computed on the whole matrix at once instead of by gene family or by genome.
+
+    Methods:
+        - partition_mask: returns a boolean mask of the gene families in a partition subset.
+        - organisms_mask: returns the packed bit mask of a genome sample.
+        - family_counts: returns the number of genomes of each gene family.
+        - organism_counts: returns the number of gene families of each genome.
+        - family_intersections: returns the number of genomes shared by each pair of gene families.
+        - organism_intersections: returns the number of gene families shared by each pair of genomes.
+        - subset: returns the matrix restricted to some gene families and genomes.
+        - to_dense: returns the boolean matrix.
+        - to_sparse: returns the matrix in Compressed Sparse Column format.
+
+    Fields:
+        - families: gene families of the rows.
+        - organisms: genomes of the columns.
+        - family_index, organism_index: row of each gene family and column of each genome.
+        - packed: matrix of bytes with the presence bits of the genomes of each gene family.
+    """
+
+    def __init__(
+        self,
+        families: Iterable[GeneFamily],
+        organisms: Iterable[Organism],
+        packed: np.ndarray = None,
+    ):
+        """Constructor method
+
+        :param families: Gene families of the rows
+        :param organisms: Genomes of the columns. Genomes of the gene families that are not given are left out.
+        :param packed: Packed presence bits of the genomes of each gene family. Default is to get them from the
+                       genomes of the gene families.
+        """
+        self.families: List[GeneFamily] = list(families)
+        self.organisms: List[Organism] = list(organisms)
+        self.family_index: Dict[GeneFamily, int] = {
+            family: index for index, family in enumerate(self.families)
+        }
+        self.organism_index: Dict[Organism, int] = {
+            organism: index for index, organism in enumerate(self.organisms)
+        }
+        self._partition_masks = {}
+        if packed is not None:
+            self.packed = packed
+            return
+        rows, columns = [], []
+        for row, family in enumerate(self.families):
+            for organism in family.organisms:
+                column = self.organism_index.get(organism)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        self.packed = np.zeros(
+            (len(self.families), (len(self.organisms) + 7) // 8), dtype=np.uint8
+        )
+        columns = np.array(columns, dtype=np.int64)
+        np.bitwise_or.at(
+            self.packed,
+            (np.array(rows, dtype=np.int64), columns >> 3),
+            (128 >> (columns & 7)).astype(np.uint8),
+        )
+
+    @property
+    def shape(self):
+        """Get the number of gene families and of genomes of the matrix
+
+        :return: Number of rows and number of columns
+        """
+        return len(self.families), len(self.organisms)
+
+    def partition_mask(self, partition: str = "all") -> np.ndarray:
+        """Get the gene families belonging to a partition subset.
+        Masks are computed on first call with the partitions the gene families have at that time.
+
+        :param partition: 'all', 'persistent', 'shell', 'cloud' or 'accessory'
+
+        :return: Boolean mask of the rows of the gene families in the partition subset
+
+        :raises ValueError: If the partition subset is unknown or the gene families have not been partitioned
+        """
+        if partition not in PARTITION_SUBSETS:
+            raise ValueError(
+                f"Unknown partition subset '{partition}'. "
+                f"Choose among {', '.join(PARTITION_SUBSETS)}."
+            )
+        mask = self._partition_masks.get(partition)
+        if mask is None:
+            letters = PARTITION_SUBSETS[partition]
+            if letters is None:
+                mask = np.ones(len(self.families), dtype=bool)
+            else:
+                partitions = np.array(
+                    [family.partition[:1] for family in self.families]
+                )
+                if np.any(partitions == ""):
+                    raise ValueError(
+                        "The gene family has not been associated to a partition."
+                    )
+                mask = np.isin(partitions, letters)
+            self._partition_masks[partition] = mask
+        return mask
+
+    def organisms_mask(self, organisms: Iterable[Organism]) -> np.ndarray:
+        """Get the packed bit mask of a genome sample, to be combined with the rows of the matrix
+
+        :param organisms: Genomes of the sample
+
+        :return: Bytes with the bits of the sample genomes set
+
+        :raises KeyError: If a genome is not in the matrix
+        """
+        columns = np.zeros(len(self.organisms), dtype=bool)
+        columns[[self.organism_index[organism] for organism in organisms]] = True
+        return np.packbits(columns)
+
+    def family_counts(
+        self, partition: str = "all", organisms: Iterable[Organism] = None
+    ) -> np.ndarray:
+        """Get the number of genomes in which each gene family is present
+
+        :param partition: Partition subset of the gene families to count
+        :param organisms: Genome sample to count the gene families in. Default is all genomes.
+
+        :return: Number of genomes of the gene families of the partition subset, in the row order
+        """
+        packed = self.packed[self.partition_mask(partition)]
+        if organisms is not None:
+            packed = packed & self.organisms_mask(organisms)
+        return POPCOUNT[packed].sum(axis=1, dtype=np.int64)
+
+    def organism_counts(self, partition: str = "all") -> np.ndarray:
+        """Get the number of gene families present in each genome
+
+        :param partition: Partition subset of the gene families to count
+
+        :return: Number of gene families of the partition subset in each genome, in the column order
+        """
+        return self.to_dense(partition).sum(axis=0, dtype=np.int64)
+
+    def family_intersections(self, partition: str = "all") -> np.ndarray:
+        """Get the number of genomes shared by each pair of gene families
+
+        :param partition: Partition subset of the gene families to compare
+
+        :return: Square matrix of the number of genomes shared by the gene families of the partition subset
+        """
+        presence = self.to_dense(partition).astype(np.float32)
+        return np.rint(presence @ presence.T).astype(np.int64)
+
+    def organism_intersections(self, partition: str = "all") -> np.ndarray:
+        """Get the number of gene families shared by each pair of genomes
+
+        :param partition: Partition subset of the gene families to compare
+
+        :return: Square matrix of the number of gene families of the partition subset shared by the genomes
+        """
+        presence = self.to_dense(partition).astype(np.float32)
+        return np.rint(presence.T @ presence).astype(np.int64)
+
+    def subset(
+        self,
+        families: Iterable[GeneFamily] = None,
+        organisms: Iterable[Organism] = None,
+    ) -> PresenceMatrix:
+        """Get the matrix restricted to some gene families and genomes
+
+        :param families: Gene families to keep, in the wanted order. Default is all gene families.
+        :param organisms: Genomes to keep, in the wanted order. Default is all genomes.
+
+        :return: Presence/absence matrix of the gene families in the genomes
+
+        :raises KeyError: If a gene family or a genome is not in the matrix
+        """
+        families = self.families if families is None else list(families)
+        organisms = self.organisms if organisms is None else list(organisms)
+        rows = [self.family_index[family] for family in families]
+        columns = [self.organism_index[organism] for organism in organisms]
+        presence = np.unpackbits(
+            self.packed[rows], axis=1, count=len(self.organisms)
+        ).astype(bool)
+        return PresenceMatrix(
+            families, organisms, np.packbits(presence[:, columns], axis=1)
+        )
+
+    def to_dense(self, partition: str = "all") -> np.ndarray:
+        """Get the boolean presence/absence matrix
+
+        :param partition: Partition subset of the gene families to keep
+
+        :return: Boolean matrix with the gene families of the partition subset in rows and the genomes in columns
+        """
+        return np.unpackbits(
+            self.packed[self.partition_mask(partition)],
+            axis=1,
+            count=len(self.organisms),
+        ).astype(bool)
+
+    def to_sparse(self, partition: str = "all") -> csc_matrix:
+        """Get the presence/absence matrix in Compressed Sparse Column format
+
+        :param partition: Partition subset of the gene families to keep
+
+        :return: Sparse matrix with 1.0 where a gene family of the partition subset is present in a genome
+        """
+        return csc_matrix(self.to_dense(partition), dtype="float")
@@ -23,8 +23,9 @@ import yaml
 from ppanggolin.annotate.synta import read_fasta, get_dna_sequence
 from ppanggolin.annotate.annotate import (
     init_contig_counter,
-    read_anno_file,
-    annotate_organism,
+    read_anno_file_payload,
+    annotate_organism_payload,
+    unpack_organism,
     local_identifiers_are_unique,
 )
 from ppanggolin.annotate import subparser as annotate_subparser
@@ -569,11 +570,11 @@ def annotate_fasta_files(
             futures = []
 
             for fn_args in arguments:
-                future = executor.submit(annotate_organism, *fn_args)
+                future = executor.submit(annotate_organism_payload, *fn_args)
                 future.add_done_callback(lambda p: progress.update())
                 futures.append(future)
 
-            organisms.extend(future.result() for future in futures)
+            organisms.extend(unpack_organism(future.result()) for future in futures)
 
     return organisms
 
@@ -625,12 +626,13 @@ def read_annotation_files(
             futures = []
 
             for fn_args in args:
-                future = executor.submit(read_anno_file, *fn_args)
+                future = executor.submit(read_anno_file_payload, *fn_args)
                 future.add_done_callback(lambda p: progress.update())
                 futures.append(future)
 
             for future in futures:
-                org, has_fasta = future.result()
+                payload, has_fasta = future.result()
+                org = unpack_organism(payload)
                 organisms.append(org)
                 org_to_has_fasta_flag[org] = has_fasta
 
@@ -871,6 +873,7 @@ def annotate_input_genes_with_pangenome_families(
             gene_family.add(gene)
 
         pangenome._mk_gene_getter()  # re-build the gene getter
+        pangenome.reset_indexes()
 
         logging.getLogger("PPanGGOLiN").info(
             f"{input_organism.name} has {len(lonely_genes)}/{input_organism.number_of_genes()} "
@@ -1572,6 +1575,7 @@ def launch(args: argparse.Namespace):
         pangenome,
         need_annotations=True,
         need_families=True,
+        cpu=args.cpu,
         disable_bar=args.disable_prog_bar,
         need_rgp=predict_rgp,
         need_modules=project_modules,
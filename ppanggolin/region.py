@@ -477,78 +477,32 @@ class Region(MetaFeatures):
 
         :return: A list of bordering genes in start and stop position
         """
-        genes_in_region = list(self.genes)
-        # Identifying left border
-        left_border = []
-        pos = self.starter.position
-        init = pos
-        single_copy_persistent_count = 0
-        while single_copy_persistent_count < n and (
-            pos != 0 or self.contig.is_circular
-        ):
-            curr_gene = None
-            if pos == 0:
-                if self.contig.is_circular:
-                    curr_gene = self.contig[pos - 1]
-            else:
-                curr_gene = self.contig[pos - 1]
-
-            if (
-                curr_gene is not None
-                and curr_gene.family not in multigenics
-                and curr_gene.family.named_partition == "persistent"
-                and curr_gene not in genes_in_region
-            ):
-                left_border.append(curr_gene)
-                single_copy_persistent_count += 1
-            elif (
-                curr_gene is not None
-                and curr_gene not in genes_in_region
-                and not return_only_persistents
-            ):
-                left_border.append(curr_gene)
-
-            pos -= 1
-            if pos == -1 and self.contig.is_circular:
-                pos = self.contig.number_of_genes
-            if pos == init:
-                break  # looped around the contig
-
-        # Identifying right border
-        right_border = []
-        pos = self.stopper.position
-        init = pos
-        single_copy_persistent_count = 0
-        while single_copy_persistent_count < n and (
-            pos != self.contig.number_of_genes - 1 or self.contig.is_circular
-        ):
-            curr_gene = None
-            if pos == self.contig.number_of_genes - 1:
-                if self.contig.is_circular:
-                    curr_gene = self.contig[0]
-            else:
-                curr_gene = self.contig[pos + 1]
-            if (
-                curr_gene is not None
-                and curr_gene.family not in multigenics
-                and curr_gene.family.named_partition == "persistent"
-                and curr_gene not in genes_in_region
-            ):
-                right_border.append(curr_gene)
-                single_copy_persistent_count += 1
-            elif (
-                curr_gene is not None
-                and curr_gene not in genes_in_region
-                and not return_only_persistents
-            ):
-                right_border.append(curr_gene)
-            pos += 1
-            if pos == self.contig.number_of_genes and self.contig.is_circular:
-                pos = -1
-            if pos == init:
-                break  # looped around the contig
-
-        border = [left_border, right_border]
+        region_positions = {gene.position for gene in self.genes}
+        number_of_genes = self.contig.number_of_genes
+        # genes are walked from the region to each side, around the contig if it is circular
+        walks = [
+            self.contig.get_previous_positions(self.starter.position, number_of_genes),
+            self.contig.get_next_positions(self.stopper.position, number_of_genes),
+        ]
+        border = []
+        for positions in walks:
+            side_border = []
+            single_copy_persistent_count = 0
+            for position in positions.tolist():
+                if single_copy_persistent_count == n:
+                    break
+                curr_gene = self.contig[position]
+                if curr_gene is None or position in region_positions:
+                    continue
+                if (
+                    curr_gene.family not in multigenics
+                    and curr_gene.family.named_partition == "persistent"
+                ):
+                    side_border.append(curr_gene)
+                    single_copy_persistent_count += 1
+                elif not return_only_persistents:
+                    side_border.append(curr_gene)
+            border.append(side_border)
         return border
 
 
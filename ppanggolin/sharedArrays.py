@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# default libraries
+from __future__ import annotations
+import os
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Tuple
+
+# installed libraries
+import numpy as np
+
+# memory alignment in bytes of each array in the shared memory block
+ALIGNMENT = 64
+
+
+def release_shared_memory(shared_memory: SharedMemory, owner_pid: int = None):
+    """Close a shared memory block and free it if the current process created it
+
+    :param shared_memory: Shared memory block
+    :param owner_pid: Identifier of the process that created the block, None if it was attached to
+    """
+    try:
+        shared_memory.close()
+    except BufferError:
+        # arrays are still viewing the block, the mapping is closed with the process
+        pass
+    # forked workers inherit the object of the creator, which must not free the block when they release it
+    if owner_pid == os.getpid():
+        shared_memory.unlink()
+
+
+class SharedArrays:
+    """
+    NumPy arrays stored in a single shared memory block, to be read by worker processes without copying them.
+
+    The process creating the arrays copies them once into the block, and worker processes attach to the block from
+    its descriptor, which is small and picklable. The arrays returned in workers are views over the block, so that
+    workers do not inherit, copy or touch the Python objects the arrays were made from.
+    The arrays are meant to be read only once shared.
+
+    Methods:
+        - attach: returns the arrays of an existing block from its descriptor.
+        - close: detaches the process from the block.
+        - unlink: frees the block.
+
+    Fields:
+        - descriptor: name of the block and layout of the arrays in it, to give to the workers.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray] = None, descriptor: Tuple = None):
+        """Constructor method. Give either the arrays to share, or the descriptor of a block to attach to.
+
+        :param arrays: Arrays to copy in a new shared memory block
+        :param descriptor: Descriptor of an existing shared memory block
+
+        :raises ValueError: If neither or both arrays and descriptor are given
+        """
+        if (arrays is None) == (descriptor is None):
+            raise ValueError("Give either the arrays to share or a block descriptor.")
+        self._owner = arrays is not None
+        if self._owner:
+            layout: List[Tuple[str, str, Tuple[int, ...], int]] = []
+            size = 0
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                layout.append((key, array.dtype.str, array.shape, size))
+                size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+            self._shared_memory = SharedMemory(create=True, size=max(size, 1))
+            self.descriptor = (self._shared_memory.name, tuple(layout))
+        else:
+            self._shared_memory = SharedMemory(name=descriptor[0])
+            self.descriptor = descriptor
+        self._arrays = {
+            key: np.ndarray(
+                shape,
+                dtype=np.dtype(dtype),
+                buffer=self._shared_memory.buf,
+                offset=offset,
+            )
+            for key, dtype, shape, offset in self.descriptor[1]
+        }
+        if self._owner:
+            for key, array in arrays.items():
+                self._arrays[key][...] = array
+        self._finalizer = weakref.finalize(
+            self,
+            release_shared_memory,
+            self._shared_memory,
+            os.getpid() if self._owner else None,
+        )
+
+    @classmethod
+    def attach(cls, descriptor: Tuple) -> SharedArrays:
+        """Attach to the arrays of an existing shared memory block
+
+        :param descriptor: Descriptor of the block, given by the process which created it
+
+        :return: Arrays viewing the block
+        """
+        return cls(descriptor=descriptor)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Get a shared array
+
+        :param key: Name of the array
+
+        :return: Array viewing the shared memory block
+        """
+        return self._arrays[key]
+
+    def __contains__(self, key: str) -> bool:
+        """Check if an array is shared
+
+        :param key: Name of the array
+
+        :return: True if the array is shared
+        """
+        return key in self._arrays
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the shared arrays
+
+        :return: Generator of array names
+        """
+        yield from self._arrays
+
+    def close(self):
+        """Detach the process from the block. The arrays obtained before must not be used anymore."""
+        self._arrays = {}
+        release_shared_memory(self._shared_memory)
+
+    def unlink(self):
+        """Detach the process from the block and free it, if the process created it.
+        The block is also freed when the object is garbage collected or at exit.
+        """
+        self._arrays = {}
+        self._finalizer()
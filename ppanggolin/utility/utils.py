@@ -20,6 +20,7 @@ from ppanggolin.utils import (
     DRAW_FLAG_DEFAULT_IN_WF,
 )
 from ppanggolin import SUBCOMMAND_TO_SUBPARSER
+from ppanggolin.formats.subsetBinaries import write_subset_pangenome
 
 """ Utility scripts to help formatting input files of PPanggolin."""
 
@@ -157,6 +158,9 @@ def launch_default_config(args: argparse.Namespace):
     """
     initial_command = args.default_config
 
+    if args.output is None:
+        args.output = Path("default_config.yaml")
+
     if args.output.exists() and not args.force:
         raise FileExistsError(
             f"{args.output} already exists. Use -f if you want to overwrite it."
@@ -258,6 +262,44 @@ def launch_default_config(args: argparse.Namespace):
         fl.write("\n".join(arg_lines) + "\n")
 
 
+def get_genome_names(genomes: str) -> List[str]:
+    """
+    Get the names of genomes given by the user
+
+    :param genomes: File path with one genome name per line or a comma-separated list of genome names
+
+    :return: Names of the genomes
+    """
+    if Path(genomes).is_file():
+        with open(genomes) as fl:
+            names = [line.strip() for line in fl if not line.startswith("#")]
+    else:
+        names = [name.strip() for name in genomes.split(",")]
+    return [name for name in names if name]
+
+
+def launch_subset(args: argparse.Namespace):
+    """
+    Command launcher to write a pangenome file restricted to some genomes
+
+    :param args: All arguments provide by user
+    """
+    if args.output.exists() and not args.force:
+        raise FileExistsError(
+            f"{args.output} already exists. Use -f if you want to overwrite it."
+        )
+    if args.output.absolute() == args.pangenome.absolute():
+        raise ValueError("The subset pangenome file must be a new file.")
+
+    genomes = get_genome_names(args.subset)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    write_subset_pangenome(args.pangenome, args.output, genomes)
+    logging.getLogger("PPanGGOLiN").info(
+        f"Pangenome of {len(set(genomes))} genomes written in {args.output}. "
+        "Partitions, RGPs, spots and modules have to be computed again on it."
+    )
+
+
 def launch(args: argparse.Namespace):
     """
     Command launcher
@@ -268,6 +310,9 @@ def launch(args: argparse.Namespace):
     if args.default_config is not None:
         launch_default_config(args)
 
+    elif args.subset is not None:
+        launch_subset(args)
+
     # elif args.another_util_args is not None:
     #     launch_another_utils()
 
@@ -301,7 +346,10 @@ def parser_default_config(parser: argparse.ArgumentParser):
         description="All of the following arguments are required :",
     )
 
-    required.add_argument(
+    # a single utility is run at a time
+    utilities = required.add_mutually_exclusive_group()
+
+    utilities.add_argument(
         "--default_config",
         required=False,
         type=str,
@@ -310,14 +358,34 @@ def parser_default_config(parser: argparse.ArgumentParser):
         choices=subcommands,
     )
 
+    utilities.add_argument(
+        "--subset",
+        required=False,
+        type=str,
+        default=None,
+        help="Write a pangenome file restricted to the given genomes, from the pangenome file given with "
+        "--pangenome. Genomes are given as a file with one genome name per line, or as a "
+        "comma-separated list of names.",
+    )
+
     optional = parser.add_argument_group(title="Config arguments")
 
+    optional.add_argument(
+        "-p",
+        "--pangenome",
+        required=False,
+        type=Path,
+        default=None,
+        help="The pangenome .h5 file to subset with --subset",
+    )
+
     optional.add_argument(
         "-o",
         "--output",
         type=Path,
-        default="default_config.yaml",
-        help="name and path of the config file with default parameters written in yaml.",
+        default=None,
+        help="name and path of the config file with default parameters written in yaml "
+        "(default: default_config.yaml), or of the pangenome file written with --subset.",
     )
 
     optional.add_argument(
@@ -4,6 +4,7 @@
 import logging
 import sys
 import os
+import gc
 import gzip
 import bz2
 import zipfile
@@ -403,6 +404,23 @@ def create_tmpdir(main_dir, basename="tmpdir", keep_tmp=False):
             yield Path(new_tmpdir)
 
 
+@contextmanager
+def paused_garbage_collection():
+    """
+    Disable the cyclic garbage collector while building many objects at once.
+
+    Each collection walks the whole object graph, which is mostly the already loaded pangenome,
+    so bulk loaders spend most of their time in it without freeing anything.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
 def mk_file_name(basename: str, output: Path, force: bool = False) -> Path:
     """Returns a usable filename for a ppanggolin output file, or crashes.
 
@@ -1538,3 +1556,62 @@ def replace_non_ascii(string_with_ascii: str, replacement_string: str = "_") ->
     :return: A new string where all non-ASCII characters have been replaced.
     """
     return re.sub(r"[^\x00-\x7F]+", replacement_string, string_with_ascii)
+
+
+class CategoricalValues:
+    """
+    Dictionary of the distinct values of a categorical field, such as gene products.
+
+    Each distinct value is stored once and identified by an integer code,
+    so objects sharing a value share the same string instead of holding their own copy.
+    """
+
+    def __init__(self):
+        """Constructor method"""
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def __len__(self) -> int:
+        """Get the number of distinct values
+
+        :return: Number of distinct values
+        """
+        return len(self._values)
+
+    def encode(self, value: str) -> int:
+        """Get the code of a value, adding it if it is a new one
+
+        :param value: Value to encode
+
+        :return: Code of the value
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def decode(self, code: int) -> str:
+        """Get the value corresponding to a code
+
+        :param code: Code of the value
+
+        :return: Value
+        """
+        return self._values[code]
+
+    def intern(self, value: str) -> str:
+        """Get the shared instance of a value, adding it if it is a new one
+
+        :param value: Value to intern
+
+        :return: Shared instance equal to the value
+        """
+        return self._values[self.encode(value)]
+
+
+# Annotation fields with few distinct values repeated across genes, shared by the annotation parsers and readers
+ANNOTATION_CATEGORIES = {
+    field: CategoricalValues() for field in ["strand", "type", "name", "product"]
+}
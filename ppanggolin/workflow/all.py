@@ -199,6 +199,7 @@ def launch_workflow(
         cpu=args.partition.cpu,
         force=args.force,
         disable_bar=args.disable_prog_bar,
+        engine=args.partition.engine,
     )
     part_time = time.time() - start_part
 
@@ -326,6 +327,7 @@ def launch_workflow(
             "gexf",
             "light_gexf",
             "json",
+            "sparse_graph",
             "csv",
             "Rtab",
             "stats",
@@ -377,6 +379,7 @@ def launch_workflow(
                 light_gexf=args.write_pangenome.light_gexf,
                 stats=args.write_pangenome.stats,
                 json=args.write_pangenome.json,
+                sparse_graph=args.write_pangenome.sparse_graph,
                 partitions=args.write_pangenome.partitions,
                 families_tsv=args.write_pangenome.families_tsv,
                 regions=regions,
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""
+Measure the time and memory needed to read a pangenome file with one or several processes.
+
+The annotations, gene families and neighbors graph of each pangenome are read with read_pangenome for each number
+of processes, such as the pangenome built from the testingDataset and synthetic pangenomes written to a temporary file.
+With a single process, tables are read by chunks while the pangenome objects are built.
+With several processes, tables are read whole by worker processes while the main process builds the objects,
+whatever the number of genes of the pangenome.
+Each read is done in a new process, and the median time of the repeats is reported with the peak resident memory
+of the main process and of the largest worker process, as a tab separated table.
+
+:Example:
+python benchmark_loading.py --pangenome mybasicpangenome/pangenome.h5 --synthetic 20000 500 --cpu 1 2 4
+"""
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+import logging
+from multiprocessing import get_context
+from pathlib import Path
+import resource
+from statistics import median
+import tempfile
+import time
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats import readBinaries
+from ppanggolin.formats.readBinaries import read_pangenome
+from ppanggolin.formats.writeBinaries import write_pangenome
+from benchmark_partition import synthetic_pangenome
+
+COLUMNS = [
+    "dataset",
+    "genomes",
+    "families",
+    "genes",
+    "cpu",
+    "seconds",
+    "peak_mb",
+    "worker_peak_mb",
+]
+
+
+def write_synthetic_pangenome(
+    nb_families: int, nb_genomes: int, filename: Path, seed: int = 42
+):
+    """
+    Write a synthetic pangenome with its neighbors graph in a pangenome file
+
+    :param nb_families: Number of gene families
+    :param nb_genomes: Number of genomes
+    :param filename: Pangenome file to write
+    :param seed: Seed of the random generator
+    """
+    pangenome = synthetic_pangenome(nb_families, nb_genomes, seed=seed)
+    # cloud gene families drawn in no genome would not be read back
+    for family in list(pangenome.gene_families):
+        if family.number_of_genes == 0:
+            del pangenome._fam_getter[family.name]
+    for contig in pangenome.contigs:
+        contig.length = contig.number_of_genes * 1000
+        # gene positions are only written for coding sequences
+        for gene in contig.genes:
+            gene.type = "CDS"
+    write_pangenome(pangenome, filename, disable_bar=True)
+
+
+def read(filename: Path, cpu: int, connection):
+    """
+    Read the annotations, gene families and neighbors graph of a pangenome file, and send the measures back
+
+    :param filename: Pangenome file
+    :param cpu: Number of processes reading the tables
+    :param connection: Connection to send the measures to
+    """
+    # the reading processes are used even for the pangenomes read by chunks by default
+    readBinaries.PREFETCH_MIN_GENES = 0
+    pangenome = Pangenome()
+    pangenome.add_file(filename)
+    start = time.perf_counter()
+    read_pangenome(
+        pangenome,
+        annotation=True,
+        gene_families=True,
+        graph=True,
+        cpu=cpu,
+        disable_bar=True,
+    )
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    connection.send(
+        (
+            pangenome.number_of_organisms,
+            pangenome.number_of_gene_families,
+            pangenome.number_of_genes,
+            seconds,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        )
+    )
+    connection.close()
+
+
+def benchmark(filename: Path, dataset: str, cpus: list, repeats: int = 3) -> list:
+    """
+    Read a pangenome file with each number of processes
+
+    :param filename: Pangenome file
+    :param dataset: Name of the dataset in the results
+    :param cpus: Numbers of processes to compare
+    :param repeats: Number of reads for each number of processes
+
+    :return: Rows of results
+    """
+    context = get_context("fork")
+    rows = []
+    for cpu in cpus:
+        measures = []
+        for _ in range(repeats):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=read, args=(filename, cpu, sender))
+            process.start()
+            # only the reading process holds the sending end, so a failed read does not block the benchmark
+            sender.close()
+            try:
+                measures.append(receiver.recv())
+            except EOFError:
+                raise RuntimeError(
+                    f"Reading {filename} with {cpu} processes failed"
+                ) from None
+            finally:
+                process.join()
+        genomes, families, genes = measures[0][:3]
+        rows.append(
+            [
+                dataset,
+                genomes,
+                families,
+                genes,
+                cpu,
+                median(measure[3] for measure in measures),
+                max(measure[4] for measure in measures),
+                max(measure[5] for measure in measures),
+            ]
+        )
+    return rows
+
+
+def parse_arguments():
+    """Parse script arguments."""
+    parser = ArgumentParser(
+        description="Compare the time and memory needed to read a pangenome file with one or several processes",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--pangenome",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Pangenome files with a neighbors graph, such as the ones built from the testingDataset",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("FAMILIES", "GENOMES"),
+        help="Number of gene families and genomes of a synthetic pangenome. Can be given several times.",
+    )
+    parser.add_argument(
+        "--cpu",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="Numbers of processes to compare",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of reads for each number of processes",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="seed used to generate random numbers"
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="increase output verbosity"
+    )
+    args = parser.parse_args()
+    if not args.pangenome and not args.synthetic:
+        parser.error("Give at least one pangenome file or synthetic pangenome size")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    print("\t".join(COLUMNS))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        datasets = [(str(path), path) for path in args.pangenome]
+        for families, genomes in args.synthetic:
+            filename = Path(tmpdir) / f"synthetic_{families}x{genomes}.h5"
+            write_synthetic_pangenome(families, genomes, filename, seed=args.seed)
+            datasets.append((f"synthetic_{families}x{genomes}", filename))
+        for dataset, filename in datasets:
+            for row in benchmark(filename, dataset, args.cpu, args.repeats):
+                print(
+                    "\t".join(
+                        f"{value:.4g}" if isinstance(value, float) else str(value)
+                        for value in row
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+
+"""
+Compare the partitioning engines of PPanGGOLiN, NEM and its NumPy implementation, on the same NEM inputs.
+
+Both engines are run for each number of partitions on a pangenome file, such as the one built from the testingDataset,
+and on synthetic pangenomes. The NumPy engine is also run once for all the numbers of partitions at once.
+For each run, the time, the markov pseudo-likelihood reached and the fraction of gene families assigned to the same
+partition as with NEM are reported as a tab separated table.
+With --warm_start, the last genomes are instead added to a partitioning of the other ones, and partitioning all the
+genomes from this former partitioning is compared with partitioning them from the default parameters, with each engine.
+The speedup is the ratio of the numbers of iterations of both runs on the same genomes.
+The number of threads of the NumPy engine is the one of the BLAS library, set with OPENBLAS_NUM_THREADS or
+OMP_NUM_THREADS.
+
+:Example:
+python benchmark_partition.py --pangenome mybasicpangenome/pangenome.h5 --synthetic 5000 100 --kvals 3 5
+python benchmark_partition.py --synthetic 5000 100 --kvals 3 --warm_start 5
+"""
+
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+import logging
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from ppanggolin.genome import Gene, Organism, Contig
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats import check_pangenome_info
+from ppanggolin.graph.makeGraph import compute_neighbors_graph
+from ppanggolin.nem import partition
+
+COLUMNS = [
+    "dataset",
+    "families",
+    "genomes",
+    "K",
+    "engine",
+    "seconds",
+    "log_likelihood",
+    "agreement",
+]
+WARM_START_COLUMNS = [
+    "dataset",
+    "families",
+    "genomes",
+    "added",
+    "K",
+    "engine",
+    "re_evaluated",
+    "cold_iterations",
+    "warm_iterations",
+    "speedup",
+    "cold_seconds",
+    "warm_seconds",
+    "agreement",
+]
+
+
+def synthetic_pangenome(nb_families: int, nb_genomes: int, seed: int = 42) -> Pangenome:
+    """
+    Generate a pangenome with persistent, shell and cloud gene families, in a conserved order in all the genomes
+
+    :param nb_families: Number of gene families
+    :param nb_genomes: Number of genomes
+    :param seed: Seed of the random generator
+
+    :return: Pangenome with its neighbors graph
+    """
+    rng = random.Random(seed)
+    pangenome = Pangenome()
+    families = [GeneFamily(index, f"family{index}") for index in range(nb_families)]
+    # frequency of each gene family in the genomes: 20% persistent, 30% shell and 50% cloud
+    frequencies = []
+    for index in range(nb_families):
+        draw = rng.random()
+        if draw < 0.2:
+            frequencies.append(0.98)
+        elif draw < 0.5:
+            frequencies.append(rng.uniform(0.15, 0.85))
+        else:
+            frequencies.append(1 / nb_genomes)
+    for family in families:
+        pangenome.add_gene_family(family)
+    for genome_index in range(nb_genomes):
+        organism = Organism(f"genome{genome_index}")
+        pangenome.add_organism(organism)
+        contig = Contig(genome_index, f"contig{genome_index}")
+        organism.add(contig)
+        contig_families = [
+            family
+            for family, frequency in zip(families, frequencies)
+            if rng.random() < frequency
+        ]
+        for position, family in enumerate(contig_families):
+            gene = Gene(f"gene{genome_index}_{position}")
+            gene.fill_annotations(
+                start=position * 1000 + 1,
+                stop=position * 1000 + 900,
+                strand="+",
+                position=position,
+            )
+            gene.fill_parents(organism, contig)
+            contig.add(gene)
+            family.add(gene)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+    compute_neighbors_graph(pangenome, disable_bar=True)
+    return pangenome
+
+
+def benchmark(
+    pangenome: Pangenome,
+    dataset: str,
+    kvals: list,
+    beta: float = 2.5,
+    sm_degree: int = 10,
+    free_dispersion: bool = False,
+    seed: int = 42,
+) -> list:
+    """
+    Partition all the genomes of a pangenome with both engines for each number of partitions
+
+    :param pangenome: Pangenome with its neighbors graph
+    :param dataset: Name of the dataset in the report
+    :param kvals: Numbers of partitions to compare
+    :param beta: strength of the smoothing using the graph topology during partitioning
+    :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
+    :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
+    :param seed: seed used to generate random numbers
+
+    :return: Rows of the report
+    """
+    nem_arrays = partition.share_nem_arrays(pangenome)
+    organisms = list(range(pangenome.number_of_organisms))
+    rows = []
+    try:
+        nem_input, edges_weight = partition.get_nem_input(organisms, sm_degree)
+        nb_families = len(nem_input["families"])
+        if edges_weight > 0:
+            beta = beta * (nb_families / edges_weight)
+        description = [dataset, nb_families, len(organisms)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            nem_partitions = {}
+            for kval in kvals:
+                start = time.perf_counter()
+                currtmpdir = Path(tmpdir) / str(kval)
+                partition.write_nem_input_files(currtmpdir, organisms, sm_degree)
+                partitions, _, log_likelihood = partition.run_partitioning(
+                    currtmpdir,
+                    len(organisms),
+                    beta,
+                    free_dispersion,
+                    kval=kval,
+                    seed=seed,
+                )
+                rows.append(
+                    description
+                    + [kval, "nem", time.perf_counter() - start, log_likelihood, 1.0]
+                )
+                nem_partitions[kval] = partitions
+
+        def agreement(kval, partitions):
+            if not nem_partitions[kval] or not partitions:
+                return float("nan")
+            same = sum(
+                partitions[name] == nem_partitions[kval].get(name)
+                for name in partitions
+            )
+            return same / len(partitions)
+
+        for kval in kvals:
+            start = time.perf_counter()
+            nem_input, _ = partition.get_nem_input(organisms, sm_degree)
+            ((partitions, _, log_likelihood),) = partition.run_numpy_partitioning(
+                nem_input, len(organisms), beta, free_dispersion, kvals=[kval]
+            )
+            rows.append(
+                description
+                + [
+                    kval,
+                    "numpy",
+                    time.perf_counter() - start,
+                    log_likelihood,
+                    agreement(kval, partitions),
+                ]
+            )
+
+        start = time.perf_counter()
+        nem_input, _ = partition.get_nem_input(organisms, sm_degree)
+        results = partition.run_numpy_partitioning(
+            nem_input, len(organisms), beta, free_dispersion, kvals=kvals
+        )
+        seconds = time.perf_counter() - start
+        for kval, (partitions, _, log_likelihood) in zip(kvals, results):
+            rows.append(
+                description
+                + [
+                    kval,
+                    "numpy_batched",
+                    seconds,
+                    log_likelihood,
+                    agreement(kval, partitions),
+                ]
+            )
+    finally:
+        nem_arrays.unlink()
+    return rows
+
+
+def benchmark_warm_start(
+    pangenome: Pangenome,
+    dataset: str,
+    kvals: list,
+    added: int,
+    beta: float = 2.5,
+    sm_degree: int = 10,
+    free_dispersion: bool = False,
+    seed: int = 42,
+) -> list:
+    """
+    Add the last genomes of a pangenome to a partitioning of the other ones, and partition all the genomes from this
+    former partitioning and from the default parameters with both engines
+
+    :param pangenome: Pangenome with its neighbors graph
+    :param dataset: Name of the dataset in the report
+    :param kvals: Numbers of partitions to compare
+    :param added: Number of genomes added to the former partitioning
+    :param beta: strength of the smoothing using the graph topology during partitioning
+    :param sm_degree: Maximum degree of the nodes to be included in the smoothing process.
+    :param free_dispersion: use if the dispersion around the centroid vector of each partition during must be free.
+    :param seed: seed used to generate random numbers
+
+    :return: Rows of the report
+    """
+    nem_arrays = partition.share_nem_arrays(pangenome)
+    organisms = list(range(pangenome.number_of_organisms))
+    former_organisms = organisms[: len(organisms) - added]
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for engine in ["nem", "numpy"]:
+                for kval in kvals:
+                    runs = {}
+                    for run, sample in [
+                        ("former", former_organisms),
+                        ("cold", organisms),
+                        ("warm", organisms),
+                    ]:
+                        start = time.perf_counter()
+                        results, model, nb_updated = partition.partition_all_genomes(
+                            sample,
+                            kval,
+                            Path(tmpdir) / f"{engine}_{kval}_{run}",
+                            beta,
+                            sm_degree,
+                            free_dispersion,
+                            seed,
+                            engine=engine,
+                            partition_model=(
+                                runs["former"][1] if run == "warm" else None
+                            ),
+                        )
+                        runs[run] = (
+                            results[0],
+                            model,
+                            nb_updated,
+                            time.perf_counter() - start,
+                        )
+                    cold, cold_model, _, cold_seconds = runs["cold"]
+                    warm, warm_model, nb_updated, warm_seconds = runs["warm"]
+                    if not cold_model or not warm_model:
+                        continue
+                    rows.append(
+                        [
+                            dataset,
+                            len(cold),
+                            len(organisms),
+                            added,
+                            kval,
+                            engine,
+                            nb_updated,
+                            cold_model["iterations"],
+                            warm_model["iterations"],
+                            (
+                                cold_model["iterations"] / warm_model["iterations"]
+                                if cold_model["iterations"] and warm_model["iterations"]
+                                else float("nan")
+                            ),
+                            cold_seconds,
+                            warm_seconds,
+                            sum(warm.get(name) == cold[name] for name in cold)
+                            / len(cold),
+                        ]
+                    )
+    finally:
+        nem_arrays.unlink()
+    return rows
+
+
+def parse_arguments():
+    """Parse script arguments."""
+    parser = ArgumentParser(
+        description="Compare the NEM and NumPy partitioning engines",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--pangenome",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Pangenome files with a neighbors graph, such as the ones built from the testingDataset",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("FAMILIES", "GENOMES"),
+        help="Number of gene families and genomes of a synthetic pangenome. Can be given several times.",
+    )
+    parser.add_argument(
+        "--kvals",
+        type=int,
+        nargs="+",
+        default=[3, 5, 7],
+        help="Numbers of partitions to compare",
+    )
+    parser.add_argument(
+        "--warm_start",
+        type=int,
+        default=0,
+        metavar="ADDED",
+        help="Compare partitioning from a former partitioning of all the genomes but the last ADDED ones "
+        "with partitioning from the default parameters, instead of comparing the engines",
+    )
+    parser.add_argument(
+        "--beta",
+        type=float,
+        default=2.5,
+        help="strength of the smoothing using the graph topology during partitioning",
+    )
+    parser.add_argument(
+        "--free_dispersion",
+        action="store_true",
+        help="use if the dispersion around the centroid vector of each partition must be free",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42, help="seed used to generate random numbers"
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="increase output verbosity"
+    )
+    args = parser.parse_args()
+    if not args.pangenome and not args.synthetic:
+        parser.error("Give at least one pangenome file or synthetic pangenome size")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    print("\t".join(WARM_START_COLUMNS if args.warm_start else COLUMNS))
+    datasets = [(str(path), path) for path in args.pangenome] + [
+        (f"synthetic_{families}x{genomes}", (families, genomes))
+        for families, genomes in args.synthetic
+    ]
+    for dataset, source in datasets:
+        if isinstance(source, Path):
+            pangenome = Pangenome()
+            pangenome.add_file(source)
+            check_pangenome_info(
+                pangenome,
+                need_annotations=True,
+                need_families=True,
+                need_graph=True,
+                disable_bar=True,
+            )
+        else:
+            pangenome = synthetic_pangenome(*source, seed=args.seed)
+        if args.warm_start:
+            rows = benchmark_warm_start(
+                pangenome,
+                dataset,
+                args.kvals,
+                args.warm_start,
+                args.beta,
+                free_dispersion=args.free_dispersion,
+                seed=args.seed,
+            )
+        else:
+            rows = benchmark(
+                pangenome,
+                dataset,
+                args.kvals,
+                args.beta,
+                free_dispersion=args.free_dispersion,
+                seed=args.seed,
+            )
+        for row in rows:
+            print(
+                "\t".join(
+                    f"{value:.4g}" if isinstance(value, float) else str(value)
+                    for value in row
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from pathlib import Path
 
@@ -14,6 +15,8 @@ from ppanggolin.annotate.annotate import (
     fix_partial_gene_coordinates,
     shift_start_coordinates,
     shift_end_coordinates,
+    pack_organism,
+    unpack_organism,
 )
 
 
@@ -212,6 +215,43 @@ def test_read_org_gbff(genome_data_with_joined_genes):
     assert genome.number_of_genes() == 917
 
 
+def test_pack_and_unpack_organism(genome_data_with_joined_genes):
+    """
+    Test that a genome sent back by a worker as columns is built again with the same fields.
+    """
+    genome_name, genome_path, circular_contigs = genome_data_with_joined_genes
+    genome, _ = read_anno_file(genome_name, genome_path, circular_contigs, True)
+
+    unpacked = unpack_organism(pickle.loads(pickle.dumps(pack_organism(genome))))
+
+    assert unpacked.name == genome.name
+    assert unpacked.number_of_genes() == genome.number_of_genes()
+    for contig, unpacked_contig in zip(genome.contigs, unpacked.contigs):
+        for field in ["ID", "name", "is_circular", "length"]:
+            assert getattr(unpacked_contig, field) == getattr(contig, field)
+        assert list(unpacked_contig.metadata) == list(contig.metadata)
+        # RNAs are stored in a set, so they are compared in the order of their identifiers
+        features = list(contig.genes) + sorted(contig.RNAs, key=lambda rna: rna.ID)
+        unpacked_features = list(unpacked_contig.genes) + sorted(
+            unpacked_contig.RNAs, key=lambda rna: rna.ID
+        )
+        assert len(unpacked_features) == len(features)
+        for feature, unpacked_feature in zip(features, unpacked_features):
+            assert type(unpacked_feature) is type(feature)
+            slots = [
+                field
+                for cls in type(feature).__mro__
+                for field in getattr(cls, "__slots__", ())
+            ]
+            for field in slots:
+                if field in ["_organism", "_contig", "__weakref__"]:
+                    continue
+                if hasattr(feature, field):
+                    assert getattr(unpacked_feature, field) == getattr(feature, field)
+            assert unpacked_feature.organism is unpacked
+            assert unpacked_feature.contig is unpacked_contig
+
+
 def test_gbff_header_parser():
     header_lines = [
         "LOCUS       NC_022109            1041595 bp    DNA     circular CON 24-MAR-2017",
@@ -0,0 +1,97 @@
+import pytest
+
+from ppanggolin.genome import Organism, Contig, Gene, RNA
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.graph.makeGraph import compute_neighbors_graph
+from ppanggolin.formats.writeBinaries import write_pangenome
+
+
+def create_annotated_pangenome(prefix: str = "", first_contig_id: int = 0) -> Pangenome:
+    """Create a small annotated pangenome with genes, a joined gene and an RNA
+
+    :param prefix: Prefix of the genome, contig, gene and RNA names
+    :param first_contig_id: Identifier of the first contig
+    """
+    pangenome = Pangenome()
+    for org_idx in range(2):
+        organism = Organism(f"{prefix}organism_{org_idx}")
+        for contig_idx in range(2):
+            contig = Contig(
+                identifier=first_contig_id + org_idx * 2 + contig_idx,
+                name=f"{prefix}contig_{org_idx}_{contig_idx}",
+                is_circular=contig_idx == 0,
+            )
+            contig.length = 10000
+            organism.add(contig)
+            for position in range(5):
+                gene = Gene(f"{prefix}gene_{org_idx}_{contig_idx}_{position}")
+                start = position * 100 + 1
+                coordinates = [(start, start + 89)]
+                if position == 4 and contig_idx == 0:
+                    # gene split at the end of a circular contig
+                    coordinates = [(start, 10000), (1, 30)]
+                gene.fill_annotations(
+                    start=coordinates[0][0],
+                    stop=coordinates[-1][1],
+                    strand="+" if position % 2 == 0 else "-",
+                    gene_type="CDS",
+                    name=f"name_{position}" if position % 2 == 0 else "",
+                    position=position,
+                    genetic_code=11,
+                    product="hypothetical protein",
+                    local_identifier=f"local_{org_idx}_{contig_idx}_{position}",
+                    coordinates=coordinates,
+                )
+                gene.is_fragment = position == 3
+                gene.fill_parents(organism, contig)
+                contig.add(gene)
+            rna = RNA(f"{prefix}rna_{org_idx}_{contig_idx}")
+            rna.fill_annotations(
+                start=600, stop=700, strand="+", gene_type="tRNA", name="tRNA-Ala"
+            )
+            rna.fill_parents(organism, contig)
+            contig.add_rna(rna)
+        pangenome.add_organism(organism)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    return pangenome
+
+
+@pytest.fixture
+def pangenome() -> Pangenome:
+    """Create a small annotated pangenome with genes, a joined gene and an RNA"""
+    return create_annotated_pangenome()
+
+
+@pytest.fixture
+def new_genomes() -> Pangenome:
+    """Create genomes to add to the pangenome fixture, with longer names than its genomes"""
+    return create_annotated_pangenome(prefix="added_", first_contig_id=4)
+
+
+@pytest.fixture
+def pangenome_file(pangenome, tmp_path):
+    """Write the pangenome fixture into an HDF5 file"""
+    filename = tmp_path / "pangenome.h5"
+    write_pangenome(pangenome, filename, disable_bar=True)
+    return filename
+
+
+@pytest.fixture
+def graph_file(pangenome, tmp_path):
+    """Write the pangenome fixture with gene families and neighbors graph into an HDF5 file"""
+    for gene in pangenome.genes:
+        family_name = f"family_{gene.position}"
+        try:
+            family = pangenome.get_gene_family(family_name)
+        except KeyError:
+            family = GeneFamily(pangenome.max_fam_id, family_name)
+            family.add_sequence("MAGIC")
+            pangenome.add_gene_family(family)
+        family.add(gene)
+    pangenome.status["genesClustered"] = "Computed"
+    pangenome.status["geneFamilySequences"] = "Computed"
+    compute_neighbors_graph(pangenome, disable_bar=True)
+    filename = tmp_path / "pangenome_graph.h5"
+    write_pangenome(pangenome, filename, disable_bar=True)
+    return filename
@@ -0,0 +1,139 @@
+import pytest
+import tables
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import (
+    get_stale_steps,
+    read_annotation,
+)
+from ppanggolin.formats.writeAnnotations import (
+    append_to_table,
+    resize_table,
+    TableWriter,
+)
+from ppanggolin.formats.writeBinaries import append_genomes, write_pangenome
+
+
+def file_pangenome(filename) -> Pangenome:
+    """Get the pangenome associated to a file, with its status read"""
+    pangenome = Pangenome()
+    pangenome.add_file(filename)
+    return pangenome
+
+
+def read_genes(filename) -> dict:
+    """Read the annotations of a pangenome file and get the attributes of its genes and RNAs"""
+    loaded = Pangenome()
+    with tables.open_file(filename) as h5f:
+        read_annotation(loaded, h5f, disable_bar=True)
+    features = list(loaded.genes) + list(loaded.RNAs)
+    return {
+        feature.ID: (
+            feature.start,
+            feature.stop,
+            feature.strand,
+            feature.coordinates,
+            feature.name,
+            feature.contig.name,
+            feature.contig.ID,
+            feature.organism.name,
+        )
+        for feature in features
+    }
+
+
+@pytest.fixture
+def table_file(tmp_path):
+    with tables.open_file(tmp_path / "table.h5", "w") as h5f:
+        table = h5f.create_table(
+            "/",
+            "table",
+            {
+                "name": tables.StringCol(itemsize=4, pos=0),
+                "value": tables.UInt32Col(pos=1),
+            },
+        )
+        table.append([(b"a", 1), (b"bb", 2)])
+        yield h5f
+
+
+def test_append_to_table_widens_columns(table_file):
+    table = append_to_table(
+        table_file,
+        table_file.root.table,
+        {"name": ["a longer name"], "value": [3]},
+    )
+    assert table is table_file.root.table
+    assert table.coldtypes["name"].itemsize == len("a longer name")
+    assert table.colnames == ["name", "value"]
+    assert table.read().tolist() == [(b"a", 1), (b"bb", 2), (b"a longer name", 3)]
+
+
+def test_append_to_table_doubles_widths(table_file):
+    table = append_to_table(
+        table_file, table_file.root.table, {"name": ["abcde"], "value": [3]}
+    )
+    assert table.coldtypes["name"].itemsize == 8
+    table = append_to_table(table_file, table, {"name": ["abcdefg"], "value": [4]})
+    assert table.coldtypes["name"].itemsize == 8
+    assert table.col("name").tolist() == [b"a", b"bb", b"abcde", b"abcdefg"]
+
+
+def test_append_to_empty_table_sets_widths(tmp_path):
+    with tables.open_file(tmp_path / "empty.h5", "w") as h5f:
+        table = h5f.create_table("/", "table", {"name": tables.StringCol(itemsize=1)})
+        table = append_to_table(h5f, table, {"name": ["abcde"]})
+        assert table.coldtypes["name"].itemsize == 5
+
+
+def test_resize_table_adds_columns(table_file):
+    table = resize_table(
+        table_file, table_file.root.table, {"other": tables.Int32Col(dflt=-1)}
+    )
+    assert table.col("other").tolist() == [-1, -1]
+    assert table.col("name").tolist() == [b"a", b"bb"]
+
+
+def test_table_writer_widens_columns_between_batches(table_file):
+    with TableWriter(table_file, table_file.root.table, batch_size=2) as writer:
+        writer.append(name="c", value=3)
+        writer.append(name="dd", value=4)
+        writer.append(name="a longer name")
+    table = table_file.root.table
+    assert writer.table is table
+    assert table.coldtypes["name"].itemsize == len("a longer name")
+    assert table.read().tolist() == [
+        (b"a", 1),
+        (b"bb", 2),
+        (b"c", 3),
+        (b"dd", 4),
+        (b"a longer name", 0),
+    ]
+
+
+class TestAppendGenomes:
+    def test_round_trip(self, pangenome, new_genomes, pangenome_file, tmp_path):
+        expected_filename = tmp_path / "expected.h5"
+        for organism in new_genomes.organisms:
+            pangenome.add_organism(organism)
+        pangenome.status["genomesAnnotated"] = "Computed"
+        write_pangenome(pangenome, expected_filename, disable_bar=True)
+
+        append_genomes(file_pangenome(pangenome_file), new_genomes, disable_bar=True)
+        assert read_genes(pangenome_file) == read_genes(expected_filename)
+        with tables.open_file(pangenome_file) as h5f:
+            assert h5f.root.info._v_attrs.numberOfGenomes == 4
+            assert h5f.root.info._v_attrs.numberOfGenes == 40
+            genedata_ids = h5f.root.annotations.genedata.col("genedata_id")
+            assert len(set(genedata_ids)) == len(genedata_ids)
+            assert get_stale_steps(h5f) == []
+
+    def test_marks_steps_as_stale(self, new_genomes, graph_file):
+        append_genomes(file_pangenome(graph_file), new_genomes, disable_bar=True)
+        with tables.open_file(graph_file) as h5f:
+            assert get_stale_steps(h5f) == ["genesClustered", "NeighborsGraph"]
+            # the computed steps are kept
+            assert h5f.root.status._v_attrs.genesClustered
+            assert "/edges" in h5f
+            assert "/presenceAbsence" not in h5f
+        assert file_pangenome(graph_file).status["genesClustered"] == "inFile"
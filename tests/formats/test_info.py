@@ -0,0 +1,79 @@
+import tables
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import read_pangenome
+from ppanggolin.info.info import (
+    BYTES_PER_GENE,
+    estimate_loading_memory,
+    estimate_memory,
+    get_available_memory,
+    measure_memory,
+    read_memory,
+)
+
+
+def test_estimate_memory(graph_file):
+    with tables.open_file(graph_file, "r") as h5f:
+        estimates = estimate_memory(h5f)
+    assert set(estimates) == {
+        "genomes",
+        "contigs",
+        "genes",
+        "RNAs",
+        "families",
+        "edges",
+    }
+    assert estimates["genes"] == 20 * BYTES_PER_GENE
+    assert all(size > 0 for size in estimates.values())
+
+
+def test_estimate_loading_memory(graph_file):
+    pangenome = Pangenome()
+    pangenome.add_file(graph_file)
+    with tables.open_file(graph_file, "r") as h5f:
+        estimates = estimate_memory(h5f)
+    assert estimate_loading_memory(pangenome) == 0
+    assert estimate_loading_memory(pangenome, gene_families=True, rgp=True) == (
+        estimates["families"]
+    )
+    assert estimate_loading_memory(
+        pangenome, annotation=True, gene_families=True, graph=True
+    ) == sum(estimates.values())
+
+
+def test_get_available_memory(tmp_path):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text(
+        "MemTotal:        6157312 kB\nMemFree:          349184 kB\nMemAvailable:    5506048 kB\n"
+    )
+    assert get_available_memory(meminfo) == 5506048 * 1024
+    meminfo.write_text("MemTotal:        6157312 kB\n")
+    assert get_available_memory(meminfo) is None
+    assert get_available_memory(tmp_path / "missing") is None
+
+
+def test_measure_memory(graph_file):
+    pangenome = Pangenome()
+    pangenome.add_file(graph_file)
+    read_pangenome(
+        pangenome, annotation=True, gene_families=True, graph=True, disable_bar=True
+    )
+    memory = measure_memory(pangenome)
+    for component in ["genomes", "contigs", "genes", "RNAs", "families", "edges"]:
+        assert memory[component] > 0
+    for component in ["RGPs", "spots", "modules", "metadata"]:
+        assert memory[component] == 0
+
+
+def test_read_memory(graph_file):
+    memory = read_memory(graph_file, disable_bar=True)["Memory"]
+    assert set(memory) == {
+        "genomes",
+        "contigs",
+        "genes",
+        "RNAs",
+        "families",
+        "edges",
+        "Total",
+    }
+    assert set(memory["Total"]) == {"Estimated", "Measured"}
@@ -0,0 +1,158 @@
+import pytest
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import check_pangenome_info
+from ppanggolin.formats.lazyPangenome import (
+    BoundedCache,
+    LazyGeneFamily,
+    LazyPangenome,
+    group_rows,
+)
+
+
+@pytest.fixture
+def full_pangenome(graph_file) -> Pangenome:
+    """Load the whole pangenome file with gene families and graph"""
+    pangenome = Pangenome()
+    pangenome.add_file(graph_file)
+    check_pangenome_info(
+        pangenome,
+        need_annotations=True,
+        need_families=True,
+        need_graph=True,
+        disable_bar=True,
+    )
+    return pangenome
+
+
+@pytest.fixture
+def lazy_pangenome(graph_file) -> LazyPangenome:
+    """Open the pangenome file lazily with room for a single genome and family"""
+    with LazyPangenome(cache_size=1) as pangenome:
+        pangenome.add_file(graph_file)
+        yield pangenome
+
+
+def genome_content(organism) -> list:
+    """Get the contigs, genes and RNAs of a genome to compare them"""
+    return [
+        (
+            contig.name,
+            contig.length,
+            contig.is_circular,
+            [
+                (gene.ID, gene.start, gene.stop, gene.coordinates, gene.family.name)
+                for gene in contig.genes
+            ],
+            sorted(rna.ID for rna in contig.RNAs),
+        )
+        for contig in organism.contigs
+    ]
+
+
+def test_bounded_cache_drops_oldest():
+    dropped = []
+    cache = BoundedCache(2, dropped.append)
+    cache.add("a", 1)
+    cache.add("b", 2)
+    cache.get("a")
+    cache.add("c", 3)
+    assert dropped == [2]
+    assert "a" in cache and "c" in cache
+    assert len(cache) == 2
+
+
+def test_group_rows():
+    rows, offsets = group_rows([2, 0, 2, 1], 4)
+    assert offsets.tolist() == [0, 1, 2, 4, 4]
+    assert sorted(rows[offsets[2] : offsets[3]].tolist()) == [0, 2]
+
+
+class TestLazyPangenome:
+    def test_status(self, lazy_pangenome):
+        assert lazy_pangenome.status["genomesAnnotated"] == "Loaded"
+        assert lazy_pangenome.status["genesClustered"] == "Loaded"
+        assert lazy_pangenome.status["neighborsGraph"] == "Loaded"
+
+    def test_counts(self, full_pangenome, lazy_pangenome):
+        assert lazy_pangenome.number_of_organisms == full_pangenome.number_of_organisms
+        assert lazy_pangenome.number_of_contigs == full_pangenome.number_of_contigs
+        assert lazy_pangenome.number_of_genes == full_pangenome.number_of_genes
+        assert lazy_pangenome.number_of_rnas == full_pangenome.number_of_rnas
+        assert (
+            lazy_pangenome.number_of_gene_families
+            == full_pangenome.number_of_gene_families
+        )
+        assert lazy_pangenome.number_of_edges == full_pangenome.number_of_edges
+
+    def test_genomes(self, full_pangenome, lazy_pangenome):
+        for organism in full_pangenome.organisms:
+            lazy_organism = lazy_pangenome.get_organism(organism.name)
+            assert genome_content(lazy_organism) == genome_content(organism)
+
+    def test_unknown_genome(self, lazy_pangenome):
+        with pytest.raises(KeyError):
+            lazy_pangenome.get_organism("unknown")
+
+    def test_family_without_reading_genes(self, full_pangenome, lazy_pangenome):
+        for family in full_pangenome.gene_families:
+            lazy_family = lazy_pangenome.get_gene_family(family.name)
+            assert isinstance(lazy_family, LazyGeneFamily)
+            assert lazy_family.number_of_genes == family.number_of_genes
+            assert lazy_family.number_of_organisms == family.number_of_organisms
+            assert lazy_family.number_of_neighbors == family.number_of_neighbors
+            assert {neighbor.name for neighbor in lazy_family.neighbors} == {
+                neighbor.name for neighbor in family.neighbors
+            }
+            assert lazy_family.sequence == family.sequence
+            assert not lazy_family.is_resolved
+
+    def test_family_genes_and_edges(self, full_pangenome, lazy_pangenome):
+        for family in full_pangenome.gene_families:
+            lazy_family = lazy_pangenome.get_gene_family(family.name)
+            assert {gene.ID for gene in lazy_family.genes} == {
+                gene.ID for gene in family.genes
+            }
+            assert lazy_family.is_resolved
+            assert {
+                frozenset((edge.source.name, edge.target.name))
+                for edge in lazy_family.edges
+            } == {
+                frozenset((edge.source.name, edge.target.name)) for edge in family.edges
+            }
+
+    def test_genes_per_genome(self, lazy_pangenome):
+        organism = lazy_pangenome.get_organism("organism_0")
+        family = lazy_pangenome.get_gene_family("family_0")
+        assert sorted(gene.ID for gene in family.get_genes_per_org(organism)) == [
+            "gene_0_0_0",
+            "gene_0_1_0",
+        ]
+        assert not family.is_resolved
+
+    def test_edges(self, full_pangenome, lazy_pangenome):
+        def edge_content(pangenome):
+            return {
+                frozenset((edge.source.name, edge.target.name)): sorted(
+                    (gene1.ID, gene2.ID) for gene1, gene2 in edge.gene_pairs
+                )
+                for edge in pangenome.edges
+            }
+
+        assert edge_content(lazy_pangenome) == edge_content(full_pangenome)
+
+    def test_get_gene_keeps_identity(self, lazy_pangenome):
+        gene = lazy_pangenome.get_gene("gene_1_0_2")
+        assert gene.organism.name == "organism_1"
+        # reading other genomes drops organism_1 from the cache but the gene is still in use
+        lazy_pangenome.get_organism("organism_0")
+        assert lazy_pangenome.get_gene("gene_1_0_2") is gene
+        assert gene.organism.get(gene.contig.name) is gene.contig
+
+    def test_family_unloaded_when_dropped(self, lazy_pangenome):
+        family_0 = lazy_pangenome.get_gene_family("family_0")
+        family_0.resolve()
+        assert family_0.is_resolved
+        lazy_pangenome.get_gene_family("family_1").resolve()
+        assert not family_0.is_resolved
+        assert family_0.number_of_genes == 4
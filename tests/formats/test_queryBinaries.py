@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import tables
+
+from ppanggolin.formats import queryBinaries
+from ppanggolin.formats.queryBinaries import (
+    INDEXED_COLUMNS,
+    get_family_genes,
+    get_gene_annotations,
+    get_gene_families,
+    get_gene_genomes,
+    get_row_coordinates,
+    index_pangenome_tables,
+)
+
+
+@pytest.fixture
+def h5f(graph_file):
+    with tables.open_file(graph_file) as h5f:
+        yield h5f
+
+
+def test_key_columns_are_indexed(h5f):
+    for table_path, columns in INDEXED_COLUMNS.items():
+        if table_path in h5f:
+            table = h5f.get_node(table_path)
+            for column in columns:
+                assert table.colinstances[column].index.is_csi
+
+
+def test_index_after_append(graph_file):
+    with tables.open_file(graph_file, "a") as h5f:
+        table = h5f.root.geneFamilies
+        table.append([(b"gene_2_0_0", b"family_0")])
+        index_pangenome_tables(h5f)
+        assert table.cols.gene.index.is_csi
+        assert get_gene_families(h5f, ["gene_2_0_0"]) == {"gene_2_0_0": "family_0"}
+
+
+@pytest.mark.parametrize("rows_per_lookup", [0, 10**9])
+def test_lookups_with_and_without_index(h5f, monkeypatch, rows_per_lookup):
+    monkeypatch.setattr(queryBinaries, "ROWS_PER_LOOKUP", rows_per_lookup)
+    table = h5f.root.annotations.genes
+    gene_ids = table.col("ID")
+    coordinates = get_row_coordinates(
+        table, "ID", ["gene_1_0_2", b"gene_0_1_4", "unknown", "gene_0_0_0_too_long"]
+    )
+    assert gene_ids[coordinates].tolist() == [b"gene_0_1_4", b"gene_1_0_2"]
+    assert (
+        get_row_coordinates(table, "genedata_id", [0]).tolist()
+        == np.flatnonzero(table.col("genedata_id") == 0).tolist()
+    )
+
+
+def test_gene_families(pangenome, h5f):
+    genes = ["gene_0_0_1", "gene_1_1_3", "unknown"]
+    assert get_gene_families(h5f, genes) == {
+        "gene_0_0_1": "family_1",
+        "gene_1_1_3": "family_3",
+    }
+    family_genes = get_family_genes(h5f, ["family_2"])
+    assert sorted(family_genes["family_2"]) == sorted(
+        gene.ID for gene in pangenome.get_gene_family("family_2").genes
+    )
+
+
+def test_gene_genomes_and_annotations(pangenome, h5f):
+    assert get_gene_genomes(h5f, ["gene_0_1_2", "gene_1_0_0"]) == {
+        "gene_0_1_2": "organism_0",
+        "gene_1_0_0": "organism_1",
+    }
+    gene = pangenome.get_gene("gene_1_0_2")
+    annotations = get_gene_annotations(h5f, [gene.ID])[gene.ID]
+    assert annotations["start"] == gene.start
+    assert annotations["stop"] == gene.stop
+    assert annotations["strand"] == gene.strand
+    assert annotations["name"] == gene.name
+    assert annotations["product"] == gene.product
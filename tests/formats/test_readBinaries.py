@@ -0,0 +1,439 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pytest
+import tables
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.metadata import Metadata
+from ppanggolin.formats import readBinaries
+from ppanggolin.info import info
+from ppanggolin.formats.readBinaries import (
+    get_family_edges,
+    get_family_to_genome_count,
+    get_presence_absence_names,
+    iter_presence_absence,
+    read_copy_number,
+    read_presence_absence,
+    read_annotation,
+    read_gene_families,
+    read_genedata,
+    read_genedata_columns,
+    read_graph,
+    read_join_coordinates,
+    read_metadata,
+    read_pangenome,
+    read_partition_model,
+)
+from ppanggolin.formats.writeBinaries import write_pangenome, write_partition_model
+
+
+def read_graph_from_file(filename, compact: bool = False) -> Pangenome:
+    """Read annotations, gene families and graph of a pangenome file"""
+    loaded = Pangenome()
+    with tables.open_file(filename) as h5f:
+        read_annotation(loaded, h5f, disable_bar=True)
+        read_gene_families(loaded, h5f, disable_bar=True)
+        read_graph(loaded, h5f, disable_bar=True, compact=compact)
+    return loaded
+
+
+def graph_content(pangenome: Pangenome, reverse: bool = False) -> dict:
+    """Get the gene pairs of each edge by family pair to compare graphs, each pair reversed if asked for"""
+    return {
+        frozenset((edge.source.name, edge.target.name)): {
+            organism.name: [
+                (gene2.ID, gene1.ID) if reverse else (gene1.ID, gene2.ID)
+                for gene1, gene2 in gene_pairs
+            ]
+            for organism, gene_pairs in edge.get_organisms_dict().items()
+        }
+        for edge in pangenome.edges
+    }
+
+
+def gene_attributes(gene):
+    """Get the annotation attributes of a gene to compare them"""
+    return (
+        gene.ID,
+        gene.start,
+        gene.stop,
+        gene.strand,
+        gene.type,
+        gene.name,
+        gene.position,
+        gene.genetic_code,
+        gene.product,
+        gene.local_identifier,
+        gene.coordinates,
+        gene.is_fragment,
+        gene.contig.name,
+        gene.organism.name,
+    )
+
+
+class TestReadAnnotation:
+    def test_genedata_columns_match_genedata(self, pangenome_file):
+        with tables.open_file(pangenome_file) as h5f:
+            genedata_dict = read_genedata(h5f)
+            columns = read_genedata_columns(h5f)
+        for genedata_id, genedata in genedata_dict.items():
+            assert genedata.start == columns["start"][genedata_id]
+            assert genedata.stop == columns["stop"][genedata_id]
+            assert genedata.strand == columns["strand"][genedata_id]
+            assert genedata.gene_type == columns["gene_type"][genedata_id]
+            assert genedata.name == columns["name"][genedata_id]
+            assert genedata.product == columns["product"][genedata_id]
+            assert (
+                genedata.has_joined_coordinates
+                == columns["has_joined_coordinates"][genedata_id]
+            )
+
+    def test_annotation_strings_are_shared_between_chunks(self, pangenome_file):
+        with tables.open_file(pangenome_file) as h5f:
+            columns = read_genedata_columns(h5f, chunk_size=1)
+        products = [product for product in columns["product"] if product is not None]
+        assert len(products) > 1
+        assert len({id(product) for product in products}) == len(set(products))
+
+    def test_read_join_coordinates(self, pangenome_file):
+        with tables.open_file(pangenome_file) as h5f:
+            join_coordinates = read_join_coordinates(h5f)
+        # identical genedata are shared between genes
+        assert list(join_coordinates.values()) == [[(401, 10000), (1, 30)]]
+
+    def test_read_annotation_round_trip(self, pangenome, pangenome_file):
+        loaded = Pangenome()
+        with tables.open_file(pangenome_file) as h5f:
+            read_annotation(loaded, h5f, disable_bar=True)
+        assert loaded.status["genomesAnnotated"] == "Loaded"
+        assert {org.name for org in loaded.organisms} == {
+            org.name for org in pangenome.organisms
+        }
+        expected = {gene.ID: gene_attributes(gene) for gene in pangenome.genes}
+        observed = {gene.ID: gene_attributes(gene) for gene in loaded.genes}
+        assert observed == expected
+        for contig in pangenome.contigs:
+            loaded_contig = loaded.get_organism(contig.organism.name).get(contig.name)
+            assert loaded_contig.ID == contig.ID
+            assert loaded_contig.length == contig.length
+            assert loaded_contig.is_circular == contig.is_circular
+            assert [gene.ID for gene in loaded_contig.genes] == [
+                gene.ID for gene in contig.genes
+            ]
+            assert {rna.ID for rna in loaded_contig.RNAs} == {
+                rna.ID for rna in contig.RNAs
+            }
+
+    def test_read_annotation_without_link(self, pangenome_file):
+        loaded = Pangenome()
+        with tables.open_file(pangenome_file) as h5f:
+            read_annotation(
+                loaded, h5f, load_organisms=False, load_contigs=False, disable_bar=True
+            )
+        assert loaded.number_of_organisms == 0
+
+
+class TestReadGraph:
+    def test_edges_are_written_with_gene_rows(self, graph_file):
+        with tables.open_file(graph_file) as h5f:
+            assert h5f.root.edges.coltypes["geneSource"] == "uint32"
+            gene_ids = h5f.root.annotations.genes.col("ID")
+            source_ids = gene_ids[h5f.root.edges.col("geneSource")]
+        assert b"gene_0_0_0" in source_ids
+
+    def test_read_graph_round_trip(self, pangenome, graph_file):
+        """Edges are read back reversed, with reversed gene pairs, as they always were"""
+        loaded = read_graph_from_file(graph_file)
+        assert loaded.status["neighborsGraph"] == "Loaded"
+        assert loaded.number_of_edges == pangenome.number_of_edges
+        assert graph_content(loaded) == graph_content(pangenome, reverse=True)
+
+    def test_edge_orientation_round_trip(self, pangenome, graph_file):
+        """Edges are read back in the same order, from the target to the source family, and both file layouts agree"""
+        expected = [(edge.target.name, edge.source.name) for edge in pangenome.edges]
+        loaded = read_graph_from_file(graph_file)
+        assert [(edge.source.name, edge.target.name) for edge in loaded.edges] == (
+            expected
+        )
+        with tables.open_file(graph_file) as h5f:
+            assert [
+                (row["familySource"].decode(), row["familyTarget"].decode())
+                for row in h5f.root.familyEdges
+            ] == expected
+            gene_ids = h5f.root.annotations.genes.col("ID")
+            source_ids = gene_ids[h5f.root.edges.col("geneSource")]
+            target_ids = gene_ids[h5f.root.edges.col("geneTarget")]
+        # pairs of files written with gene identifiers, as the target then the source of each pair
+        assert [
+            (target.decode(), source.decode())
+            for target, source in zip(target_ids, source_ids)
+        ] == [
+            (gene1.ID, gene2.ID)
+            for edge in pangenome.edges
+            for gene1, gene2 in edge.gene_pairs
+        ]
+
+    def test_read_compact_graph(self, pangenome, graph_file):
+        loaded = read_graph_from_file(graph_file, compact=True)
+        assert all(edge.is_compact for edge in loaded.edges)
+        assert {
+            frozenset((edge.source.name, edge.target.name)): {
+                organism.name: count
+                for organism, count in edge.get_organism_pair_counts().items()
+            }
+            for edge in loaded.edges
+        } == {
+            frozenset((edge.source.name, edge.target.name)): {
+                organism.name: count
+                for organism, count in edge.get_organism_pair_counts().items()
+            }
+            for edge in pangenome.edges
+        }
+        assert graph_content(loaded) == graph_content(pangenome)
+
+    def test_write_compact_graph(self, pangenome, graph_file):
+        """Gene pairs of compact edges, found again on the contigs, are written as the ones of the computed graph"""
+        loaded = Pangenome()
+        loaded.add_file(graph_file)
+        read_pangenome(
+            loaded,
+            annotation=True,
+            gene_families=True,
+            graph=True,
+            compact_graph=True,
+            disable_bar=True,
+        )
+        loaded.status["neighborsGraph"] = "Computed"
+        write_pangenome(loaded, graph_file, force=True, disable_bar=True)
+        assert graph_content(read_graph_from_file(graph_file)) == graph_content(
+            pangenome, reverse=True
+        )
+        with tables.open_file(graph_file) as h5f:
+            assert {
+                frozenset((row["familySource"], row["familyTarget"])): row["genePairs"]
+                for row in h5f.root.familyEdges
+            } == {
+                frozenset(
+                    (edge.source.name.encode(), edge.target.name.encode())
+                ): edge.number_of_gene_pairs
+                for edge in pangenome.edges
+            }
+
+    def test_read_graph_with_gene_ids(self, pangenome, graph_file):
+        """Files written with gene identifiers in the edges table are still readable"""
+        with tables.open_file(graph_file, "a") as h5f:
+            gene_ids = h5f.root.annotations.genes.col("ID")
+            sources = gene_ids[h5f.root.edges.col("geneSource")]
+            targets = gene_ids[h5f.root.edges.col("geneTarget")]
+            h5f.remove_node("/", "edges")
+            h5f.remove_node("/", "familyEdges")
+            edge_table = h5f.create_table(
+                "/",
+                "edges",
+                {
+                    "geneTarget": tables.StringCol(itemsize=gene_ids.itemsize),
+                    "geneSource": tables.StringCol(itemsize=gene_ids.itemsize),
+                },
+            )
+            edge_table.append(list(zip(sources, targets)))
+        loaded = read_graph_from_file(graph_file)
+        assert graph_content(loaded) == graph_content(pangenome, reverse=True)
+
+    def test_get_family_edges(self, pangenome, graph_file):
+        expected = {
+            frozenset((edge.source.name.encode(), edge.target.name.encode())): (
+                edge.number_of_organisms,
+                len(edge.gene_pairs),
+            )
+            for edge in pangenome.edges
+        }
+        with tables.open_file(graph_file, "a") as h5f:
+            family_edges = get_family_edges(h5f)
+            h5f.remove_node("/", "familyEdges")
+            aggregated_family_edges = get_family_edges(h5f)
+        assert {
+            frozenset(families): counts for families, counts in family_edges.items()
+        } == expected
+        assert {
+            frozenset(families): counts
+            for families, counts in aggregated_family_edges.items()
+        } == expected
+
+
+class TestPresenceAbsence:
+    def test_matrix_matches_families(self, pangenome, graph_file):
+        with tables.open_file(graph_file) as h5f:
+            families, genomes = get_presence_absence_names(h5f)
+            presence = read_presence_absence(h5f)
+            copy_number = read_copy_number(h5f)
+        assert presence.shape == (len(families), len(genomes))
+        assert sorted(genomes) == ["organism_0", "organism_1"]
+        for row, family_name in enumerate(families):
+            family = pangenome.get_gene_family(family_name)
+            for column, genome_name in enumerate(genomes):
+                organism = pangenome.get_organism(genome_name)
+                number_of_copies = len(family.get_org_dict().get(organism, []))
+                assert copy_number[row, column] == number_of_copies
+                assert presence[row, column] == (number_of_copies > 0)
+
+    def test_read_slices(self, graph_file):
+        with tables.open_file(graph_file) as h5f:
+            presence = read_presence_absence(h5f)
+            assert (
+                read_presence_absence(h5f, 1, 3, genomes=[1, 0])
+                == presence[1:3, [1, 0]]
+            ).all()
+            blocks = [block for _, block in iter_presence_absence(h5f)]
+        assert (np.concatenate(blocks) == presence).all()
+
+    def test_family_to_genome_count(self, graph_file):
+        with tables.open_file(graph_file, "a") as h5f:
+            from_matrix = get_family_to_genome_count(h5f)
+            h5f.remove_node("/", "presenceAbsence", recursive=True)
+            from_tables = get_family_to_genome_count(h5f)
+        assert from_matrix == from_tables
+
+
+class TestParallelRead:
+    def test_read_pangenome_with_several_cpu(self, graph_file, monkeypatch):
+        monkeypatch.setattr(readBinaries, "PREFETCH_MIN_GENES", 0)
+        sequential = Pangenome()
+        sequential.add_file(graph_file)
+        read_pangenome(
+            sequential,
+            annotation=True,
+            gene_families=True,
+            graph=True,
+            disable_bar=True,
+        )
+        parallel = Pangenome()
+        parallel.add_file(graph_file)
+        read_pangenome(
+            parallel,
+            annotation=True,
+            gene_families=True,
+            graph=True,
+            cpu=2,
+            disable_bar=True,
+        )
+        assert {gene.ID: gene_attributes(gene) for gene in parallel.genes} == {
+            gene.ID: gene_attributes(gene) for gene in sequential.genes
+        }
+        assert {
+            family.name: {gene.ID for gene in family.genes}
+            for family in parallel.gene_families
+        } == {
+            family.name: {gene.ID for gene in family.genes}
+            for family in sequential.gene_families
+        }
+        assert graph_content(parallel) == graph_content(sequential)
+
+    def test_prefetched_table_is_released(self, graph_file):
+        """A table prefetched for two parts is kept until both have got it"""
+        h5f = readBinaries.PrefetchedFile(
+            tables.open_file(graph_file, "r"),
+            ProcessPoolExecutor(max_workers=2, mp_context=get_context("fork")),
+        )
+        try:
+            h5f.prefetch_table("/annotations/genes")
+            h5f.prefetch_table("/annotations/genes")
+            assert h5f.get_node("/annotations/genes").nrows == 20
+            assert h5f.get_node("/annotations/genes").nrows == 20
+            assert h5f._tables == {}
+        finally:
+            h5f.close()
+
+    def test_read_small_pangenome_with_several_cpu(self, graph_file, monkeypatch):
+        """A pangenome with few genes is read by chunks in a single process"""
+        monkeypatch.setattr(
+            readBinaries,
+            "PrefetchedFile",
+            lambda *args: pytest.fail("tables are read by several processes"),
+        )
+        loaded = Pangenome()
+        loaded.add_file(graph_file)
+        read_pangenome(
+            loaded,
+            annotation=True,
+            gene_families=True,
+            graph=True,
+            cpu=2,
+            disable_bar=True,
+        )
+        assert loaded.number_of_genes == 20
+
+    def test_read_pangenome_without_enough_memory(
+        self, graph_file, monkeypatch, caplog
+    ):
+        """A pangenome estimated not to fit in the available memory is read by chunks in a single process"""
+        monkeypatch.setattr(info, "get_available_memory", lambda: 1)
+        monkeypatch.setattr(readBinaries, "PREFETCH_MIN_GENES", 0)
+        monkeypatch.setattr(
+            readBinaries,
+            "PrefetchedFile",
+            lambda *args: pytest.fail("tables are read by several processes"),
+        )
+        loaded = Pangenome()
+        loaded.add_file(graph_file)
+        read_pangenome(loaded, annotation=True, cpu=2, disable_bar=True)
+        assert loaded.number_of_genes == 20
+        assert "more than the 1 B available" in caplog.text
+        assert "2 cpus were requested" in caplog.text
+
+
+class TestMetadata:
+    def test_metadata_round_trip(self, pangenome, tmp_path):
+        genes = sorted(pangenome.genes, key=lambda gene: gene.ID)
+        for index, gene in enumerate(genes):
+            # gene metadata are written with the gene name when it has one
+            gene.name = ""
+            gene.add_metadata(Metadata("source", product=f"product_{index}", score=1))
+            if index % 3 == 0:
+                gene.add_metadata(Metadata("source", score=0.5, note="long note"))
+        contig = next(pangenome.contigs)
+        contig.add_metadata(Metadata("source", origin="plasmid"))
+        for metatype in ["genes", "contigs"]:
+            pangenome.status["metadata"][metatype] = "Computed"
+            pangenome.status["metasources"][metatype].append("source")
+        filename = tmp_path / "pangenome.h5"
+        write_pangenome(pangenome, filename, disable_bar=True)
+
+        loaded = Pangenome()
+        with tables.open_file(filename) as h5f:
+            read_annotation(loaded, h5f, disable_bar=True)
+            for metatype in ["genes", "contigs"]:
+                read_metadata(loaded, h5f, metatype, {"source"}, disable_bar=True)
+            assert h5f.root.metadata.genes.source.coltypes["score"] == "float64"
+        for gene in genes:
+            loaded_metadata = loaded.get_gene(gene.ID).get_metadata_by_source("source")
+            for meta_id, metadata in gene.get_metadata_by_source("source").items():
+                for field in metadata.fields:
+                    assert getattr(loaded_metadata[meta_id], field) == getattr(
+                        metadata, field
+                    )
+        loaded_contig = loaded.get_contig(contig.ID)
+        assert loaded_contig.get_metadata_by_source("source")[1].origin == "plasmid"
+
+
+def test_partition_model_round_trip(tmp_path):
+    """Tests that the partition model is read back as written, and removed when the pangenome has none"""
+    pangenome = Pangenome()
+    pangenome.partition_model = {
+        "genomes": np.array([b"genome1", b"genome2"]),
+        "centers": np.array([[1, 1], [0, 1]], dtype=np.uint8),
+        "classification": np.array([[0.9, 0.1], [np.nan, np.nan]], dtype=np.float32),
+        "iterations": None,
+    }
+    with tables.open_file(tmp_path / "pangenome.h5", "w") as h5f:
+        assert read_partition_model(h5f) == {}
+        write_partition_model(pangenome, h5f)
+        partition_model = read_partition_model(h5f)
+        assert partition_model["genomes"].tolist() == [b"genome1", b"genome2"]
+        assert partition_model["centers"].tolist() == [[1, 1], [0, 1]]
+        assert np.isnan(partition_model["classification"][1]).all()
+        assert partition_model["iterations"] is None
+        pangenome.partition_model = {}
+        write_partition_model(pangenome, h5f)
+        assert read_partition_model(h5f) == {}
@@ -0,0 +1,97 @@
+import argparse
+
+import pytest
+import tables
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import get_family_edges, read_pangenome
+from ppanggolin.formats.subsetBinaries import write_subset_pangenome
+from ppanggolin.utility.utils import launch_subset, parser_default_config
+
+
+def gene_pairs(pangenome: Pangenome, organism_name: str) -> set:
+    """Get the gene pairs of the neighbors graph in a genome"""
+    organism = pangenome.get_organism(organism_name)
+    return {
+        frozenset((gene1.ID, gene2.ID))
+        for edge in pangenome.edges
+        for gene1, gene2 in edge.get_organisms_dict().get(organism, [])
+    }
+
+
+def test_subset_round_trip(pangenome, graph_file, tmp_path):
+    output = tmp_path / "subset.h5"
+    write_subset_pangenome(graph_file, output, ["organism_1"])
+
+    loaded = Pangenome()
+    loaded.add_file(output)
+    read_pangenome(
+        loaded, annotation=True, gene_families=True, graph=True, disable_bar=True
+    )
+    organism = pangenome.get_organism("organism_1")
+    assert [org.name for org in loaded.organisms] == ["organism_1"]
+    assert {gene.ID for gene in loaded.genes} == {gene.ID for gene in organism.genes}
+    assert {rna.ID for rna in loaded.RNAs} == {
+        rna.ID for contig in organism.contigs for rna in contig.RNAs
+    }
+    assert {family.name for family in loaded.gene_families} == {
+        gene.family.name for gene in organism.genes
+    }
+    assert gene_pairs(loaded, "organism_1") == gene_pairs(pangenome, "organism_1")
+
+    with tables.open_file(output, "a") as h5f:
+        assert not h5f.root.status._v_attrs.Partitioned
+        assert h5f.root.info._v_attrs.numberOfGenomes == 1
+        family_edges = get_family_edges(h5f)
+        assert h5f.root.info._v_attrs.numberOfEdges == len(family_edges)
+        h5f.remove_node("/", "familyEdges")
+        aggregated_family_edges = get_family_edges(h5f)
+    assert {
+        frozenset(families): counts for families, counts in family_edges.items()
+    } == {
+        frozenset(families): counts
+        for families, counts in aggregated_family_edges.items()
+    }
+
+
+def test_subset_drops_partitions_and_their_parameters(graph_file, tmp_path):
+    with tables.open_file(graph_file, "a") as h5f:
+        families = h5f.root.geneFamiliesInfo
+        families.modify_column(column=[b"P"] * families.nrows, colname="partition")
+        h5f.root.status._v_attrs.Partitioned = True
+        h5f.root.info._v_attrs.parameters = {
+            "cluster": {"identity": 0.8},
+            "partition": {"nb_of_partitions": 3},
+            "rgp": {"min_length": 3000},
+        }
+    output = tmp_path / "subset.h5"
+    write_subset_pangenome(graph_file, output, ["organism_1"])
+
+    with tables.open_file(output) as h5f:
+        assert set(h5f.root.geneFamiliesInfo.col("partition")) == {b""}
+        assert h5f.root.info._v_attrs.parameters == {"cluster": {"identity": 0.8}}
+
+
+def test_subset_with_unknown_genome(graph_file, tmp_path):
+    with pytest.raises(KeyError):
+        write_subset_pangenome(
+            graph_file, tmp_path / "subset.h5", ["organism_1", "unknown"]
+        )
+
+
+def test_launch_subset_creates_output_directory(graph_file, tmp_path):
+    output = tmp_path / "new" / "directory" / "subset.h5"
+    launch_subset(
+        argparse.Namespace(
+            pangenome=graph_file, output=output, subset="organism_1", force=False
+        )
+    )
+    assert output.is_file()
+
+
+def test_subset_and_default_config_are_exclusive(capsys):
+    parser = argparse.ArgumentParser()
+    parser_default_config(parser)
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--subset", "organism_1", "--default_config", "annotate"])
+    assert "not allowed with argument" in capsys.readouterr().err
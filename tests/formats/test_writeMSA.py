@@ -0,0 +1,19 @@
+import gc
+
+import pytest
+
+from ppanggolin.formats import writeMSA
+from ppanggolin.formats.writeMSA import compute_msa
+
+
+def test_compute_msa_unfreezes_gc_when_workers_fail(tmp_path, monkeypatch):
+    """The garbage collection is restored even if the worker pool fails"""
+
+    class FailingContext:
+        def Pool(self, *args, **kwargs):
+            raise OSError("no more processes")
+
+    monkeypatch.setattr(writeMSA, "get_context", lambda method: FailingContext())
+    with pytest.raises(OSError):
+        compute_msa(set(), tmp_path, tmp_path, cpu=2, disable_bar=True)
+    assert gc.get_freeze_count() == 0
@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+
+import pytest
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from ppanggolin.genome import Gene, Organism, Contig
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.edge import get_contig_gene_pairs
+from ppanggolin.graph.makeGraph import compute_neighbors_graph
+
+# families of the genes of each contig of each genome, with the contig circularity
+GENOMES = [
+    [([0, 1, 0, 2, 2], True), ([3, 1, 1, 4], False)],
+    [([4, 4, 4], True), ([2], True), ([], False), ([1, 0, 3, 0], False)],
+    [([4, 3, 4, 4, 2, 1], True)],
+]
+
+
+def get_edges(pangenome: Pangenome) -> Dict[Tuple[str, str], List[Tuple[str, str]]]:
+    """Get the gene pairs of each edge of the pangenome, by the names of the families of the edge"""
+    return {
+        tuple(sorted([edge.source.name, edge.target.name])): [
+            (gene.ID, prev.ID) for gene, prev in edge.gene_pairs
+        ]
+        for edge in pangenome.edges
+    }
+
+
+@pytest.fixture
+def pangenome() -> Pangenome:
+    """Generate a pangenome with gene families, circular contigs, an empty contig and fragments"""
+    pangenome = Pangenome()
+    families = [GeneFamily(index, f"family{index}") for index in range(5)]
+    for family in families:
+        pangenome.add_gene_family(family)
+    for organism_index, contigs in enumerate(GENOMES):
+        organism = Organism(f"organism{organism_index}")
+        pangenome.add_organism(organism)
+        for contig_index, (contig_families, is_circular) in enumerate(contigs):
+            contig = Contig(
+                organism_index * 10 + contig_index,
+                f"contig{organism_index}_{contig_index}",
+                is_circular=is_circular,
+            )
+            organism.add(contig)
+            for position, family in enumerate(contig_families):
+                gene = Gene(f"gene{organism_index}_{contig_index}_{position}")
+                gene.fill_annotations(
+                    start=position * 10 + 1,
+                    stop=position * 10 + 9,
+                    strand="+",
+                    position=position,
+                )
+                gene.fill_parents(organism, contig)
+                contig.add(gene)
+                families[family].add(gene)
+    pangenome.get_gene("gene0_1_2").is_fragment = True
+    pangenome.get_gene("gene2_0_3").is_fragment = True
+    pangenome.status["genomesAnnotated"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+    return pangenome
+
+
+def get_expected_edges(pangenome: Pangenome) -> Dict[Tuple[str, str], List]:
+    """Get the gene pairs of each edge from the neighbor gene pairs of the contigs, in order of appearance"""
+    edges = {}
+    for organism in pangenome.organisms:
+        for contig in organism.contigs:
+            for gene, prev in get_contig_gene_pairs(contig):
+                families = tuple(sorted([gene.family.name, prev.family.name]))
+                edges.setdefault(families, []).append((gene.ID, prev.ID))
+    return edges
+
+
+def test_compute_neighbors_graph(pangenome):
+    """Tests that the graph holds the neighbor gene pairs of the contigs, in the same order"""
+    compute_neighbors_graph(pangenome, disable_bar=True)
+    assert get_edges(pangenome) == get_expected_edges(pangenome)
+    assert pangenome.status["neighborsGraph"] == "Computed"
+
+
+def test_compute_neighbors_graph_with_removed_families(pangenome):
+    """Tests that the genes of the families with too many copies are skipped"""
+    compute_neighbors_graph(pangenome, remove_copy_number=3, disable_bar=True)
+    assert pangenome.get_gene_family("family4").removed
+    assert get_edges(pangenome) == get_expected_edges(pangenome)
+    assert pangenome.parameters["graph"]["remove_high_copy_number"] == 3
+
+
+def test_compute_compact_neighbors_graph(pangenome):
+    """Tests that compact edges count the gene pairs of each genome"""
+    compute_neighbors_graph(pangenome, disable_bar=True, compact=True)
+    expected = {
+        families: Counter(
+            pangenome.get_gene(gene_id).organism for gene_id, _ in gene_pairs
+        )
+        for families, gene_pairs in get_expected_edges(pangenome).items()
+    }
+    assert {
+        tuple(sorted([edge.source.name, edge.target.name])): Counter(
+            edge.get_organism_pair_counts()
+        )
+        for edge in pangenome.edges
+    } == expected
+    assert all(edge.is_compact for edge in pangenome.edges)
+
+
+def test_compute_neighbors_graph_without_families(pangenome):
+    """Tests that the graph cannot be computed if a gene has no gene family"""
+    organism = pangenome.get_organism("organism0")
+    contig = organism.get("contig0_0")
+    gene = Gene("gene_without_family")
+    gene.fill_annotations(start=101, stop=109, strand="+", position=5)
+    gene.fill_parents(organism, contig)
+    contig.add(gene)
+    pangenome.reset_indexes()
+    with pytest.raises(AttributeError):
+        compute_neighbors_graph(pangenome, disable_bar=True)
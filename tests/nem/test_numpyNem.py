@@ -0,0 +1,159 @@
+#! /usr/bin/env python3
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from ppanggolin.nem import numpyNem
+
+# 4 gene families present in all 4 genomes, then 4 present in a single genome
+PRESENCE = np.array([[1, 1, 1, 1]] * 4 + [[1, 0, 0, 0], [0, 1, 0, 0]] * 2)
+
+
+@pytest.fixture
+def chain() -> csr_matrix:
+    """Generate the neighbors of gene families linked as a chain"""
+    rows = np.arange(len(PRESENCE) - 1)
+    neighbors = csr_matrix(
+        (np.ones(len(rows)), (rows, rows + 1)), shape=(len(PRESENCE),) * 2
+    )
+    return neighbors + neighbors.T
+
+
+def test_init_parameters():
+    """Tests that the initial parameters are the ones written in the NEM parameter file"""
+    proportions, centers, dispersions = numpyNem.init_parameters(3, 2)
+    assert proportions.tolist() == pytest.approx([0.33, 0.33, 0.34])
+    assert centers.tolist() == [[1, 1], [0, 0], [0, 0]]
+    np.testing.assert_allclose(dispersions, [[0.25, 0.25], [0.5, 0.5], [0.25, 0.25]])
+
+
+def test_get_update_groups(chain):
+    """Tests that the update groups cover all the gene families, without neighbors in the same group"""
+    neighbors = chain.tolil()
+    neighbors[7, :] = 0
+    neighbors[:, 7] = 0
+    neighbors = neighbors.tocsr()
+    neighbors.eliminate_zeros()
+    groups = numpyNem.get_update_groups(neighbors)
+    assert groups[0].tolist() == [7]
+    assert sorted(np.concatenate(groups).tolist()) == list(range(len(PRESENCE)))
+    for group in groups:
+        assert neighbors[group][:, group].nnz == 0
+
+
+def test_normalize():
+    """Tests that probabilities sum to 1 in each block, a null block being spread equally"""
+    with np.errstate(divide="ignore"):
+        logits = np.log(
+            np.array([[1.0, 3.0, 1.0, 1.0, 2.0], [1.0, 1.0, 0.0, 0.0, 0.0]])
+        )
+        probabilities = numpyNem.normalize(logits, np.array([0, 2, 5]))
+    np.testing.assert_allclose(
+        probabilities, [[0.25, 0.75, 0.25, 0.25, 0.5], [0.5, 0.5, 1 / 3, 1 / 3, 1 / 3]]
+    )
+
+
+def test_estimate_parameters():
+    """Tests that the parameters are estimated from a hard classification as the median and the mean distance"""
+    classification = np.zeros((len(PRESENCE), 2))
+    classification[:4, 0] = 1
+    classification[4:, 1] = 1
+    proportions, centers, dispersions, empty = numpyNem.estimate_parameters(
+        PRESENCE.astype(float), classification, np.zeros((2, 4)), np.zeros((2, 4))
+    )
+    assert proportions.tolist() == [0.5, 0.5]
+    assert centers.tolist() == [[1, 1, 1, 1], [0.5, 0.5, 0, 0]]
+    np.testing.assert_allclose(dispersions, [[0] * 4, [0.25] * 4])
+    assert not empty.any()
+
+
+def test_estimate_parameters_with_an_empty_class():
+    """Tests that an empty class keeps its previous parameters"""
+    classification = np.zeros((len(PRESENCE), 2))
+    classification[:, 0] = 1
+    previous = np.full((2, 4), 0.3)
+    _, centers, dispersions, empty = numpyNem.estimate_parameters(
+        PRESENCE.astype(float), classification, previous, previous, True
+    )
+    assert empty.tolist() == [False, True]
+    assert centers[1].tolist() == [0.3] * 4
+    assert dispersions[1].tolist() == [0.3] * 4
+
+
+def test_log_densities():
+    """Tests the densities of the Bernoulli mixture, null when differing from a center without dispersion"""
+    densities = numpyNem.log_densities(
+        np.array([[1.0, 0.0], [1.0, 1.0]]),
+        np.array([0.5, 0.5]),
+        np.array([[1.0, 1.0], [0.0, 0.0]]),
+        np.array([[0.0, 0.0], [0.1, 0.1]]),
+    )
+    assert densities[0, 0] == -np.inf
+    assert densities[1, 0] == pytest.approx(np.log(0.5))
+    assert densities[0, 1] == pytest.approx(np.log(0.5 * 0.1 * 0.9))
+    assert densities[1, 1] == pytest.approx(np.log(0.5 * 0.1 * 0.1))
+
+
+def test_nem_without_smoothing(chain):
+    """Tests that without smoothing, the classification is the posterior probability of the mixture"""
+    (result,) = numpyNem.nem(PRESENCE, chain, [2], beta=0, dtype=np.float64)
+    densities = numpyNem.log_densities(
+        PRESENCE.astype(float),
+        result["proportions"],
+        result["centers"],
+        result["dispersions"],
+    )
+    expected = numpyNem.normalize(densities, np.array([0, 2]))
+    assert result["classification"] == pytest.approx(expected, abs=0.01)
+    assert result["converged"]
+    assert (result["classification"][:4, 0] > 0.9).all()
+
+
+def test_nem_batched(chain):
+    """Tests that classifications computed at once for several numbers of classes are the ones computed alone"""
+    batched = numpyNem.nem(PRESENCE, chain, [2, 3], beta=1)
+    for kval, result in zip([2, 3], batched):
+        (alone,) = numpyNem.nem(PRESENCE, chain, [kval], beta=1)
+        assert result["iterations"] == alone["iterations"]
+        assert result["classification"] == pytest.approx(alone["classification"])
+        assert result["M"] == pytest.approx(alone["M"])
+
+
+def test_nem_stops_on_empty_class(chain):
+    """Tests that a run stops as soon as a class is empty"""
+    parameters = [
+        (
+            np.array([0.5, 0.5, 0.0]),
+            np.array([[1] * 4, [0] * 4, [0] * 4]),
+            np.full((3, 4), 0.2),
+        )
+    ]
+    (result,) = numpyNem.nem(PRESENCE, chain, [3], parameters=parameters)
+    assert result["empty_class"]
+    assert not result["converged"]
+    assert result["iterations"] == 1
+
+
+def test_nem_with_fixed_gene_families(chain):
+    """Tests that the gene families not updated keep their initial classification"""
+    initial = np.zeros((len(PRESENCE), 2))
+    initial[:, 1] = 1
+    updated = np.arange(len(PRESENCE)) < 4
+    (result,) = numpyNem.nem(
+        PRESENCE,
+        chain,
+        [2],
+        beta=1,
+        initial_classification=[initial],
+        updated=updated,
+        dtype=np.float64,
+    )
+    assert result["classification"][~updated].tolist() == initial[~updated].tolist()
+    assert (result["classification"][updated, 0] > 0.9).all()
+
+
+def test_nem_with_fixed_gene_families_without_classification(chain):
+    """Tests that gene families cannot be left out of the updates without an initial classification"""
+    with pytest.raises(ValueError):
+        numpyNem.nem(PRESENCE, chain, [2], updated=np.ones(len(PRESENCE), dtype=bool))
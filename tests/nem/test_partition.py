@@ -0,0 +1,251 @@
+#! /usr/bin/env python3
+
+import numpy as np
+import pytest
+from typing import Generator, List
+
+from ppanggolin.genome import Gene, Organism, Contig
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.graph.makeGraph import compute_neighbors_graph
+from ppanggolin.nem import partition
+
+# families of the genes of the single linear contig of each genome
+GENOMES = [[0, 1, 2], [0, 1, 2, 3], [3, 1, 0]]
+
+
+def build_pangenome(genomes: List[List[int]], nb_families: int) -> Pangenome:
+    """Build a pangenome with the neighbors graph of single linear contigs of the given gene families"""
+    pangenome = Pangenome()
+    families = [GeneFamily(index, f"family{index}") for index in range(nb_families)]
+    for family in families:
+        pangenome.add_gene_family(family)
+    for organism_index, contig_families in enumerate(genomes):
+        organism = Organism(f"organism{organism_index}")
+        pangenome.add_organism(organism)
+        contig = Contig(organism_index, f"contig{organism_index}")
+        organism.add(contig)
+        for position, family in enumerate(contig_families):
+            gene = Gene(f"gene{organism_index}_{position}")
+            gene.fill_annotations(
+                start=position * 10 + 1,
+                stop=position * 10 + 9,
+                strand="+",
+                position=position,
+            )
+            gene.fill_parents(organism, contig)
+            contig.add(gene)
+            families[family].add(gene)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+    compute_neighbors_graph(pangenome, disable_bar=True)
+    return pangenome
+
+
+@pytest.fixture
+def pangenome() -> Generator[Pangenome, None, None]:
+    """Generate a pangenome with a neighbors graph, and share its arrays used to write the NEM input files"""
+    pangenome = build_pangenome(GENOMES, 4)
+    nem_arrays = partition.share_nem_arrays(pangenome)
+    yield pangenome
+    nem_arrays.unlink()
+
+
+@pytest.fixture
+def synthetic_pangenome() -> Generator[Pangenome, None, None]:
+    """Generate 20 genomes with persistent, shell and cloud gene families in a conserved order, and share its arrays"""
+    rng = np.random.default_rng(0)
+    frequencies = rng.choice([0.98, 0.5, 1 / 20], size=300, p=[0.3, 0.2, 0.5])
+    presence = rng.random((20, 300)) < frequencies
+    pangenome = build_pangenome(
+        [np.flatnonzero(genome).tolist() for genome in presence], 300
+    )
+    nem_arrays = partition.share_nem_arrays(pangenome)
+    yield pangenome
+    nem_arrays.unlink()
+
+
+def test_get_nem_input(pangenome):
+    """Tests that the NEM input holds the gene families of the sample with their neighbors in the sample"""
+    nem_input, edges_weight = partition.get_nem_input([0, 2], sm_degree=10)
+    assert nem_input["families"].tolist() == [0, 1, 2, 3]
+    assert nem_input["presence"].tolist() == [[1, 1], [1, 1], [1, 0], [0, 1]]
+    assert nem_input["neighbor_offsets"].tolist() == [0, 1, 4, 5, 6]
+    assert nem_input["neighbors"].tolist() == [1, 0, 2, 3, 1, 1]
+    assert nem_input["neighbor_coverages"].tolist() == [2, 2, 1, 1, 1, 1]
+    assert edges_weight == pytest.approx(4 / 2)
+
+
+def test_get_nem_input_with_max_degree(pangenome):
+    """Tests that the gene families with too many neighbors are left out of the smoothing process"""
+    nem_input, edges_weight = partition.get_nem_input([0, 2], sm_degree=3)
+    assert nem_input["neighbor_offsets"].tolist() == [0, 1, 1, 2, 3]
+    assert nem_input["neighbors"].tolist() == [1, 1, 1]
+    assert edges_weight == pytest.approx(2 / 2)
+
+
+def test_write_nem_input_files(pangenome, tmp_path):
+    """Tests that the NEM input files are written from the NEM input"""
+    edges_weight, number_of_families = partition.write_nem_input_files(
+        tmp_path / "nem", [0, 2], sm_degree=10
+    )
+    assert number_of_families == 4
+    assert edges_weight == pytest.approx(2)
+    assert (tmp_path / "nem/nem_file.dat").read_text() == "1\t1\n1\t1\n1\t0\n0\t1\n"
+    assert (tmp_path / "nem/nem_file.index").read_text() == (
+        "1\tfamily0\n2\tfamily1\n3\tfamily2\n4\tfamily3\n"
+    )
+    assert (tmp_path / "nem/nem_file.nei").read_text() == (
+        "1\n1\t1\t2\t1.0\n2\t3\t1\t3\t4\t1.0\t0.5\t0.5\n3\t1\t2\t0.5\n4\t1\t2\t0.5\n"
+    )
+    assert (tmp_path / "nem/nem_file.str").read_text() == "S\t4\t2\n"
+    assert (tmp_path / "nem/column_org_file").read_text() == (
+        '"organism0" "organism2"\n'
+    )
+
+
+def test_get_neighbors_matrix(pangenome):
+    """Tests that the neighbors matrix holds the weights written in the NEM neighbors file"""
+    nem_input, _ = partition.get_nem_input([0, 2], sm_degree=10)
+    neighbors = partition.get_neighbors_matrix(nem_input, 2)
+    assert neighbors.toarray().tolist() == [
+        [0, 1, 0, 0],
+        [1, 0, 0.5, 0.5],
+        [0, 0.5, 0, 0],
+        [0, 0.5, 0, 0],
+    ]
+
+
+def test_run_numpy_partitioning(pangenome):
+    """Tests that the NumPy partitioning gives a partition to each gene family of the sample"""
+    nem_input, _ = partition.get_nem_input([0, 1, 2], sm_degree=10)
+    ((partitions, parameters, log_likelihood),) = partition.run_numpy_partitioning(
+        nem_input, 3, beta=0, kvals=[2]
+    )
+    assert sorted(partitions) == [f"family{index}" for index in range(4)]
+    assert partitions["family0"] == partitions["family1"] == "P"
+    assert set(parameters) == {"persistent", "cloud"}
+    assert isinstance(log_likelihood, float)
+
+
+def test_get_class_vectors():
+    """Tests that partitions are turned into the classes they come from, gene families in doubt being spread"""
+    vectors = partition.get_class_vectors(
+        np.array([b"P", b"S1", b"S2", b"C", b"S_", b""]), 4
+    )
+    assert vectors[:5].tolist() == [
+        [1, 0, 0, 0],
+        [0, 1, 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1],
+        [0, 0.5, 0.5, 0],
+    ]
+    assert np.isnan(vectors[5]).all()
+
+
+@pytest.fixture
+def partition_model(pangenome) -> dict:
+    """Generate the partition model of a partitioning of the first 2 genomes"""
+    return partition.get_partition_model(
+        {"family0": "P", "family1": "P", "family2": "P", "family3": "C"},
+        partition.get_partition_parameters(
+            [0.75, 0.25], [[1, 1], [0, 0]], [[0.1, 0.2], [0.3, 0.4]]
+        ),
+        [0, 1],
+        iterations=4,
+    )
+
+
+def test_get_partition_model(partition_model):
+    """Tests that the partition model holds the partitioned genomes and the presence of the gene families in them"""
+    assert partition_model["genomes"].tolist() == [b"organism0", b"organism1"]
+    assert partition_model["partitions"].tolist() == [b"P", b"P", b"P", b"C"]
+    assert np.unpackbits(partition_model["presence"], axis=1, count=2).tolist() == [
+        [1, 1],
+        [1, 1],
+        [1, 1],
+        [0, 1],
+    ]
+    assert partition_model["centers"].tolist() == [[1, 1], [0, 0]]
+    assert partition_model["iterations"] == 4
+    assert "classification" not in partition_model
+
+
+def test_get_partition_model_with_classification(pangenome):
+    """Tests that the classification of the partitioned gene families is kept, NaN for the other ones"""
+    partition_model = partition.get_partition_model(
+        {"family0": "P", "family3": "C"},
+        partition.get_partition_parameters([0.5, 0.5], [[1], [0]], [[0.1], [0.2]]),
+        [2],
+        iterations=4,
+        classification=np.array([[0.9, 0.1], [0.2, 0.8]]),
+        families=np.array([0, 3]),
+    )
+    np.testing.assert_allclose(
+        partition_model["classification"][[0, 3]], [[0.9, 0.1], [0.2, 0.8]]
+    )
+    assert np.isnan(partition_model["classification"][[1, 2]]).all()
+
+
+def test_get_warm_start_with_added_genome(partition_model):
+    """Tests that only the gene families whose presence in an added genome differs from their partition center are
+    re-evaluated, with parameters estimated in the added genome"""
+    nem_input, _ = partition.get_nem_input([0, 1, 2], sm_degree=10)
+    warm_start = partition.get_warm_start(partition_model, nem_input, [0, 1, 2])
+    assert warm_start["updated"].tolist() == [False, False, True, False]
+    assert warm_start["initial_classification"][0].tolist() == [
+        [1, 0],
+        [1, 0],
+        [1, 0],
+        [0, 1],
+    ]
+    proportions, centers, dispersions = warm_start["parameters"][0]
+    assert proportions.tolist() == [0.75, 0.25]
+    assert centers.tolist() == [[1, 1, 1], [0, 0, 1]]
+    np.testing.assert_allclose(dispersions, [[0.1, 0.2, 0.15], [0.3, 0.4, 0.35]])
+
+
+def test_get_warm_start_with_lost_genome(partition_model):
+    """Tests that the gene families whose presence in a genome left out differs from their partition center are
+    re-evaluated"""
+    nem_input, _ = partition.get_nem_input([1], sm_degree=10)
+    warm_start = partition.get_warm_start(partition_model, nem_input, [1])
+    assert not warm_start["updated"].any()
+    partition_model["centers"][1, 0] = 1
+    warm_start = partition.get_warm_start(partition_model, nem_input, [1])
+    assert warm_start["updated"].tolist() == [False, False, False, True]
+    assert partition.get_warm_start(partition_model, nem_input, [2]) is None
+
+
+def test_partition_all_genomes_from_partition_model(partition_model, tmp_path):
+    """Tests that a NumPy partitioning started from a partition model keeps the partition of unchanged families"""
+    (partitions, _, _), new_model, nb_updated = partition.partition_all_genomes(
+        [0, 1, 2],
+        2,
+        tmp_path,
+        beta=0,
+        engine="numpy",
+        partition_model=partition_model,
+    )
+    assert nb_updated == 1
+    assert new_model["iterations"] >= 1
+    assert partitions["family0"] == "P"
+    assert partitions["family3"] == "C"
+    assert new_model["classification"].shape == (4, 2)
+
+
+def test_warm_start_takes_fewer_iterations(synthetic_pangenome, tmp_path):
+    """Tests that after adding genomes, starting from the former partitioning takes fewer iterations than starting
+    from the default parameters, for the same partitions"""
+    _, partition_model, _ = partition.partition_all_genomes(
+        list(range(15)), 3, tmp_path, engine="numpy"
+    )
+    (cold, _, _), cold_model, _ = partition.partition_all_genomes(
+        list(range(20)), 3, tmp_path, engine="numpy"
+    )
+    (warm, _, _), warm_model, nb_updated = partition.partition_all_genomes(
+        list(range(20)), 3, tmp_path, engine="numpy", partition_model=partition_model
+    )
+    assert nb_updated < len(warm) / 2
+    assert warm_model["iterations"] < cold_model["iterations"]
+    assert np.mean([warm[name] == cold[name] for name in cold]) > 0.95
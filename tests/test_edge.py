@@ -3,8 +3,8 @@
 import pytest
 from typing import Generator, Tuple
 
-from ppanggolin.genome import Gene, Organism
-from ppanggolin.edge import Edge
+from ppanggolin.genome import Gene, Organism, Contig
+from ppanggolin.edge import Edge, OrganismIndex, get_contig_gene_pairs
 from ppanggolin.geneFamily import GeneFamily
 
 
@@ -119,3 +119,104 @@ class TestEdge:
             edge.add_genes(gene1, gene2)
         with pytest.raises(ValueError):
             edge.add_genes(gene2, gene1)
+
+    def test_edge_add_gene_pairs(self, edge, genes_pair, organism):
+        """Tests that several gene pairs can be added at once to the edge"""
+        other_organism = Organism("other_organism")
+        gene3, gene4, gene5, gene6 = (Gene(f"gene{i}") for i in range(3, 7))
+        gene3.fill_parents(organism, None)
+        gene4.fill_parents(organism, None)
+        gene5.fill_parents(other_organism, None)
+        gene6.fill_parents(other_organism, None)
+        edge.add_gene_pairs([(gene3, gene4), (gene5, gene6)])
+        assert edge.get_organisms_dict() == {
+            organism: [genes_pair, (gene3, gene4)],
+            other_organism: [(gene5, gene6)],
+        }
+
+
+class TestCompactEdge:
+    @pytest.fixture
+    def contig(self) -> Generator[Contig, None, None]:
+        """Generate a circular contig with genes of three families, the last two genes in the same family"""
+        organism = Organism("organism")
+        contig = Contig(0, "contig", is_circular=True)
+        organism.add(contig)
+        families = [GeneFamily(i, f"family{i}") for i in range(3)]
+        for position, family in enumerate([0, 1, 0, 2, 2]):
+            gene = Gene(f"gene{position}")
+            gene.fill_annotations(
+                start=position * 10 + 1,
+                stop=position * 10 + 9,
+                strand="+",
+                position=position,
+            )
+            gene.fill_parents(organism, contig)
+            contig.add(gene)
+            families[family].add(gene)
+        yield contig
+
+    def test_get_contig_gene_pairs(self, contig):
+        """Tests that neighbor genes are paired, including the last and first genes of a circular contig"""
+        genes = list(contig.genes)
+        assert list(get_contig_gene_pairs(contig)) == [
+            (genes[1], genes[0]),
+            (genes[2], genes[1]),
+            (genes[3], genes[2]),
+            (genes[4], genes[3]),
+            (genes[0], genes[4]),
+        ]
+
+    def test_get_contig_gene_pairs_with_fragment(self, contig):
+        """Tests that consecutive genes of a family are not paired if one is a fragment"""
+        genes = list(contig.genes)
+        genes[4].is_fragment = True
+        assert (genes[4], genes[3]) not in list(get_contig_gene_pairs(contig))
+
+    def test_get_contig_gene_pairs_with_removed_family(self, contig):
+        """Tests that genes of removed families are skipped"""
+        genes = list(contig.genes)
+        genes[1].family.removed = True
+        assert list(get_contig_gene_pairs(contig)) == [
+            (genes[2], genes[0]),
+            (genes[3], genes[2]),
+            (genes[4], genes[3]),
+            (genes[0], genes[4]),
+        ]
+
+    def test_compact_edge(self, contig):
+        """Tests that a compact edge counts the gene pairs and finds them again on the contigs"""
+        genes = list(contig.genes)
+        organism_index = OrganismIndex()
+        edge = Edge(genes[1], genes[0], organism_index)
+        edge.add_genes(genes[2], genes[1])
+        assert edge.is_compact
+        assert list(edge.organisms) == [contig.organism]
+        assert edge.number_of_organisms == 1
+        assert edge.number_of_gene_pairs == 2
+        assert edge.get_organism_pair_counts() == {contig.organism: 2}
+        assert edge.gene_pairs == [(genes[1], genes[0]), (genes[2], genes[1])]
+        assert edge.get_organisms_dict() == {
+            contig.organism: [(genes[1], genes[0]), (genes[2], genes[1])]
+        }
+
+    def test_compact_edge_add_pair_count(self, contig):
+        """Tests that pair counts are summed by organism"""
+        genes = list(contig.genes)
+        other_organism = Organism("other_organism")
+        edge = Edge(genes[1], genes[0], OrganismIndex())
+        edge.add_pair_count(other_organism, 3)
+        edge.add_pair_count(contig.organism)
+        assert edge.get_organism_pair_counts() == {
+            contig.organism: 2,
+            other_organism: 3,
+        }
+
+    def test_add_pair_count_to_edge_not_compact(self, contig):
+        """Tests that pair counts cannot be given to an edge storing its gene pairs"""
+        genes = list(contig.genes)
+        edge = Edge(genes[1], genes[0])
+        assert not edge.is_compact
+        assert edge.get_organism_pair_counts() == {contig.organism: 1}
+        with pytest.raises(TypeError):
+            edge.add_pair_count(contig.organism)
@@ -57,6 +57,14 @@ class TestFeature:
         assert feature.name == "name"
         assert feature.local_identifier == "local_id"
 
+    def test_fill_annotations_shares_repeated_values(self, feature):
+        """Tests that repeated annotation values are shared between features"""
+        other_feature = Feature("other_id")
+        product = "".join(["shared", "_product"])
+        feature.fill_annotations(1, 10, "+", "gene_type", "name", "shared_product")
+        other_feature.fill_annotations(1, 10, "+", "gene_type", "name", product)
+        assert other_feature.product is feature.product
+
     def test_fill_annotations_type_error(self, feature):
         """Tests that 'fill_annotations' method raises a TypeError if attribute value is not with the correct type"""
         with pytest.raises(TypeError):
@@ -211,6 +219,13 @@ class TestGene:
         assert gene.is_partial is False
         assert gene._frame is None
 
+    def test_gene_has_no_instance_dict(self, gene):
+        """Tests that Gene attributes are stored in slots and no other attribute can be added"""
+        assert not hasattr(gene, "__dict__")
+        assert gene._metadata_getter is None
+        with pytest.raises(AttributeError):
+            gene.unknown_attribute = None
+
     def test_fill_annotations(self, gene):
         """Tests that Gene annotations can be filled with valid parameters"""
         gene.fill_annotations(start=1, stop=10, strand="+", position=10, genetic_code=4)
@@ -480,6 +495,43 @@ class TestContig:
             [gene1, gene2, gene3], key=lambda x: x.position
         )
 
+    def test_gene_arrays(self, genes, contig):
+        """Tests the arrays of the gene fields by position, and that they follow the genes and their families"""
+        gene1, gene2, gene3 = genes
+        contig.add(gene1)
+        contig.add(gene3)
+        assert contig.gene_starts.tolist() == [1, -1, 21]
+        assert contig.gene_stops.tolist() == [10, -1, 30]
+        assert contig.gene_families.tolist() == [-1, -1, -1]
+        contig.add(gene2)
+        gene2.fill_parents(contig=contig)
+        gene2.family = GeneFamily(4, "family")
+        assert contig.gene_starts.tolist() == [1, 11, 21]
+        assert contig.gene_families.tolist() == [-1, 4, -1]
+
+    def test_get_positions(self, contig):
+        """Tests the gene positions of a range, around a linear contig or a circular one"""
+        for position in range(5):
+            gene = Gene(f"gene_{position}")
+            gene.fill_annotations(
+                start=10 * position + 1,
+                stop=10 * position + 5,
+                strand="+",
+                position=position,
+            )
+            contig.add(gene)
+        assert contig.get_positions(-2, 3).tolist() == [0, 1, 2]
+        assert contig.get_window(3, 2, 2).tolist() == [1, 2, 3, 4]
+        assert contig.get_next_positions(3, 3).tolist() == [4]
+        assert contig.get_previous_positions(1, 3).tolist() == [0]
+        assert contig.get_positions_in_range(12, 31).tolist() == [1, 2, 3]
+        contig.is_circular = True
+        assert contig.get_positions(-2, 3).tolist() == [3, 4, 0, 1, 2]
+        assert contig.get_positions(3, 20).tolist() == [3, 4, 0, 1, 2]
+        assert contig.get_window(4, 1, 2).tolist() == [3, 4, 0, 1]
+        assert contig.get_next_positions(3, 10).tolist() == [4, 0, 1, 2]
+        assert contig.get_previous_positions(1, 3).tolist() == [0, 4, 3]
+
     def test_add_rna(self, contig):
         """Tests that an RNA can be added to the contig"""
         rna = RNA("test_rna")
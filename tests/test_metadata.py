@@ -130,3 +130,17 @@ class TestMetaFeatures:
         """Tests that an AssertionError is raised when metadata is not with type Metadata"""
         with pytest.raises(AssertionError):
             metafeatures.add_metadata("not_metadata")
+
+    def test_metadata_storage_is_created_on_first_metadata(self, metadata):
+        """Tests that the metadata storage is not created before a metadata is added"""
+        metafeatures = MetaFeatures()
+        assert not metafeatures.has_metadata()
+        assert list(metafeatures.sources) == []
+        assert metafeatures.get_metadata_by_source("source") is None
+        with pytest.raises(KeyError):
+            metafeatures.get_metadata("source", 1)
+        metafeatures.del_metadata_by_source("source")
+        assert metafeatures._metadata_getter is None
+        meta = next(iter(metadata))
+        metafeatures.add_metadata(meta)
+        assert metafeatures.get_metadata(meta.source, 1) == meta
@@ -47,6 +47,7 @@ class TestPangenome:
             "_region_getter": dict,
             "_spot_getter": dict,
             "_module_getter": dict,
+            "_gene_index": type(None),
             "status": dict,
             "parameters": dict,
         }
@@ -408,6 +409,52 @@ class TestPangenomeGene(TestPangenome):
         with pytest.raises(AssertionError):
             pangenome.get_gene(gene_id=4)
 
+    def test_gene_index(self, pangenome, organism_genes):
+        """Tests that the gene index gives the gene fields by gene id
+
+        :param pangenome: Pangenome object to test method
+        :param organism_genes: Method to get an organism object filled with genes
+        """
+        organism, genes = organism_genes
+        for contig in organism.contigs:
+            for gene in contig.genes:
+                gene.fill_parents(organism, contig)
+        pangenome.add_organism(organism)
+        family = GeneFamily(family_id=0, name="family")
+        pangenome.add_gene_family(family)
+        family_genes = sorted(genes, key=lambda gene: gene.ID)[::2]
+        for gene in family_genes:
+            family.add(gene)
+        gene_index = pangenome.gene_index
+        assert len(gene_index) == len(genes)
+        for gene in genes:
+            index = gene_index.get_index(gene.ID)
+            assert gene_index.get_gene(index) == gene
+            assert gene_index.position[index] == gene.position
+            assert gene_index.start[index] == gene.start
+            assert gene_index.contigs[gene_index.contig[index]] == gene.contig
+        assert {
+            gene_index.get_gene(index) for index in gene_index.family_genes(family)
+        } == set(family_genes)
+        assert len(gene_index.organism_genes(organism)) == len(genes)
+        for contig in organism.contigs:
+            assert [
+                gene_index.get_gene(index) for index in gene_index.contig_genes(contig)
+            ] == list(contig.genes)
+        assert gene_index.organisms == [organism]
+        assert gene_index.family_organisms(family).tolist() == [0]
+        assert gene_index.organism_families(organism).tolist() == [0]
+        assert gene_index.family_organism_counts().tolist() == [1]
+        assert gene_index.nbytes < 100 * len(genes)
+        assert pangenome.gene_index is gene_index
+        pangenome.reset_indexes()
+        assert pangenome.gene_index is not gene_index
+        gene_index = pangenome.gene_index
+        new_organism = Organism("new_organism")
+        pangenome.add_organism(new_organism)
+        assert pangenome.gene_index is not gene_index
+        assert len(pangenome.gene_index.organism_families(new_organism)) == 0
+
     def test_number_of_genes(self, pangenome, organism_genes):
         """Tests get number of genes in pangenome object
 
@@ -498,6 +545,65 @@ class TestPangenomeEdge(TestPangenome):
         assert isinstance(pangenome.number_of_edges, int)
         assert pangenome.number_of_edges == 1
 
+    @pytest.fixture
+    def graph(self, pangenome) -> Generator[Pangenome, None, None]:
+        """Generate a pangenome with three gene families linked by edges in two organisms
+
+        Families 0 and 1 are linked by two gene pairs in the first organism and one in the second,
+        families 1 and 2 are linked in the first organism, and family 2 is linked to itself in the second.
+        """
+        families = [GeneFamily(family_id=i, name=f"fam_{i}") for i in range(3)]
+        for family in families:
+            pangenome.add_gene_family(family)
+        genes = {}
+        for organism_name, gene_families in [
+            ("org_0", [0, 1, 0, 1, 2]),
+            ("org_1", [0, 1, 2, 2]),
+        ]:
+            organism = Organism(organism_name)
+            contig = Contig(0, name=f"ctg_{organism_name}")
+            for position, family in enumerate(gene_families):
+                gene = Gene(gene_id=f"{organism_name}_gene_{position}")
+                gene.fill_parents(organism, contig)
+                families[family].add(gene)
+                genes[organism_name, position] = gene
+        for organism_name, gene, prev in [
+            ("org_0", 1, 0),
+            ("org_0", 3, 2),
+            ("org_0", 4, 3),
+            ("org_1", 1, 0),
+            ("org_1", 3, 2),
+        ]:
+            pangenome.add_edge(genes[organism_name, gene], genes[organism_name, prev])
+        yield pangenome
+
+    @pytest.mark.parametrize(
+        "weight, expected",
+        [
+            ("genomes", [[0, 2, 0], [2, 0, 1], [0, 1, 1]]),
+            ("gene_pairs", [[0, 3, 0], [3, 0, 1], [0, 1, 1]]),
+            ("binary", [[0, 1, 0], [1, 0, 1], [0, 1, 1]]),
+        ],
+    )
+    def test_to_sparse_graph(self, graph, weight, expected):
+        """Tests that the graph is given as a symmetric adjacency matrix of the gene families
+
+        :param graph: Pangenome object with edges
+        :param weight: Weight of the edges
+        :param expected: Expected dense matrix, in the order of the gene families
+        """
+        matrix = graph.to_sparse_graph(weight=weight)
+        assert matrix.format == "csr"
+        assert matrix.toarray().tolist() == expected
+
+    def test_to_sparse_graph_with_unknown_weight(self, graph):
+        """Tests that a ValueError is raised if the weight of the edges is unknown
+
+        :param graph: Pangenome object with edges
+        """
+        with pytest.raises(ValueError):
+            graph.to_sparse_graph(weight="unknown")
+
 
 class TestPangenomeBinary(TestPangenomeOrganism, TestPangenomeGeneFamilies):
     """This class tests methods in pangenome class associated to binary methods."""
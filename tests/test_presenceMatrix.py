@@ -0,0 +1,136 @@
+#! /usr/bin/env python3
+
+import pytest
+from typing import Generator, Tuple, List
+
+import numpy as np
+
+from ppanggolin.genome import Gene, Organism
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.presenceMatrix import PresenceMatrix
+
+# genomes of each family, by genome index, with the family partition
+FAMILY_GENOMES = [
+    ([0, 1, 2, 3, 4, 5, 6, 7, 8], "P"),
+    ([0, 1, 2, 3, 4, 5, 6, 7], "P"),
+    ([1, 3, 8], "S1"),
+    ([2], "C"),
+]
+
+
+class TestPresenceMatrix:
+    @pytest.fixture
+    def pangenome(
+        self,
+    ) -> Generator[Tuple[Pangenome, List[GeneFamily], List[Organism]], None, None]:
+        """Generate a pangenome with nine genomes, so that the rows span two bytes, and four families"""
+        pangenome = Pangenome()
+        organisms = [Organism(f"organism_{index}") for index in range(9)]
+        for organism in organisms:
+            pangenome.add_organism(organism)
+        families = []
+        for family_id, (genomes, partition) in enumerate(FAMILY_GENOMES):
+            family = GeneFamily(family_id, f"family_{family_id}")
+            family.partition = partition
+            for index in genomes:
+                gene = Gene(f"gene_{family_id}_{index}")
+                gene.fill_parents(organisms[index], None)
+                family.add(gene)
+            pangenome.add_gene_family(family)
+            families.append(family)
+        yield pangenome, families, organisms
+
+    def test_cstr(self, pangenome):
+        """Tests that the matrix holds the presence of the families in the genomes"""
+        pangenome, families, organisms = pangenome
+        presence_matrix = pangenome.presence_matrix
+        assert presence_matrix.shape == (4, 9)
+        assert presence_matrix.packed.shape == (4, 2)
+        assert presence_matrix.families == families
+        assert presence_matrix.organisms == organisms
+        expected = np.zeros((4, 9), dtype=bool)
+        for row, (genomes, _) in enumerate(FAMILY_GENOMES):
+            expected[row, genomes] = True
+        assert np.array_equal(presence_matrix.to_dense(), expected)
+        assert np.array_equal(presence_matrix.to_sparse().toarray(), expected)
+        assert pangenome.presence_matrix is presence_matrix
+
+    def test_reset_when_organism_is_added(self, pangenome):
+        """Tests that the matrix of the pangenome is built again when a genome is added"""
+        pangenome, _, _ = pangenome
+        presence_matrix = pangenome.presence_matrix
+        pangenome.add_organism(Organism("new_organism"))
+        assert pangenome.presence_matrix is not presence_matrix
+        assert pangenome.presence_matrix.shape == (4, 10)
+
+    def test_partition_mask(self, pangenome):
+        """Tests the gene families selected by partition subset"""
+        pangenome, _, _ = pangenome
+        presence_matrix = pangenome.presence_matrix
+        assert presence_matrix.partition_mask().tolist() == [True] * 4
+        assert presence_matrix.partition_mask("persistent").tolist() == [
+            True,
+            True,
+            False,
+            False,
+        ]
+        assert presence_matrix.partition_mask("accessory").tolist() == [
+            False,
+            False,
+            True,
+            True,
+        ]
+        assert presence_matrix.partition_mask("shell") is (
+            presence_matrix.partition_mask("shell")
+        )
+        with pytest.raises(ValueError):
+            presence_matrix.partition_mask("unknown")
+
+    def test_partition_mask_without_partition(self, pangenome):
+        """Tests that the partition subsets cannot be used if the families are not partitioned"""
+        pangenome, families, _ = pangenome
+        families[0].partition = ""
+        with pytest.raises(ValueError):
+            PresenceMatrix(families, pangenome.organisms).partition_mask("cloud")
+
+    def test_counts(self, pangenome):
+        """Tests the number of genomes of the families and of families of the genomes"""
+        pangenome, _, organisms = pangenome
+        presence_matrix = pangenome.presence_matrix
+        assert presence_matrix.family_counts().tolist() == [9, 8, 3, 1]
+        assert presence_matrix.family_counts("accessory").tolist() == [3, 1]
+        assert presence_matrix.family_counts(
+            organisms=[organisms[1], organisms[8]]
+        ).tolist() == [2, 1, 2, 0]
+        assert presence_matrix.organism_counts().tolist() == [2, 3, 3, 3, 2, 2, 2, 2, 2]
+        assert presence_matrix.organism_counts("persistent").tolist() == [2] * 8 + [1]
+
+    def test_intersections(self, pangenome):
+        """Tests the number of genomes shared by the families and of families shared by the genomes"""
+        pangenome, _, _ = pangenome
+        presence_matrix = pangenome.presence_matrix
+        dense = presence_matrix.to_dense().astype(int)
+        assert np.array_equal(presence_matrix.family_intersections(), dense @ dense.T)
+        assert np.array_equal(presence_matrix.organism_intersections(), dense.T @ dense)
+        assert presence_matrix.family_intersections("accessory").tolist() == [
+            [3, 0],
+            [0, 1],
+        ]
+
+    def test_subset(self, pangenome):
+        """Tests that the matrix can be restricted to some families and a genome sample"""
+        pangenome, families, organisms = pangenome
+        subset = pangenome.presence_matrix.subset(
+            families=[families[3], families[2]], organisms=[organisms[8], organisms[2]]
+        )
+        assert subset.families == [families[3], families[2]]
+        assert subset.organisms == [organisms[8], organisms[2]]
+        assert subset.to_dense().tolist() == [[False, True], [True, False]]
+        assert subset.partition_mask("cloud").tolist() == [True, False]
+
+    def test_core_families(self, pangenome):
+        """Tests the soft and exact core families of the pangenome"""
+        pangenome, families, _ = pangenome
+        assert pangenome.exact_core_families() == {families[0]}
+        assert pangenome.soft_core_families(0.85) == {families[0], families[1]}
@@ -553,6 +553,39 @@ class TestRegion:
         borders = region.get_bordering_genes(1, {})
         assert borders == [[genes[8]], [genes[2]]]
 
+    def test_get_bordering_genes_around_circular_contig(self, region):
+        """
+        Test borders of several genes for a region near the start of a circular contig of 10 genes.
+        Add gene from 1 to 3. Left border goes around the contig without taking a gene twice.
+        """
+
+        contig = Contig(0, "contig_name", is_circular=True)
+        contig.length = 200
+
+        family = GeneFamily(1, "test")
+        family.partition = "Persistent"
+
+        genes = []
+        for i in range(0, 10):
+            gene = Gene(f"gene_{str(i)}")
+            gene.fill_annotations(
+                start=10 * i + 1,
+                stop=10 * (i + 1),
+                strand="+",
+                position=i,
+                genetic_code=4,
+            )
+            gene.fill_parents(contig=contig)
+            gene.family = family
+            contig.add(gene)
+            genes.append(gene)
+
+        for gene in genes[1:4]:
+            region.add(gene)
+
+        borders = region.get_bordering_genes(3, {})
+        assert borders == [[genes[0], genes[9], genes[8]], genes[4:7]]
+
     def test_get_bordering_genes_whole_contig(self, region):
         """
         Test border of a region that cover all the contig. Expect no border
@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+
+import pytest
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from ppanggolin.sharedArrays import SharedArrays
+
+
+def sum_shared_array(args):
+    """Attach to shared arrays in a worker and sum one of them"""
+    descriptor, key = args
+    arrays = SharedArrays.attach(descriptor)
+    total = int(arrays[key].sum())
+    arrays.close()
+    return total
+
+
+class TestSharedArrays:
+    @pytest.fixture
+    def arrays(self):
+        """Generate arrays of several types and shapes"""
+        return {
+            "matrix": np.arange(12, dtype=np.uint8).reshape(3, 4),
+            "names": np.array([b"family_1", b"fam_2"], dtype=bytes),
+            "empty": np.array([], dtype=np.int64),
+            "counts": np.array([3, 1, 2], dtype=np.int64),
+        }
+
+    def test_cstr(self, arrays):
+        """Tests that the arrays are copied in the shared memory"""
+        shared = SharedArrays(arrays)
+        assert list(shared) == list(arrays)
+        for key, array in arrays.items():
+            assert shared[key].dtype == array.dtype
+            assert np.array_equal(shared[key], array)
+        assert "matrix" in shared
+        shared.unlink()
+
+    def test_cstr_without_arrays_nor_descriptor(self):
+        """Tests that either arrays or a descriptor must be given"""
+        with pytest.raises(ValueError):
+            SharedArrays()
+
+    def test_attach(self, arrays):
+        """Tests that the arrays attached to are views over the same memory"""
+        shared = SharedArrays(arrays)
+        attached = SharedArrays.attach(shared.descriptor)
+        shared["counts"][0] = 10
+        assert attached["counts"].tolist() == [10, 1, 2]
+        assert attached["names"].tolist() == [b"family_1", b"fam_2"]
+        attached.close()
+        shared.unlink()
+
+    def test_attach_in_workers(self, arrays):
+        """Tests that forked workers read the arrays and do not free the shared memory"""
+        shared = SharedArrays(arrays)
+        with get_context("fork").Pool(processes=2) as pool:
+            totals = pool.map(
+                sum_shared_array,
+                [(shared.descriptor, "matrix"), (shared.descriptor, "counts")],
+            )
+        assert totals == [66, 6]
+        assert shared["counts"].tolist() == [3, 1, 2]
+        shared.unlink()
+
+    def test_unlink(self, arrays):
+        """Tests that the shared memory is freed"""
+        shared = SharedArrays(arrays)
+        name = shared.descriptor[0]
+        shared.unlink()
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
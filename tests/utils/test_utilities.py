@@ -13,6 +13,7 @@ from ppanggolin.utils import (
     write_compressed_or_not,
     has_non_ascii,
     replace_non_ascii,
+    CategoricalValues,
 )
 
 
@@ -197,3 +198,13 @@ def test_has_non_ascii(input_string, expected):
 )
 def test_replace_non_ascii(input_string, replacement, expected):
     assert replace_non_ascii(input_string, replacement) == expected
+
+
+def test_categorical_values():
+    categories = CategoricalValues()
+    product = "".join(["hypothetical", " protein"])
+    assert categories.encode("hypothetical protein") == 0
+    assert categories.encode("transposase") == 1
+    assert categories.intern(product) is categories.decode(0)
+    assert product is not categories.decode(0)
+    assert len(categories) == 2